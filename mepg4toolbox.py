@@ -3,7 +3,13 @@ import os
 import configparser
 from PyQt5.QtWidgets import QApplication, QWizard
 from modules import (MediaToolSettingsPage, TaskSelectionPage, MediaInfoPage,
-                    MediaTagManagementPage)
+                    MediaTagManagementPage, CatalogPage)
+from modules.resources import apply_config
+from modules.utils import get_default_temp_dir
+from modules.profiling import start_session, finish_session, profile_section, profile_dir
+
+# 設定ファイルのパス（GUIとコマンドラインで共通）
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "mpeg4toolbox.ini")
 
 class Mpeg4Wizard(QWizard):
     def __init__(self):
@@ -18,7 +24,7 @@ class Mpeg4Wizard(QWizard):
 
         # 設定ファイルの読み込み
         self.config = configparser.ConfigParser()
-        self.config_path = os.path.join(os.path.dirname(__file__), "mpeg4toolbox.ini")
+        self.config_path = CONFIG_PATH
         self.load_config()
 
         # ページの追加
@@ -26,12 +32,14 @@ class Mpeg4Wizard(QWizard):
         self.media_tool_settings_page = MediaToolSettingsPage()
         self.media_info_page = MediaInfoPage()
         self.subtitle_management_page = MediaTagManagementPage()
+        self.catalog_page = CatalogPage()
 
         # ページIDを保存
         self.task_selection_page_id = self.addPage(self.task_selection_page)
         self.media_tool_settings_page_id = self.addPage(self.media_tool_settings_page)
         self.media_info_page_id = self.addPage(self.media_info_page)
         self.subtitle_management_page_id = self.addPage(self.subtitle_management_page)
+        self.catalog_page_id = self.addPage(self.catalog_page)
 
         # サイズの設定
         self.resize(800, 600)
@@ -46,11 +54,17 @@ class Mpeg4Wizard(QWizard):
         # 最初のページを設定
         self.setStartId(self.task_selection_page_id)
 
+    def initializePage(self, page_id):
+        """ページの初期化（プロファイルモードではページごとの区間として計測）"""
+        with profile_section(f"initializePage:{type(self.page(page_id)).__name__}"):
+            super().initializePage(page_id)
+
     def load_config(self):
         """設定ファイルを読み込む"""
         self.config.read(self.config_path)
         if not self.config.has_section("Settings"):
             self.config.add_section("Settings")
+        apply_config(self.config)
 
     def save_config(self):
         """設定ファイルを保存する"""
@@ -89,7 +103,7 @@ class Mpeg4Wizard(QWizard):
                 QWizard.NextButton,
                 QWizard.CancelButton
             ])
-        elif current_page == self.media_info_page:
+        elif current_page == self.media_info_page or current_page == self.catalog_page:
             self.setButtonLayout([
                 QWizard.BackButton,
                 QWizard.Stretch,
@@ -110,11 +124,40 @@ class Mpeg4Wizard(QWizard):
                 QWizard.CancelButton
             ])
 
+def gui_profile_dir(argv):
+    """引数がプロファイルの指定（--profile [--profile-dir DIR]）だけならGUIのプロファイルの出力先を返す
+
+    それ以外の引数がある場合はNone（コマンドラインモード）、出力先の省略時は空文字列を返す。
+    """
+    if not argv or argv[0] != "--profile":
+        return None
+    if len(argv) == 1:
+        return ""
+    if len(argv) == 3 and argv[1] == "--profile-dir":
+        return argv[2]
+    return None
+
 def main():
+    # プロファイルの指定だけの場合はGUIを計測しながら起動
+    output_dir = gui_profile_dir(sys.argv[1:])
+    # 引数が指定された場合はGUIを起動せずにコマンドラインモードで実行
+    if len(sys.argv) > 1 and output_dir is None:
+        from modules.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:], CONFIG_PATH))
+
     app = QApplication(sys.argv)
-    wizard = Mpeg4Wizard()
+    if output_dir is not None:
+        config = configparser.ConfigParser()
+        config.read(CONFIG_PATH)
+        temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+        start_session(output_dir or profile_dir(config, temp_dir))
+    with profile_section("Mpeg4Wizard.__init__"):
+        wizard = Mpeg4Wizard()
     wizard.show()
-    sys.exit(app.exec_())
+    returncode = app.exec_()
+    if output_dir is not None:
+        print(f"プロファイルを出力しました: {finish_session()}")
+    sys.exit(returncode)
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,7 @@ from .settings_page import MediaToolSettingsPage
 from .task_page import TaskSelectionPage
 from .media_info_page import MediaInfoPage
 from .subtitle_page import MediaTagManagementPage
+from .catalog_page import CatalogPage
 
 __all__ = [
     'LANGUAGES',
@@ -13,5 +14,6 @@ __all__ = [
     'MediaToolSettingsPage',
     'TaskSelectionPage',
     'MediaInfoPage',
-    'MediaTagManagementPage'
+    'MediaTagManagementPage',
+    'CatalogPage'
 ]
@@ -0,0 +1,90 @@
+import asyncio
+from .resources import create_subprocess, async_device_slots
+from .core import (ToolError, build_probe_args, parse_probe_output, build_extract_args, stage_subtitles,
+                   remove_files, check_result, partial_output_path, commit_output)
+from .mux_backend import get_mux_backend
+from .verify import mux_checker, count_input_tracks, DEFAULT_SPOT_CHECK_SAMPLES
+from .webvtt import package_subtitles
+
+class AsyncToolRunner:
+    """asyncioで外部ツールを実行するランナー（同時実行数・タイムアウト・キャンセル対応）
+
+    toolsはcore.get_tool_pathsの戻り値と同じ形式の辞書。
+    core.run_commandと同じリソースの方針（優先度・cgroup・デバイスごとの同時実行数）を適用する。
+    タスクがキャンセルされたりタイムアウトした場合は子プロセスを強制終了する。
+    """
+
+    def __init__(self, tools, max_concurrency=2, timeout=None):
+        self.tools = tools
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, args, timeout=None):
+        """外部コマンドを実行し、(終了コード, 標準出力, エラー出力)を返す"""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore, async_device_slots(args):
+            process = await create_subprocess(
+                args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise ToolError(f"タイムアウトしました ({timeout}秒): {args[0]}")
+            except asyncio.CancelledError:
+                await self._kill(process)
+                raise
+            return (process.returncode,
+                    stdout.decode('utf-8', errors='replace'),
+                    stderr.decode('utf-8', errors='replace'))
+
+    async def _kill(self, process):
+        """子プロセスを強制終了して回収"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def probe(self, file_path, timeout=None):
+        """メディア情報を取得（ffmpeg.probeと同じ形式の辞書を返す）"""
+        args = build_probe_args(self.tools.get('ffprobe', 'ffprobe'), file_path)
+        returncode, stdout, stderr = await self.run(args, timeout)
+        check_result("ffprobe", returncode, stdout, stderr)
+        return parse_probe_output(stdout)
+
+    async def mux(self, job, temp_dir, timeout=None, verify=True, spot_check_samples=DEFAULT_SPOT_CHECK_SAMPLES):
+        """字幕とタグを設定してジョブのバックエンドで出力（jobの形式はcore.build_mux_argsを参照）
+
+        mux_backend.muxと同じく出力先と同じディレクトリの一時ファイルに書き込み、確認してから置き換える
+        （タイムアウトやキャンセルで中断しても出力先は壊れない）。
+        """
+        backend = get_mux_backend(job)
+        executable = backend.executable(self.tools)
+        # ファイルの読み書き（トラック数の取得・字幕のコピー・検証・置き換え）はイベントループを止めないよう別スレッドで行う
+        if 'input_track_count' not in job:
+            input_track_count = await asyncio.to_thread(count_input_tracks, job['input_file'])
+            if input_track_count is not None:
+                job = dict(job, input_track_count=input_track_count)
+        check = mux_checker(job, spot_check_samples) if verify else backend.check_structure
+        temp_output = partial_output_path(job['output_file'])
+        staged_paths = await asyncio.to_thread(stage_subtitles, job, temp_dir)
+        try:
+            args = backend.build_args(executable, dict(job, output_file=temp_output), staged_paths)
+            returncode, stdout, stderr = await self.run(args, timeout)
+            backend.check_result(returncode, stdout, stderr, temp_output)
+            await asyncio.to_thread(commit_output, temp_output, job['output_file'], check)
+            if job.get('webvtt') is not None:
+                await asyncio.to_thread(package_subtitles, job, staged_paths[:len(job.get('subtitles', []))],
+                                        **job['webvtt'])
+        finally:
+            remove_files(staged_paths + [temp_output])
+
+    async def extract(self, input_file, stream_index, output_file, timeout=None):
+        """字幕ストリームを抽出"""
+        args = build_extract_args(self.tools, input_file, stream_index, output_file)
+        returncode, stdout, stderr = await self.run(args, timeout)
+        check_result("抽出ツール", returncode, stdout, stderr, output_file)
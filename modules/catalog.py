@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from .core import MEDIA_EXTENSIONS
+from .isobmff import parse_movie, BoxError
+from .ebml import probe_matroska, EbmlError
+from .strip import TRACK_KINDS
+
+# 一覧に表示する列（列名, 見出し）。すべての列に索引を作り、並べ替えはデータベースで行う
+CATALOG_COLUMNS = [
+    ('name', "ファイル名"),
+    ('duration', "時間"),
+    ('size', "サイズ"),
+    ('video_codec', "映像"),
+    ('pixels', "解像度"),
+    ('audio_count', "音声"),
+    ('subtitle_count', "字幕"),
+    ('languages', "言語"),
+    ('mtime', "更新日時"),
+]
+SORT_KEYS = [column for column, _ in CATALOG_COLUMNS]
+# 一覧の行に含める値（詳細は別のテーブルに置き、選択されたときだけ読み込む）
+ROW_FIELDS = ['id', 'path', 'name', 'duration', 'size', 'video_codec', 'width', 'height',
+              'pixels', 'audio_count', 'subtitle_count', 'languages', 'mtime', 'error']
+
+# 一度に読み込む行数の既定値
+DEFAULT_PAGE_SIZE = 500
+# 同時に解析するファイル数の既定値
+DEFAULT_CATALOG_WORKERS = 8
+# 1回のトランザクションで書き込むファイル数
+SCAN_BATCH_SIZE = 500
+
+# MP4のサンプルエントリからffprobeのコーデック名への対応
+CODEC_NAMES = {
+    'avc1': 'h264', 'avc3': 'h264', 'hvc1': 'hevc', 'hev1': 'hevc', 'av01': 'av1', 'vp09': 'vp9',
+    'mp4a': 'aac', 'ac-3': 'ac3', 'ec-3': 'eac3', 'Opus': 'opus', 'fLaC': 'flac',
+    'tx3g': 'mov_text', 'wvtt': 'webvtt', 'stpp': 'ttml',
+}
+# hdlrのハンドラータイプからトラックの種類への対応
+HANDLER_KINDS = {handler: kind for kind, handlers in TRACK_KINDS.items() for handler in handlers}
+
+class CatalogError(Exception):
+    """カタログのデータベースを操作できないときの例外"""
+
+def _mp4_tracks(file_path):
+    """MP4ファイルのmoovから(長さ, トラックの一覧)を取得"""
+    movie = parse_movie(file_path)
+    duration = movie['duration'] / movie['timescale'] if movie['timescale'] else None
+    tracks = []
+    for track in movie['tracks']:
+        tracks.append({
+            'id': track['track_id'],
+            'kind': HANDLER_KINDS.get(track.get('handler'), track.get('handler')),
+            'codec': CODEC_NAMES.get(track['codec'], track['codec']),
+            'language': track.get('extended_language') or track.get('language', 'und'),
+            'title': track.get('name', ''),
+            'default': track['enabled'],
+            'forced': False,
+            'width': track['width'],
+            'height': track['height'],
+        })
+    return duration, tracks
+
+def _mkv_tracks(file_path):
+    """MKVファイルのヘッダーから(長さ, トラックの一覧)を取得"""
+    probe = probe_matroska(file_path)
+    duration = probe['format'].get('duration')
+    tracks = []
+    for stream in probe['streams']:
+        tracks.append({
+            'id': stream['index'],
+            'kind': stream['codec_type'],
+            'codec': stream['codec_name'],
+            'language': stream['tags'].get('language_ietf') or stream['tags'].get('language', 'und'),
+            'title': stream['tags'].get('title', ''),
+            'default': bool(stream['disposition']['default']),
+            'forced': bool(stream['disposition']['forced']),
+            'width': stream.get('width', 0),
+            'height': stream.get('height', 0),
+        })
+    return float(duration) if duration is not None else None, tracks
+
+def probe_entry(file_path, size, mtime):
+    """ファイルのヘッダーだけを読み、一覧の値とトラックの詳細を作成
+
+    外部ツールは起動しないため、大量のファイルでも短時間で解析できる。
+    読み取れないファイルはerrorに理由を入れて登録する。
+    """
+    entry = {
+        'path': file_path, 'name': os.path.basename(file_path), 'size': size, 'mtime': mtime,
+        'duration': 0.0, 'video_codec': '', 'width': 0, 'height': 0, 'pixels': 0,
+        'audio_count': 0, 'subtitle_count': 0, 'languages': '', 'error': None, 'tracks': []
+    }
+    try:
+        if os.path.splitext(file_path)[1].lower() == '.mkv':
+            duration, tracks = _mkv_tracks(file_path)
+        else:
+            duration, tracks = _mp4_tracks(file_path)
+    except (OSError, BoxError, EbmlError, ValueError) as e:
+        entry['error'] = str(e)
+        return entry
+
+    video = next((track for track in tracks if track['kind'] == 'video'), None)
+    languages = []
+    for track in tracks:
+        if track['kind'] in ('audio', 'subtitle') and track['language'] not in languages:
+            languages.append(track['language'])
+    entry.update(
+        duration=duration or 0.0,
+        video_codec=video['codec'] if video else '',
+        width=video['width'] if video else 0,
+        height=video['height'] if video else 0,
+        pixels=video['width'] * video['height'] if video else 0,
+        audio_count=sum(1 for track in tracks if track['kind'] == 'audio'),
+        subtitle_count=sum(1 for track in tracks if track['kind'] == 'subtitle'),
+        languages=','.join(languages),
+        tracks=tracks)
+    return entry
+
+def _like_pattern(text):
+    """部分一致のLIKEのパターンを作成（%と_はそのままの文字として扱う）"""
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+class CatalogStore:
+    """解析結果を保存するSQLiteのカタログ
+
+    一覧の値（filesテーブル）とトラックの詳細（detailsテーブル）を分け、並べ替えに使う列には
+    (列, id)の索引を作る。一覧はキーセット方式で少しずつ取得するため、件数が多くても
+    OFFSETで読み飛ばす処理は発生しない。
+    """
+
+    def __init__(self, db_path, timeout=30):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            # 解析中も一覧を読めるようにWALモードを使う（カタログはローカルの作業ディレクトリに置く）
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    duration REAL NOT NULL,
+                    video_codec TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    pixels INTEGER NOT NULL,
+                    audio_count INTEGER NOT NULL,
+                    subtitle_count INTEGER NOT NULL,
+                    languages TEXT NOT NULL,
+                    error TEXT,
+                    scanned REAL NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS details (
+                    file_id INTEGER PRIMARY KEY REFERENCES files (id) ON DELETE CASCADE,
+                    tracks TEXT NOT NULL
+                )""")
+            for column in SORT_KEYS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS files_{column} ON files ({column}, id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _where(self, text):
+        """絞り込みの条件（ファイル名または言語の部分一致）と引数を作成"""
+        if not text:
+            return "", []
+        pattern = _like_pattern(text)
+        return "(name LIKE ? ESCAPE '\\' OR languages LIKE ? ESCAPE '\\')", [pattern, pattern]
+
+    def count(self, text=''):
+        """絞り込み後のファイル数を取得"""
+        where, params = self._where(text)
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM files{' WHERE ' + where if where else ''}",
+                                params).fetchone()[0]
+
+    def page(self, sort_key='name', descending=False, text='', after=None, limit=DEFAULT_PAGE_SIZE):
+        """並べ替えと絞り込みをした一覧の続きを取得
+
+        afterには前回取得した最後の行の(並べ替えの列の値, id)を指定する。
+        ROW_FIELDSの順の値のタプルのリストを返す。
+        """
+        if sort_key not in SORT_KEYS:
+            raise CatalogError(f"並べ替えられない列です: {sort_key}")
+        conditions = []
+        where, params = self._where(text)
+        if where:
+            conditions.append(where)
+        if after is not None:
+            conditions.append(f"({sort_key}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        order = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(ROW_FIELDS)} FROM files"
+               f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+               f" ORDER BY {sort_key} {order}, id {order} LIMIT ?")
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params + [limit]).fetchall()
+
+    def paths(self, text=''):
+        """絞り込み後のファイルのパスをファイル名の順に取得"""
+        where, params = self._where(text)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT path FROM files{' WHERE ' + where if where else ''} ORDER BY name, id",
+                                params)
+            return [row[0] for row in rows]
+
+    def details(self, file_id):
+        """ファイルの一覧の値とトラックの詳細を辞書で取得（登録されていなければNone）"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(ROW_FIELDS)} FROM files WHERE id = ?", (file_id,)).fetchone()
+            if row is None:
+                return None
+            tracks = conn.execute("SELECT tracks FROM details WHERE file_id = ?", (file_id,)).fetchone()
+        entry = dict(zip(ROW_FIELDS, row))
+        entry['tracks'] = json.loads(tracks[0]) if tracks else []
+        return entry
+
+    def known_files(self, roots):
+        """フォルダー以下に登録済みのファイルの{パス: (サイズ, 更新時刻)}を取得"""
+        known = {}
+        with closing(self._connect()) as conn:
+            for root in roots:
+                prefix = os.path.join(os.path.abspath(root), '')
+                rows = conn.execute("SELECT path, size, mtime FROM files WHERE substr(path, 1, ?) = ?",
+                                    (len(prefix), prefix))
+                known.update((path, (size, mtime)) for path, size, mtime in rows)
+        return known
+
+    def store(self, entries):
+        """解析結果をまとめて1回のトランザクションで登録（同じパスは上書き）"""
+        now = time.time()
+        columns = [field for field in ROW_FIELDS if field != 'id'] + ['scanned']
+        sql = (f"INSERT INTO files ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (path) DO UPDATE SET "
+               f"{', '.join(f'{column} = excluded.{column}' for column in columns if column != 'path')}")
+        with self._lock, closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for entry in entries:
+                    conn.execute(sql, [entry[column] for column in columns[:-1]] + [now])
+                    file_id = conn.execute("SELECT id FROM files WHERE path = ?", (entry['path'],)).fetchone()[0]
+                    conn.execute("INSERT OR REPLACE INTO details (file_id, tracks) VALUES (?, ?)",
+                                 (file_id, json.dumps(entry['tracks'], ensure_ascii=False)))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, paths):
+        """登録されたファイルを削除"""
+        with self._lock, closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+def _walk_media_files(roots):
+    """フォルダー以下のメディアファイルの{パス: (サイズ, 更新時刻)}を取得（os.scandirでstatを省く）"""
+    files = {}
+    pending = [os.path.abspath(root) for root in roots]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS:
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            print(f"フォルダーを読み取れません: {directory}: {e}")
+    return files
+
+def scan_catalog(store, roots, max_workers=DEFAULT_CATALOG_WORKERS, on_progress=None, cancelled=None):
+    """フォルダー以下のメディアファイルを解析してカタログに登録
+
+    サイズと更新時刻が変わっていないファイルは解析せず、なくなったファイルは削除する。
+    解析結果はSCAN_BATCH_SIZE件ごとにまとめて書き込み、on_progress(完了数, 総数)で進捗を通知する。
+    cancelledに関数を指定すると、Trueを返した時点で残りの解析を中止する。
+    (解析したファイル数, 削除したファイル数)を返す。
+    """
+    files = _walk_media_files(roots)
+    known = store.known_files(roots)
+    removed = [path for path in known if path not in files]
+    if removed:
+        store.remove(removed)
+    changed = [path for path, identity in files.items() if known.get(path) != identity]
+    changed.sort()
+
+    done = 0
+    for start in range(0, len(changed), SCAN_BATCH_SIZE):
+        if cancelled is not None and cancelled():
+            break
+        batch = changed[start:start + SCAN_BATCH_SIZE]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = list(executor.map(lambda path: probe_entry(path, *files[path]), batch))
+        store.store(entries)
+        done += len(batch)
+        if on_progress is not None:
+            on_progress(done, len(changed))
+    return done, len(removed)
+
+def catalog_path(config, temp_dir):
+    """カタログのデータベースのパス（設定ファイルのcatalog_db、省略時は作業ディレクトリ内）"""
+    return config.get("Settings", "catalog_db", fallback=os.path.join(temp_dir, 'catalog.sqlite3'))
@@ -0,0 +1,396 @@
+import time
+from PyQt5.QtWidgets import (QWizardPage, QLabel, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
+                            QTableView, QTextEdit, QFileDialog, QMessageBox, QAbstractItemView,
+                            QHeaderView, QSplitter, QProgressBar)
+from PyQt5.QtCore import Qt, QThread, QTimer, QAbstractTableModel, QModelIndex, pyqtSignal
+from .utils import get_default_temp_dir, format_duration
+from .catalog import (CatalogStore, scan_catalog, catalog_path, CATALOG_COLUMNS, SORT_KEYS, ROW_FIELDS,
+                      DEFAULT_PAGE_SIZE, DEFAULT_CATALOG_WORKERS)
+from .core import get_tool_paths
+from .track_manifest import export_track_manifest, apply_track_manifest
+from .profiling import profiled
+
+# 絞り込みの入力が止まってから検索するまでの時間（ミリ秒）
+FILTER_DELAY_MS = 300
+# 数値を右寄せにする列
+NUMERIC_COLUMNS = ('duration', 'size', 'pixels', 'audio_count', 'subtitle_count')
+FIELD_INDEX = {field: i for i, field in enumerate(ROW_FIELDS)}
+
+def format_cell(column, row):
+    """一覧のセルの表示文字列を作成"""
+    if column == 'duration':
+        return format_duration(row[FIELD_INDEX['duration']]) if row[FIELD_INDEX['duration']] else ""
+    if column == 'size':
+        return f"{row[FIELD_INDEX['size']] / (1024 * 1024):.1f} MB"
+    if column == 'pixels':
+        return f"{row[FIELD_INDEX['width']]}x{row[FIELD_INDEX['height']]}" if row[FIELD_INDEX['pixels']] else ""
+    if column == 'mtime':
+        return time.strftime("%Y-%m-%d %H:%M", time.localtime(row[FIELD_INDEX['mtime']] / 1e9))
+    if column == 'name' and row[FIELD_INDEX['error']]:
+        return f"{row[FIELD_INDEX['name']]} (読み取り失敗)"
+    return str(row[FIELD_INDEX[column]])
+
+class CatalogModel(QAbstractTableModel):
+    """カタログの一覧のモデル（表示に必要な分だけDEFAULT_PAGE_SIZE件ずつ読み込む）
+
+    並べ替えと絞り込みはデータベースに任せ、条件が変わったら読み込んだ行を捨てて最初から読み直す。
+    """
+
+    def __init__(self, store=None):
+        super().__init__()
+        self.store = store
+        self.rows = []
+        self.sort_key = SORT_KEYS[0]
+        self.descending = False
+        self.filter_text = ''
+        self.total = 0
+        self._exhausted = True
+
+    def set_store(self, store):
+        self.store = store
+        self.refresh()
+
+    def refresh(self):
+        """読み込んだ行を捨てて、現在の条件で最初から読み直す"""
+        self.beginResetModel()
+        self.rows = []
+        self.total = self.store.count(self.filter_text) if self.store is not None else 0
+        self._exhausted = self.total == 0
+        self.endResetModel()
+
+    def set_filter(self, text):
+        self.filter_text = text
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CATALOG_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = CATALOG_COLUMNS[index.column()][0]
+        if role == Qt.DisplayRole:
+            return format_cell(column, row)
+        if role == Qt.TextAlignmentRole and column in NUMERIC_COLUMNS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ToolTipRole:
+            return row[FIELD_INDEX['error']] or row[FIELD_INDEX['path']]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return CATALOG_COLUMNS[section][1]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """前回の最後の行の続きを読み込む"""
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self.rows:
+            last = self.rows[-1]
+            after = (last[FIELD_INDEX[self.sort_key]], last[FIELD_INDEX['id']])
+        rows = self.store.page(self.sort_key, self.descending, self.filter_text, after, DEFAULT_PAGE_SIZE)
+        self._exhausted = len(rows) < DEFAULT_PAGE_SIZE
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_key = SORT_KEYS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.refresh()
+
+    def file_id(self, row):
+        """行のファイルのIDを取得"""
+        return self.rows[row][FIELD_INDEX['id']]
+
+class CatalogScanThread(QThread):
+    """フォルダーをバックグラウンドで解析してカタログに登録するスレッド"""
+    progress = pyqtSignal(int, int)
+    scanned = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, store, roots, max_workers):
+        super().__init__()
+        self.store = store
+        self.roots = roots
+        self.max_workers = max_workers
+
+    def run(self):
+        try:
+            result = scan_catalog(self.store, self.roots, self.max_workers,
+                                  on_progress=self.progress.emit,
+                                  cancelled=self.isInterruptionRequested)
+            self.scanned.emit(*result)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class TrackManifestThread(QThread):
+    """トラックのマニフェストの書き出し・適用をバックグラウンドで行うスレッド（ログを1行ずつ通知）"""
+    log = pyqtSignal(str)
+    done = pyqtSignal(int)
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            self.done.emit(self.func(*self.args, log=self.log.emit))
+        except Exception as e:
+            self.log.emit(f"失敗しました\n{e}")
+            self.done.emit(-1)
+
+class CatalogPage(QWizardPage):
+    def __init__(self):
+        super().__init__()
+        self.setTitle("ライブラリ一覧")
+        self.setSubTitle("フォルダー内のメディアファイルを解析し、一覧で並べ替え・絞り込みします")
+
+        layout = QVBoxLayout()
+
+        # フォルダー選択部分
+        folder_layout = QHBoxLayout()
+        self.folder_edit = QLineEdit()
+        self.folder_edit.setReadOnly(True)
+        self.browse_button = QPushButton("フォルダーを追加...")
+        self.browse_button.clicked.connect(self.browse_folder)
+        self.scan_button = QPushButton("再解析")
+        self.scan_button.clicked.connect(self.scan)
+        folder_layout.addWidget(QLabel("フォルダー:"))
+        folder_layout.addWidget(self.folder_edit)
+        folder_layout.addWidget(self.browse_button)
+        folder_layout.addWidget(self.scan_button)
+
+        # 絞り込み部分（入力が止まってから検索する）
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("ファイル名または言語コード")
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.count_label = QLabel()
+        filter_layout.addWidget(QLabel("絞り込み:"))
+        filter_layout.addWidget(self.filter_edit)
+        filter_layout.addWidget(self.count_label)
+
+        # トラックのマニフェスト（絞り込んだファイルの状態を書き出し、編集後に差分だけを適用）
+        manifest_layout = QHBoxLayout()
+        self.export_manifest_button = QPushButton("トラック一覧を書き出す...")
+        self.export_manifest_button.clicked.connect(self.export_manifest)
+        self.apply_manifest_button = QPushButton("マニフェストを適用...")
+        self.apply_manifest_button.clicked.connect(self.apply_manifest)
+        manifest_layout.addWidget(self.export_manifest_button)
+        manifest_layout.addWidget(self.apply_manifest_button)
+        manifest_layout.addStretch()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+
+        # 一覧（行の高さを固定し、列幅も内容から計算しない）
+        self.model = CatalogModel()
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 260)
+        self.table.selectionModel().currentRowChanged.connect(self.show_details)
+
+        # 詳細（選択したファイルだけ読み込む）
+        self.detail_text = QTextEdit()
+        self.detail_text.setReadOnly(True)
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.detail_text)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+
+        layout.addLayout(folder_layout)
+        layout.addLayout(filter_layout)
+        layout.addLayout(manifest_layout)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        self.store = None
+        self.roots = []
+        self.scan_thread = None
+        self.manifest_thread = None
+
+    def initializePage(self):
+        """ページの初期化（前回までに解析したカタログをそのまま表示）"""
+        config = self.wizard().config
+        temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+        try:
+            self.store = CatalogStore(catalog_path(config, temp_dir))
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"カタログを開けませんでした:\n{str(e)}")
+            return
+        self.roots = [root for root in config.get("Settings", "catalog_folders", fallback="").split(';') if root]
+        self.folder_edit.setText("; ".join(self.roots))
+        self.detail_text.clear()
+        self.model.set_store(self.store)
+        self.update_count()
+
+    def cleanupPage(self):
+        """ページを離れるときは解析を中止"""
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            self.scan_thread.requestInterruption()
+            self.scan_thread.wait()
+
+    def nextId(self):
+        # 最後のページなので-1を返す
+        return -1
+
+    def browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "フォルダーの選択")
+        if folder and folder not in self.roots:
+            self.roots.append(folder)
+            self.wizard().config.set("Settings", "catalog_folders", ";".join(self.roots))
+            self.folder_edit.setText("; ".join(self.roots))
+            self.scan()
+
+    def scan(self):
+        """登録したフォルダーを解析（変更されていないファイルは解析しない）"""
+        if self.store is None or not self.roots:
+            QMessageBox.warning(self, "警告", "フォルダーを追加してください。")
+            return
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        workers = self.wizard().config.getint("Settings", "catalog_workers", fallback=DEFAULT_CATALOG_WORKERS)
+        self.scan_thread = CatalogScanThread(self.store, list(self.roots), workers)
+        self.scan_thread.progress.connect(self.show_progress)
+        self.scan_thread.scanned.connect(self.scan_finished)
+        self.scan_thread.failed.connect(self.scan_failed)
+        self.scan_button.setEnabled(False)
+        self.browse_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.scan_thread.start()
+
+    def show_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def scan_finished(self, scanned, removed):
+        self.scan_button.setEnabled(True)
+        self.browse_button.setEnabled(True)
+        self.progress_bar.hide()
+        self.model.refresh()
+        self.update_count()
+        self.count_label.setText(self.count_label.text() + f"（解析 {scanned}件, 削除 {removed}件）")
+
+    def scan_failed(self, message):
+        self.scan_button.setEnabled(True)
+        self.browse_button.setEnabled(True)
+        self.progress_bar.hide()
+        QMessageBox.critical(self, "エラー", f"フォルダーの解析に失敗しました:\n{message}")
+
+    def export_manifest(self):
+        """絞り込んだファイルのトラックの状態をマニフェスト（CSV/JSON）に書き出す"""
+        if self.store is None or self.manifest_thread is not None:
+            return
+        files = self.store.paths(self.model.filter_text)
+        if not files:
+            QMessageBox.warning(self, "警告", "書き出すファイルがありません。")
+            return
+        manifest_path, _ = QFileDialog.getSaveFileName(
+            self, "マニフェストの保存", "tracks.csv", "CSV (*.csv);;JSON (*.json)")
+        if manifest_path:
+            self.run_manifest(export_track_manifest, files, manifest_path)
+
+    def apply_manifest(self):
+        """編集したマニフェストの差分を各ファイルに適用"""
+        if self.manifest_thread is not None:
+            return
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self, "マニフェストの選択", "", "マニフェスト (*.csv *.json);;すべてのファイル (*.*)")
+        if manifest_path:
+            self.run_manifest(apply_track_manifest, get_tool_paths(self.wizard().config), manifest_path)
+
+    def run_manifest(self, func, *args):
+        """マニフェストの処理をバックグラウンドで実行し、ログを詳細欄に表示"""
+        self.detail_text.clear()
+        self.export_manifest_button.setEnabled(False)
+        self.apply_manifest_button.setEnabled(False)
+        self.manifest_thread = TrackManifestThread(func, *args)
+        self.manifest_thread.log.connect(self.detail_text.append)
+        self.manifest_thread.done.connect(self.manifest_finished)
+        # スレッドの参照はrunが終了してから解放する
+        self.manifest_thread.finished.connect(self.manifest_released)
+        self.manifest_thread.start()
+
+    def manifest_released(self):
+        """マニフェストの処理スレッドの終了後に参照を解放し、ボタンを有効にする"""
+        self.manifest_thread = None
+        self.export_manifest_button.setEnabled(True)
+        self.apply_manifest_button.setEnabled(True)
+
+    def manifest_finished(self, failed):
+        applied = self.manifest_thread.func is apply_track_manifest
+        if failed:
+            QMessageBox.warning(self, "警告", "一部のファイルを処理できませんでした。詳細欄を確認してください。")
+        if applied and self.roots:
+            # 書き換えたファイルは更新時刻が変わるため、再解析でカタログに反映される
+            self.scan()
+
+    @profiled()
+    def apply_filter(self):
+        """絞り込みの条件を変更して一覧を読み直す"""
+        if self.store is None:
+            return
+        self.detail_text.clear()
+        self.model.set_filter(self.filter_edit.text().strip())
+        self.update_count()
+
+    def update_count(self):
+        self.count_label.setText(f"{self.model.total}件")
+
+    @profiled()
+    def show_details(self, current, previous):
+        """選択したファイルの詳細をカタログから読み込んで表示"""
+        if not current.isValid() or self.store is None:
+            self.detail_text.clear()
+            return
+        entry = self.store.details(self.model.file_id(current.row()))
+        if entry is None:
+            self.detail_text.clear()
+            return
+        info_text = f"【ファイル情報】\nパス: {entry['path']}\n"
+        if entry['error']:
+            info_text += f"読み取りエラー: {entry['error']}\n"
+        info_text += f"時間: {format_duration(entry['duration'])}\n"
+        info_text += f"サイズ: {entry['size'] / (1024 * 1024):.2f} MB\n"
+        for track in entry['tracks']:
+            info_text += f"\n【{str(track['kind']).upper()}トラック #{track['id']}】\n"
+            info_text += f"コーデック: {track['codec']}\n言語: {track['language']}\n"
+            if track['title']:
+                info_text += f"名前: {track['title']}\n"
+            if track['kind'] == 'video':
+                info_text += f"解像度: {track['width']}x{track['height']}\n"
+            flags = [name for name in ('default', 'forced') if track[name]]
+            if flags:
+                info_text += f"ディスポジション: {', '.join(flags)}\n"
+        self.detail_text.setText(info_text)
@@ -0,0 +1,253 @@
+import os
+import re
+import csv
+import uuid
+import struct
+import xml.etree.ElementTree as ET
+from .isobmff import (BoxError, parse_movie, iter_children, find_child, find_path, sample_location)
+from .ebml import read_matroska
+from .utils import format_duration, parse_duration
+
+# チャプターを読み取れるメディアファイルの拡張子
+CHAPTER_MEDIA_EXTENSIONS = ['.mp4', '.m4v', '.mov', '.mkv']
+
+# Neroのチャプター（chpl）の時刻の単位（100ナノ秒）
+CHPL_TIMESCALE = 10000000
+
+OGM_LINE = re.compile(r'^CHAPTER(\d+)(NAME)?=(.*)$', re.IGNORECASE)
+
+class ChapterError(Exception):
+    """チャプターを読み書きできないときの例外"""
+
+def _sorted(chapters):
+    """開始時刻の順に並べ、終了時刻がないチャプターは次のチャプターの開始時刻で補う"""
+    chapters = sorted(chapters, key=lambda chapter: chapter['start'])
+    for chapter, following in zip(chapters, chapters[1:]):
+        if chapter.get('end') is None:
+            chapter['end'] = following['start']
+    return chapters
+
+def parse_chpl(data, start, end):
+    """Neroのチャプター（moov/udta/chpl）を解析"""
+    version = data[start]
+    pos = start + 4
+    if version == 1:
+        pos += 4  # 予約領域
+    count = data[pos]
+    pos += 1
+    chapters = []
+    for _ in range(count):
+        if pos + 9 > end:
+            raise ChapterError("chplが途中で終わっています")
+        timestamp, length = struct.unpack_from('>QB', data, pos)
+        pos += 9
+        title = bytes(data[pos:pos + length]).decode('utf-8', 'replace')
+        pos += length
+        chapters.append({'start': timestamp / CHPL_TIMESCALE, 'end': None, 'title': title})
+    return chapters
+
+def _chapter_track_ids(data, tracks):
+    """trefの'chap'で参照されているチャプタートラックのIDを取得"""
+    ids = []
+    for track in tracks:
+        start, end = track['box']
+        chap = find_path(data, start, end, 'tref/chap')
+        if chap is not None:
+            count = (chap[1] - chap[0]) // 4
+            ids.extend(struct.unpack_from(f'>{count}I', data, chap[0]))
+    return ids
+
+def read_text_track(file_path, track):
+    """QuickTimeのテキストのチャプタートラックからチャプター一覧を取得
+
+    各サンプルは2バイトの文字列長と文字列（UTF-8またはUTF-16）から始まる。
+    """
+    stts = track.get('stts', [])
+    chapters = []
+    time = 0
+    sample_number = 1
+    with open(file_path, 'rb') as f:
+        for i in range(0, len(stts), 2):
+            for _ in range(stts[i]):
+                offset, size = sample_location(track, sample_number)
+                f.seek(offset)
+                sample = f.read(size)
+                length = struct.unpack_from('>H', sample)[0] if len(sample) >= 2 else 0
+                text = sample[2:2 + length]
+                if text.startswith(b'\xfe\xff'):
+                    title = text[2:].decode('utf-16-be', 'replace')
+                else:
+                    title = text.decode('utf-8', 'replace')
+                chapters.append({'start': time / track['timescale'], 'end': None, 'title': title})
+                time += stts[i + 1]
+                sample_number += 1
+    if chapters:
+        chapters[-1]['end'] = time / track['timescale']
+    return chapters
+
+def read_mp4_chapters(file_path):
+    """MP4ファイルのチャプターを取得（Neroのchplを優先し、なければQuickTimeのチャプタートラック）"""
+    movie = parse_movie(file_path, sample_tables=True)
+    data = movie['moov']
+    _, _, size, header_size = next(iter_children(data, 0, len(data)))
+    udta = find_child(data, header_size, size, 'udta')
+    if udta is not None:
+        chpl = find_child(data, udta[0], udta[1], 'chpl')
+        if chpl is not None:
+            chapters = parse_chpl(data, chpl[0], chpl[1])
+            if chapters:
+                chapters = _sorted(chapters)
+                # 最後のチャプターはムービーの終わりまで
+                duration = movie['duration'] / movie['timescale'] if movie['timescale'] else 0
+                if duration > chapters[-1]['start']:
+                    chapters[-1]['end'] = duration
+                return chapters
+    tracks = {track['track_id']: track for track in movie['tracks']}
+    for track_id in _chapter_track_ids(data, movie['tracks']):
+        track = tracks.get(track_id)
+        if track is not None and track.get('handler') == 'text' and track.get('timescale'):
+            return _sorted(read_text_track(file_path, track))
+    return []
+
+def read_chapters(file_path):
+    """メディアファイルのチャプター一覧（{'start', 'end', 'title'}、秒）を取得"""
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext == '.mkv':
+            return _sorted([{'start': chapter['start'], 'end': chapter['end'], 'title': chapter['title']}
+                            for chapter in read_matroska(file_path)['chapters']])
+        return read_mp4_chapters(file_path)
+    except (BoxError, struct.error, IndexError) as e:
+        raise ChapterError(f"チャプターを読み取れません: {e}")
+
+def parse_ogm(text):
+    """OGM形式（CHAPTER01=00:00:00.000 / CHAPTER01NAME=タイトル）のチャプターを解析"""
+    starts = {}
+    titles = {}
+    for line in text.splitlines():
+        match = OGM_LINE.match(line.strip())
+        if match is None:
+            continue
+        number, is_name, value = match.groups()
+        if is_name:
+            titles[int(number)] = value
+        else:
+            starts[int(number)] = parse_duration(value)
+    return _sorted([{'start': start, 'end': None, 'title': titles.get(number, f"Chapter {number:02d}")}
+                    for number, start in starts.items()])
+
+def parse_xml(text):
+    """Matroskaのチャプター形式のXML（mkvextract chaptersの出力）を解析（最初のエディションのみ）"""
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise ChapterError(f"チャプターのXMLを解析できません: {e}")
+    edition = root.find('EditionEntry')
+    if edition is None:
+        return []
+    chapters = []
+    for atom in edition.iter('ChapterAtom'):
+        start = atom.findtext('ChapterTimeStart')
+        if start is None:
+            continue
+        end = atom.findtext('ChapterTimeEnd')
+        chapters.append({
+            'start': parse_duration(start),
+            'end': parse_duration(end) if end else None,
+            'title': atom.findtext('ChapterDisplay/ChapterString', default='')
+        })
+    return _sorted(chapters)
+
+def parse_csv(text):
+    """CSV（開始時刻, タイトル[, 終了時刻]）のチャプターを解析（見出し行は省略可）"""
+    chapters = []
+    for row in csv.reader(text.splitlines()):
+        if not row or not row[0].strip():
+            continue
+        try:
+            start = parse_duration(row[0])
+        except ValueError:
+            # 見出し行
+            continue
+        end = row[2].strip() if len(row) > 2 else ''
+        chapters.append({
+            'start': start,
+            'end': parse_duration(end) if end else None,
+            'title': row[1].strip() if len(row) > 1 else ''
+        })
+    return _sorted(chapters)
+
+def load_chapters(file_path):
+    """チャプターファイル（OGM/XML/CSV）またはメディアファイルからチャプター一覧を読み込む"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in CHAPTER_MEDIA_EXTENSIONS:
+        return read_chapters(file_path)
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        text = f.read()
+    if ext == '.xml':
+        return parse_xml(text)
+    if ext == '.csv':
+        return parse_csv(text)
+    return parse_ogm(text)
+
+def format_ogm(chapters):
+    """チャプター一覧をOGM形式のテキストに変換（MP4Boxの-chapで読み込める形式）"""
+    lines = []
+    for number, chapter in enumerate(chapters, 1):
+        lines.append(f"CHAPTER{number:02d}={format_duration(chapter['start'])}")
+        lines.append(f"CHAPTER{number:02d}NAME={chapter['title']}")
+    return "\n".join(lines) + "\n"
+
+def _xml_time(seconds):
+    """秒数をMatroskaのXMLの時刻形式（HH:MM:SS.nnnnnnnnn）に変換"""
+    nanoseconds = int(round(seconds * 1e9))
+    return (f"{nanoseconds // 3600000000000:02d}:{nanoseconds // 60000000000 % 60:02d}:"
+            f"{nanoseconds // 1000000000 % 60:02d}.{nanoseconds % 1000000000:09d}")
+
+def format_xml(chapters, language='und'):
+    """チャプター一覧をMatroskaのチャプター形式のXMLに変換（mkvmergeの--chaptersで読み込める形式）"""
+    root = ET.Element('Chapters')
+    edition = ET.SubElement(root, 'EditionEntry')
+    for chapter in chapters:
+        atom = ET.SubElement(edition, 'ChapterAtom')
+        ET.SubElement(atom, 'ChapterTimeStart').text = _xml_time(chapter['start'])
+        if chapter.get('end') is not None:
+            ET.SubElement(atom, 'ChapterTimeEnd').text = _xml_time(chapter['end'])
+        display = ET.SubElement(atom, 'ChapterDisplay')
+        ET.SubElement(display, 'ChapterString').text = chapter['title']
+        ET.SubElement(display, 'ChapterLanguage').text = language
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode') + "\n"
+
+def format_csv(chapters):
+    """チャプター一覧をCSV（start, title, end）に変換"""
+    lines = ["start,title,end"]
+    for chapter in chapters:
+        end = format_duration(chapter['end']) if chapter.get('end') is not None else ''
+        title = chapter['title'].replace('"', '""')
+        lines.append(f'{format_duration(chapter["start"])},"{title}",{end}')
+    return "\n".join(lines) + "\n"
+
+CHAPTER_FORMATS = {'ogm': format_ogm, 'xml': format_xml, 'csv': format_csv}
+CHAPTER_FORMAT_EXTENSIONS = {'ogm': 'txt', 'xml': 'xml', 'csv': 'csv'}
+
+def write_chapters(chapters, output_file, chapter_format=None):
+    """チャプター一覧をファイルに書き出す（形式の省略時は拡張子で判定し、不明ならOGM形式）"""
+    if chapter_format is None:
+        ext = os.path.splitext(output_file)[1].lower().lstrip('.')
+        chapter_format = ext if ext in CHAPTER_FORMATS else 'ogm'
+    with open(output_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(CHAPTER_FORMATS[chapter_format](chapters))
+
+def stage_chapters(chapters, temp_dir):
+    """ジョブのチャプター（ファイルのパスまたは{'start', 'title'}のリスト）を
+    MP4Boxの-chapで読み込めるOGM形式の一時ファイルに書き出し、そのパスを返す"""
+    if isinstance(chapters, str):
+        chapters = load_chapters(chapters)
+    else:
+        chapters = _sorted([{'start': parse_duration(chapter['start']), 'end': None,
+                             'title': chapter.get('title', '')} for chapter in chapters])
+    if not chapters:
+        raise ChapterError("チャプターがありません")
+    temp_chapters = os.path.join(temp_dir, f"chap_{uuid.uuid4().hex[:16]}.txt")
+    write_chapters(chapters, temp_chapters, 'ogm')
+    return temp_chapters
@@ -0,0 +1,600 @@
+import os
+import json
+import hashlib
+import argparse
+import configparser
+from .utils import get_default_temp_dir, parse_duration, format_duration
+from .core import get_tool_paths, MEDIA_EXTENSIONS
+from .work_queue import SQLiteWorkQueue, DEFAULT_MAX_ATTEMPTS
+from .worker import run_job, run_worker, DEFAULT_LEASE_SECONDS, DEFAULT_POLL_INTERVAL
+from .journal import BatchJournal
+from .trim import trim_clips
+from .concat import concat, check_compatibility
+from .thumbnails import (generate_library_sheets, DEFAULT_THUMBNAIL_COUNT, DEFAULT_THUMBNAIL_WIDTH,
+                         DEFAULT_SHEET_COLUMNS, DEFAULT_THUMBNAIL_WORKERS)
+from .sync import analyze_sync, sync_problems
+from .langdetect import detect_files, DEFAULT_DETECT_WORKERS
+from .loudness import (list_audio_tracks, analyze_tracks, check_compliance, format_result,
+                       DEFAULT_TARGET_LOUDNESS, DEFAULT_LOUDNESS_TOLERANCE, DEFAULT_TRUE_PEAK_LIMIT,
+                       DEFAULT_ANALYSIS_WORKERS)
+from .planner import plan_jobs, format_plan
+from .staging import load_staging_cache
+from .resources import apply_config, RESOURCE_PRESETS
+from .strip import strip_files, TRACK_KINDS, DEFAULT_STRIP_WORKERS
+from .pgs import (index_pgs, check_pgs, summarize_pgs, format_pgs_summary, PGS_CLOCK,
+                  DEFAULT_MIN_CUE_DURATION)
+from .webvtt import package_subtitles, DEFAULT_SEGMENT_DURATION, DEFAULT_MPEGTS_OFFSET
+from .profiling import start_session, finish_session, profile_section, profile_dir
+from .chapters import load_chapters, write_chapters, CHAPTER_FORMATS, CHAPTER_FORMAT_EXTENSIONS
+from .catalog import CatalogStore, scan_catalog, catalog_path, SORT_KEYS, ROW_FIELDS, DEFAULT_CATALOG_WORKERS
+from .track_manifest import (read_track_state, export_track_manifest, apply_track_manifest,
+                             DEFAULT_MANIFEST_WORKERS)
+from .interleave import (analyze_interleave, interleave_problems, format_interleave_report, relayout,
+                         DEFAULT_INTERLEAVE_DURATION, DEFAULT_MAX_SKEW)
+from .mux_backend import benchmark_backends, format_benchmark, MUX_BACKENDS, DEFAULT_BENCHMARK_REPEAT
+from .metadata import read_tags, write_tags, apply_manifest, DEFAULT_PADDING, DEFAULT_TAG_WORKERS
+
+def load_config(config_path):
+    """GUIと同じ設定ファイルを読み込む"""
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    if not config.has_section("Settings"):
+        config.add_section("Settings")
+    return config
+
+def load_jobs(file_path):
+    """ジョブ定義のJSONファイルを読み込む（リストまたは{'jobs': [...]}）"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('jobs', [data])
+    return data
+
+def job_entry(job):
+    """ジョブ定義を{'kind', 'payload'}の形式に変換（kindの省略時は'mux'）"""
+    payload = dict(job)
+    return {'kind': payload.pop('kind', 'mux'), 'payload': payload}
+
+def get_temp_dir(config):
+    """作業ディレクトリを取得（存在しなければ作成）"""
+    temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
+def expand_media_files(paths):
+    """ファイルとディレクトリの一覧から、メディアファイルの一覧を作成（ディレクトリは再帰的に探す）"""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                    files.append(os.path.join(root, name))
+    return files
+
+def cmd_enqueue(args, config):
+    """ジョブをキューに追加"""
+    queue = SQLiteWorkQueue(args.queue)
+    for job in load_jobs(args.jobs):
+        job = dict(job)
+        kind = job.pop('kind', 'mux')
+        job_id = queue.enqueue(kind, job, args.max_attempts)
+        print(f"ジョブ #{job_id} ({kind}): {job.get('output_file')}")
+    return 0
+
+def cmd_worker(args, config):
+    """ワーカーとしてキューのジョブを実行"""
+    queue = SQLiteWorkQueue(args.queue)
+    temp_dir = get_temp_dir(config)
+    processed = run_worker(queue, get_tool_paths(config), temp_dir,
+                           worker_id=args.worker_id, lease_seconds=args.lease,
+                           poll_interval=args.poll, exit_when_empty=args.once,
+                           staging=load_staging_cache(config, temp_dir))
+    print(f"{processed}件のジョブを処理しました")
+    return 0
+
+def cmd_batch(args, config):
+    """ジョブ定義のファイルを順に実行（中断した場合は完了済みのジョブをスキップして再開）"""
+    temp_dir = get_temp_dir(config)
+    journal_path = args.journal
+    if not journal_path:
+        # ジョブ定義ファイルごとにジャーナルを作成
+        name = hashlib.sha256(os.path.abspath(args.jobs).encode('utf-8')).hexdigest()[:16]
+        journal_path = os.path.join(temp_dir, 'journals', f"{name}.jsonl")
+    journal = BatchJournal(journal_path)
+    tools = get_tool_paths(config)
+    staging = load_staging_cache(config, temp_dir)
+
+    jobs = load_jobs(args.jobs)
+    if not args.skip_preflight:
+        # 書き込みを始める前に、未完了のジョブの分の空き容量を確認
+        pending = [job for job in jobs if not journal.is_done(job)]
+        plan = plan_jobs(tools, [job_entry(job) for job in pending], temp_dir)
+        if not plan['ok']:
+            print(format_plan(plan))
+            print("空き容量が不足しているため実行しません")
+            return 1
+
+    failed = 0
+    for i, job in enumerate(jobs, 1):
+        if journal.is_done(job):
+            print(f"[{i}/{len(jobs)}] 完了済みのためスキップ: {job['output_file']}")
+            continue
+        try:
+            run_job(tools, job_entry(job), temp_dir, staging)
+        except Exception as e:
+            failed += 1
+            print(f"[{i}/{len(jobs)}] 失敗: {job['output_file']}\n{e}")
+            continue
+        journal.record(job)
+        print(f"[{i}/{len(jobs)}] 完了: {job['output_file']}")
+    return 1 if failed else 0
+
+def cmd_plan(args, config):
+    """ジョブ定義のファイルを実行せずに、必要な容量と所要時間を見積もる"""
+    plan = plan_jobs(get_tool_paths(config), [job_entry(job) for job in load_jobs(args.jobs)],
+                     get_temp_dir(config))
+    print(format_plan(plan))
+    return 0 if plan['ok'] else 1
+
+def cmd_trim(args, config):
+    """キーフレーム単位でクリップを切り出す"""
+    clips = [{'start': parse_duration(start), 'end': parse_duration(end), 'output_file': output}
+             for start, end, output in args.clip or []]
+    if args.clips:
+        with open(args.clips, 'r', encoding='utf-8') as f:
+            for clip in json.load(f):
+                clips.append({'start': parse_duration(clip['start']), 'end': parse_duration(clip['end']),
+                              'output_file': clip['output_file']})
+    trim_clips(get_tool_paths(config), args.input, clips, get_temp_dir(config))
+    return 0
+
+def cmd_join(args, config):
+    """複数のMP4ファイルを再エンコードせずに結合"""
+    segments = check_compatibility(args.inputs)
+    total = sum(segment['duration'] for segment in segments)
+    print(f"{len(segments)}個のファイルを結合できます (合計 {total:.3f}秒)")
+    if args.check_only:
+        return 0
+    job = {'inputs': args.inputs, 'output_file': args.output}
+    if args.video_language:
+        job['video_language'] = args.video_language
+    concat(get_tool_paths(config), job, get_temp_dir(config))
+    print(f"完了: {args.output}")
+    return 0
+
+def cmd_sheets(args, config):
+    """複数のファイルのコンタクトシートを並列に作成"""
+    failed = generate_library_sheets(get_tool_paths(config), expand_media_files(args.inputs),
+                                     get_temp_dir(config), args.output_dir, args.count, args.width,
+                                     args.columns, args.workers)
+    return 1 if failed else 0
+
+def cmd_loudness(args, config):
+    """全オーディオトラックのラウドネスと無音区間を並列に解析"""
+    tools = get_tool_paths(config)
+    tracks = []
+    for input_file in expand_media_files(args.inputs):
+        tracks.extend(list_audio_tracks(tools, input_file))
+    results = analyze_tracks(tools, tracks, args.workers)
+    target = args.target
+    if target is None:
+        target = config.getfloat("Settings", "loudness_target", fallback=DEFAULT_TARGET_LOUDNESS)
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = config.getfloat("Settings", "loudness_tolerance", fallback=DEFAULT_LOUDNESS_TOLERANCE)
+    true_peak_limit = args.true_peak_limit
+    if true_peak_limit is None:
+        true_peak_limit = config.getfloat("Settings", "true_peak_limit", fallback=DEFAULT_TRUE_PEAK_LIMIT)
+
+    if args.json:
+        print(json.dumps([dict(track, **result) for track, result in zip(tracks, results)],
+                         ensure_ascii=False, indent=2))
+    failed = 0
+    for track, result in zip(tracks, results):
+        problems = check_compliance(result, target, tolerance, true_peak_limit)
+        failed += bool(problems)
+        if not args.json:
+            print(f"{track['file']} (オーディオ #{track['audio_index']})\n{format_result(result)}")
+            for problem in problems:
+                print(f"警告: {problem}")
+            print()
+    return 1 if failed else 0
+
+def cmd_detect_language(args, config):
+    """字幕ファイルの言語を並列に判定"""
+    for result in detect_files(args.inputs, args.workers):
+        if 'error' in result:
+            print(f"{result['file']}: 判定できません ({result['error']})")
+        else:
+            print(f"{result['file']}: {result['language']} ({result['confidence']:.0%})")
+    return 0
+
+def cmd_sync(args, config):
+    """字幕と音声の発話区間のずれとドリフトを推定"""
+    failed = 0
+    for result in analyze_sync(get_tool_paths(config), args.input, args.audio, args.subtitles):
+        if 'error' in result:
+            print(f"{result['file']}: 解析できません ({result['error']})")
+            continue
+        drift = f"{result['drift']:+.2f}秒/時" if result['drift'] is not None else "-"
+        print(f"{result['file']}: ずれ {result['offset']:+.2f}秒, ドリフト {drift}, 相関 {result['score']:.2f}")
+        for problem in sync_problems(result):
+            failed += 1
+            print(f"警告: {problem}")
+    return 1 if failed else 0
+
+def cmd_tag(args, config):
+    """MP4ファイルのメタデータ（ilst）を表示・編集（マニフェストで一括適用）"""
+    padding = args.padding
+    if padding is None:
+        padding = config.getint("Settings", "metadata_padding", fallback=DEFAULT_PADDING)
+    if args.manifest:
+        return 1 if apply_manifest(args.manifest, padding, args.workers) else 0
+
+    tags = {}
+    for item in args.set or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            print(f"タグは KEY=VALUE の形式で指定してください: {item}")
+            return 2
+        tags[key] = value
+    if args.artwork:
+        tags['artwork'] = args.artwork
+
+    failed = 0
+    for input_file in args.inputs:
+        try:
+            if tags:
+                print(f"{input_file}: {write_tags(input_file, tags, padding)}")
+            else:
+                print(input_file)
+                for key, value in read_tags(input_file).items():
+                    if key == 'artwork':
+                        value = ", ".join(f"{image['format']} {len(image['data'])}バイト"
+                                          if isinstance(image, dict) else f"{len(image)}バイト" for image in value)
+                    print(f"  {key}: {value}")
+        except Exception as e:
+            failed += 1
+            print(f"{input_file}: 失敗しました\n{e}")
+    return 1 if failed else 0
+
+def cmd_tracks(args, config):
+    """トラックの言語・デフォルト・強制・タイトルを表示し、マニフェストに書き出す・差分を適用する"""
+    if args.apply:
+        return 1 if apply_track_manifest(get_tool_paths(config), args.apply, args.dry_run, args.workers) else 0
+    files = expand_media_files(args.inputs)
+    if args.export:
+        return 1 if export_track_manifest(files, args.export, args.workers) else 0
+
+    failed = 0
+    for input_file in files:
+        try:
+            tracks = read_track_state(input_file)
+        except Exception as e:
+            failed += 1
+            print(f"{input_file}: 失敗しました\n{e}")
+            continue
+        print(input_file)
+        for track in tracks:
+            flags = [name for name in ('default', 'forced') if track[name]]
+            print(f"  #{track['track']} {track['kind']} ({track['codec']}) {track['language']}"
+                  f"{' [' + ', '.join(flags) + ']' if flags else ''} {track['title']}")
+    return 1 if failed else 0
+
+def cmd_strip(args, config):
+    """MP4ファイルから不要なトラックを削除（moovだけを書き換え、mdatは読み書きしない）"""
+    if not (args.track or args.type or args.language or args.name):
+        print("削除するトラックの条件を指定してください")
+        return 2
+    failed = strip_files(expand_media_files(args.inputs), args.track or (), args.type or (),
+                         args.language or (), args.name, args.dry_run, args.workers)
+    return 1 if failed else 0
+
+def cmd_chapters(args, config):
+    """チャプターを表示・エクスポート（メディアファイルとチャプターファイルのどちらも読める）"""
+    failed = 0
+    for input_file in expand_media_files(args.inputs):
+        try:
+            chapters = load_chapters(input_file)
+            if args.export:
+                output_dir = args.output_dir or os.path.dirname(os.path.abspath(input_file))
+                base_name = os.path.splitext(os.path.basename(input_file))[0]
+                output_file = os.path.join(
+                    output_dir, f"{base_name}.chapters.{CHAPTER_FORMAT_EXTENSIONS[args.export]}")
+                write_chapters(chapters, output_file, args.export)
+                print(f"{input_file}: {len(chapters)}件 -> {output_file}")
+                continue
+            print(f"{input_file}: {len(chapters)}件")
+            for number, chapter in enumerate(chapters, 1):
+                print(f"  {number:02d}. {format_duration(chapter['start'])} {chapter['title']}")
+        except Exception as e:
+            failed += 1
+            print(f"{input_file}: 失敗しました\n{e}")
+    return 1 if failed else 0
+
+def cmd_pgs(args, config):
+    """PGS字幕（.sup）の表示セットを索引化し、キュー数と時刻の問題を表示"""
+    failed = 0
+    for input_file in args.inputs:
+        try:
+            index = index_pgs(input_file)
+        except Exception as e:
+            failed += 1
+            print(f"{input_file}: 失敗しました\n{e}")
+            continue
+        print(f"{input_file}: {format_pgs_summary(summarize_pgs(index))}")
+        if args.list:
+            for i in index.cue_indexes():
+                end = index.end_pts(i)
+                end_text = format_duration(end / PGS_CLOCK) if end is not None else "?"
+                print(f"  {format_duration(index.pts[i] / PGS_CLOCK)} --> {end_text}"
+                      f"  オブジェクト {index.object_counts[i]}, {index.object_bytes[i]}バイト")
+        problems = check_pgs(index, args.min_duration)
+        for problem in problems:
+            print(f"警告: {problem}")
+        if problems:
+            failed += 1
+    return 1 if failed else 0
+
+def cmd_interleave(args, config):
+    """MP4ファイルのインターリーブを解析し、ずれが大きい場合は並べ直す"""
+    tools = get_tool_paths(config)
+    failed = 0
+    for input_file in expand_media_files(args.inputs):
+        if os.path.splitext(input_file)[1].lower() == '.mkv':
+            continue
+        try:
+            report = analyze_interleave(input_file)
+            problems = interleave_problems(report, args.max_skew)
+            if problems and args.fix:
+                relayout(tools, input_file, args.duration)
+                print(f"{input_file}: {args.duration}ミリ秒のチャンクで並べ直しました")
+                report = analyze_interleave(input_file)
+                problems = interleave_problems(report, args.max_skew)
+        except Exception as e:
+            failed += 1
+            print(f"{input_file}: 失敗しました\n{e}")
+            continue
+        print(f"{input_file}: {format_interleave_report(report)}")
+        for problem in problems:
+            print(f"警告: {problem}")
+        if problems:
+            failed += 1
+    return 1 if failed else 0
+
+def cmd_webvtt(args, config):
+    """字幕ファイルをWebVTTのセグメントとHLSのプレイリストに変換"""
+    job = {
+        'subtitles': [{'file': file_path, 'language': language} for file_path, language in args.subtitle],
+    }
+    if args.duration:
+        job['input_duration'] = parse_duration(args.duration)
+    playlist = package_subtitles(job, output_dir=args.output_dir, segment_duration=args.segment_duration,
+                                 mpegts_offset=args.mpegts_offset)
+    if playlist is None:
+        print("WebVTTに変換できる字幕がありません。")
+        return 1
+    print(f"プレイリストを出力しました: {playlist}")
+    return 0
+
+def cmd_catalog(args, config):
+    """フォルダーを解析してカタログに登録し、並べ替え・絞り込みした一覧を表示"""
+    store = CatalogStore(args.db or catalog_path(config, get_temp_dir(config)))
+    if args.scan:
+        scanned, removed = scan_catalog(store, args.scan, args.workers)
+        print(f"解析 {scanned}件, 削除 {removed}件")
+    print(f"{store.count(args.filter)}件")
+    for row in store.page(args.sort, args.desc, args.filter, limit=args.limit):
+        entry = dict(zip(ROW_FIELDS, row))
+        if entry['error']:
+            print(f"{entry['path']}\t読み取り失敗: {entry['error']}")
+            continue
+        print(f"{entry['path']}\t{format_duration(entry['duration'])}\t{entry['size'] / (1024 * 1024):.1f} MB\t"
+              f"{entry['video_codec']} {entry['width']}x{entry['height']}\t"
+              f"音声 {entry['audio_count']}, 字幕 {entry['subtitle_count']}\t{entry['languages']}")
+    return 0
+
+def cmd_mux_benchmark(args, config):
+    """ジョブ定義の多重化ジョブを各バックエンドで実行し、処理速度を比較"""
+    tools = get_tool_paths(config)
+    temp_dir = get_temp_dir(config)
+    for entry in (job_entry(job) for job in load_jobs(args.jobs)):
+        if entry['kind'] != 'mux':
+            continue
+        print(entry['payload']['input_file'])
+        results = benchmark_backends(tools, entry['payload'], temp_dir, args.backend, args.repeat)
+        print(format_benchmark(results))
+    return 0
+
+def cmd_status(args, config):
+    """キューの状態を表示"""
+    queue = SQLiteWorkQueue(args.queue)
+    for status, count in sorted(queue.counts().items()):
+        print(f"{status}: {count}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mepg4toolbox", description="MPEG4 ツールボックス（コマンドライン）")
+    parser.add_argument("--config", help="設定ファイル（省略時はGUIと同じファイル）")
+    parser.add_argument("--resources", choices=sorted(RESOURCE_PRESETS),
+                        help="外部ツールの実行モード（省略時は設定ファイルの値）")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfileとtracemallocで計測し、pstatsと折りたたみ形式のスタックを書き出す")
+    parser.add_argument("--profile-dir", help="プロファイルの出力先（省略時は設定ファイルの値または作業ディレクトリ内）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="ジョブをキューに追加")
+    enqueue_parser.add_argument("--queue", required=True, help="キューのSQLiteファイル")
+    enqueue_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="最大試行回数")
+    enqueue_parser.add_argument("jobs", help="ジョブ定義のJSONファイル")
+    enqueue_parser.set_defaults(func=cmd_enqueue)
+
+    worker_parser = subparsers.add_parser("worker", help="ワーカーとしてジョブを実行")
+    worker_parser.add_argument("--queue", required=True, help="キューのSQLiteファイル")
+    worker_parser.add_argument("--worker-id", help="ワーカーID（省略時はホスト名とプロセスID）")
+    worker_parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="リース期間（秒）")
+    worker_parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL, help="キューの確認間隔（秒）")
+    worker_parser.add_argument("--once", action="store_true", help="ジョブがなくなったら終了")
+    worker_parser.set_defaults(func=cmd_worker)
+
+    batch_parser = subparsers.add_parser("batch", help="ジョブ定義のファイルを順に実行（中断後は続きから再開）")
+    batch_parser.add_argument("--journal", help="ジャーナルファイル（省略時は作業ディレクトリ内）")
+    batch_parser.add_argument("--skip-preflight", action="store_true", help="実行前の空き容量の確認を省略")
+    batch_parser.add_argument("jobs", help="ジョブ定義のJSONファイル")
+    batch_parser.set_defaults(func=cmd_batch)
+
+    plan_parser = subparsers.add_parser("plan", help="ジョブを実行せずに必要な容量と所要時間を見積もる")
+    plan_parser.add_argument("jobs", help="ジョブ定義のJSONファイル")
+    plan_parser.set_defaults(func=cmd_plan)
+
+    trim_parser = subparsers.add_parser("trim", help="キーフレーム単位でクリップを切り出す（再エンコードなし）")
+    trim_parser.add_argument("input", help="入力ファイル")
+    trim_parser.add_argument("--clip", nargs=3, action="append", metavar=("START", "END", "OUTPUT"),
+                             help="開始・終了時刻（H:M:Sまたは秒）と出力ファイル")
+    trim_parser.add_argument("--clips", help="クリップ一覧のJSONファイル（start, end, output_fileのリスト）")
+    trim_parser.set_defaults(func=cmd_trim)
+
+    join_parser = subparsers.add_parser("join", help="複数のMP4ファイルを結合する（再エンコードなし）")
+    join_parser.add_argument("inputs", nargs="+", help="結合する順の入力ファイル")
+    join_parser.add_argument("-o", "--output", required=True, help="出力ファイル")
+    join_parser.add_argument("--video-language", help="映像の言語コード")
+    join_parser.add_argument("--check-only", action="store_true", help="結合できるかの確認のみ行う")
+    join_parser.set_defaults(func=cmd_join)
+
+    sheets_parser = subparsers.add_parser("sheets", help="コンタクトシートを作成する")
+    sheets_parser.add_argument("inputs", nargs="+", help="入力ファイルまたはディレクトリ")
+    sheets_parser.add_argument("-o", "--output-dir", help="コンタクトシートの出力先ディレクトリ")
+    sheets_parser.add_argument("--count", type=int, default=DEFAULT_THUMBNAIL_COUNT, help="サムネイルの枚数")
+    sheets_parser.add_argument("--width", type=int, default=DEFAULT_THUMBNAIL_WIDTH, help="サムネイルの幅")
+    sheets_parser.add_argument("--columns", type=int, default=DEFAULT_SHEET_COLUMNS, help="コンタクトシートの列数")
+    sheets_parser.add_argument("--workers", type=int, default=DEFAULT_THUMBNAIL_WORKERS, help="同時に処理するファイル数")
+    sheets_parser.set_defaults(func=cmd_sheets)
+
+    loudness_parser = subparsers.add_parser("loudness", help="ラウドネスと無音区間を解析する")
+    loudness_parser.add_argument("inputs", nargs="+", help="入力ファイルまたはディレクトリ")
+    loudness_parser.add_argument("--target", type=float,
+                                 help="目標ラウドネス（LUFS、省略時は設定ファイルの値）")
+    loudness_parser.add_argument("--tolerance", type=float,
+                                 help="目標ラウドネスの許容範囲（LU、省略時は設定ファイルの値）")
+    loudness_parser.add_argument("--true-peak-limit", type=float,
+                                 help="トゥルーピークの上限（dBTP、省略時は設定ファイルの値）")
+    loudness_parser.add_argument("--workers", type=int, default=DEFAULT_ANALYSIS_WORKERS, help="同時に解析するトラック数")
+    loudness_parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    loudness_parser.set_defaults(func=cmd_loudness)
+
+    detect_parser = subparsers.add_parser("detect-language", help="字幕ファイルの言語を判定する")
+    detect_parser.add_argument("inputs", nargs="+", help="字幕ファイル")
+    detect_parser.add_argument("--workers", type=int, default=DEFAULT_DETECT_WORKERS, help="同時に判定するファイル数")
+    detect_parser.set_defaults(func=cmd_detect_language)
+
+    sync_parser = subparsers.add_parser("sync", help="字幕と音声のタイミングのずれを確認する")
+    sync_parser.add_argument("input", help="入力ファイル")
+    sync_parser.add_argument("subtitles", nargs="+", help="字幕ファイル")
+    sync_parser.add_argument("--audio", type=int, default=0, help="比較するオーディオの番号（0から）")
+    sync_parser.set_defaults(func=cmd_sync)
+
+    tag_parser = subparsers.add_parser("tag", help="MP4ファイルのメタデータを表示・編集する")
+    tag_parser.add_argument("inputs", nargs="*", help="入力ファイル（--setがなければタグを表示）")
+    tag_parser.add_argument("--set", action="append", metavar="KEY=VALUE",
+                            help="設定するタグ（title, show, season, episodeなど。値を空にすると削除）")
+    tag_parser.add_argument("--artwork", help="アートワークの画像ファイル（JPEG/PNG）")
+    tag_parser.add_argument("--manifest", help="一括適用するマニフェスト（CSV/JSON、file列とタグ名の列）")
+    tag_parser.add_argument("--padding", type=int,
+                            help="最初に書き込むときに確保する余白（バイト、省略時は設定ファイルの値）")
+    tag_parser.add_argument("--workers", type=int, default=DEFAULT_TAG_WORKERS, help="同時に処理するファイル数")
+    tag_parser.set_defaults(func=cmd_tag)
+
+    tracks_parser = subparsers.add_parser(
+        "tracks", help="トラックの言語・フラグ・タイトルを表示し、マニフェストで一括編集する")
+    tracks_parser.add_argument("inputs", nargs="*", help="入力ファイルまたはフォルダー")
+    tracks_parser.add_argument("--export", metavar="MANIFEST", help="現在の状態を書き出すマニフェスト（.csv/.json）")
+    tracks_parser.add_argument("--apply", metavar="MANIFEST", help="差分を適用するマニフェスト（.csv/.json）")
+    tracks_parser.add_argument("--dry-run", action="store_true", help="適用せずに差分だけを表示する")
+    tracks_parser.add_argument("--workers", type=int, default=DEFAULT_MANIFEST_WORKERS, help="同時に処理するファイル数")
+    tracks_parser.set_defaults(func=cmd_tracks)
+
+    strip_parser = subparsers.add_parser("strip", help="MP4ファイルから不要なトラックを削除する（再エンコードなし）")
+    strip_parser.add_argument("inputs", nargs="+", help="入力ファイルまたはディレクトリ（その場で書き換える）")
+    strip_parser.add_argument("--track", type=int, action="append", help="削除するトラックID")
+    strip_parser.add_argument("--type", choices=sorted(TRACK_KINDS), action="append", help="削除するトラックの種類")
+    strip_parser.add_argument("--language", action="append", help="削除するトラックの言語コード")
+    strip_parser.add_argument("--name", help="トラック名にこの文字列を含むトラックを削除（例: Commentary）")
+    strip_parser.add_argument("--dry-run", action="store_true", help="該当するトラックの表示のみ行う")
+    strip_parser.add_argument("--workers", type=int, default=DEFAULT_STRIP_WORKERS, help="同時に処理するファイル数")
+    strip_parser.set_defaults(func=cmd_strip)
+
+    chapters_parser = subparsers.add_parser(
+        "chapters", help="チャプターを表示・エクスポートする（追加はジョブ定義のchaptersで指定）")
+    chapters_parser.add_argument("inputs", nargs="+", help="メディアファイル・チャプターファイルまたはディレクトリ")
+    chapters_parser.add_argument("--export", choices=sorted(CHAPTER_FORMATS), help="エクスポートする形式")
+    chapters_parser.add_argument("-o", "--output-dir", help="エクスポート先のディレクトリ（省略時は入力と同じ場所）")
+    chapters_parser.set_defaults(func=cmd_chapters)
+
+    pgs_parser = subparsers.add_parser("pgs", help="PGS字幕（.sup）のキュー数と時刻の問題を確認する")
+    pgs_parser.add_argument("inputs", nargs="+", help=".supファイル")
+    pgs_parser.add_argument("--list", action="store_true", help="キューの一覧を表示")
+    pgs_parser.add_argument("--min-duration", type=float, default=DEFAULT_MIN_CUE_DURATION,
+                            help="これより表示時間が短いキューを警告する（秒）")
+    pgs_parser.set_defaults(func=cmd_pgs)
+
+    interleave_parser = subparsers.add_parser("interleave", help="MP4ファイルのトラックのインターリーブを確認・最適化する")
+    interleave_parser.add_argument("inputs", nargs="+", help="MP4ファイルまたはフォルダー")
+    interleave_parser.add_argument("--max-skew", type=float, default=DEFAULT_MAX_SKEW,
+                                   help="問題として報告するトラック間のずれ（秒）")
+    interleave_parser.add_argument("--fix", action="store_true", help="ずれが大きいファイルをMP4Boxで並べ直す")
+    interleave_parser.add_argument("--duration", type=int, default=DEFAULT_INTERLEAVE_DURATION,
+                                   help="並べ直すチャンクの長さ（ミリ秒）")
+    interleave_parser.set_defaults(func=cmd_interleave)
+
+    webvtt_parser = subparsers.add_parser("webvtt", help="字幕をWebVTTのセグメントとHLSのプレイリストに変換する")
+    webvtt_parser.add_argument("--subtitle", nargs=2, action="append", required=True, metavar=("FILE", "LANGUAGE"),
+                               help="字幕ファイルと言語コード")
+    webvtt_parser.add_argument("-o", "--output-dir", required=True, help="出力先のディレクトリ")
+    webvtt_parser.add_argument("--duration", help="映像の長さ（H:M:Sまたは秒、省略時は最後の字幕まで）")
+    webvtt_parser.add_argument("--segment-duration", type=float, default=DEFAULT_SEGMENT_DURATION,
+                               help="セグメントの長さ（秒）")
+    webvtt_parser.add_argument("--mpegts-offset", type=int, default=DEFAULT_MPEGTS_OFFSET,
+                               help="X-TIMESTAMP-MAPのMPEGTSの値（90kHz）")
+    webvtt_parser.set_defaults(func=cmd_webvtt)
+
+    catalog_parser = subparsers.add_parser("catalog", help="ライブラリのカタログを作成・検索する")
+    catalog_parser.add_argument("--db", help="カタログのSQLiteファイル（省略時は設定ファイルの値または作業ディレクトリ内）")
+    catalog_parser.add_argument("--scan", nargs="+", metavar="DIR", help="解析してカタログに登録するフォルダー")
+    catalog_parser.add_argument("--filter", default="", help="ファイル名または言語コードで絞り込む")
+    catalog_parser.add_argument("--sort", choices=SORT_KEYS, default="name", help="並べ替える列")
+    catalog_parser.add_argument("--desc", action="store_true", help="降順に並べる")
+    catalog_parser.add_argument("--limit", type=int, default=50, help="表示する件数")
+    catalog_parser.add_argument("--workers", type=int, default=DEFAULT_CATALOG_WORKERS, help="同時に解析するファイル数")
+    catalog_parser.set_defaults(func=cmd_catalog)
+
+    benchmark_parser = subparsers.add_parser("mux-benchmark", help="多重化ジョブをMP4Boxとmkvmergeで実行して処理速度を比較する")
+    benchmark_parser.add_argument("jobs", help="ジョブ定義のJSONファイル（出力先には書き込まない）")
+    benchmark_parser.add_argument("--backend", nargs="+", choices=list(MUX_BACKENDS),
+                                  help="比較するバックエンド（省略時はすべて）")
+    benchmark_parser.add_argument("--repeat", type=int, default=DEFAULT_BENCHMARK_REPEAT, help="繰り返す回数")
+    benchmark_parser.set_defaults(func=cmd_mux_benchmark)
+
+    status_parser = subparsers.add_parser("status", help="キューの状態を表示")
+    status_parser.add_argument("--queue", required=True, help="キューのSQLiteファイル")
+    status_parser.set_defaults(func=cmd_status)
+
+    return parser
+
+def main(argv, config_path):
+    """コマンドラインモードのエントリポイント"""
+    args = build_parser().parse_args(argv)
+    config = load_config(args.config or config_path)
+    if args.resources:
+        config.set("Settings", "resource_preset", args.resources)
+    apply_config(config)
+    if not args.profile:
+        return args.func(args, config)
+    start_session(args.profile_dir or profile_dir(config, get_temp_dir(config)))
+    try:
+        with profile_section(f"cli:{args.command}"):
+            return args.func(args, config)
+    finally:
+        print(f"プロファイルを出力しました: {finish_session()}")
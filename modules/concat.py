@@ -0,0 +1,124 @@
+import struct
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from .isobmff import parse_movie, find_child, check_structure, BoxError
+from .verify import mux_checker, DEFAULT_SPOT_CHECK_SAMPLES
+from .core import (ToolError, build_track_args, stage_subtitles, run_command, check_result,
+                   partial_output_path, commit_output, remove_files)
+
+# 事前確認を並列に行うスレッド数の既定値
+DEFAULT_PRECHECK_WORKERS = 8
+
+# 映像のサンプルエントリでデコーダ設定を持つ子ボックス
+VIDEO_CONFIG_BOXES = ('avcC', 'hvcC', 'av1C', 'vpcC')
+
+class ConcatError(Exception):
+    """結合する入力ファイルの形式が一致しないときの例外"""
+
+def track_signature(data, track):
+    """結合の可否を判定するためのトラックの特徴（ハンドラ・コーデック・デコーダ設定）を取得"""
+    handler = track.get('handler')
+    if not track['sample_entries']:
+        return (handler, None, None)
+    entry_type, start, end = track['sample_entries'][0]
+    detail = None
+    if handler == 'vide':
+        # VisualSampleEntry: 解像度とデコーダ設定（SPS/PPSなど）
+        width, height = struct.unpack_from('>HH', data, start + 24)
+        config = b''
+        for box_type in VIDEO_CONFIG_BOXES:
+            box = find_child(data, start + 78, end, box_type)
+            if box is not None:
+                config = data[box[0]:box[1]]
+                break
+        detail = (width, height, hashlib.sha256(config).hexdigest())
+    elif handler == 'soun':
+        # AudioSampleEntry: チャンネル数とサンプリングレート
+        channels = struct.unpack_from('>H', data, start + 16)[0]
+        sample_rate = struct.unpack_from('>I', data, start + 24)[0] >> 16
+        detail = (channels, sample_rate)
+    # 字幕などはコーデックの種類のみ比較する
+    return (handler, entry_type, detail)
+
+def read_segment(file_path):
+    """結合する入力ファイルのトラックの特徴と長さを取得"""
+    movie = parse_movie(file_path)
+    return {
+        'file': file_path,
+        'duration': movie['duration'] / movie['timescale'] if movie['timescale'] else 0,
+        'tracks': [track_signature(movie['moov'], track) for track in movie['tracks']]
+    }
+
+def check_compatibility(input_files, max_workers=DEFAULT_PRECHECK_WORKERS):
+    """全入力ファイルのmoovを並列に読み取り、先頭のファイルと結合できるか確認
+
+    問題があればConcatErrorを送出し、問題がなければ各入力の情報を返す。
+    """
+    def read(file_path):
+        try:
+            return read_segment(file_path)
+        except (OSError, BoxError) as e:
+            return {'file': file_path, 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        segments = list(executor.map(read, input_files))
+
+    problems = [f"{segment['file']}: 読み取れません ({segment['error']})"
+                for segment in segments if 'error' in segment]
+    if not problems:
+        reference = segments[0]
+        for segment in segments[1:]:
+            if len(segment['tracks']) != len(reference['tracks']):
+                problems.append(f"{segment['file']}: トラック数が一致しません "
+                                f"(期待: {len(reference['tracks'])}, 実際: {len(segment['tracks'])})")
+                continue
+            for i, (expected, actual) in enumerate(zip(reference['tracks'], segment['tracks']), 1):
+                if expected != actual:
+                    problems.append(f"{segment['file']}: トラック{i}の形式が一致しません "
+                                    f"(期待: {expected[:2]}, 実際: {actual[:2]})")
+    if problems:
+        raise ConcatError("結合できない入力ファイルがあります:\n" + "\n".join(problems))
+    return segments
+
+def build_concat_args(mp4box_path, job, staged_paths):
+    """MP4Boxの結合コマンドを構築
+
+    jobはcore.build_mux_argsと同じ形式で、input_fileの代わりに
+    inputs（結合する順の入力ファイルのリスト）を持つ。
+    """
+    inputs = job['inputs']
+    args = [mp4box_path, '-add', inputs[0]]
+    for input_file in inputs[1:]:
+        args.extend(['-cat', input_file])
+
+    # 言語・デフォルト設定と字幕の追加（結合後のトラックに適用）
+    args.extend(build_track_args(job, staged_paths))
+
+    args.extend(['-new', '-out', job['output_file']])
+    return args
+
+def concat(tools, job, temp_dir, on_output=None, verify=True,
+           spot_check_samples=DEFAULT_SPOT_CHECK_SAMPLES, max_workers=DEFAULT_PRECHECK_WORKERS):
+    """複数のMP4ファイルを再エンコードせずに結合して出力
+
+    書き込みを始める前に全入力の形式を確認し、出力は一時ファイルに書いてから置き換える。
+    """
+    if 'mp4box' not in tools:
+        raise ToolError("MP4Boxの設定が見つかりません。")
+    if not job.get('inputs'):
+        raise ConcatError("結合する入力ファイルが指定されていません")
+    segments = check_compatibility(job['inputs'], max_workers)
+    job = dict(job,
+               input_track_count=job.get('input_track_count', len(segments[0]['tracks'])),
+               input_duration=job.get('input_duration', sum(segment['duration'] for segment in segments)))
+
+    temp_output = partial_output_path(job['output_file'])
+    staged_paths = stage_subtitles(job, temp_dir)
+    try:
+        args = build_concat_args(tools['mp4box'], dict(job, output_file=temp_output), staged_paths)
+        returncode, stdout, stderr = run_command(args, on_output)
+        check_result("MP4Box", returncode, stdout, stderr, temp_output)
+        check = mux_checker(job, spot_check_samples) if verify else check_structure
+        commit_output(temp_output, job['output_file'], check)
+    finally:
+        remove_files(staged_paths + [temp_output])
@@ -0,0 +1,374 @@
+import os
+import sys
+import json
+import uuid
+import threading
+import subprocess
+from .resources import popen, device_slots
+from .profiling import profiled
+from .chapters import stage_chapters
+from .verify import first_added_track_id
+
+# 入力として扱うメディアファイルの拡張子
+MEDIA_EXTENSIONS = ['.mp4', '.m4v', '.mkv']
+# 入力として扱う字幕ファイルの拡張子
+SUBTITLE_EXTENSIONS = ['.srt', '.ass', '.ssa', '.txt', '.vtt', '.smi', '.sup', '.dvb', '.ttx', '.tx3g']
+
+# コーデックごとのエクスポート時の拡張子
+SUBTITLE_EXPORT_EXTENSIONS = {
+    'subrip': 'srt',
+    'ass': 'ass',
+    'ssa': 'ssa',
+    'mov_text': 'txt',
+    'text': 'txt',
+    'dvd_subtitle': 'sub',  # DVD字幕の拡張子は.sub
+    'hdmv_pgs_subtitle': 'sup',
+    'dvb_subtitle': 'dvb',
+    'dvb_teletext': 'ttx',
+    'webvtt': 'vtt',
+    'sami': 'smi',
+    'tx3g': 'tx3g'
+}
+
+class ToolError(Exception):
+    """外部ツールの実行に失敗したときの例外"""
+
+    def __init__(self, message, returncode=None, stdout="", stderr=""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+def find_executable(directory, name):
+    """ディレクトリ内の実行ファイルを探す（Windowsでは.exeを優先）"""
+    candidates = [f"{name}.exe", name] if sys.platform == 'win32' else [name, f"{name}.exe"]
+    for candidate in candidates:
+        path = os.path.join(directory, candidate)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, candidates[0])
+
+def get_tool_paths(config):
+    """設定ファイルから外部ツールのパスを取得"""
+    tools = {}
+    if config.has_option("Settings", "mp4box_path"):
+        tools['mp4box'] = config.get("Settings", "mp4box_path")
+    if config.has_option("Settings", "ffmpeg_path"):
+        ffmpeg_path = config.get("Settings", "ffmpeg_path")
+        tools['ffmpeg'] = ffmpeg_path
+        ffprobe_path = find_executable(os.path.dirname(ffmpeg_path), "ffprobe")
+        tools['ffprobe'] = ffprobe_path if os.path.exists(ffprobe_path) else "ffprobe"
+    if config.has_option("Settings", "mkv_path"):
+        tools['mkv_dir'] = config.get("Settings", "mkv_path")
+    return tools
+
+def build_probe_args(ffprobe_path, file_path):
+    """ffprobeコマンドを構築（ffmpeg.probeと同じ出力形式）"""
+    return [ffprobe_path, '-show_format', '-show_streams', '-of', 'json', file_path]
+
+@profiled('parse_probe_output')
+def parse_probe_output(stdout):
+    """ffprobeのJSON出力を解析"""
+    return json.loads(stdout)
+
+def stage_subtitles(job, temp_dir):
+    """追加する字幕ファイルを一時ディレクトリにコピー
+
+    job['subtitles']と同じ順序で一時ファイルのパスを返す。
+    job['chapters']がある場合は、OGM形式に変換したチャプターファイルのパスを最後に追加する。
+    """
+    os.makedirs(temp_dir, exist_ok=True)
+    staged_paths = []
+    for subtitle in job.get('subtitles', []):
+        subtitle_file = subtitle['file']
+        temp_subtitle = os.path.join(
+            temp_dir,
+            f"sub_{uuid.uuid4().hex[:16]}{os.path.splitext(subtitle_file)[1]}"
+        )
+        with open(subtitle_file, 'rb') as src, open(temp_subtitle, 'wb') as dst:
+            dst.write(src.read())
+        staged_paths.append(temp_subtitle)
+    if job.get('chapters'):
+        try:
+            staged_paths.append(stage_chapters(job['chapters'], temp_dir))
+        except Exception:
+            remove_files(staged_paths)
+            raise
+    return staged_paths
+
+def remove_files(paths):
+    """一時ファイルを削除（失敗は無視）"""
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+def partial_output_path(output_file):
+    """出力先と同じディレクトリに置く書き込み途中の一時ファイルのパスを取得
+
+    拡張子で出力形式が決まるツールがあるため、拡張子は元のまま残す。
+    """
+    dir_name = os.path.dirname(os.path.abspath(output_file))
+    base_name, ext = os.path.splitext(os.path.basename(output_file))
+    return os.path.join(dir_name, f".{base_name}.{uuid.uuid4().hex[:8]}.partial{ext}")
+
+def fsync_path(path):
+    """ファイル（またはディレクトリ）の内容をディスクに同期"""
+    if os.path.isdir(path):
+        # Windowsではディレクトリを開けないため省略
+        if sys.platform == 'win32':
+            return
+        fd = os.open(path, os.O_RDONLY)
+    else:
+        fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def commit_output(temp_file, output_file, check=None):
+    """書き込みが完了した一時ファイルを出力先に置き換える
+
+    ディスクに同期し、checkを指定した場合はその関数で出力を検証してから置き換える。
+    """
+    fsync_path(temp_file)
+    if check is not None:
+        check(temp_file)
+    os.replace(temp_file, output_file)
+    fsync_path(os.path.dirname(os.path.abspath(output_file)))
+
+def build_mux_args(mp4box_path, job, staged_paths):
+    """MP4Boxの多重化コマンドを構築
+
+    jobは以下の形式の辞書:
+        input_file, output_file: 入出力ファイル
+        video_language: 映像の言語コード（省略時は入力のまま）
+        audio: [{'language': 言語コード, 'default': bool}, ...]
+        subtitles: [{'file': 字幕ファイル, 'language': 言語コード,
+                     'default': bool, 'forced': bool, 'delay': 秒（省略可）}, ...]
+        input_track_count: 入力ファイルのトラック数（省略可。drop_tracksを指定する場合は必須）
+        drop_tracks: 出力しない入力ファイルのトラックID（1から）のリスト（省略可）
+        input_duration: 入力ファイルの長さ（秒、省略可。出力の検証に使用）
+        chapters: チャプターファイル（OGM/XML/CSV）のパス、または
+                  [{'start': 秒またはH:M:S, 'title': タイトル}, ...]（省略可）
+        webvtt: 追加する字幕をWebVTTのセグメントとHLSのプレイリストとしても出力する設定（省略可）
+                {'segment_duration': 秒, 'mpegts_offset': 90kHz, 'output_dir': 出力先}（各項目も省略可）
+        backend: 多重化バックエンド（'mp4box'または'mkvmerge'、省略時は出力ファイルの拡張子で選ぶ。
+                 mux_backend.get_mux_backendを参照）
+        interleave: サンプルを並べ直すチャンクの長さ（ミリ秒、省略時はMP4Boxの既定。MP4Boxのみ）
+    """
+    args = [mp4box_path]
+
+    # 新しいMP4ファイルを作成（除外するトラックがある場合は残すトラックだけを1回で選択）
+    args.extend(build_input_args(job))
+
+    # 言語・デフォルト設定と字幕の追加
+    args.extend(build_track_args(job, staged_paths))
+
+    # 同じ処理の中でトラックのサンプルを指定した長さのチャンクで交互に並べる
+    if job.get('interleave'):
+        args.extend(['-inter', str(job['interleave'])])
+
+    # 出力ファイルを指定
+    args.extend(['-new', '-out', job['output_file']])
+    return args
+
+def build_input_args(job):
+    """入力ファイルを追加するMP4Boxの引数を構築（drop_tracksのトラックは#trackIDで除外）"""
+    drop_tracks = set(job.get('drop_tracks', []))
+    if not drop_tracks:
+        return ['-add', job['input_file']]
+    if 'input_track_count' not in job:
+        raise ToolError("入力ファイルのトラック数が分からないため、トラックを除外できません。")
+    kept = [track_id for track_id in range(1, job['input_track_count'] + 1) if track_id not in drop_tracks]
+    if not kept:
+        raise ToolError("すべてのトラックが除外されています。")
+    args = []
+    for track_id in kept:
+        args.extend(['-add', f"{job['input_file']}#trackID={track_id}"])
+    return args
+
+def mux_tracks(job):
+    """ジョブから出力するトラックの一覧を作成（各多重化バックエンドの引数はこの一覧から作る）
+
+    出力の順に{'track_id': 出力のトラックID（MP4Boxの番号、1から）, 'input_track_id': 入力ファイルの
+    トラックID（1から、追加する字幕はNone）, 'subtitle_index': job['subtitles']の番号（入力のトラックはNone）,
+    'kind', 'language', 'default', 'forced', 'delay'}を返す。language/default/forcedがNoneの項目は変更しない。
+    """
+    # 除外したトラックはトラックIDが空くだけで、残りのトラックIDは変わらない
+    drop_tracks = set(job.get('drop_tracks', []))
+    tracks = []
+    if 1 not in drop_tracks:
+        tracks.append({'track_id': 1, 'input_track_id': 1, 'subtitle_index': None, 'kind': 'video',
+                       'language': job.get('video_language'), 'default': None, 'forced': None,
+                       'delay': 0})
+    for i, audio in enumerate(job.get('audio', [])):
+        if i + 2 in drop_tracks:
+            continue
+        tracks.append({'track_id': i + 2, 'input_track_id': i + 2, 'subtitle_index': None, 'kind': 'audio',
+                       'language': audio['language'], 'default': bool(audio.get('default')), 'forced': None,
+                       'delay': 0})
+    # 追加する字幕は入力ファイルの残すトラックの後ろに並ぶ
+    track_id = first_added_track_id(job)
+    for i, subtitle in enumerate(job.get('subtitles', [])):
+        tracks.append({'track_id': track_id + i, 'input_track_id': None, 'subtitle_index': i,
+                       'kind': 'subtitle', 'language': subtitle['language'],
+                       'default': bool(subtitle.get('default')), 'forced': bool(subtitle.get('forced')),
+                       'delay': subtitle.get('delay', 0)})
+    return tracks
+
+def build_track_args(job, staged_paths):
+    """映像・音声の言語とデフォルト設定、字幕の追加を行うMP4Boxの引数を構築"""
+    args = []
+    subtitles = job.get('subtitles', [])
+    for track in mux_tracks(job):
+        if track['subtitle_index'] is not None:
+            if track['subtitle_index'] >= len(staged_paths):
+                continue
+            # 字幕の追加（字幕ファイルの種類に応じて適切なオプションを追加）
+            ext = os.path.splitext(subtitles[track['subtitle_index']]['file'])[1].lower()
+            temp_subtitle = staged_paths[track['subtitle_index']]
+            source = f'{temp_subtitle}:fmt=tx3g' if ext == '.srt' else temp_subtitle
+            # 表示タイミングの補正（ミリ秒）
+            if track['delay']:
+                source += f":delay={int(round(track['delay'] * 1000))}"
+            args.extend(['-add', source])
+
+        # 言語設定（指定がなければ入力のまま）
+        if track['language'] is not None:
+            args.extend(['-lang', f"{track['track_id']}={track['language']}"])
+
+        # デフォルトと強制フラグの設定
+        if track['default']:
+            args.extend(['-def', str(track['track_id'])])
+        if track['forced']:
+            args.extend(['-force', str(track['track_id'])])
+
+    # チャプターの追加（トラックは増えず、Neroのチャプターとして書き込まれる）
+    if job.get('chapters') and len(staged_paths) > len(subtitles):
+        args.extend(['-chap', staged_paths[len(subtitles)]])
+    return args
+
+def build_extract_args(tools, input_file, stream_index, output_file):
+    """字幕抽出コマンドを構築（MKVはmkvextract、それ以外はMP4Box）"""
+    if os.path.splitext(input_file)[1].lower() == '.mkv':
+        if 'mkv_dir' not in tools:
+            raise ToolError("MKVToolNixの設定が見つかりません。")
+        mkvextract_path = find_executable(tools['mkv_dir'], "mkvextract")
+        if not os.path.exists(mkvextract_path):
+            raise ToolError(f"MKVToolNixの実行ファイルが見つかりません: {mkvextract_path}")
+        # MKVToolNixでは字幕ストリームのインデックスは0から始まる
+        # 正しい形式: mkvextract 入力ファイル トラックID:出力ファイル
+        return [mkvextract_path, "tracks", input_file, f"{stream_index}:{output_file}"]
+
+    if 'mp4box' not in tools:
+        raise ToolError("MP4Boxの設定が見つかりません。")
+    # MP4Boxでは字幕ストリームのインデックスは1から始まる
+    return [tools['mp4box'], '-raw', str(stream_index + 1), input_file, '-out', output_file]
+
+def run_command(args, on_output=None):
+    """外部コマンドを実行し、(終了コード, 標準出力, エラー出力)を返す
+
+    on_outputを指定すると標準出力を1行ずつ渡す。
+    設定されたリソースの方針（優先度・cgroup・デバイスごとの同時実行数）を適用して実行する。
+    """
+    with device_slots(args):
+        process = popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1
+        )
+
+        # エラー出力は別スレッドで読み取り、パイプが詰まらないようにする
+        stderr_lines = []
+        stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr))
+        stderr_thread.daemon = True
+        stderr_thread.start()
+
+        stdout_lines = []
+        for line in process.stdout:
+            stdout_lines.append(line)
+            if on_output is not None and line.strip():
+                on_output(line.strip())
+        process.wait()
+        stderr_thread.join()
+
+    return process.returncode, "".join(stdout_lines), "".join(stderr_lines)
+
+def _read_full(stream, view):
+    """バッファがいっぱいになるか終端に達するまで読み込み、読み込んだバイト数を返す"""
+    total = 0
+    while total < len(view):
+        n = stream.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+def stream_output(tool_name, args, view):
+    """外部コマンドのバイナリ出力を固定長のバッファに読み込む
+
+    viewがいっぱいになるたび（最後は読み込めた分だけ）読み込んだバイト数を返すジェネレータ。
+    コマンドが失敗した場合は最後にToolErrorを送出する。
+    """
+    with device_slots(args):
+        process = popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # エラー出力は別スレッドで読み取り、パイプが詰まらないようにする
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=lambda: stderr_chunks.extend(process.stderr))
+        stderr_thread.daemon = True
+        stderr_thread.start()
+        try:
+            while True:
+                size = _read_full(process.stdout, view)
+                if size:
+                    yield size
+                if size < len(view):
+                    break
+        finally:
+            process.stdout.close()
+            process.wait()
+            stderr_thread.join()
+
+    if process.returncode != 0:
+        stderr = b"".join(stderr_chunks).decode('utf-8', 'replace')
+        raise ToolError(f"{tool_name}エラー: {stderr if stderr else '不明なエラー'}",
+                        process.returncode, "", stderr)
+
+def check_result(tool_name, returncode, stdout, stderr, output_file=None):
+    """実行結果を確認し、失敗していればToolErrorを送出"""
+    if returncode != 0:
+        raise ToolError(f"{tool_name}エラー: {stderr if stderr else '不明なエラー'}",
+                        returncode, stdout, stderr)
+    # 出力ファイルの存在確認
+    if output_file is not None and not os.path.exists(output_file):
+        raise ToolError(f"出力ファイルが作成されませんでした。\n終了コード: {returncode}\n"
+                        f"標準出力:\n{stdout}\nエラー出力:\n{stderr}",
+                        returncode, stdout, stderr)
+
+@profiled('probe')
+def probe(tools, file_path):
+    """メディア情報を取得"""
+    args = build_probe_args(tools.get('ffprobe', 'ffprobe'), file_path)
+    returncode, stdout, stderr = run_command(args)
+    check_result("ffprobe", returncode, stdout, stderr)
+    return parse_probe_output(stdout)
+
+def extract_subtitle(tools, input_file, stream_index, output_file):
+    """字幕ストリームを抽出（一時ファイルに書き込んでから置き換える）"""
+    temp_output = partial_output_path(output_file)
+    try:
+        args = build_extract_args(tools, input_file, stream_index, temp_output)
+        tool_name = "MKVToolNix" if os.path.splitext(input_file)[1].lower() == '.mkv' else "MP4Box"
+        returncode, stdout, stderr = run_command(args)
+        check_result(tool_name, returncode, stdout, stderr, temp_output)
+        commit_output(temp_output, output_file)
+    finally:
+        remove_files([temp_output])
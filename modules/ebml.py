@@ -0,0 +1,399 @@
+import os
+import struct
+
+# EBML/Matroskaの要素ID
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TITLE = 0x7BA9
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+TRACK_UID = 0x73C5
+TRACK_TYPE = 0x83
+FLAG_DEFAULT = 0x88
+FLAG_FORCED = 0x55AA
+FLAG_ENABLED = 0xB9
+CODEC_ID = 0x86
+LANGUAGE = 0x22B59C
+LANGUAGE_IETF = 0x22B59D
+NAME = 0x536E
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+CHAPTERS = 0x1043A770
+EDITION_ENTRY = 0x45B9
+CHAPTER_ATOM = 0xB6
+CHAPTER_TIME_START = 0x91
+CHAPTER_TIME_END = 0x92
+CHAPTER_DISPLAY = 0x80
+CHAP_STRING = 0x85
+CHAP_LANGUAGE = 0x437C
+TAGS = 0x1254C367
+TAG = 0x7373
+TARGETS = 0x63C0
+TAG_TRACK_UID = 0x63C5
+SIMPLE_TAG = 0x67C8
+TAG_NAME = 0x45A3
+TAG_STRING = 0x4487
+CLUSTER = 0x1F43B675
+
+# 読み取り対象のトップレベル要素
+TARGET_ELEMENTS = (SEEK_HEAD, INFO, TRACKS, CHAPTERS, TAGS)
+
+TRACK_TYPES = {1: 'video', 2: 'audio', 0x11: 'subtitle', 0x12: 'button', 0x10: 'logo', 0x20: 'control'}
+
+# MatroskaのコーデックIDからffprobeのコーデック名への対応
+CODEC_NAMES = {
+    'V_MPEG4/ISO/AVC': 'h264',
+    'V_MPEGH/ISO/HEVC': 'hevc',
+    'V_AV1': 'av1',
+    'V_VP9': 'vp9',
+    'V_VP8': 'vp8',
+    'V_MPEG2': 'mpeg2video',
+    'V_MPEG4/ISO/ASP': 'mpeg4',
+    'A_AAC': 'aac',
+    'A_AC3': 'ac3',
+    'A_EAC3': 'eac3',
+    'A_DTS': 'dts',
+    'A_OPUS': 'opus',
+    'A_VORBIS': 'vorbis',
+    'A_FLAC': 'flac',
+    'A_MPEG/L3': 'mp3',
+    'A_TRUEHD': 'truehd',
+    'A_PCM/INT/LIT': 'pcm_s16le',
+    'S_TEXT/UTF8': 'subrip',
+    'S_TEXT/ASS': 'ass',
+    'S_TEXT/SSA': 'ssa',
+    'S_TEXT/WEBVTT': 'webvtt',
+    'S_HDMV/PGS': 'hdmv_pgs_subtitle',
+    'S_HDMV/TEXTST': 'hdmv_text_subtitle',
+    'S_VOBSUB': 'dvd_subtitle',
+    'S_DVBSUB': 'dvb_subtitle'
+}
+
+class EbmlError(Exception):
+    """EBML/Matroskaの構造が不正なときの例外"""
+
+def _vint_length(first_byte):
+    """可変長整数の先頭バイトから長さを取得"""
+    for length in range(1, 9):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    raise EbmlError("可変長整数が不正です")
+
+def read_element_header(data, pos):
+    """要素ヘッダーを読み取り、(要素ID, データサイズ, データの開始位置)を返す
+
+    サイズが不明（全ビットが1）の場合はデータサイズをNoneで返す。
+    """
+    if pos >= len(data):
+        raise EbmlError("要素ヘッダーが途中で終わっています")
+    id_length = _vint_length(data[pos])
+    element_id = int.from_bytes(data[pos:pos + id_length], 'big')
+    pos += id_length
+    if pos >= len(data):
+        raise EbmlError("要素ヘッダーが途中で終わっています")
+    size_length = _vint_length(data[pos])
+    size = int.from_bytes(data[pos:pos + size_length], 'big') & ((1 << (7 * size_length)) - 1)
+    if size == (1 << (7 * size_length)) - 1:
+        size = None
+    return element_id, size, pos + size_length
+
+def iter_elements(data, start, end):
+    """メモリ上の範囲から子要素を順に返す（要素ID, データ開始位置, データ終了位置）"""
+    pos = start
+    while pos < end:
+        element_id, size, data_start = read_element_header(data, pos)
+        data_end = end if size is None else data_start + size
+        if data_end > end:
+            raise EbmlError(f"要素 0x{element_id:X} が範囲外まで続いています")
+        yield element_id, data_start, data_end
+        pos = data_end
+
+def _uint(data, start, end):
+    return int.from_bytes(data[start:end], 'big')
+
+def _float(data, start, end):
+    if end - start == 4:
+        return struct.unpack('>f', data[start:end])[0]
+    if end - start == 8:
+        return struct.unpack('>d', data[start:end])[0]
+    return 0.0
+
+def _string(data, start, end):
+    return data[start:end].split(b'\0')[0].decode('utf-8', errors='replace')
+
+def _read_header_at(f, offset, end):
+    """offsetの位置にある要素のヘッダーを読み取り、(要素ID, データの開始位置, 要素全体のサイズ)を返す"""
+    f.seek(offset)
+    element_id, size, data_start = read_element_header(f.read(12), 0)
+    if size is None:
+        size = end - offset - data_start
+    return element_id, offset + data_start, data_start + size
+
+def parse_seek_head(data):
+    """SeekHeadから{要素ID: セグメント内の位置}を取得"""
+    positions = {}
+    for element_id, start, end in iter_elements(data, 0, len(data)):
+        if element_id != SEEK:
+            continue
+        seek_id = seek_position = None
+        for child_id, child_start, child_end in iter_elements(data, start, end):
+            if child_id == SEEK_ID:
+                seek_id = _uint(data, child_start, child_end)
+            elif child_id == SEEK_POSITION:
+                seek_position = _uint(data, child_start, child_end)
+        if seek_id is not None and seek_position is not None:
+            positions.setdefault(seek_id, []).append(seek_position)
+    return positions
+
+def parse_info(data):
+    """Infoからタイムスケール・長さ・タイトルを取得"""
+    info = {'timestamp_scale': 1000000, 'duration': None, 'title': None}
+    duration = None
+    for element_id, start, end in iter_elements(data, 0, len(data)):
+        if element_id == TIMESTAMP_SCALE:
+            info['timestamp_scale'] = _uint(data, start, end)
+        elif element_id == DURATION:
+            duration = _float(data, start, end)
+        elif element_id == TITLE:
+            info['title'] = _string(data, start, end)
+    if duration is not None:
+        info['duration'] = duration * info['timestamp_scale'] / 1e9
+    return info
+
+def parse_tracks(data):
+    """Tracksからトラック一覧を取得
+
+    idはmkvextract/mkvmergeのトラックID（Tracks内の順番、0から）。
+    """
+    tracks = []
+    for element_id, start, end in iter_elements(data, 0, len(data)):
+        if element_id != TRACK_ENTRY:
+            continue
+        # Matroskaの既定値（言語はeng、デフォルトフラグは1）
+        track = {
+            'id': len(tracks), 'number': None, 'uid': None, 'type': None, 'codec_id': '',
+            'language': 'eng', 'language_ietf': None, 'name': None,
+            'default': True, 'forced': False, 'enabled': True
+        }
+        for child_id, child_start, child_end in iter_elements(data, start, end):
+            if child_id == TRACK_NUMBER:
+                track['number'] = _uint(data, child_start, child_end)
+            elif child_id == TRACK_UID:
+                track['uid'] = _uint(data, child_start, child_end)
+            elif child_id == TRACK_TYPE:
+                track_type = _uint(data, child_start, child_end)
+                track['type'] = TRACK_TYPES.get(track_type, str(track_type))
+            elif child_id == CODEC_ID:
+                track['codec_id'] = _string(data, child_start, child_end)
+            elif child_id == LANGUAGE:
+                track['language'] = _string(data, child_start, child_end)
+            elif child_id == LANGUAGE_IETF:
+                track['language_ietf'] = _string(data, child_start, child_end)
+            elif child_id == NAME:
+                track['name'] = _string(data, child_start, child_end)
+            elif child_id == FLAG_DEFAULT:
+                track['default'] = bool(_uint(data, child_start, child_end))
+            elif child_id == FLAG_FORCED:
+                track['forced'] = bool(_uint(data, child_start, child_end))
+            elif child_id == FLAG_ENABLED:
+                track['enabled'] = bool(_uint(data, child_start, child_end))
+            elif child_id == VIDEO:
+                for video_id, video_start, video_end in iter_elements(data, child_start, child_end):
+                    if video_id == PIXEL_WIDTH:
+                        track['width'] = _uint(data, video_start, video_end)
+                    elif video_id == PIXEL_HEIGHT:
+                        track['height'] = _uint(data, video_start, video_end)
+            elif child_id == AUDIO:
+                for audio_id, audio_start, audio_end in iter_elements(data, child_start, child_end):
+                    if audio_id == SAMPLING_FREQUENCY:
+                        track['sample_rate'] = int(_float(data, audio_start, audio_end))
+                    elif audio_id == CHANNELS:
+                        track['channels'] = _uint(data, audio_start, audio_end)
+        tracks.append(track)
+    return tracks
+
+def _parse_chapter_atom(data, start, end, chapters):
+    chapter = {'start': 0.0, 'end': None, 'title': '', 'language': None}
+    for element_id, child_start, child_end in iter_elements(data, start, end):
+        if element_id == CHAPTER_TIME_START:
+            chapter['start'] = _uint(data, child_start, child_end) / 1e9
+        elif element_id == CHAPTER_TIME_END:
+            chapter['end'] = _uint(data, child_start, child_end) / 1e9
+        elif element_id == CHAPTER_DISPLAY:
+            for display_id, display_start, display_end in iter_elements(data, child_start, child_end):
+                if display_id == CHAP_STRING and not chapter['title']:
+                    chapter['title'] = _string(data, display_start, display_end)
+                elif display_id == CHAP_LANGUAGE and chapter['language'] is None:
+                    chapter['language'] = _string(data, display_start, display_end)
+    chapters.append(chapter)
+    # 入れ子のチャプターも順に追加
+    for element_id, child_start, child_end in iter_elements(data, start, end):
+        if element_id == CHAPTER_ATOM:
+            _parse_chapter_atom(data, child_start, child_end, chapters)
+
+def parse_chapters(data):
+    """Chaptersからチャプター一覧を取得（最初のエディションのみ）"""
+    chapters = []
+    for element_id, start, end in iter_elements(data, 0, len(data)):
+        if element_id != EDITION_ENTRY:
+            continue
+        for child_id, child_start, child_end in iter_elements(data, start, end):
+            if child_id == CHAPTER_ATOM:
+                _parse_chapter_atom(data, child_start, child_end, chapters)
+        break
+    return chapters
+
+def parse_tags(data):
+    """Tagsからタグ一覧を取得（track_uidがNoneのものはファイル全体のタグ）"""
+    tags = []
+    for element_id, start, end in iter_elements(data, 0, len(data)):
+        if element_id != TAG:
+            continue
+        track_uid = None
+        for child_id, child_start, child_end in iter_elements(data, start, end):
+            if child_id == TARGETS:
+                for target_id, target_start, target_end in iter_elements(data, child_start, child_end):
+                    if target_id == TAG_TRACK_UID:
+                        track_uid = _uint(data, target_start, target_end)
+            elif child_id == SIMPLE_TAG:
+                name = value = None
+                for simple_id, simple_start, simple_end in iter_elements(data, child_start, child_end):
+                    if simple_id == TAG_NAME:
+                        name = _string(data, simple_start, simple_end)
+                    elif simple_id == TAG_STRING:
+                        value = _string(data, simple_start, simple_end)
+                if name is not None:
+                    tags.append({'track_uid': track_uid, 'name': name, 'value': value})
+    return tags
+
+def read_matroska(file_path):
+    """MKVファイルのヘッダー部分（SeekHead/Info/Tracks/Chapters/Tags）だけを読み取る
+
+    SeekHeadに従って必要な要素の位置へ直接移動し、クラスターは読み飛ばす。
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        element_id, _, header_total = _read_header_at(f, 0, file_size)
+        if element_id != EBML_HEADER:
+            raise EbmlError("EBMLヘッダーが見つかりません")
+
+        f.seek(header_total)
+        element_id, size, data_start = read_element_header(f.read(12), 0)
+        if element_id != SEGMENT:
+            raise EbmlError("Segmentが見つかりません")
+        segment_start = header_total + data_start
+        segment_end = file_size if size is None else min(file_size, segment_start + size)
+
+        elements = {}
+        pending = []  # SeekHeadで見つかった未読の位置
+        visited = set()
+
+        def load(offset):
+            """要素を読み取り、対象の要素ならデータを保持する"""
+            visited.add(offset)
+            element_id, data_offset, total = _read_header_at(f, offset, segment_end)
+            if element_id == SEEK_HEAD or (element_id in TARGET_ELEMENTS and element_id not in elements):
+                f.seek(data_offset)
+                data = f.read(offset + total - data_offset)
+                if element_id == SEEK_HEAD:
+                    for seek_id, positions in parse_seek_head(data).items():
+                        if seek_id in TARGET_ELEMENTS:
+                            pending.extend(segment_start + position for position in positions)
+                else:
+                    elements[element_id] = data
+            return element_id, total
+
+        # 先頭から順に読み、最初のクラスターに到達したら止める
+        offset = segment_start
+        while offset < segment_end:
+            element_id, total = load(offset)
+            if element_id == CLUSTER:
+                break
+            offset += total
+
+        # クラスターより後ろにある要素はSeekHeadの位置から読む
+        while pending:
+            offset = pending.pop(0)
+            if offset not in visited and offset < segment_end:
+                load(offset)
+
+    if TRACKS not in elements:
+        raise EbmlError("Tracksが見つかりません")
+
+    info = parse_info(elements[INFO]) if INFO in elements else {'duration': None, 'title': None}
+    return {
+        'file_size': file_size,
+        'duration': info['duration'],
+        'title': info['title'],
+        'tracks': parse_tracks(elements[TRACKS]),
+        'chapters': parse_chapters(elements[CHAPTERS]) if CHAPTERS in elements else [],
+        'tags': parse_tags(elements[TAGS]) if TAGS in elements else []
+    }
+
+def check_structure(file_path):
+    """出力ファイルのEBMLヘッダー・Segment・Tracksを簡易チェック（問題があればEbmlErrorを送出）"""
+    if not read_matroska(file_path)['tracks']:
+        raise EbmlError("トラックがありません")
+
+def codec_name(codec_id):
+    """MatroskaのコーデックIDをffprobeのコーデック名に変換"""
+    if codec_id in CODEC_NAMES:
+        return CODEC_NAMES[codec_id]
+    for prefix, name in CODEC_NAMES.items():
+        if codec_id.startswith(prefix + '/'):
+            return name
+    return codec_id.lower()
+
+def probe_matroska(file_path):
+    """ffmpeg.probeと同じ形式の辞書を作成
+
+    ストリームのindexにはmkvextractと同じトラックIDを設定する。
+    """
+    info = read_matroska(file_path)
+    format_info = {
+        'filename': file_path,
+        'format_name': 'matroska,webm',
+        'format_long_name': 'Matroska / WebM',
+        'size': str(info['file_size']),
+        'tags': {}
+    }
+    if info['duration'] is not None:
+        format_info['duration'] = str(info['duration'])
+    if info['title']:
+        format_info['tags']['title'] = info['title']
+    for tag in info['tags']:
+        if tag['track_uid'] is None and tag['value'] is not None:
+            format_info['tags'][tag['name'].lower()] = tag['value']
+
+    streams = []
+    for track in info['tracks']:
+        stream = {
+            'index': track['id'],
+            'codec_type': track['type'],
+            'codec_name': codec_name(track['codec_id']),
+            'codec_long_name': track['codec_id'],
+            'tags': {'language': track['language']},
+            'disposition': {'default': int(track['default']), 'forced': int(track['forced'])}
+        }
+        if track['language_ietf']:
+            stream['tags']['language_ietf'] = track['language_ietf']
+        if track['name']:
+            stream['tags']['title'] = track['name']
+        for key in ('width', 'height', 'channels', 'sample_rate'):
+            if key in track:
+                stream[key] = track[key]
+        streams.append(stream)
+
+    return {'format': format_info, 'streams': streams, 'chapters': info['chapters']}
@@ -0,0 +1,157 @@
+from .isobmff import parse_movie, check_structure, BoxError
+from .core import ToolError, run_command, check_result, partial_output_path, commit_output, remove_files
+
+# MP4Boxの-interに渡すチャンクの長さの既定値（ミリ秒）
+DEFAULT_INTERLEAVE_DURATION = 500
+# 問題として報告するインターリーブのずれの既定値（秒）
+DEFAULT_MAX_SKEW = 1.0
+# テキストの字幕トラックのハンドラーと、表示のない区間を埋める空のサンプルの最大サイズ（16ビットの文字数のみ）
+TEXT_HANDLERS = ('text', 'sbtl', 'subt')
+EMPTY_TEXT_SAMPLE_SIZE = 2
+
+class InterleaveError(Exception):
+    """インターリーブを解析できないときの例外"""
+
+def track_chunks(track):
+    """トラックのチャンクごとに(位置, バイト数, 開始時刻, 終了時刻, データの開始時刻)を返す（時刻は秒、デコード順）
+
+    データの開始時刻はチャンク内で最初の空でないサンプルの時刻（テキストの字幕で空のサンプルだけのチャンクはNone）。
+    """
+    stsc = track.get('stsc')
+    stts = track.get('stts')
+    stsz = track.get('stsz')
+    chunk_offsets = track.get('chunk_offsets')
+    timescale = track.get('timescale')
+    if not chunk_offsets or stsc is None or stts is None or stsz is None or not timescale:
+        return []
+
+    skip_empty = track.get('handler') in TEXT_HANDLERS and not isinstance(stsz, int)
+    chunks = []
+    sample = 0  # 次のサンプルの番号（0から）
+    time = 0
+    run = 0  # sttsの現在のエントリ
+    remaining = stts[0] if stts else 0
+    for i in range(0, len(stsc), 3):
+        first_chunk, samples_per_chunk = stsc[i], stsc[i + 1]
+        next_chunk = stsc[i + 3] if i + 3 < len(stsc) else len(chunk_offsets) + 1
+        for chunk in range(first_chunk, min(next_chunk, len(chunk_offsets) + 1)):
+            if isinstance(stsz, int):
+                size = stsz * samples_per_chunk
+            else:
+                size = sum(stsz[sample:sample + samples_per_chunk])
+            start = time
+            data_start = None if skip_empty else start
+            # sttsをサンプル数だけ進める（空のサンプルを除く場合は1サンプルずつ）
+            count = samples_per_chunk
+            while count and run < len(stts):
+                step = 1 if skip_empty else min(count, remaining)
+                if data_start is None and stsz[sample + samples_per_chunk - count] > EMPTY_TEXT_SAMPLE_SIZE:
+                    data_start = time
+                time += step * stts[run + 1]
+                count -= step
+                remaining -= step
+                if not remaining:
+                    run += 2
+                    remaining = stts[run] if run < len(stts) else 0
+            sample += samples_per_chunk
+            chunks.append((chunk_offsets[chunk - 1], size, start / timescale, time / timescale,
+                           None if data_start is None else data_start / timescale))
+    return chunks
+
+def analyze_interleave(file_path):
+    """チャンクの位置（stco/co64）と時刻からトラック間のインターリーブを解析
+
+    ファイルを先頭から読んだときに、各チャンクの開始時刻が他のトラックのまだ読んでいない
+    データの時刻よりどれだけ先にあるか（プレーヤーが先読みしておく必要がある長さ）をずれとして集計する。
+    テキストの字幕の表示のない区間を埋める空のサンプルは、後ろに置かれていても待たない。
+    {'tracks': [{'track_id', 'handler', 'chunks', 'bytes', 'mean_chunk_duration', 'max_chunk_duration'}],
+     'max_skew', 'mean_skew'（秒）, 'max_skew_offset'（ずれが最大のチャンクの位置）,
+     'max_skew_track'（そのチャンクのトラックID）}を返す。
+    """
+    try:
+        movie = parse_movie(file_path, sample_tables=True)
+    except BoxError as e:
+        raise InterleaveError(f"moovを読み取れません: {e}")
+
+    chunks = []
+    tracks = []
+    pending = {}  # トラックID -> 次に読むデータの時刻の一覧（ファイルの位置の順）
+    for track in movie['tracks']:
+        chunk_list = track_chunks(track)
+        if not chunk_list:
+            continue
+        durations = [end - start for _, _, start, end, _ in chunk_list]
+        tracks.append({
+            'track_id': track['track_id'],
+            'handler': track.get('handler'),
+            'chunks': len(chunk_list),
+            'bytes': sum(size for _, size, _, _, _ in chunk_list),
+            'mean_chunk_duration': sum(durations) / len(durations),
+            'max_chunk_duration': max(durations),
+        })
+        chunk_list.sort()
+        pending[track['track_id']] = [data_start for _, _, _, _, data_start in chunk_list if data_start is not None]
+        chunks.extend((offset, start, data_start, track['track_id'])
+                      for offset, _, start, _, data_start in chunk_list)
+    if not tracks:
+        raise InterleaveError("サンプルテーブルのあるトラックがありません")
+
+    # ファイルの位置の順にたどり、トラックごとに次に読むデータの時刻を進める
+    chunks.sort()
+    positions = {track_id: 0 for track_id in pending}
+    max_skew = 0.0
+    max_skew_offset = None
+    max_skew_track = None
+    total_skew = 0.0
+    for offset, start, data_start, track_id in chunks:
+        # 読み終えたトラックは待たない
+        behind = [times[positions[other]] for other, times in pending.items()
+                  if other != track_id and positions[other] < len(times)]
+        skew = max(0.0, start - min(behind)) if behind else 0.0
+        total_skew += skew
+        if skew > max_skew:
+            max_skew, max_skew_offset, max_skew_track = skew, offset, track_id
+        if data_start is not None:
+            positions[track_id] += 1
+
+    return {
+        'tracks': tracks,
+        'max_skew': max_skew,
+        'mean_skew': total_skew / len(chunks),
+        'max_skew_offset': max_skew_offset,
+        'max_skew_track': max_skew_track,
+    }
+
+def interleave_problems(report, max_skew=DEFAULT_MAX_SKEW):
+    """解析結果から問題の一覧を作成（問題がなければ空のリスト）"""
+    problems = []
+    if len(report['tracks']) > 1 and report['max_skew'] > max_skew:
+        problems.append(f"トラック{report['max_skew_track']}のチャンクが他のトラックより"
+                        f"{report['max_skew']:.2f}秒先に配置されています (位置: {report['max_skew_offset']})")
+    return problems
+
+def format_interleave_report(report):
+    """解析結果を表示用の文字列に変換"""
+    lines = [f"ずれ: 最大 {report['max_skew']:.2f}秒, 平均 {report['mean_skew']:.2f}秒"]
+    for track in report['tracks']:
+        lines.append(f"  トラック{track['track_id']} ({track['handler']}): チャンク {track['chunks']}個, "
+                     f"平均 {track['mean_chunk_duration']:.2f}秒, 最大 {track['max_chunk_duration']:.2f}秒, "
+                     f"{track['bytes'] / (1024 * 1024):.1f} MB")
+    return "\n".join(lines)
+
+def build_relayout_args(mp4box_path, input_file, output_file, interleave_duration=DEFAULT_INTERLEAVE_DURATION):
+    """サンプルを指定した長さ（ミリ秒）のチャンクで並べ直すMP4Boxのコマンドを構築"""
+    return [mp4box_path, '-inter', str(interleave_duration), input_file, '-out', output_file]
+
+def relayout(tools, file_path, interleave_duration=DEFAULT_INTERLEAVE_DURATION):
+    """多重化済みのMP4ファイルのサンプルを並べ直す（再エンコードなし、一時ファイルに書き込んでから置き換える）"""
+    if 'mp4box' not in tools:
+        raise ToolError("MP4Boxの設定が見つかりません。")
+    temp_output = partial_output_path(file_path)
+    try:
+        args = build_relayout_args(tools['mp4box'], file_path, temp_output, interleave_duration)
+        returncode, stdout, stderr = run_command(args)
+        check_result("MP4Box", returncode, stdout, stderr, temp_output)
+        commit_output(temp_output, file_path, check_structure)
+    finally:
+        remove_files([temp_output])
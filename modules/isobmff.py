@@ -0,0 +1,301 @@
+import os
+import sys
+import struct
+from array import array
+
+class BoxError(Exception):
+    """MP4（ISOBMFF）のボックス構造が不正なときの例外"""
+
+def read_box_header(f, offset, end):
+    """offsetの位置のボックスヘッダーを読み取り、(タイプ, サイズ, ヘッダーサイズ)を返す"""
+    f.seek(offset)
+    header = f.read(8)
+    if len(header) < 8:
+        raise BoxError(f"ボックスヘッダーが途中で終わっています (位置: {offset})")
+    size, box_type = struct.unpack('>I4s', header)
+    header_size = 8
+    if size == 1:
+        # 64ビットのサイズ
+        large = f.read(8)
+        if len(large) < 8:
+            raise BoxError(f"ボックスヘッダーが途中で終わっています (位置: {offset})")
+        size = struct.unpack('>Q', large)[0]
+        header_size = 16
+    elif size == 0:
+        # ファイル（親ボックス）の終わりまで
+        size = end - offset
+    if size < header_size:
+        raise BoxError(f"ボックスサイズが不正です (位置: {offset}, サイズ: {size})")
+    return box_type.decode('latin-1'), size, header_size
+
+def iter_boxes(f, start, end):
+    """start〜endの範囲にあるボックスを順に返す
+
+    (タイプ, 開始位置, サイズ, ヘッダーサイズ)を返す。
+    """
+    offset = start
+    while offset + 8 <= end:
+        box_type, size, header_size = read_box_header(f, offset, end)
+        if offset + size > end:
+            raise BoxError(f"ボックス '{box_type}' が範囲外まで続いています (位置: {offset}, サイズ: {size})")
+        yield box_type, offset, size, header_size
+        offset += size
+    if offset != end:
+        raise BoxError(f"末尾に不完全なデータがあります (位置: {offset})")
+
+def find_box(f, start, end, box_type):
+    """start〜endの範囲から指定したタイプの最初のボックスを探す（なければNone）"""
+    for found_type, offset, size, header_size in iter_boxes(f, start, end):
+        if found_type == box_type:
+            return offset, size, header_size
+    return None
+
+def check_structure(file_path):
+    """出力ファイルのトップレベル構造とmoovを簡易チェック
+
+    トップレベルのボックスがファイル末尾まで途切れずに並び、
+    moovにmvhdとtrakが含まれていることを確認する。問題があればBoxErrorを送出。
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        moov = None
+        for box_type, offset, size, header_size in iter_boxes(f, 0, file_size):
+            if box_type == 'moov':
+                moov = (offset, size, header_size)
+        if moov is None:
+            raise BoxError("moovボックスが見つかりません")
+
+        offset, size, header_size = moov
+        children = [box_type for box_type, _, _, _ in iter_boxes(f, offset + header_size, offset + size)]
+        if 'mvhd' not in children:
+            raise BoxError("moovにmvhdボックスがありません")
+        if 'trak' not in children:
+            raise BoxError("moovにtrakボックスがありません")
+
+def read_top_level(file_path):
+    """トップレベルのボックス一覧を取得（タイプ, 開始位置, サイズ, ヘッダーサイズ）"""
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        return list(iter_boxes(f, 0, file_size))
+
+def iter_children(data, start, end):
+    """メモリ上のボックス内容から子ボックスを順に返す
+
+    (タイプ, 開始位置, サイズ, ヘッダーサイズ)を返す。
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise BoxError(f"ボックス '{box_type.decode('latin-1')}' のサイズが不正です (位置: {offset})")
+        yield box_type.decode('latin-1'), offset, size, header_size
+        offset += size
+
+def find_child(data, start, end, box_type):
+    """メモリ上のボックス内容から指定したタイプの子ボックスの(内容の開始位置, 終了位置)を返す"""
+    for found_type, offset, size, header_size in iter_children(data, start, end):
+        if found_type == box_type:
+            return offset + header_size, offset + size
+    return None
+
+def find_path(data, start, end, path):
+    """'trak/mdia/mdhd'のようなパスでボックスを探し、(内容の開始位置, 終了位置)を返す"""
+    for box_type in path.split('/'):
+        found = find_child(data, start, end, box_type)
+        if found is None:
+            return None
+        start, end = found
+    return start, end
+
+def read_moov(file_path):
+    """moovボックスを読み込み、(ファイル内の開始位置, moov全体のバイト列)を返す"""
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        found = find_box(f, 0, file_size, 'moov')
+        if found is None:
+            raise BoxError("moovボックスが見つかりません")
+        offset, size, _ = found
+        f.seek(offset)
+        return offset, f.read(size)
+
+def _full_box(data, start):
+    """FullBoxのバージョンとフラグを返す"""
+    version_flags = struct.unpack_from('>I', data, start)[0]
+    return version_flags >> 24, version_flags & 0xFFFFFF
+
+def _read_table(data, start, count, typecode='I'):
+    """ビッグエンディアンの数値テーブルを配列として読み込む"""
+    table = array(typecode)
+    table.frombytes(data[start:start + count * table.itemsize])
+    if sys.byteorder == 'little':
+        table.byteswap()
+    return table
+
+def decode_language(packed):
+    """mdhdの言語コード（5ビット×3文字）を文字列に変換"""
+    if packed == 0 or packed == 0x7FFF:
+        return 'und'
+    return ''.join(chr(((packed >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+
+def encode_language(code):
+    """言語コード（ISO 639-2/T）をmdhdの形式に変換"""
+    code = (code + 'und')[:3] if len(code) < 3 else code[:3]
+    return ((ord(code[0]) - 0x60) << 10) | ((ord(code[1]) - 0x60) << 5) | (ord(code[2]) - 0x60)
+
+def parse_mvhd(data, start):
+    """mvhdから(タイムスケール, 長さ)を取得"""
+    version, _ = _full_box(data, start)
+    if version == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+    return timescale, duration
+
+def parse_tkhd(data, start):
+    """tkhdからトラック情報を取得"""
+    version, flags = _full_box(data, start)
+    if version == 1:
+        track_id, duration = struct.unpack_from('>I4xQ', data, start + 20)
+        pos = start + 36
+    else:
+        track_id, duration = struct.unpack_from('>I4xI', data, start + 12)
+        pos = start + 24
+    alternate_group = struct.unpack_from('>2xh', data, pos + 8)[0]
+    width, height = struct.unpack_from('>II', data, pos + 52)
+    return {
+        'track_id': track_id,
+        'flags': flags,
+        'enabled': bool(flags & 0x1),
+        'tkhd_duration': duration,
+        'alternate_group': alternate_group,
+        'width': width >> 16,
+        'height': height >> 16
+    }
+
+def parse_mdhd(data, start):
+    """mdhdから(タイムスケール, 長さ, 言語)を取得"""
+    version, _ = _full_box(data, start)
+    if version == 1:
+        timescale, duration, packed = struct.unpack_from('>IQH', data, start + 20)
+    else:
+        timescale, duration, packed = struct.unpack_from('>IIH', data, start + 12)
+    return timescale, duration, decode_language(packed)
+
+def parse_stsd(data, start, end):
+    """stsdのサンプルエントリ一覧を取得（タイプ, 開始位置, 終了位置）"""
+    entries = []
+    for entry_type, offset, size, header_size in iter_children(data, start + 8, end):
+        entries.append((entry_type, offset + header_size, offset + size))
+    return entries
+
+def parse_sample_tables(data, start, end):
+    """stblからサンプルテーブルを取得"""
+    tables = {}
+    for box_type, offset, size, header_size in iter_children(data, start, end):
+        pos = offset + header_size
+        if box_type == 'stts' or box_type == 'ctts':
+            count = struct.unpack_from('>I', data, pos + 4)[0]
+            tables[box_type] = _read_table(data, pos + 8, count * 2)
+        elif box_type == 'stss':
+            count = struct.unpack_from('>I', data, pos + 4)[0]
+            tables['stss'] = _read_table(data, pos + 8, count)
+        elif box_type == 'stsz':
+            sample_size, count = struct.unpack_from('>II', data, pos + 4)
+            tables['sample_count'] = count
+            tables['stsz'] = sample_size if sample_size else _read_table(data, pos + 12, count)
+        elif box_type == 'stsc':
+            count = struct.unpack_from('>I', data, pos + 4)[0]
+            tables['stsc'] = _read_table(data, pos + 8, count * 3)
+        elif box_type == 'stco':
+            count = struct.unpack_from('>I', data, pos + 4)[0]
+            tables['chunk_offsets'] = _read_table(data, pos + 8, count)
+        elif box_type == 'co64':
+            count = struct.unpack_from('>I', data, pos + 4)[0]
+            tables['chunk_offsets'] = _read_table(data, pos + 8, count, 'Q')
+    return tables
+
+def parse_track(data, start, end, sample_tables=False):
+    """trakボックスからトラック情報を取得"""
+    tkhd = find_child(data, start, end, 'tkhd')
+    mdia = find_child(data, start, end, 'mdia')
+    if tkhd is None or mdia is None:
+        raise BoxError("trakにtkhdまたはmdiaがありません")
+    track = parse_tkhd(data, tkhd[0])
+    track['box'] = (start, end)
+
+    mdhd = find_child(data, mdia[0], mdia[1], 'mdhd')
+    if mdhd is not None:
+        track['timescale'], track['duration'], track['language'] = parse_mdhd(data, mdhd[0])
+    hdlr = find_child(data, mdia[0], mdia[1], 'hdlr')
+    if hdlr is not None:
+        track['handler'] = data[hdlr[0] + 8:hdlr[0] + 12].decode('latin-1')
+        track['name'] = data[hdlr[0] + 24:hdlr[1]].split(b'\0')[0].decode('utf-8', 'replace')
+    elng = find_child(data, mdia[0], mdia[1], 'elng')
+    if elng is not None:
+        track['extended_language'] = data[elng[0] + 4:elng[1]].split(b'\0')[0].decode('utf-8', 'replace')
+
+    stbl = find_path(data, mdia[0], mdia[1], 'minf/stbl')
+    track['sample_entries'] = []
+    if stbl is not None:
+        stsd = find_child(data, stbl[0], stbl[1], 'stsd')
+        if stsd is not None:
+            track['sample_entries'] = parse_stsd(data, stsd[0], stsd[1])
+        if sample_tables:
+            track.update(parse_sample_tables(data, stbl[0], stbl[1]))
+    track['codec'] = track['sample_entries'][0][0] if track['sample_entries'] else None
+    return track
+
+def parse_movie(file_path, sample_tables=False):
+    """moovだけを読み込んでムービーとトラックの情報を取得
+
+    sample_tablesがTrueの場合はstts/stss/stsz/stsc/stco等のサンプルテーブルも読み込む。
+    """
+    moov_offset, data = read_moov(file_path)
+    _, _, size, header_size = next(iter_children(data, 0, len(data)))
+    mvhd = find_child(data, header_size, size, 'mvhd')
+    if mvhd is None:
+        raise BoxError("moovにmvhdボックスがありません")
+    timescale, duration = parse_mvhd(data, mvhd[0])
+
+    tracks = []
+    for box_type, offset, box_size, box_header in iter_children(data, header_size, size):
+        if box_type == 'trak':
+            tracks.append(parse_track(data, offset + box_header, offset + box_size, sample_tables))
+
+    return {
+        'moov_offset': moov_offset,
+        'moov': data,
+        'timescale': timescale,
+        'duration': duration,
+        'tracks': tracks
+    }
+
+def sample_location(track, sample_number):
+    """サンプル番号（1から）のファイル内の(位置, サイズ)を取得"""
+    stsc = track['stsc']
+    stsz = track['stsz']
+    chunk_offsets = track['chunk_offsets']
+    chunk_count = len(chunk_offsets)
+
+    first_sample = 1
+    for i in range(0, len(stsc), 3):
+        first_chunk, samples_per_chunk = stsc[i], stsc[i + 1]
+        next_chunk = stsc[i + 3] if i + 3 < len(stsc) else chunk_count + 1
+        run_samples = (next_chunk - first_chunk) * samples_per_chunk
+        if sample_number < first_sample + run_samples:
+            index_in_run = sample_number - first_sample
+            chunk = first_chunk + index_in_run // samples_per_chunk
+            first_in_chunk = sample_number - index_in_run % samples_per_chunk
+            if isinstance(stsz, int):
+                offset = chunk_offsets[chunk - 1] + (sample_number - first_in_chunk) * stsz
+                return offset, stsz
+            offset = chunk_offsets[chunk - 1] + sum(stsz[first_in_chunk - 1:sample_number - 1])
+            return offset, stsz[sample_number - 1]
+        first_sample += run_samples
+    raise BoxError(f"サンプル {sample_number} がチャンクに含まれていません")
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from .core import partial_output_path, commit_output, remove_files
+
+# 部分ハッシュで読み込むバイト数（先頭と末尾）
+PARTIAL_HASH_SIZE = 1024 * 1024
+# キャッシュに保持するジョブ数の上限（LRUで削除）
+DEFAULT_MAX_ENTRIES = 500
+
+def file_identity(file_path):
+    """ファイルの同一性情報（サイズ・更新時刻・先頭末尾の部分ハッシュ）を取得"""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_SIZE))
+        if stat.st_size > PARTIAL_HASH_SIZE * 2:
+            f.seek(-PARTIAL_HASH_SIZE, os.SEEK_END)
+            digest.update(f.read(PARTIAL_HASH_SIZE))
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'partial_hash': digest.hexdigest()
+    }
+
+def file_hash(file_path):
+    """ファイル全体のSHA-256ハッシュを取得"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compute_job_key(input_file, args, output_file, staged_files=None):
+    """入力ファイル・字幕ファイル・MP4Box引数からジョブのキーを計算
+
+    staged_filesは一時ディレクトリにコピーした字幕のパスから元の字幕ファイルへの対応。
+    一時ファイル名は毎回変わるため、元ファイルの内容ハッシュに置き換えてから引数を比較する。
+    """
+    staged_files = staged_files or {}
+    replacements = {temp: f"sha256:{file_hash(source)}" for temp, source in staged_files.items()}
+
+    normalized_args = []
+    # 先頭の実行ファイルパスと出力ファイルは結果の内容に影響しないので除外
+    for arg in args[1:]:
+        if arg == output_file:
+            continue
+        arg = arg.replace(input_file, "<input>")
+        for temp, replacement in replacements.items():
+            arg = arg.replace(temp, replacement)
+        normalized_args.append(arg)
+
+    key_source = json.dumps({
+        'input': file_identity(input_file),
+        'args': normalized_args
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+class JobCache:
+    """ジョブ結果のキャッシュ（メタデータはtemp_dir配下に保存）"""
+
+    def __init__(self, temp_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = os.path.join(temp_dir, 'job_cache')
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.max_entries = max_entries
+
+    def _load(self):
+        """インデックスを読み込む"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index):
+        """インデックスを保存する（一時ファイルに書き込んでから置き換え）"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.index_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, key):
+        """キャッシュ済みの出力ファイルを取得（存在しない・変更された場合はNone）"""
+        index = self._load()
+        entry = index.get(key)
+        if entry is None:
+            return None
+
+        output_file = entry['output']
+        try:
+            valid = file_identity(output_file) == entry['identity']
+        except OSError:
+            valid = False
+
+        if not valid:
+            # 出力ファイルが削除・変更されている場合はエントリを破棄
+            del index[key]
+            self._save(index)
+            return None
+
+        entry['last_used'] = time.time()
+        self._save(index)
+        return output_file
+
+    def store(self, key, output_file):
+        """ジョブの出力ファイルを記録"""
+        index = self._load()
+        index[key] = {
+            'output': os.path.abspath(output_file),
+            'identity': file_identity(output_file),
+            'last_used': time.time()
+        }
+        # 上限を超えた場合は最後に使われた時刻が古いものから削除
+        if len(index) > self.max_entries:
+            by_age = sorted(index.items(), key=lambda item: item[1]['last_used'])
+            for old_key, _ in by_age[:len(index) - self.max_entries]:
+                del index[old_key]
+        self._save(index)
+
+    def reuse(self, key, output_file):
+        """キャッシュ済みの出力を再利用（同じファイルならスキップ、別の場所ならコピー）
+
+        タグの書き込みなどでファイルをその場で書き換えても他の出力に影響しないよう、ハードリンクではなく
+        出力先と同じディレクトリの一時ファイルにコピーしてから置き換える（失敗しても既存の出力は残る）。
+        """
+        cached_file = self.lookup(key)
+        if cached_file is None:
+            return False
+
+        if os.path.exists(output_file) and os.path.samefile(cached_file, output_file):
+            return True
+
+        temp_output = partial_output_path(output_file)
+        try:
+            shutil.copyfile(cached_file, temp_output)
+            commit_output(temp_output, output_file)
+        except OSError:
+            # コピーできない場合は通常処理に任せる
+            return False
+        finally:
+            remove_files([temp_output])
+        return True
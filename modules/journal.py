@@ -0,0 +1,58 @@
+import os
+import json
+import hashlib
+from .job_cache import file_identity
+
+def job_journal_key(job):
+    """ジョブ定義からジャーナルのキーを作成"""
+    source = json.dumps(job, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+class BatchJournal:
+    """バッチ処理で完了したジョブを記録するジャーナル（JSON Lines形式）
+
+    中断されたバッチを再実行したとき、記録済みで出力ファイルが変更されていない
+    ジョブをスキップして続きから再開できるようにする。
+    """
+
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        """ジャーナルを読み込む（書き込み途中の最終行は無視）"""
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['key']] = entry
+        except FileNotFoundError:
+            pass
+
+    def is_done(self, job):
+        """ジョブが完了済みで、出力ファイルが記録時のまま残っているか"""
+        entry = self.entries.get(job_journal_key(job))
+        if entry is None:
+            return False
+        try:
+            return file_identity(entry['output']) == entry['identity']
+        except OSError:
+            return False
+
+    def record(self, job):
+        """ジョブの完了を記録（追記してディスクに同期）"""
+        entry = {
+            'key': job_journal_key(job),
+            'output': job['output_file'],
+            'identity': file_identity(job['output_file'])
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[entry['key']] = entry
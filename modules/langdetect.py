@@ -0,0 +1,111 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from .langid_model import MODEL, UNSEEN
+from .subtitle_parser import read_cues, SubtitleParseError
+
+# 判定に使う最大文字数（長い字幕は先頭から十分な量だけ使う）
+MAX_SAMPLE_CHARS = 20000
+# 信頼度の計算で1n-gramあたりの対数尤度の差に掛ける係数
+CONFIDENCE_SCALE = 20.0
+# 同時に判定するファイル数の既定値
+DEFAULT_DETECT_WORKERS = 8
+
+# 文字種だけで言語が決まるUnicodeの範囲
+SCRIPT_RANGES = [
+    ('kana', 0x3040, 0x30FF),
+    ('han', 0x4E00, 0x9FFF),
+    ('han', 0x3400, 0x4DBF),
+    ('hangul', 0xAC00, 0xD7AF),
+    ('hangul', 0x1100, 0x11FF),
+    ('cyrillic', 0x0400, 0x04FF),
+    ('arabic', 0x0600, 0x06FF),
+    ('devanagari', 0x0900, 0x097F),
+    ('thai', 0x0E00, 0x0E7F),
+]
+SCRIPT_LANGUAGES = {'hangul': 'kor', 'cyrillic': 'rus', 'arabic': 'ara', 'devanagari': 'hin', 'thai': 'tha'}
+# 漢字に対するかなの割合がこれ以上なら日本語、未満なら中国語とみなす
+KANA_RATIO = 0.05
+
+WORD = re.compile(r"[^\W\d_]+")
+
+def _script(char):
+    """文字の文字種を取得（ラテン文字は'latin'、その他はNone）"""
+    code = ord(char)
+    for name, start, end in SCRIPT_RANGES:
+        if start <= code <= end:
+            return name
+    if char.isalpha() and 'LATIN' in unicodedata.name(char, ''):
+        return 'latin'
+    return None
+
+def _ngrams(text):
+    """単語ごとに1〜3文字のn-gramを取得（単語の前後は空白）"""
+    for word in WORD.findall(text.lower()):
+        padded = f" {word} "
+        for n in (1, 2, 3):
+            for i in range(len(padded) - n + 1):
+                ngram = padded[i:i + n]
+                if ngram.strip():
+                    yield ngram
+
+def detect_latin(text):
+    """ラテン文字の言語をn-gramモデルで判定し、(言語コード, 信頼度)を返す"""
+    counts = Counter(_ngrams(text))
+    count = sum(counts.values())
+    if count == 0:
+        return 'und', 0.0
+    scores = {code: sum(n * profile.get(ngram, UNSEEN[code]) for ngram, n in counts.items())
+              for code, profile in MODEL.items()}
+    # 1n-gramあたりの対数尤度の差から、上位の言語の信頼度を計算
+    best = max(scores.values())
+    weights = {code: math.exp((score - best) / count * CONFIDENCE_SCALE) for code, score in scores.items()}
+    code = max(weights, key=weights.get)
+    return code, weights[code] / sum(weights.values())
+
+def detect_language(text):
+    """テキストの言語を判定し、ISO 639-2の3文字コードと信頼度（0〜1）を返す"""
+    text = text[:MAX_SAMPLE_CHARS]
+    counts = {}
+    for char in text:
+        script = _script(char)
+        if script is not None:
+            counts[script] = counts.get(script, 0) + 1
+    total = sum(counts.values())
+    if total == 0:
+        return 'und', 0.0
+
+    # 漢字・かなは日本語と中国語をかなの割合で区別する
+    kana, han = counts.pop('kana', 0), counts.pop('han', 0)
+    if kana + han:
+        counts['cjk'] = kana + han
+    script = max(counts, key=counts.get)
+    share = counts[script] / total
+    if script == 'cjk':
+        return ('jpn' if kana >= (kana + han) * KANA_RATIO else 'zho'), share
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script], share
+    code, confidence = detect_latin(text)
+    return code, confidence * share
+
+def detect_subtitle_language(file_path):
+    """字幕ファイルのキューの表示テキストから言語を判定"""
+    text = "\n".join(cue['text'] for cue in read_cues(file_path))
+    return detect_language(text)
+
+def detect_files(file_paths, max_workers=DEFAULT_DETECT_WORKERS):
+    """複数の字幕ファイルの言語を並列に判定
+
+    入力と同じ順序で{'file', 'language', 'confidence'}（失敗した場合は'error'）のリストを返す。
+    """
+    def detect(file_path):
+        try:
+            language, confidence = detect_subtitle_language(file_path)
+            return {'file': file_path, 'language': language, 'confidence': confidence}
+        except (OSError, SubtitleParseError) as e:
+            return {'file': file_path, 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(detect, file_paths))
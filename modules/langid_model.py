@@ -0,0 +1,456 @@
+# 文字n-gramによる言語判定モデル（ラテン文字の言語）
+# 言語ごとに、字幕の台詞に近い例文から集計した出現頻度上位のn-gram（1〜3文字、単語の前後は空白）と
+# その対数確率を持つ。表にないn-gramの対数確率はUNSEENを使う。
+
+MODEL = {
+    'deu': {
+        'e': -3.08, 'i': -3.53, 'n': -3.53, 's': -3.73, 'h': -3.85, 'a': -3.94, 'r': -4.01,
+        't': -4.10, 'd': -4.13, 'c': -4.27, 'ch': -4.30, 'n ': -4.30, 'en': -4.47, 'm': -4.54,
+        'r ': -4.56, 'l': -4.58, 'u': -4.61, ' d': -4.61, 'e ': -4.63, 'g': -4.66, 't ': -4.76,
+        'en ': -4.76, 'er': -4.82, ' i': -4.82, 'ic': -4.82, 'ich': -4.82, 's ': -4.85, 'h ': -4.88,
+        'w': -4.91, ' w': -4.91, 'ch ': -4.91, 'b': -5.09, 'ge': -5.09, ' s': -5.13, 'er ': -5.17,
+        'o': -5.17, ' m': -5.25, 'ei': -5.25, ' a': -5.30, 'te': -5.35, 'in': -5.35, 'as': -5.40,
+        ' ic': -5.46, 'st': -5.51, ' h': -5.51, 'ie': -5.51, 'be': -5.51, 'nd': -5.51, ' g': -5.51,
+        ' e': -5.51, 'da': -5.57, ' da': -5.57, 'es': -5.57, 'd ': -5.57, 'an': -5.64, 'ir': -5.64,
+        'f': -5.64, 'he': -5.71, ' n': -5.71, 'k': -5.71, 'di': -5.71, 'de': -5.71, 'st ': -5.78,
+        'ab': -5.78, 'nd ': -5.78, 'ir ': -5.78, 'ss': -5.78, 'as ': -5.86, 'abe': -5.86,
+        'ha': -5.86, 'se': -5.86, ' ge': -5.86, ' di': -5.86, 'ht': -5.95, 'cht': -5.95,
+        'll': -5.95, 'le': -5.95, 'das': -5.95, 'me': -5.95, 'te ': -6.04, 'mi': -6.04,
+        'ein': -6.04, ' u': -6.04, 'un': -6.04, 'wi': -6.04, ' wi': -6.04, 'wa': -6.15,
+        ' wa': -6.15, 'u ': -6.15, ' ha': -6.15, 'is': -6.15, ' mi': -6.15, 'ü': -6.15, 'm ': -6.15,
+        'z': -6.15, ' un': -6.15, 'ni': -6.15, ' ni': -6.15, 'ng': -6.27, 'ne': -6.27, 'sc': -6.27,
+        'sch': -6.27, ' k': -6.27, 'gen': -6.27, 'ie ': -6.27, 'wir': -6.27, 'du': -6.40,
+        ' du': -6.40, 'du ': -6.40, 'ut': -6.40, ' ab': -6.40, 'ist': -6.40, 'al': -6.40,
+        'nge': -6.40, 'ss ': -6.40, ' b': -6.40, 'ar': -6.40, 'si': -6.40, 'es ': -6.40,
+        'und': -6.40, 'die': -6.40, 'it': -6.40, 'nic': -6.40, 'ht ': -6.40, ' de': -6.40,
+        'ol': -6.55, 'ben': -6.55, 'au': -6.55, 'us': -6.55, 'eh': -6.55, 'hen': -6.55, 'nn': -6.55,
+        'lle': -6.55, 'ass': -6.55, ' sc': -6.55, 'ges': -6.55, 'hab': -6.55, ' al': -6.55,
+        'mm': -6.55, 'in ': -6.55, ' si': -6.55, 'che': -6.55, ' es': -6.55, 'p': -6.55,
+        'der': -6.55, 'we': -6.55, ' we': -6.55, 're': -6.55, 'hr': -6.55, 'hi': -6.74,
+        'ier': -6.74, 'wo': -6.74, 'lt': -6.74, ' wo': -6.74, 'oll': -6.74, 'lte': -6.74,
+        'end': -6.74, 'ehe': -6.74, ' is': -6.74, 'all': -6.74, ' me': -6.74, 'ine': -6.74,
+        'be ': -6.74, ' z': -6.74, 'ko': -6.74, 'mme': -6.74, 'men': -6.74, 'rt': -6.74,
+        'ten': -6.74, ' er': -6.74, 'it ': -6.74, ' f': -6.74, 'ang': -6.74, 'ns': -6.74,
+        'ag': -6.74, 'g ': -6.74, ' l': -6.74, 'was': -6.96, 'ac': -6.96, 'ach': -6.96,
+        ' hi': -6.96, 'hie': -6.96, 'ber': -6.96, 'nn ': -6.96, 'mir': -6.96, ' ei': -6.96,
+        'el': -6.96, 'l ': -6.96, 'sse': -6.96, 'im': -6.96, ' im': -6.96, 'v': -6.96, ' v': -6.96,
+        'so': -6.96, 'zu': -6.96, 'om': -6.96, ' zu': -6.96, 'kom': -6.96, 'omm': -6.96,
+        'war': -6.96, 'on': -6.96, 'on ': -6.96, 'ed': -6.96, 'bi': -6.96, ' bi': -6.96, 'ä': -6.96,
+        'ind': -6.96, 'eit': -6.96, 'ke': -6.96, 'la': -6.96, 'ga': -6.96, 'oc': -6.96,
+        'och': -6.96, 'ter': -6.96, 'tt': -6.96, 'tte': -6.96, ' an': -6.96, 'ih': -6.96,
+        ' ih': -6.96, 'ma': -7.25, 'hte': -7.25, 'llt': -7.25, 'eu': -7.25, 'ute': -7.25,
+        'aus': -7.25, 'se ': -7.25, 'geh': -7.25, 'uc': -7.25, 'uch': -7.25, 'dan': -7.25,
+        'len': -7.25, 'mei': -7.25, 'ne ': -7.25, 'o ': -7.25, 'sen': -7.25, 'mu': -7.25,
+        ' mu': -7.25, 'uss': -7.25, ' so': -7.25, 'sol': -7.25, 'art': -7.25, 'ho': -7.25,
+        'cho': -7.25, 'hon': -7.25, 'ut ': -7.25, ' se': -7.25, 'ig': -7.25, 'ige': -7.25,
+        'bis': -7.25, 'sp': -7.25, 'ß': -7.25, 'sin': -7.25, 'ese': -7.25, 'li': -7.25, 'ff': -7.25,
+        'cha': -7.25, 'den': -7.25, 'enn': -7.25, ' p': -7.25, ' in': -7.25, 'em': -7.25,
+        'eg': -7.25, 'geg': -7.25, 'ega': -7.25, 'gan': -7.25, 'il': -7.25, 'wei': -7.25,
+        'ag ': -7.25, ' r': -7.25, 'rn': -7.25, 'ern': -7.25, ' t': -7.25, 'dir': -7.25,
+        'an ': -7.25, 'sa': -7.25, 'sag': -7.25, 'ö': -7.25, 'et': -7.25, ' ko': -7.25,
+        'mic': -7.25, 'nde': -7.25, 'he ': -7.25, ' la': -7.25, 'uns': -7.25, 'ns ': -7.25,
+        ' ma': -7.65, 'wol': -7.65, 'est': -7.65, ' he': -7.65, 'heu': -7.65, 'eut': -7.65,
+        'na': -7.65, ' na': -7.65, 'nac': -7.65, 'hau': -7.65, ' au': -7.65, 'ann': -7.65,
+        'ef': -7.65, 'fa': -7.65, 'üs': -7.65,
+    },
+    'eng': {
+        'e': -3.17, 't': -3.50, 'o': -3.70, 'i': -3.72, 'e ': -3.86, 'n': -3.86, 'h': -3.89,
+        'a': -3.90, 'r': -4.21, ' t': -4.23, 'l': -4.31, 's': -4.35, 't ': -4.44, 'w': -4.56,
+        'u': -4.61, 'th': -4.61, 'y': -4.64, ' i': -4.64, 'd': -4.66, ' w': -4.69, 'he': -4.75,
+        ' th': -4.82, 'm': -4.85, 'g': -4.89, 'in': -4.96, 'ou': -5.04, 's ': -5.04, 'the': -5.04,
+        'n ': -5.13, ' a': -5.18, 're': -5.18, 'f': -5.18, ' h': -5.22, 'er': -5.28, 'i ': -5.28,
+        ' i ': -5.28, ' s': -5.28, 'ha': -5.33, 'd ': -5.33, 'b': -5.33, 'he ': -5.33, 'o ': -5.33,
+        'c': -5.39, ' m': -5.45, 'k': -5.45, 're ': -5.51, ' y': -5.51, 'yo': -5.51, 'y ': -5.51,
+        'an': -5.51, 'u ': -5.58, ' yo': -5.58, 'you': -5.58, 'ou ': -5.58, 'ng': -5.58,
+        'g ': -5.58, 'ng ': -5.58, 'to': -5.58, ' to': -5.58, 'r ': -5.58, 'v': -5.58, 'ing': -5.65,
+        'me': -5.65, ' b': -5.65, ' l': -5.65, 've': -5.65, 'we': -5.73, ' we': -5.73, 'en': -5.73,
+        'at': -5.82, 'to ': -5.82, 'is': -5.82, 'p': -5.82, 'on': -5.92, 'le': -5.92, 'it': -5.92,
+        'hi': -5.92, 'wh': -6.02, ' wh': -6.02, 'at ': -6.02, ' d': -6.02, 'her': -6.02,
+        'ere': -6.02, 'en ': -6.02, 'be': -6.02, ' c': -6.02, ' f': -6.02, 'll': -6.02, ' g': -6.14,
+        'me ': -6.14, 'wa': -6.14, 'ut': -6.14, ' o': -6.14, ' ha': -6.14, ' me': -6.14,
+        'it ': -6.14, 'or': -6.14, ' n': -6.14, 'no': -6.14, 'ne': -6.14, 'se': -6.14, 'is ': -6.14,
+        'ea': -6.14, 'av': -6.14, 've ': -6.14, 'l ': -6.14, 'hat': -6.27, 'ar': -6.27, 'ho': -6.27,
+        ' wa': -6.27, 'k ': -6.27, ' it': -6.27, 'nd': -6.27, ' an': -6.27, 'and': -6.27,
+        'ee': -6.27, 'al': -6.27, ' be': -6.27, 'er ': -6.27, 'ave': -6.27, 'll ': -6.27,
+        'do': -6.43, ' do': -6.43, 'hou': -6.43, 'om': -6.43, 'as': -6.43, ' le': -6.43,
+        ' no': -6.43, 'et': -6.43, 'nd ': -6.43, 'thi': -6.43, 'ld': -6.43, ' p': -6.43,
+        'we ': -6.43, 'il': -6.43, 'wha': -6.61, 'are': -6.61, ' he': -6.61, 'go': -6.61,
+        'ni': -6.61, 'ut ': -6.61, ' r': -6.61, 'em': -6.61, 'in ': -6.61, 'fi': -6.61, 'ce': -6.61,
+        'ce ': -6.61, 'fo': -6.61, 'for': -6.61, ' s ': -6.61, 'f ': -6.61, 'ur': -6.61,
+        'te': -6.61, 'st': -6.61, 'ot': -6.61, 'ld ': -6.61, ' is': -6.61, ' t ': -6.61,
+        'm ': -6.61, 'hav': -6.61, ' ar': -6.83, 'gh': -6.83, 'ht': -6.83, 'ght': -6.83,
+        'ht ': -6.83, 'ai': -6.83, ' go': -6.83, ' ho': -6.83, 'was': -6.83, 'as ': -6.83,
+        'ed': -6.83, 'ed ': -6.83, 'tha': -6.83, ' k': -6.83, 'ke': -6.83, ' in': -6.83,
+        'of': -6.83, ' of': -6.83, 'co': -6.83, ' co': -6.83, 'nt': -6.83, 'nt ': -6.83,
+        ' fo': -6.83, 'or ': -6.83, ' fi': -6.83, 'la': -6.83, 'han': -6.83, 'all': -6.83,
+        'ul': -6.83, 'ry': -6.83, 'ver': -6.83, 'se ': -6.83, 'wi': -6.83, ' wi': -6.83,
+        'on ': -6.83, 'li': -6.83, 'ro': -6.83, 'ow': -6.83, 'ay': -6.83, 'lea': -6.83,
+        'ill': -6.83, 'et ': -6.83, ' al': -6.83, 'oi': -7.12, 'oin': -7.12, 'sa': -7.12,
+        'id': -7.12, ' sa': -7.12, 'ome': -7.12, 'ig': -7.12, 'igh': -7.12, 'bu': -7.12,
+        ' bu': -7.12, 'but': -7.12, ' re': -7.12, 'ef': -7.12, 'my': -7.12, ' my': -7.12,
+        'ey': -7.12, 'ys': -7.12, 'com': -7.12, 'fin': -7.12, 'ne ': -7.12, 'ca': -7.12,
+        'an ': -7.12, 'ke ': -7.12, 'of ': -7.12, 'ti': -7.12, 'tr': -7.12, 'not': -7.12,
+        'his': -7.12, 'our': -7.12, 'nk': -7.12, 'nk ': -7.12, 'ly': -7.12, 'ly ': -7.12,
+        'hin': -7.12, 'sh': -7.12, 'oul': -7.12, 'uld': -7.12, 'le ': -7.12, 'ev': -7.12,
+        'eve': -7.12, 'ol': -7.12, 'us': -7.12, 'iv': -7.12, 'ive': -7.12, 'go ': -7.12,
+        'h ': -7.12, 'don': -7.12, ' li': -7.12, 'now': -7.12, 'ch': -7.12, 'eav': -7.12,
+        'wil': -7.12, 'pl': -7.12, ' pl': -7.12, 'mi': -7.12, 'een': -7.12, 'oth': -7.12,
+        'lo': -7.12, 'ki': -7.12, 'sai': -7.53, 'aid': -7.53, 'id ': -7.53, 'wer': -7.53,
+        'goi': -7.53, 'ton': -7.53, 'oni': -7.53, 'nig': -7.53, 'hen': -7.53, 'mb': -7.53,
+        'rem': -7.53, 'eme': -7.53, 'mem': -7.53, 'emb': -7.53, 'mbe': -7.53, 'ber': -7.53,
+        'ft': -7.53, 'lef': -7.53, 'eft': -7.53, 'ft ': -7.53, 'my ': -7.53, 'ys ': -7.53,
+        'ic': -7.53, 'ice': -7.53, 'so': -7.53, ' so': -7.53, 'ad': -7.53, 'ac': -7.53,
+        'do ': -7.53, 'wan': -7.53, 'ant': -7.53, ' ca': -7.53, 'ta': -7.53, ' ta': -7.53,
+        'el': -7.53, 'su': -7.53, ' su': -7.53, 'ge': -7.53,
+    },
+    'fra': {
+        'e': -3.09, 's': -3.53, 'a': -3.69, 'i': -3.71, 'e ': -3.75, 'u': -3.80, 't': -3.94,
+        'n': -3.94, 'r': -3.99, 's ': -4.05, 'o': -4.17, 'l': -4.21, 'c': -4.66, 't ': -4.71,
+        'ai': -4.77, 'd': -4.80, 'p': -4.83, 'm': -4.87, 'v': -4.94, ' p': -5.01, ' d': -5.01,
+        ' s': -5.05, ' l': -5.05, 'j': -5.09, 'ou': -5.09, 'is': -5.13, ' j': -5.13, ' e': -5.18,
+        ' t': -5.18, ' a': -5.18, 'es': -5.22, 'u ': -5.27, ' c': -5.27, 'i ': -5.32, ' m': -5.32,
+        'é': -5.32, 'q': -5.38, 'is ': -5.38, 'en': -5.38, 're': -5.38, ' n': -5.38, 'le': -5.38,
+        'qu': -5.44, 'n ': -5.44, ' q': -5.50, ' qu': -5.50, ' v': -5.50, 'a ': -5.50, 'ais': -5.56,
+        'je': -5.56, ' je': -5.56, 'je ': -5.56, 'on': -5.56, 'r ': -5.63, 'pa': -5.63, 'ce': -5.70,
+        'ue': -5.70, ' i': -5.70, 'so': -5.70, 'me': -5.70, 'er': -5.70, ' pa': -5.70, 'ce ': -5.78,
+        'que': -5.78, 'ue ': -5.78, 'nt': -5.78, 'la': -5.78, 'es ': -5.78, 'eu': -5.78,
+        'l ': -5.78, 'il': -5.78, ' le': -5.78, 'ne': -5.78, 'le ': -5.78, ' es': -5.87,
+        ' la': -5.87, 'in': -5.87, 'us': -5.87, 'us ': -5.87, ' ce': -5.97, 'ra': -5.97,
+        ' so': -5.97, 'te': -5.97, 'ne ': -5.97, 'as': -5.97, 're ': -5.97, 'st': -6.07,
+        'est': -6.07, 'st ': -6.07, 'f': -6.07, 'rai': -6.07, 'ma': -6.07, 'ur': -6.07,
+        ' il': -6.07, 'il ': -6.07, 'et': -6.07, 'pas': -6.07, 'la ': -6.07, 'an': -6.07,
+        'ous': -6.07, 'tu': -6.19, ' tu': -6.19, 'tu ': -6.19, 'ci': -6.19, 'ns': -6.19,
+        ' r': -6.19, 'h': -6.19, 'oi': -6.19, 'mai': -6.19, 'ui': -6.19, 've': -6.19, 'de': -6.19,
+        'no': -6.19, ' no': -6.19, 'ar': -6.19, 'nt ': -6.19, 'as ': -6.19, ' f': -6.32,
+        'tr': -6.32, 'to': -6.32, ' me': -6.32, 'va': -6.32, 'é ': -6.32, 'er ': -6.32, 'ut': -6.32,
+        'se': -6.32, 'te ': -6.32, 'ns ': -6.32, 'ie': -6.32, ' de': -6.32, 'nou': -6.32,
+        'ci ': -6.48, 'pe': -6.48, 'he': -6.48, ' to': -6.48, 'ir': -6.48, 'ai ': -6.48,
+        ' ma': -6.48, 'me ': -6.48, 'uis': -6.48, 'au': -6.48, 'x': -6.48, 'ux': -6.48, 'x ': -6.48,
+        'eux': -6.48, 'ux ': -6.48, ' o': -6.48, ' et': -6.48, 'et ': -6.48, ' ne': -6.48,
+        'll': -6.48, 'it': -6.48, 'ic': -6.66, ' pe': -6.66, ' re': -6.66, 'ch': -6.66,
+        'oi ': -6.66, 'av': -6.66, 'lé': -6.66, 'és': -6.66, 'b': -6.66, 'al': -6.66, ' al': -6.66,
+        'on ': -6.66, ' se': -6.66, 'son': -6.66, 'ro': -6.66, 'da': -6.66, 'dan': -6.66,
+        'è': -6.66, 'par': -6.66, 'in ': -6.66, 'di': -6.66, 'it ': -6.66, 'y': -6.66, 'fa': -6.88,
+        ' ic': -6.88, 'ici': -6.88, 'sa': -6.88, 'sai': -6.88, 'che': -6.88, 'nu': -6.88,
+        'j ': -6.88, ' j ': -6.88, ' av': -6.88, 'ss': -6.88, 'és ': -6.88, ' ve': -6.88,
+        ' en': -6.88, 'tou': -6.88, 'ut ': -6.88, 'ul': -6.88, 'ont': -6.88, 'rc': -6.88,
+        'dé': -6.88, ' dé': -6.88, 'all': -6.88, ' da': -6.88, 'ans': -6.88, 'ri': -6.88,
+        'èr': -6.88, 'ère': -6.88, 'our': -6.88, ' n ': -6.88, ' ai': -6.88, 'ant': -6.88,
+        'ain': -6.88, ' te': -6.88, ' di': -6.88, 'vo': -6.88, 'ait': -6.88, ' y': -6.88,
+        'y ': -6.88, ' y ': -6.88, 'ien': -6.88, 'qu ': -7.17, ' fa': -7.17, 'ent': -7.17,
+        'tra': -7.17, ' ch': -7.17, 'ir ': -7.17, 'c ': -7.17, 'su': -7.17, ' su': -7.17,
+        'sui': -7.17, 'uv': -7.17, 'ouv': -7.17, 'ven': -7.17, 'enu': -7.17, 'ava': -7.17,
+        'vai': -7.17, 'mes': -7.17, ' au': -7.17, 'au ': -7.17, ' b': -7.17, 'ure': -7.17,
+        'or': -7.17, 'rs': -7.17, 'veu': -7.17, 'nd': -7.17, 'end': -7.17, 'de ': -7.17,
+        ' va': -7.17, 'va ': -7.17, 'en ': -7.17, 'out': -7.17, 'seu': -7.17, 'eul': -7.17,
+        'û': -7.17, 'd ': -7.17, 'les': -7.17, 'à': -7.17, ' à': -7.17, 'à ': -7.17, ' à ': -7.17,
+        ' h': -7.17, 'eur': -7.17, 'erc': -7.17, 'lle': -7.17, 'ù': -7.17, 'où': -7.17, 'ù ': -7.17,
+        ' où': -7.17, 'où ': -7.17, 'llé': -7.17, 'ê': -7.17, 'vi': -7.17, 'pr': -7.17,
+        ' pr': -7.17, 'po': -7.17, ' po': -7.17, 'lé ': -7.17, 'em': -7.17, 'co': -7.17,
+        'mo': -7.17, ' mo': -7.17, 'nc': -7.17, 'ons': -7.17, 'rt': -7.17, ' a ': -7.17,
+        'ur ': -7.17, 'jo': -7.17, 'jou': -7.17, 'om': -7.17, ' vo': -7.17, 'fai': -7.58,
+        'pen': -7.58, 'ren': -7.58, 'ntr': -7.58, 'z': -7.58, 'ez': -7.58, 'z ': -7.58,
+        'ez ': -7.58, 'toi': -7.58, 'soi': -7.58, 'oir': -7.58, ' c ': -7.58, 'vr': -7.58,
+        ' vr': -7.58, 'vra': -7.58,
+    },
+    'ind': {
+        'a': -2.63, 'n': -3.54, 'i': -3.64, 'k': -3.68, 'e': -3.90, 'u': -3.93, 'm': -4.11,
+        'an': -4.14, 'a ': -4.20, 't': -4.20, 'r': -4.34, 'g': -4.38, 'u ': -4.43, 's': -4.43,
+        'ak': -4.54, 'd': -4.61, ' k': -4.66, ' a': -4.68, 'ng': -4.71, 'ka': -4.73, 'i ': -4.73,
+        'l': -4.76, 'p': -4.82, 'n ': -4.88, 'y': -4.94, ' s': -4.98, 'ya': -5.01, 'an ': -5.01,
+        ' m': -5.05, 'ma': -5.05, 'er': -5.05, 'ku': -5.17, 'b': -5.17, ' t': -5.17, 'ta': -5.17,
+        'da': -5.17, 'ang': -5.21, ' ak': -5.21, 'g ': -5.25, 'ng ': -5.25, ' d': -5.30,
+        'in': -5.30, 'ku ': -5.30, 'aku': -5.35, ' b': -5.40, 'h': -5.40, 'ar': -5.40, 'am': -5.46,
+        ' ka': -5.46, 'la': -5.46, 'k ': -5.46, ' p': -5.51, 'se': -5.51, 'mu': -5.57, 'al': -5.57,
+        'at': -5.57, 'en': -5.57, 'ya ': -5.57, ' se': -5.57, 'pa': -5.64, 'ny': -5.64,
+        'nya': -5.64, 'na': -5.64, 'di': -5.71, 'ke': -5.71, 'j': -5.71, 'ak ': -5.71, 'ap': -5.78,
+        ' ma': -5.78, 'me': -5.78, 'em': -5.78, ' ke': -5.78, 'ja': -5.78, ' y': -5.86,
+        ' ya': -5.86, 'mu ': -5.86, 'kan': -5.86, ' me': -5.86, 'ga': -5.86, 'ti': -5.86,
+        'sa': -5.86, 'be': -5.86, 'yan': -5.95, 'si': -6.04, ' i': -6.04, ' ti': -6.04, 'ri': -6.04,
+        'gi': -6.04, ' be': -6.04, 'pe': -6.04, ' pe': -6.04, 'apa': -6.15, 'pa ': -6.15,
+        ' di': -6.15, 'di ': -6.15, 'ni': -6.15, 'ki': -6.15, 'ala': -6.15, 't ': -6.15,
+        'id': -6.15, 'tid': -6.15, 'ida': -6.15, 'dak': -6.15, ' da': -6.15, 'ta ': -6.15,
+        'it': -6.15, ' ap': -6.27, 'kam': -6.27, 'amu': -6.27, 'ini': -6.27, 'ni ': -6.27,
+        'm ': -6.27, 'nga': -6.27, 'o': -6.27, 'ha': -6.27, 'h ': -6.27, 'ana': -6.27, 'te': -6.27,
+        'ra': -6.27, 'per': -6.27, ' l': -6.40, ' in': -6.40, 'man': -6.40, 'at ': -6.40,
+        'c': -6.40, 'un': -6.40, 'tu': -6.40, 'ah': -6.40, 'as': -6.40, 'gi ': -6.40, 'ai': -6.40,
+        'lu': -6.40, ' ki': -6.40, 'kit': -6.40, 'ita': -6.40, 'aka': -6.40, 'ber': -6.40,
+        'ik': -6.55, 'r ': -6.55, 'lan': -6.55, 'am ': -6.55, ' ta': -6.55, 'ia': -6.55,
+        'emu': -6.55, 'ing': -6.55, 'nt': -6.55, ' j': -6.55, ' ja': -6.55, 'ru': -6.55,
+        'li': -6.55, 'men': -6.55, 'dan': -6.55, 'ua': -6.55, 'ek': -6.55, 'el': -6.55,
+        ' sa': -6.55, ' la': -6.74, 'bi': -6.74, ' bi': -6.74, 'au': -6.74, 'au ': -6.74,
+        'gg': -6.74, 'ngg': -6.74, 'ad': -6.74, 'us': -6.74, 'har': -6.74, 'rus': -6.74,
+        'ba': -6.74, 'eng': -6.74, 'su': -6.74, 'ah ': -6.74, 'im': -6.74, ' te': -6.74,
+        'ima': -6.74, 'ih': -6.74, 'asi': -6.74, 'ena': -6.74, 'ata': -6.74, 'sem': -6.74,
+        'na ': -6.74, 're': -6.74, 'eka': -6.74, 'ari': -6.74, 'uk': -6.96, 'sin': -6.96,
+        'pi': -6.96, 'ir': -6.96, 'pu': -6.96, 'mal': -6.96, 'lam': -6.96, 'ud': -6.96,
+        'ian': -6.96, 'gat': -6.96, 'aru': -6.96, 'is': -6.96, 'sa ': -6.96, 'ri ': -6.96,
+        'in ': -6.96, ' su': -6.96, 'ama': -6.96, 'ter': -6.96, 'ma ': -6.96, 'mer': -6.96,
+        'era': -6.96, 'ere': -6.96, 'ka ': -6.96, 'rg': -6.96, 'erg': -6.96, 'rgi': -6.96,
+        'ag': -6.96, 'lu ': -6.96, 'tan': -6.96, 'rt': -6.96, 'ert': -6.96, 'uka': -7.25,
+        ' si': -7.25, 'il': -7.25, 'mau': -7.25, ' pu': -7.25, 'ema': -7.25, 'tap': -7.25,
+        'api': -7.25, 'pi ': -7.25, 'kem': -7.25, 'dia': -7.25, 'kal': -7.25, 'gga': -7.25,
+        ' h': -7.25, ' ha': -7.25, 'gu': -7.25, 'isa': -7.25, 'sn': -7.25, 'usn': -7.25,
+        'sny': -7.25, 'sud': -7.25, 'nan': -7.25, 'eri': -7.25, 'sih': -7.25, 'ih ': -7.25,
+        'ben': -7.25, 'nar': -7.25, 'ar ': -7.25, 'mua': -7.25, 'ua ': -7.25, 'ran': -7.25,
+        'e ': -7.25, 'ke ': -7.25, 'rek': -7.25, 'es': -7.25, 'um': -7.25, 'de': -7.25,
+        ' de': -7.25, 'kat': -7.25, 'ker': -7.25, 'uny': -7.25, 'rj': -7.25, 'erj': -7.25,
+        'rja': -7.25, 'elu': -7.25, 'agi': -7.25, 'ca': -7.25, 'ara': -7.25, 'nta': -7.25,
+        'rn': -7.25, 'sat': -7.25, 'atu': -7.25, 'tu ': -7.25, 'pat': -7.25, 'tem': -7.25,
+        'ay': -7.25, ' c': -7.25, 'any': -7.25, 'rte': -7.25, 'lal': -7.25, 'alu': -7.25,
+        'ada': -7.25, 'da ': -7.25, 'jan': -7.25, ' ba': -7.25, 'bil': -7.65, 'ila': -7.65,
+        'mem': -7.65, 'lau': -7.65, 'nc': -7.65, 'iku': -7.65, 'et': -7.65, 'tin': -7.65,
+        'gal': -7.65, 'to': -7.65, 'or': -7.65, 'ant': -7.65, 'jad': -7.65, 'adi': -7.65,
+        's ': -7.65, 'us ': -7.65, 'ali': -7.65, ' tu': -7.65, 'tun': -7.65, 'ung': -7.65,
+        'ggu': -7.65,
+    },
+    'ita': {
+        'a': -3.34, 'o': -3.36, 'i': -3.36, 'e': -3.55, 'n': -3.83, 'r': -3.96, 's': -3.97,
+        't': -3.99, 'o ': -4.00, 'c': -4.18, 'i ': -4.26, 'l': -4.26, 'a ': -4.28, 'e ': -4.38,
+        'd': -4.45, 'u': -4.64, 'm': -4.64, ' s': -4.82, 'v': -4.86, 'p': -4.89, ' d': -4.93,
+        ' c': -4.97, 'no': -5.06, ' p': -5.15, ' l': -5.19, 'in': -5.30, ' a': -5.36, 'on': -5.36,
+        'ia': -5.36, 'n ': -5.36, 're': -5.36, 'h': -5.48, 'er': -5.48, 'to': -5.48, 'f': -5.55,
+        'la': -5.55, 'ar': -5.55, 'ti': -5.55, ' n': -5.55, 'ra': -5.63, ' t': -5.63, 'or': -5.63,
+        'to ': -5.63, ' v': -5.63, 'b': -5.63, 'ch': -5.71, ' f': -5.71, 'en': -5.71, 'st': -5.71,
+        ' m': -5.71, 'so': -5.71, 'no ': -5.71, 'da': -5.71, 'di': -5.71, 'lo': -5.71, 'co': -5.79,
+        're ': -5.79, 'ti ': -5.79, ' no': -5.79, 'ci': -5.89, 'q': -5.89, 'qu': -5.89, 'ta': -5.89,
+        'mi': -5.89, 'at': -5.89, ' i': -5.89, 'do': -5.89, 'lo ': -5.89, 'on ': -5.89, 'g': -5.89,
+        'la ': -5.89, ' ch': -5.99, ' q': -5.99, ' qu': -5.99, 'as': -5.99, 've': -5.99,
+        'tt': -5.99, 'non': -5.99, 'an': -5.99, 'll': -5.99, 'he': -6.11, 'che': -6.11,
+        'he ': -6.11, 'sa': -6.11, 'av': -6.11, 'se': -6.11, 'ss': -6.11, 'si': -6.11, 'ma': -6.11,
+        'mi ': -6.11, ' so': -6.11, ' di': -6.11, ' la': -6.11, 'nd': -6.11, 'ut': -6.11,
+        ' da': -6.11, 'ce': -6.11, ' e': -6.11, 'es': -6.11, 'te': -6.11, 'el': -6.11, 'l ': -6.11,
+        'am': -6.11, 'mo': -6.11, 'mo ': -6.11, 'os': -6.24, 'sa ': -6.24, 'pe': -6.24,
+        'sta': -6.24, 'ra ': -6.24, 'na': -6.24, 'po': -6.24, 'ri': -6.24, 'ic': -6.24,
+        ' do': -6.24, ' lo': -6.24, ' pe': -6.40, ' st': -6.40, 'oi': -6.40, ' po': -6.40,
+        'oi ': -6.40, ' mi': -6.40, 'ono': -6.40, 'di ': -6.40, 'sc': -6.40, ' in': -6.40,
+        'io': -6.40, 'ro': -6.40, ' e ': -6.40, 'de': -6.40, 'ue': -6.40, 'que': -6.40,
+        ' an': -6.40, 'and': -6.40, 'iam': -6.40, 'amo': -6.40, ' co': -6.58, 'fa': -6.58,
+        ' fa': -6.58, 'ui': -6.58, 'ca': -6.58, ' ma': -6.58, 'son': -6.58, 'ato': -6.58,
+        'in ': -6.58, ' u': -6.58, 'fi': -6.58, 'ov': -6.58, 'vu': -6.58, 'dov': -6.58,
+        'tti': -6.58, 'ne': -6.58, 'so ': -6.58, 'cu': -6.58, 'pa': -6.58, 'me': -6.58,
+        'par': -6.58, 'ol': -6.58, ' se': -6.58, ' si': -6.58, 'ro ': -6.58, 'ta ': -6.58,
+        'tr': -6.58, 'al': -6.58, 'ell': -6.58, 'ni': -6.58, 'pr': -6.58, 'bi': -6.58, 'è': -6.58,
+        ' è': -6.58, 'è ': -6.58, ' è ': -6.58, 'un': -6.58, 'te ': -6.58, 'ai': -6.80,
+        'ai ': -6.80, 'qui': -6.80, 'ui ': -6.80, 'vo': -6.80, 'ma ': -6.80, 'rd': -6.80,
+        'cor': -6.80, 'dat': -6.80, 'sci': -6.80, 'vi': -6.80, 'io ': -6.80, 'are': -6.80,
+        'et': -6.80, 'ett': -6.80, 'va': -6.80, ' b': -6.80, 'ei': -6.80, 'ei ': -6.80,
+        'est': -6.80, 'z': -6.80, ' g': -6.80, 'zi': -6.80, 'rc': -6.80, 'erc': -6.80, 'lla': -6.80,
+        ' ve': -6.80, ' fi': -6.80, 'per': -6.80, 'ir': -6.80, 'im': -6.80, ' pr': -6.80,
+        'na ': -6.80, 'ess': -6.80, 'nt': -6.80, 'gi': -6.80, 'cos': -7.09, 'osa': -7.09,
+        ' ci': -7.09, 'ser': -7.09, 'era': -7.09, 'rn': -7.09, 'orn': -7.09, 'ssi': -7.09,
+        ' r': -7.09, ' ri': -7.09, 'r ': -7.09, 'ver': -7.09, 'er ': -7.09, 'asc': -7.09,
+        'uo': -7.09, ' vu': -7.09, 'vuo': -7.09, 'uoi': -7.09, 'va ': -7.09, 'be': -7.09,
+        ' be': -7.09, 'ene': -7.09, 'ne ': -7.09, 'pos': -7.09, 'sso': -7.09, ' o': -7.09,
+        'cc': -7.09, 'rm': -7.09, 'arm': -7.09, 'men': -7.09, 'da ': -7.09, 'ac': -7.09,
+        'ace': -7.09, 'do ': -7.09, 'ad': -7.09, 'tra': -7.09, 'ues': -7.09, 'ora': -7.09,
+        'ie': -7.09, 'ove': -7.09, 'tu': -7.09, ' tu': -7.09, 'tut': -7.09, 'utt': -7.09,
+        'nda': -7.09, 'all': -7.09, 'ia ': -7.09, ' vi': -7.09, 'cin': -7.09, 'con': -7.09,
+        'oro': -7.09, 'pi': -7.09, 'ce ': -7.09, ' h': -7.09, ' de': -7.09, 'fin': -7.09,
+        'ini': -7.09, 'ire': -7.09, 'ina': -7.09, 'bb': -7.09, 'bbi': -7.09, 'bia': -7.09,
+        ' pa': -7.09, 'llo': -7.09, 'is': -7.09, 'rt': -7.09, 'à': -7.09, 'à ': -7.09, ' un': -7.09,
+        'il': -7.09, 'li': -7.09, 'em': -7.09, 'sto': -7.09, 'uti': -7.09, 'ent': -7.09,
+        'pre': -7.09, ' gi': -7.09, 'gio': -7.09, 'iar': -7.09, 'tto': -7.09, ' te': -7.09,
+        ' ce': -7.09, 'ci ': -7.50, 'ns': -7.50, 'pen': -7.50, 'ens': -7.50, 'avo': -7.50,
+        'tas': -7.50, 'ase': -7.50, ' to': -7.50,
+    },
+    'msa': {
+        'a': -2.53, 'n': -3.74, 'i': -3.82, 'a ': -3.86, 'k': -3.90, 'e': -3.91, 't': -4.01,
+        's': -4.12, 'm': -4.30, 'an': -4.33, ' s': -4.37, 'r': -4.43, 'u': -4.45, 'p': -4.47,
+        'g': -4.53, 'y': -4.60, 'ya': -4.63, 'ak': -4.65, 'l': -4.65, 'd': -4.70, 'i ': -4.70,
+        'ng': -4.81, 'ya ': -4.81, 'k ': -4.84, 'sa': -4.88, 'ta': -4.91, ' t': -4.97, 'ak ': -5.01,
+        'er': -5.01, ' a': -5.05, 'b': -5.05, ' d': -5.05, 'ay': -5.05, ' sa': -5.05, 'aya': -5.05,
+        'pa': -5.08, 'ka': -5.08, 'say': -5.12, ' m': -5.12, 'ma': -5.16, 'n ': -5.21, ' k': -5.21,
+        'g ': -5.30, 'ang': -5.30, 'ng ': -5.30, 'an ': -5.30, 'da': -5.30, 'ap': -5.35,
+        'se': -5.35, ' se': -5.35, ' b': -5.40, 'h': -5.40, 'la': -5.40, 'at': -5.45, 'in': -5.45,
+        'j': -5.51, 'di': -5.63, ' p': -5.63, 'u ': -5.63, 'kan': -5.70, ' ta': -5.70, ' da': -5.70,
+        'o': -5.70, 't ': -5.78, 'al': -5.78, 'ja': -5.78, 'be': -5.78, 'w': -5.86, 'wa': -5.86,
+        ' di': -5.86, 'na': -5.86, 'am': -5.86, ' ma': -5.86, 'ri': -5.86, 'pa ': -5.94,
+        'wak': -5.94, 'at ': -5.94, 'ah': -5.94, 'h ': -5.94, 'ke': -5.94, 'c': -5.94, ' be': -5.94,
+        'ar': -5.94, 'it': -5.94, 'apa': -6.04, 'aw': -6.04, ' aw': -6.04, 'awa': -6.04,
+        'ta ': -6.04, 'em': -6.04, 'te': -6.04, ' te': -6.04, 'pe': -6.04, ' pe': -6.04,
+        'ni': -6.14, 'ga': -6.14, 'm ': -6.14, ' ke': -6.14, 'tak': -6.14, 'en': -6.14,
+        'ita': -6.14, 'ber': -6.14, ' ap': -6.26, 'ua': -6.26, 'di ': -6.26, 'si': -6.26,
+        'ni ': -6.26, ' i': -6.26, 'ala': -6.26, 'me': -6.26, 'ia': -6.26, 'tu': -6.26, 'as': -6.26,
+        'ra': -6.26, 'ca': -6.26, 'gi': -6.26, 'per': -6.26, ' y': -6.40, ' ya': -6.40,
+        'yan': -6.40, 'ing': -6.40, 'nga': -6.40, ' n': -6.40, 'lam': -6.40, 'am ': -6.40,
+        ' me': -6.40, 'mu': -6.40, 'ti': -6.40, 'ol': -6.40, ' l': -6.40, 'dan': -6.40,
+        'gi ': -6.40, 'ki': -6.40, ' ki': -6.40, 'kit': -6.40, 'ny': -6.40, 'nya': -6.40,
+        'ini': -6.55, ' ka': -6.55, 'eri': -6.55, ' j': -6.55, 'ad': -6.55, 'ana': -6.55,
+        'ep': -6.55, 'mp': -6.55, 'mpa': -6.55, 'pat': -6.55, 'da ': -6.55, 'lu': -6.55,
+        'nt': -6.55, 'aka': -6.55, ' in': -6.73, 'ba': -6.73, 'ik': -6.73, 'um': -6.73,
+        'ah ': -6.73, 'mal': -6.73, 'pi': -6.73, 'pi ': -6.73, 'ter': -6.73, 'le': -6.73,
+        'ri ': -6.73, 'ul': -6.73, 'sem': -6.73, 'ek': -6.73, 'ada': -6.73, 'hu': -6.73,
+        'ahu': -6.73, 'hu ': -6.73, 'epa': -6.73, ' c': -6.73, 'bu': -6.95, ' si': -6.95,
+        'gat': -6.95, ' na': -6.95, 'nak': -6.95, 'li': -6.95, ' r': -6.95, 'man': -6.95,
+        'api': -6.95, 'emu': -6.95, 'dia': -6.95, 'un': -6.95, 'gg': -6.95, 'ngg': -6.95,
+        'ej': -6.95, 'eja': -6.95, ' ja': -6.95, ' pa': -6.95, 'el': -6.95, 'ma ': -6.95,
+        'et': -6.95, 'ran': -6.95, 're': -6.95, 'ere': -6.95, 'eka': -6.95, 'ka ': -6.95,
+        'rg': -6.95, 'erg': -6.95, 'rgi': -6.95, ' la': -6.95, 'rj': -6.95, 'erj': -6.95,
+        'tah': -6.95, 'r ': -6.95, 'ari': -6.95, ' ak': -6.95, ' bu': -7.24, 'sin': -7.24,
+        'ata': -7.24, 'ik ': -7.24, 'ru': -7.24, 'mah': -7.24, ' ni': -7.24, 'ema': -7.24,
+        'tap': -7.24, 'ku': -7.24, 'nc': -7.24, 'rt': -7.24, 'l ': -7.24, 'ab': -7.24, 'pak': -7.24,
+        'sa ': -7.24, 'tan': -7.24, 'gu': -7.24, 'bo': -7.24, 'eh': -7.24, ' bo': -7.24,
+        'bol': -7.24, 'ole': -7.24, 'leh': -7.24, 'eh ': -7.24, 'ir': -7.24, 'ama': -7.24,
+        'im': -7.24, 'ima': -7.24, 'ih': -7.24, 'asi': -7.24, 'sih': -7.24, 'ih ': -7.24,
+        'asa': -7.24, 'na ': -7.24, 'mua': -7.24, 'mer': -7.24, 'rek': -7.24, 'su': -7.24,
+        'ut': -7.24, 'eb': -7.24, 'seb': -7.24, 'uk': -7.24, ' ad': -7.24, 'ker': -7.24,
+        'rja': -7.24, 'rl': -7.24, 'erl': -7.24, 'lu ': -7.24, 'elu': -7.24, 'ag': -7.24,
+        'agi': -7.24, 'ent': -7.24, 'nta': -7.24, 'mi': -7.24, ' mi': -7.24, 'min': -7.24,
+        'ara': -7.24, 'ar ': -7.24, ' mu': -7.24, 'mul': -7.24, 'ula': -7.24, 'la ': -7.24,
+        'p ': -7.24, ' ca': -7.24, 'ap ': -7.24, 'to': -7.24, 'tol': -7.24, 'ia ': -7.24,
+        'jan': -7.24, 'men': -7.24, 'bua': -7.65, 'uat': -7.65, ' ba': -7.65, 'bal': -7.65,
+        'ali': -7.65, 'lik': -7.65, ' ru': -7.65, 'rum': -7.65, 'uma': -7.65, 'mem': -7.65,
+        'ud': -7.65, 'rin': -7.65, 'ert': -7.65, 'rti': -7.65, 'tin': -7.65, 'gga': -7.65,
+        'gal': -7.65, 'aba': -7.65, 'ks': -7.65, 'aks': -7.65, 'dat': -7.65, 'ung': -7.65,
+    },
+    'por': {
+        'e': -3.14, 'a': -3.37, 'o': -3.39, 's': -3.73, 'r': -3.94, 'i': -4.02, 'n': -4.07,
+        'o ': -4.16, 'e ': -4.21, 'u': -4.25, 'a ': -4.29, 'm': -4.29, 'd': -4.32, 't': -4.36,
+        'c': -4.45, ' e': -4.52, 's ': -4.73, 'v': -4.85, 'p': -5.00, 'es': -5.04, ' d': -5.08,
+        ' n': -5.12, 'r ': -5.12, 'q': -5.16, 'qu': -5.16, ' v': -5.21, 'l': -5.21, ' a': -5.26,
+        ' p': -5.26, 'de': -5.26, 'ar': -5.31, 'ã': -5.31, 'ue': -5.37, 'que': -5.37, 'te': -5.37,
+        ' q': -5.42, ' qu': -5.42, 'u ': -5.42, ' c': -5.42, 'ão': -5.42, 'ão ': -5.42, 'ra': -5.48,
+        ' m': -5.48, 'em': -5.48, 'h': -5.48, 'er': -5.48, 'ue ': -5.55, 'eu': -5.55, 'eu ': -5.55,
+        'as': -5.55, ' t': -5.55, 'os': -5.55, ' o': -5.62, 'i ': -5.62, 'st': -5.69, 'do': -5.69,
+        ' eu': -5.69, ' de': -5.69, 'or': -5.69, 'm ': -5.69, ' s': -5.69, 'vo': -5.77,
+        ' es': -5.77, 'f': -5.77, ' f': -5.77, 'as ': -5.77, 'in': -5.77, 'g': -5.77, 'co': -5.77,
+        'os ': -5.77, ' vo': -5.86, 'est': -5.86, 'do ': -5.86, 'ta': -5.86, 're': -5.86,
+        'nã': -5.86, ' nã': -5.86, 'não': -5.86, 'me': -5.86, 'on': -5.86, ' o ': -5.95,
+        'oc': -5.95, 'se': -5.95, 'sa': -5.95, 'po': -5.95, 'b': -5.95, 'nt': -5.95, 'da': -5.95,
+        'ê': -6.06, 'cê': -6.06, 'voc': -6.06, 'ocê': -6.06, 'is': -6.06, 'ia': -6.06, 'ra ': -6.06,
+        've': -6.06, 'ri': -6.06, 'ar ': -6.06, 'mo': -6.06, 'an': -6.06, ' co': -6.06, 'ê ': -6.18,
+        'cê ': -6.18, 'en': -6.18, 'nd': -6.18, 'ei': -6.18, 'ss': -6.18, 'ia ': -6.18, 'oi': -6.18,
+        'ma': -6.18, ' po': -6.18, 'em ': -6.18, 'de ': -6.18, ' a ': -6.18, 'mos': -6.18,
+        'di': -6.31, 'pa': -6.31, ' pa': -6.31, 'ca': -6.31, 'sta': -6.31, 'te ': -6.31,
+        'le': -6.31, 'er ': -6.31, ' me': -6.31, 'so': -6.31, ' te': -6.31, 'ad': -6.31,
+        'con': -6.31, 'to': -6.31, 'el': -6.31, 'na': -6.31, 'da ': -6.31, 'z': -6.46, 'ei ': -6.46,
+        ' di': -6.46, ' i': -6.46, 'par': -6.46, ' l': -6.46, 'nh': -6.46, 'por': -6.46,
+        'or ': -6.46, ' e ': -6.46, ' se': -6.46, 'ho': -6.46, 'am': -6.46, 'va': -6.46, 'á': -6.65,
+        'á ': -6.65, 'ndo': -6.65, 'ui': -6.65, 'iss': -6.65, 'ara': -6.65, 'ta ': -6.65,
+        'no': -6.65, ' no': -6.65, ' ma': -6.65, 'br': -6.65, 'ha': -6.65, 'es ': -6.65,
+        'ce': -6.65, 'ora': -6.65, 'nte': -6.65, 'ver': -6.65, ' el': -6.65, 'ele': -6.65,
+        'fo': -6.65, ' fo': -6.65, 'pr': -6.65, 'me ': -6.65, 'nc': -6.65, 'ai': -6.65, 'pe': -6.87,
+        'av': -6.87, 'tar': -6.87, 'sso': -6.87, 'so ': -6.87, 'cu': -6.87, 'tem': -6.87,
+        ' r': -6.87, ' h': -6.87, 'ga': -6.87, 'ho ': -6.87, 'go': -6.87, 'to ': -6.87,
+        'foi': -6.87, 'oi ': -6.87, 'rm': -6.87, 'ec': -6.87, 'amo': -6.87, 'ont': -6.87,
+        'des': -6.87, 'ria': -6.87, 'ir': -6.87, ' va': -6.87, 'vam': -6.87, 'j': -6.87,
+        'tá': -7.16, 'stá': -7.16, 'tá ': -7.16, 'fa': -7.16, ' fa': -7.16, 'aq': -7.16,
+        ' aq': -7.16, 'aqu': -7.16, 'qui': -7.16, 'ui ': -7.16, 'ns': -7.16, 'sei': -7.16,
+        'dis': -7.16, 'se ': -7.16, 'sa ': -7.16, 'it': -7.16, 'mas': -7.16, 'mb': -7.16,
+        'emb': -7.16, ' as': -7.16, 'mi': -7.16, 'min': -7.16, 'inh': -7.16, 'ch': -7.16,
+        'ó': -7.16, 'sc': -7.16, 'esc': -7.16, ' en': -7.16, 'ent': -7.16, 'ol': -7.16,
+        'uer': -7.16, 're ': -7.16, ' b': -7.16, 'be': -7.16, 'id': -7.16, 'rt': -7.16, 'fi': -7.16,
+        'ic': -7.16, ' fi': -7.16, 'ica': -7.16, 'rd': -7.16, 'gu': -7.16, 'ig': -7.16, 'al': -7.16,
+        ' on': -7.16, ' na': -7.16, 'na ': -7.16, 'lh': -7.16, ' ve': -7.16, 'om': -7.16,
+        'tr': -7.16, 'ter': -7.16, 'ant': -7.16, ' da': -7.16, 'ci': -7.16, ' pr': -7.16,
+        'pre': -7.16, 'ece': -7.16, ' sa': -7.16, 'irm': -7.16, ' em': -7.16, 'vi': -7.16,
+        ' vi': -7.16, 'mã': -7.16, 'le ': -7.16, 'ada': -7.16, 'zi': -7.16, 'ind': -7.16,
+        ' j': -7.16, 'az': -7.56, 'ze': -7.56, 'faz': -7.56, ' pe': -7.56, 'nse': -7.56,
+        'sse': -7.56, ' ia': -7.56, ' ca': -7.56, 'cas': -7.56, 'asa': -7.56, 'noi': -7.56,
+        'oit': -7.56, 'ite': -7.56, 'ep': -7.56, 'dep': -7.56, 'ois': -7.56, 'is ': -7.56,
+        ' le': -7.56, 'lem': -7.56, 'mbr': -7.56, 'bre': -7.56, 'rei': -7.56, 'x': -7.56,
+        'ix': -7.56, 'xe': -7.56, 'dei': -7.56, 'eix': -7.56, 'ixe': -7.56, ' mi': -7.56,
+        'nha': -7.56, ' ch': -7.56, 'cha': -7.56, 'no ': -7.56, 'cr': -7.56, 'io': -7.56,
+    },
+    'spa': {
+        'e': -3.19, 'a': -3.31, 'o': -3.51, 's': -3.66, 'n': -3.92, 'r': -3.96, 'e ': -4.17,
+        'i': -4.19, 'a ': -4.19, 'o ': -4.24, 'u': -4.26, 'd': -4.28, 'l': -4.32, 't': -4.34,
+        's ': -4.51, 'c': -4.58, 'm': -4.79, 'es': -4.83, ' e': -4.83, ' l': -4.83, 'p': -4.90,
+        'q': -4.94, 'qu': -4.94, ' q': -5.10, ' qu': -5.10, 'ue': -5.10, ' p': -5.20, 'en': -5.20,
+        'n ': -5.20, ' d': -5.25, 'os': -5.25, 'st': -5.30, ' n': -5.30, ' s': -5.30, 'h': -5.36,
+        ' a': -5.36, 'que': -5.36, 'ue ': -5.36, 'no': -5.36, 'v': -5.36, 'os ': -5.36,
+        ' es': -5.42, 'er': -5.42, 'de': -5.42, 'la': -5.42, ' t': -5.42, 'ar': -5.49, 'as': -5.55,
+        ' no': -5.55, 'r ': -5.55, 'g': -5.55, ' la': -5.55, 'lo': -5.55, 'í': -5.63, 'te': -5.63,
+        'b': -5.63, 're': -5.63, 'ie': -5.63, ' h': -5.71, 'es ': -5.71, 'est': -5.71, 'or': -5.71,
+        ' v': -5.71, 'ra': -5.71, ' lo': -5.71, ' c': -5.80, ' m': -5.80, 'da': -5.80, 'to': -5.80,
+        'lo ': -5.80, 'j': -5.89, ' de': -5.89, 'la ': -5.89, 'ci': -5.89, 'no ': -5.89, 'é': -6.00,
+        'é ': -6.00, 'ha': -6.00, 'as ': -6.00, 'co': -6.00, 'en ': -6.00, 'na': -6.00, 'y': -6.00,
+        'mo': -6.00, 'de ': -6.00, 'on': -6.00, 'po': -6.00, ' ha': -6.11, 'te ': -6.11,
+        ' a ': -6.11, 'sa': -6.11, 'ta': -6.11, ' en': -6.11, 'do': -6.11, ' y': -6.11, 'ad': -6.11,
+        'is': -6.25, 'ca': -6.25, 'sta': -6.25, 'ro': -6.25, 'mi': -6.25, 'f': -6.25, 'in': -6.25,
+        ' te': -6.25, 'me': -6.25, 'an': -6.25, 'mos': -6.25, 'ía': -6.25, 'ía ': -6.25,
+        'ac': -6.40, 'ba': -6.40, 'rd': -6.40, 've': -6.40, 'na ': -6.40, 'á': -6.40, 'do ': -6.40,
+        'me ': -6.40, 'se': -6.40, 'y ': -6.40, ' y ': -6.40, 'to ': -6.40, ' f': -6.40,
+        'un': -6.40, ' po': -6.40, 'por': -6.40, 'ab': -6.40, 'em': -6.40, 'pr': -6.40, 'pe': -6.58,
+        'di': -6.58, 'ta ': -6.58, ' mi': -6.58, 'tá': -6.58, 'stá': -6.58, 'ien': -6.58,
+        'nc': -6.58, ' se': -6.58, 'al': -6.58, 'so': -6.58, ' co': -6.58, 'con': -6.58,
+        'nt': -6.58, 'l ': -6.58, 'or ': -6.58, 'el': -6.58, ' el': -6.58, 'tr': -6.58,
+        ' pr': -6.58, 'hac': -6.81, 'í ': -6.81, ' pe': -6.81, ' di': -6.81, 'ist': -6.81,
+        ' i': -6.81, 'oc': -6.81, 'ch': -6.81, 'he': -6.81, 'ir': -6.81, 'ir ': -6.81, 'per': -6.81,
+        'ero': -6.81, 'ro ': -6.81, 'go': -6.81, 'go ': -6.81, 'ec': -6.81, 'ic': -6.81,
+        'ui': -6.81, 'ere': -6.81, 'gu': -6.81, 'nd': -6.81, 'on ': -6.81, 'ho': -6.81,
+        'ra ': -6.81, ' g': -6.81, 'od': -6.81, ' to': -6.81, 'tod': -6.81, 'vi': -6.81,
+        ' vi': -6.81, 'ma': -6.81, 'pa': -6.81, 'si': -6.81, ' si': -6.81, 'el ': -6.81,
+        'am': -6.81, 'ni': -6.81, 'nos': -6.81, ' sa': -6.81, 'ué': -7.10, 'qué': -7.10,
+        'ué ': -7.10, 'ce': -7.10, 'aq': -7.10, 'uí': -7.10, ' aq': -7.10, 'aqu': -7.10,
+        'quí': -7.10, 'uí ': -7.10, 'ste': -7.10, 'ib': -7.10, ' ib': -7.10, 'iba': -7.10,
+        ' ca': -7.10, 'asa': -7.10, 'sa ': -7.10, 'noc': -7.10, 'he ': -7.10, 'ba ': -7.10,
+        'eg': -7.10, ' r': -7.10, 'rec': -7.10, 'ej': -7.10, 'll': -7.10, 'av': -7.10, 'fi': -7.10,
+        'cin': -7.10, 'ina': -7.10, 'tu': -7.10, 'ol': -7.10, 'ver': -7.10, 'qui': -7.10,
+        'uie': -7.10, 'ier': -7.10, 'res': -7.10, 're ': -7.10, 'á ': -7.10, 'tá ': -7.10,
+        ' b': -7.10, 'ed': -7.10, 'ued': -7.10, 'ga': -7.10, 'rm': -7.10, 'se ': -7.10,
+        'aci': -7.10, 'las': -7.10, 'le': -7.10, 'hor': -7.10, 'ora': -7.10, 'gr': -7.10,
+        'ia': -7.10, 'gra': -7.10, 'd ': -7.10, ' ve': -7.10, 'rda': -7.10, 'dad': -7.10,
+        'ad ': -7.10, 'sto': -7.10, 'ó': -7.10, 'odo': -7.10, 'fu': -7.10, ' fu': -7.10,
+        ' j': -7.10, 'rí': -7.10, ' me': -7.10, 'us': -7.10, 'des': -7.10, 'ten': -7.10,
+        'tra': -7.10, 'aba': -7.10, 'ar ': -7.10, 'emo': -7.10, ' pa': -7.10, 'be': -7.10,
+        'va': -7.10, ' va': -7.10, 'amo': -7.10, 'sal': -7.10, ' da': -7.10, ' u': -7.10,
+        ' un': -7.10, 'da ': -7.10, 'pre': -7.10, 'dar': -7.10, 'je': -7.10, 'ace': -7.50,
+        'sé': -7.50, 'sé ': -7.50, 'ij': -7.50, 'dij': -7.50, 'cas': -7.50, 'och': -7.50,
+        'che': -7.50, 'lu': -7.50, ' lu': -7.50, ' re': -7.50, 'eco': -7.50, 'cor': -7.50,
+        'ord': -7.50, 'dej': -7.50, 'mis': -7.50, ' o': -7.50, 'vo': -7.50, 'er ': -7.50,
+        'bi': -7.50, ' bi': -7.50, 'bie': -7.50, 'pu': -7.50, ' pu': -7.50, 'pue': -7.50,
+        'edo': -7.50,
+    },
+    'vie': {
+        'n': -3.23, 'h': -3.56, 'a': -4.01, 'g': -4.02, 'i': -4.08, 't': -4.09, 'ng': -4.18,
+        'c': -4.29, 'i ': -4.33, 'g ': -4.35, 'ng ': -4.35, ' t': -4.37, 'đ': -4.47, ' đ': -4.47,
+        'nh': -4.50, ' n': -4.55, ' c': -4.55, 'm': -4.58, 'an': -4.80, 'h ': -4.80, 'n ': -4.80,
+        'nh ': -4.84, ' a': -4.92, ' an': -4.96, 'anh': -4.96, 'm ': -4.96, 'y': -4.96, 'à': -5.00,
+        'y ': -5.04, 'u': -5.04, 'ô': -5.09, 'a ': -5.14, 'ch': -5.19, ' ch': -5.25, 'k': -5.30,
+        ' k': -5.30, 'l': -5.36, ' l': -5.36, 'r': -5.36, 'kh': -5.36, ' kh': -5.36, 'hô': -5.36,
+        'ôn': -5.36, 'v': -5.43, ' v': -5.43, 'e': -5.43, 'ư': -5.43, 'ông': -5.43, ' e': -5.50,
+        'em': -5.50, ' em': -5.50, 'em ': -5.50, 's': -5.50, ' s': -5.50, 't ': -5.50, 'khô': -5.57,
+        'hôn': -5.57, 'à ': -5.65, 'p': -5.65, 'o': -5.65, 'ó': -5.74, ' nh': -5.74, ' m': -5.74,
+        'ờ': -5.74, 'b': -5.74, ' b': -5.74, 'ả': -5.83, 'u ': -5.83, 'c ': -5.83, 'là': -5.94,
+        ' là': -5.94, ' g': -5.94, 'â': -5.94, 'th': -5.94, ' th': -5.94, 'tr': -5.94, ' tr': -5.94,
+        'ú': -5.94, 'hú': -5.94, 'ta': -5.94, ' ta': -5.94, 'ta ': -5.94, 'đâ': -6.06, ' đâ': -6.06,
+        ' ng': -6.06, 'ún': -6.06, 'chú': -6.06, 'hún': -6.06, 'úng': -6.06, 'ế': -6.06, 'ì': -6.19,
+        'ố': -6.19, ' r': -6.19, 'ã': -6.19, 'đã': -6.19, 'ã ': -6.19, ' đã': -6.19, 'đã ': -6.19,
+        ' p': -6.19, 'ph': -6.19, ' ph': -6.19, 'ấ': -6.19, 'ở': -6.34, 'ây': -6.34, 'ây ': -6.34,
+        'ẽ': -6.34, 'ẽ ': -6.34, 'ớ': -6.34, 'o ': -6.34, ' h': -6.34, 'đi': -6.34, ' đi': -6.34,
+        ' ở': -6.53, 'ở ': -6.53, ' ở ': -6.53, 'đây': -6.53, 'nó': -6.53, 'ói': -6.53,
+        ' nó': -6.53, 'nói': -6.53, 'ói ': -6.53, 'ay': -6.53, 'ay ': -6.53, 'sẽ': -6.53,
+        ' sẽ': -6.53, 'sẽ ': -6.53, 'là ': -6.53, 'ó ': -6.53, 'đư': -6.53, ' đư': -6.53,
+        'ộ': -6.53, 'và': -6.53, ' và': -6.53, 'và ': -6.53, 'ườ': -6.53, 'cả': -6.53, ' cả': -6.53,
+        'ơ': -6.53, 'ọ': -6.53, 'đi ': -6.53, 'iế': -6.53, 'p ': -6.53, 'àm': -6.75, 'làm': -6.75,
+        'àm ': -6.75, 'ì ': -6.75, 'ối': -6.75, 'ối ': -6.75, 'ề': -6.75, 'ra': -6.75, 'ê': -6.75,
+        'ên': -6.75, 'ên ': -6.75, 'hả': -6.75, 'ải': -6.75, 'phả': -6.75, 'hải': -6.75,
+        'ải ': -6.75, 'ạ': -6.75, 'ợ': -6.75, 'sa': -6.75, 'ao': -6.75, ' sa': -6.75, 'ao ': -6.75,
+        'ự': -6.75, 'ự ': -6.75, 'ời': -6.75, 'ời ': -6.75, 'ờ ': -6.75, 'ày': -6.75, 'ày ': -6.75,
+        'ệ': -6.75, 'ôi': -6.75, 'ôi ': -6.75, 'x': -6.75, ' x': -6.75, 'on': -6.75, 'ong': -6.75,
+        'á': -6.75, 'ữ': -6.75, 'ặ': -6.75, 'đa': -7.04, ' đa': -7.04, 'đan': -7.04, 'ang': -7.04,
+        'gì': -7.04, ' gì': -7.04, 'gì ': -7.04, 'ậ': -7.04, 'tố': -7.04, ' tố': -7.04,
+        'tối': -7.04, 'về': -7.04, 'ề ': -7.04, ' về': -7.04, 'về ': -7.04, 'hư': -7.04,
+        'ưn': -7.04, 'như': -7.04, 'hưn': -7.04, 'ưng': -7.04, 'ồ': -7.04, 'rồ': -7.04, 'ồi': -7.04,
+        ' rồ': -7.04, 'rồi': -7.04, 'ồi ': -7.04, ' ra': -7.04, 'ra ': -7.04, 'q': -7.04,
+        ' q': -7.04, 'qu': -7.04, ' qu': -7.04, 'ò': -7.04, 'òn': -7.04, 'có': -7.04, ' có': -7.04,
+        'có ': -7.04, 'mu': -7.04, 'uố': -7.04, ' mu': -7.04, 'sao': -7.04, 'âu': -7.04,
+        'đâu': -7.04, 'âu ': -7.04, 'ượ': -7.04, 'ợc': -7.04, 'đượ': -7.04, 'ược': -7.04,
+        'ợc ': -7.04, 'ờn': -7.04, 'ườn': -7.04, 'gi': -7.04, 'iờ': -7.04, ' gi': -7.04,
+        'giờ': -7.04, 'iờ ': -7.04, 'nà': -7.04, ' nà': -7.04, 'này': -7.04, 'd': -7.04,
+        ' d': -7.04, 'ti': -7.04, ' ti': -7.04, 'rư': -7.04, 'ướ': -7.04, 'ớc': -7.04, 'trư': -7.04,
+        'rướ': -7.04, 'ước': -7.04, 'ớc ': -7.04, 'ai': -7.04, 'ai ': -7.04, 'ầ': -7.04,
+        'uy': -7.04, 'ết': -7.04, 'iết': -7.04, 'ết ': -7.04, 'ừ': -7.04, 'ất': -7.04, 'ất ': -7.04,
+        'ữa': -7.04, 'ữa ': -7.04, 'ấy': -7.04, 'ấy ': -7.04, 'ẹ': -7.04, 'gặ': -7.04, 'ặp': -7.04,
+        ' gặ': -7.04, 'gặp': -7.04, 'ặp ': -7.04, 'mộ': -7.04, 'ột': -7.04, ' mộ': -7.04,
+        'một': -7.04, 'ột ': -7.04, 'ro': -7.04, 'tro': -7.04, 'ron': -7.04, 'na': -7.44,
+        ' na': -7.44, 'nay': -7.44, 'hà': -7.44, 'nhà': -7.44, 'hà ': -7.44, 'hớ': -7.44,
+        'ớ ': -7.44, 'nhớ': -7.44, 'hớ ': -7.44, 'ể': -7.44, 'ể ': -7.44, 'ă': -7.44, 'ua': -7.44,
+        'qua': -7.44, 'lạ': -7.44, 'ại': -7.44, ' lạ': -7.44, 'lại': -7.44, 'ại ': -7.44,
+        'ốn': -7.44,
+    },
+}
+
+UNSEEN = {'deu': -9.04, 'eng': -8.91, 'fra': -8.96, 'ind': -9.04, 'ita': -8.88, 'msa': -9.03, 'por': -8.95, 'spa': -8.89, 'vie': -8.83}
@@ -0,0 +1,319 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .core import ToolError, probe, stream_output
+from .ebml import probe_matroska, EbmlError
+
+# 解析時のサンプリングレートと100ms単位のサンプル数
+SAMPLE_RATE = 48000
+SUB_BLOCK_FRAMES = SAMPLE_RATE // 10
+# 1回に読み込むバッファの長さ（100ms単位）
+BUFFER_SUB_BLOCKS = 20
+
+# ITU-R BS.1770のKフィルタ（48kHz）の係数: 高域シェルフとハイパス
+K_WEIGHTING = [
+    ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585)),
+    ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621)),
+]
+
+# 5.1chのチャンネルごとの重み（L, R, C, LFE, Ls, Rs）
+SURROUND_WEIGHTS = [1.0, 1.0, 1.0, 0.0, 1.41, 1.41]
+# チャンネル数ごとのffmpegのチャンネルレイアウト（ない場合は"Nc"）
+CHANNEL_LAYOUTS = {1: 'mono', 2: 'stereo', 3: '2.1', 4: '4.0', 5: '5.0', 6: '5.1', 7: '6.1', 8: '7.1'}
+
+# ゲーティングのしきい値（LUFS / LU）とヒストグラムの範囲
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+LRA_RELATIVE_GATE = -20.0
+HISTOGRAM_MAX = 10.0
+HISTOGRAM_STEP = 0.1
+
+# トゥルーピークの近似に使うオーバーサンプリングの倍率と1位相あたりのタップ数
+OVERSAMPLING = 4
+OVERSAMPLING_TAPS = 12
+
+# 無音判定の既定値
+DEFAULT_SILENCE_THRESHOLD = -60.0
+DEFAULT_MIN_SILENCE = 2.0
+
+# 準拠の確認に使う既定値（EBU R128）
+DEFAULT_TARGET_LOUDNESS = -23.0
+DEFAULT_LOUDNESS_TOLERANCE = 1.0
+DEFAULT_TRUE_PEAK_LIMIT = -1.0
+
+# 同時に解析するトラック数の既定値
+DEFAULT_ANALYSIS_WORKERS = 4
+
+def _loudness(power):
+    """平均パワーからラウドネス（LUFS）を計算"""
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(power)
+
+def _decibels(value):
+    """振幅をdBに変換（0は-inf）"""
+    with np.errstate(divide='ignore'):
+        return float(20 * np.log10(value))
+
+def _oversampling_filter():
+    """トゥルーピーク用の補間フィルタ（窓付きsinc）を位相ごとに分けて作成"""
+    length = OVERSAMPLING * OVERSAMPLING_TAPS
+    n = np.arange(length) - (length - 1) / 2
+    h = np.sinc(n / OVERSAMPLING) * np.hanning(length)
+    h *= OVERSAMPLING / h.sum()
+    # 位相ごとのフィルタ（各行がOVERSAMPLING_TAPS個の係数、時間順に並べ替え）
+    return h.reshape(OVERSAMPLING_TAPS, OVERSAMPLING).T[:, ::-1].astype(np.float32)
+
+class _Histogram:
+    """ゲーティング用のラウドネスのヒストグラム（ブロック数とパワーの合計をビンごとに保持）"""
+
+    def __init__(self):
+        size = int((HISTOGRAM_MAX - ABSOLUTE_GATE) / HISTOGRAM_STEP) + 1
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.powers = np.zeros(size)
+
+    def add(self, powers):
+        loudness = _loudness(powers)
+        mask = loudness >= ABSOLUTE_GATE
+        bins = np.minimum(((loudness[mask] - ABSOLUTE_GATE) / HISTOGRAM_STEP).astype(np.int64),
+                          len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.powers += np.bincount(bins, weights=powers[mask], minlength=len(self.powers))
+
+    def relative_start(self, gate):
+        """絶対ゲートを通過したブロックの平均から相対ゲートのビン位置を計算（ブロックがなければNone）"""
+        total = self.counts.sum()
+        if total == 0:
+            return None
+        threshold = _loudness(self.powers.sum() / total) + gate
+        return max(0, int(np.ceil((threshold - ABSOLUTE_GATE) / HISTOGRAM_STEP)))
+
+    def gated_loudness(self, gate):
+        """相対ゲートを適用した平均ラウドネス"""
+        start = self.relative_start(gate)
+        if start is None or self.counts[start:].sum() == 0:
+            return None
+        return float(_loudness(self.powers[start:].sum() / self.counts[start:].sum()))
+
+    def percentile(self, gate, q):
+        """相対ゲートを適用したブロックのラウドネスのパーセンタイル"""
+        start = self.relative_start(gate)
+        if start is None:
+            return None
+        counts = self.counts[start:]
+        if counts.sum() == 0:
+            return None
+        index = int(np.searchsorted(np.cumsum(counts), q / 100 * counts.sum()))
+        return ABSOLUTE_GATE + (start + index + 0.5) * HISTOGRAM_STEP
+
+class LoudnessMeter:
+    """ストリーミングでラウドネス・ピーク・無音区間を計測する
+
+    process()には[元の音声のチャンネル..., Kフィルタ適用後のチャンネル...]の順で
+    並んだ48kHzのサンプル（フレーム数 x 2チャンネル数）を渡す。
+    保持するデータはヒストグラムと直前の数秒分のみで、長さに関係なく一定。
+    """
+
+    def __init__(self, channels, silence_threshold=DEFAULT_SILENCE_THRESHOLD,
+                 min_silence=DEFAULT_MIN_SILENCE):
+        self.channels = channels
+        weights = SURROUND_WEIGHTS if channels == 6 else [1.0] * channels
+        self.weights = np.array(weights)
+        self.silence_threshold = silence_threshold
+        self.min_silence_blocks = int(round(min_silence * 10))
+
+        self.momentary = _Histogram()
+        self.short_term = _Histogram()
+        self.max_momentary = -np.inf
+        self.max_short_term = -np.inf
+        self.sample_peak = 0.0
+        self.true_peak = 0.0
+        self.sub_blocks = 0
+        self.silence = []
+        self.silence_start = None
+
+        self._recent = np.zeros(0)  # 直前の100ms単位のパワー（最大29個）
+        self._history = np.zeros((OVERSAMPLING_TAPS - 1, channels), dtype=np.float32)
+        self._phases = _oversampling_filter()
+
+    def process(self, frames):
+        """100ms単位の整数倍のフレームを処理"""
+        raw = frames[:, :self.channels]
+        weighted = frames[:, self.channels:]
+        count = len(frames) // SUB_BLOCK_FRAMES
+        if count == 0:
+            return
+
+        # 100ms単位のチャンネル重み付き平均パワー
+        mean_square = np.square(weighted, dtype=np.float64).reshape(count, SUB_BLOCK_FRAMES, -1).mean(axis=1)
+        powers = np.concatenate([self._recent, mean_square @ self.weights])
+
+        # モーメンタリ（400ms）とショートターム（3秒）のブロックを75%/約97%重ねて計算
+        cumulative = np.concatenate([[0.0], np.cumsum(powers)])
+        first = len(self._recent)
+        for window, histogram, attribute in ((4, self.momentary, 'max_momentary'),
+                                             (30, self.short_term, 'max_short_term')):
+            ends = np.arange(max(first, window - 1), len(powers)) + 1
+            if len(ends):
+                block_powers = (cumulative[ends] - cumulative[ends - window]) / window
+                histogram.add(block_powers)
+                setattr(self, attribute, max(getattr(self, attribute), float(_loudness(block_powers.max()))))
+        self._recent = powers[-29:]
+
+        # サンプルピークとトゥルーピーク（4倍オーバーサンプリングの近似）
+        self.sample_peak = max(self.sample_peak, float(np.abs(raw).max()))
+        padded = np.concatenate([self._history, raw])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, OVERSAMPLING_TAPS, axis=0)
+        self.true_peak = max(self.true_peak, float(np.abs(windows @ self._phases.T).max()))
+        self._history = raw[-(OVERSAMPLING_TAPS - 1):].copy()
+
+        # 無音区間（100ms単位のRMSがしきい値未満の連続区間）
+        with np.errstate(divide='ignore'):
+            levels = 10 * np.log10(np.square(raw, dtype=np.float64).reshape(count, -1).mean(axis=1))
+        self._update_silence(levels < self.silence_threshold)
+        self.sub_blocks += count
+
+    def _update_silence(self, silent):
+        """無音の開始・終了を検出して区間を記録"""
+        padded = np.concatenate([[False], silent, [False]]).astype(np.int8)
+        edges = np.diff(padded)
+        starts = np.flatnonzero(edges == 1) + self.sub_blocks
+        ends = np.flatnonzero(edges == -1) + self.sub_blocks
+        if self.silence_start is not None:
+            if len(starts) and starts[0] == self.sub_blocks:
+                # 前のバッファから無音が続いている
+                starts[0] = self.silence_start
+            else:
+                self._add_silence(self.silence_start, self.sub_blocks)
+        self.silence_start = None
+        for start, end in zip(starts, ends):
+            if end == self.sub_blocks + len(silent):
+                # バッファの終わりまで無音なので次のバッファに持ち越す
+                self.silence_start = int(start)
+            else:
+                self._add_silence(int(start), int(end))
+
+    def _add_silence(self, start, end):
+        if end - start >= self.min_silence_blocks:
+            self.silence.append((start / 10, end / 10))
+
+    def result(self):
+        """計測結果を返す"""
+        if self.silence_start is not None:
+            self._add_silence(self.silence_start, self.sub_blocks)
+            self.silence_start = None
+        low = self.short_term.percentile(LRA_RELATIVE_GATE, 10)
+        high = self.short_term.percentile(LRA_RELATIVE_GATE, 95)
+        silent_blocks = sum(int(round((end - start) * 10)) for start, end in self.silence)
+        return {
+            'duration': self.sub_blocks / 10,
+            'integrated': self.momentary.gated_loudness(RELATIVE_GATE),
+            'max_momentary': self.max_momentary if np.isfinite(self.max_momentary) else None,
+            'max_short_term': self.max_short_term if np.isfinite(self.max_short_term) else None,
+            'loudness_range': high - low if low is not None else None,
+            'sample_peak': _decibels(self.sample_peak),
+            'true_peak': _decibels(self.true_peak),
+            'silence': self.silence,
+            'silent': self.sub_blocks > 0 and silent_blocks >= self.sub_blocks
+        }
+
+def build_analysis_args(ffmpeg_path, input_file, audio_index, channels):
+    """オーディオストリームを48kHzの元の音声とKフィルタ適用後の音声に分けて出力するffmpegのコマンドを構築
+
+    レイアウトが決まらないとamergeが出力の形式を選べないため、分ける前にチャンネルレイアウトを固定する。
+    """
+    k_filters = ",".join(
+        f"biquad=b0={b[0]}:b1={b[1]}:b2={b[2]}:a0={a[0]}:a1={a[1]}:a2={a[2]}" for b, a in K_WEIGHTING)
+    layout = CHANNEL_LAYOUTS.get(channels, f"{channels}c")
+    graph = (f"[0:a:{audio_index}]aresample={SAMPLE_RATE},"
+             f"aformat=sample_fmts=dbl:channel_layouts={layout},asplit=2[raw][k];"
+             f"[k]{k_filters}[weighted];[raw][weighted]amerge=inputs=2[out]")
+    return [
+        ffmpeg_path, '-v', 'error', '-nostdin', '-i', input_file,
+        '-filter_complex', graph, '-map', '[out]',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-'
+    ]
+
+def analyze_audio(tools, input_file, audio_index, channels, silence_threshold=DEFAULT_SILENCE_THRESHOLD,
+                  min_silence=DEFAULT_MIN_SILENCE):
+    """オーディオストリームを1回デコードし、固定長のバッファ単位でラウドネスと無音区間を計測"""
+    if 'ffmpeg' not in tools:
+        raise ToolError("FFmpegの設定が見つかりません。")
+    meter = LoudnessMeter(channels, silence_threshold, min_silence)
+    buffer = np.empty((SUB_BLOCK_FRAMES * BUFFER_SUB_BLOCKS, channels * 2), dtype=np.float32)
+    view = memoryview(buffer).cast('B')
+    frame_bytes = buffer.itemsize * buffer.shape[1]
+
+    args = build_analysis_args(tools['ffmpeg'], input_file, audio_index, channels)
+    for size in stream_output("FFmpeg", args, view):
+        frames = size // frame_bytes
+        if frames:
+            # 100ms未満の端数は計測に含めない
+            meter.process(buffer[:frames - frames % SUB_BLOCK_FRAMES])
+    return meter.result()
+
+def list_audio_tracks(tools, file_path):
+    """ファイル内のオーディオトラックを解析対象の一覧として取得"""
+    probe_data = None
+    if os.path.splitext(file_path)[1].lower() == '.mkv':
+        try:
+            probe_data = probe_matroska(file_path)
+        except (OSError, EbmlError):
+            pass
+    if probe_data is None:
+        probe_data = probe(tools, file_path)
+    audio_streams = [stream for stream in probe_data['streams'] if stream['codec_type'] == 'audio']
+    return [{'file': file_path, 'audio_index': i, 'channels': int(stream.get('channels', 2))}
+            for i, stream in enumerate(audio_streams)]
+
+def analyze_tracks(tools, tracks, max_workers=DEFAULT_ANALYSIS_WORKERS, **options):
+    """複数のファイル・トラックを並列に解析
+
+    tracksは[{'file': パス, 'audio_index': 音声ストリームの番号, 'channels': チャンネル数}, ...]。
+    同じ順序で結果（失敗した場合は{'error': メッセージ}）のリストを返す。
+    """
+    def analyze(track):
+        try:
+            return analyze_audio(tools, track['file'], track['audio_index'], track['channels'], **options)
+        except Exception as e:
+            return {'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(analyze, tracks))
+
+def check_compliance(result, target=DEFAULT_TARGET_LOUDNESS, tolerance=DEFAULT_LOUDNESS_TOLERANCE,
+                     true_peak_limit=DEFAULT_TRUE_PEAK_LIMIT):
+    """解析結果が目標ラウドネスとトゥルーピークの上限を満たすか確認し、問題の一覧を返す"""
+    if 'error' in result:
+        return [f"解析に失敗しました: {result['error']}"]
+    if result['silent']:
+        return ["無音のトラックです"]
+    problems = []
+    integrated = result['integrated']
+    if integrated is None or abs(integrated - target) > tolerance:
+        value = f"{integrated:.1f}" if integrated is not None else "-inf"
+        problems.append(f"ラウドネスが目標範囲外です ({value} LUFS, 目標: {target:.1f}±{tolerance:.1f})")
+    if result['true_peak'] > true_peak_limit:
+        problems.append(f"トゥルーピークが上限を超えています ({result['true_peak']:.1f} dBTP, 上限: {true_peak_limit:.1f})")
+    return problems
+
+def format_result(result):
+    """解析結果を表示用の文字列に整形"""
+    if 'error' in result:
+        return f"解析に失敗しました: {result['error']}"
+
+    def value(v, unit):
+        return f"{v:.1f} {unit}" if v is not None and np.isfinite(v) else "-"
+
+    lines = [
+        f"統合ラウドネス: {value(result['integrated'], 'LUFS')}",
+        f"最大ショートターム: {value(result['max_short_term'], 'LUFS')}",
+        f"最大モーメンタリ: {value(result['max_momentary'], 'LUFS')}",
+        f"ラウドネスレンジ: {value(result['loudness_range'], 'LU')}",
+        f"トゥルーピーク: {value(result['true_peak'], 'dBTP')}",
+        f"サンプルピーク: {value(result['sample_peak'], 'dBFS')}",
+    ]
+    if result['silence']:
+        spans = ", ".join(f"{start:.1f}〜{end:.1f}秒" for start, end in result['silence'][:10])
+        more = f" ほか{len(result['silence']) - 10}区間" if len(result['silence']) > 10 else ""
+        lines.append(f"無音区間: {spans}{more}")
+    return "\n".join(lines)
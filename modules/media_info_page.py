@@ -2,8 +2,50 @@ import os
 import ffmpeg
 from PyQt5.QtWidgets import (QWizardPage, QLabel, QVBoxLayout, QHBoxLayout,
                             QLineEdit, QPushButton, QTextEdit, QFileDialog,
-                            QMessageBox, QWizard)
-from .utils import format_duration, format_bitrate
+                            QMessageBox, QWizard, QScrollArea, QWidget, QGridLayout,
+                            QGroupBox, QFormLayout, QSpinBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QPixmap
+from .utils import get_default_temp_dir, format_duration, format_bitrate
+from .core import get_tool_paths
+from .thumbnails import generate_thumbnails, DEFAULT_THUMBNAIL_COUNT, DEFAULT_SHEET_COLUMNS
+from .metadata import read_tags, write_tags, DEFAULT_PADDING, METADATA_EXTENSIONS
+from .profiling import profiled
+from .chapters import read_chapters, CHAPTER_MEDIA_EXTENSIONS
+
+# サムネイルの表示幅
+THUMBNAIL_DISPLAY_WIDTH = 160
+# メタデータの編集欄（タグ名, ラベル）
+METADATA_FIELDS = [
+    ('title', "タイトル:"),
+    ('show', "番組名:"),
+    ('episode_id', "エピソードID:"),
+    ('description', "説明:"),
+    ('artist', "アーティスト:"),
+    ('date', "日付:"),
+]
+
+class ThumbnailThread(QThread):
+    """サムネイルをバックグラウンドで作成するスレッド（1枚できるごとに通知）"""
+    thumbnail_ready = pyqtSignal(str, int, float, str)
+    thumbnail_failed = pyqtSignal(str, int, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, tools, file_path, temp_dir, count):
+        super().__init__()
+        self.tools = tools
+        self.file_path = file_path
+        self.temp_dir = temp_dir
+        self.count = count
+
+    def run(self):
+        try:
+            generate_thumbnails(
+                self.tools, self.file_path, self.temp_dir, self.count,
+                on_thumbnail=lambda i, seconds, path: self.thumbnail_ready.emit(self.file_path, i, seconds, path),
+                on_error=lambda i, seconds, message: self.thumbnail_failed.emit(self.file_path, i, message))
+        except Exception as e:
+            self.failed.emit(self.file_path, str(e))
 
 class MediaInfoPage(QWizardPage):
     def __init__(self):
@@ -27,8 +69,56 @@ class MediaInfoPage(QWizardPage):
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
 
+        # サムネイル表示部分（作成できたものから順に表示）
+        self.thumbnail_widget = QWidget()
+        self.thumbnail_layout = QGridLayout(self.thumbnail_widget)
+        self.thumbnail_area = QScrollArea()
+        self.thumbnail_area.setWidgetResizable(True)
+        self.thumbnail_area.setWidget(self.thumbnail_widget)
+        self.thumbnail_labels = []
+        self.thumbnail_threads = []
+
+        # メタデータ編集部分（MP4のみ）
+        self.metadata_group = QGroupBox("メタデータ")
+        metadata_layout = QFormLayout()
+        self.metadata_edits = {}
+        for tag, label in METADATA_FIELDS:
+            edit = QLineEdit()
+            metadata_layout.addRow(label, edit)
+            self.metadata_edits[tag] = edit
+        self.season_spin = QSpinBox()
+        self.season_spin.setRange(0, 9999)
+        self.season_spin.setSpecialValueText("なし")
+        self.episode_spin = QSpinBox()
+        self.episode_spin.setRange(0, 99999)
+        self.episode_spin.setSpecialValueText("なし")
+        number_layout = QHBoxLayout()
+        number_layout.addWidget(QLabel("シーズン:"))
+        number_layout.addWidget(self.season_spin)
+        number_layout.addWidget(QLabel("エピソード:"))
+        number_layout.addWidget(self.episode_spin)
+        number_layout.addStretch()
+        metadata_layout.addRow(number_layout)
+        artwork_layout = QHBoxLayout()
+        self.artwork_edit = QLineEdit()
+        self.artwork_edit.setPlaceholderText("変更しない")
+        artwork_button = QPushButton("参照...")
+        artwork_button.clicked.connect(self.browse_artwork)
+        artwork_layout.addWidget(self.artwork_edit)
+        artwork_layout.addWidget(artwork_button)
+        metadata_layout.addRow("アートワーク:", artwork_layout)
+        self.save_metadata_button = QPushButton("メタデータを保存")
+        self.save_metadata_button.clicked.connect(self.save_metadata)
+        metadata_layout.addRow(self.save_metadata_button)
+        self.metadata_group.setLayout(metadata_layout)
+        self.metadata_group.setEnabled(False)
+        self.loaded_tags = {}
+
         layout.addLayout(file_layout)
         layout.addWidget(self.info_text)
+        layout.addWidget(self.metadata_group)
+        layout.addWidget(QLabel("サムネイル:"))
+        layout.addWidget(self.thumbnail_area)
 
         self.setLayout(layout)
 
@@ -40,6 +130,8 @@ class MediaInfoPage(QWizardPage):
         # ファイル選択をクリア
         self.file_edit.clear()
         self.info_text.clear()
+        self.clear_thumbnails()
+        self.load_metadata(None)
 
     def validatePage(self):
         # ファイルが選択されていない場合はエラー
@@ -59,7 +151,10 @@ class MediaInfoPage(QWizardPage):
         if file_path:
             self.file_edit.setText(file_path)
             self.show_media_info(file_path)
+            self.load_metadata(file_path)
+            self.show_thumbnails(file_path)
 
+    @profiled()
     def show_media_info(self, file_path):
         try:
             # FFmpegのパスを設定
@@ -148,6 +243,18 @@ class MediaInfoPage(QWizardPage):
                     if dispositions:
                         info_text += f"ディスポジション: {', '.join(dispositions)}\n"
 
+            # チャプター情報（Neroのchpl、QuickTimeのチャプタートラック、MatroskaのChapters）
+            if os.path.splitext(file_path)[1].lower() in CHAPTER_MEDIA_EXTENSIONS:
+                try:
+                    chapters = read_chapters(file_path)
+                except Exception as e:
+                    chapters = []
+                    print(f"チャプターを読み取れません: {e}")
+                if chapters:
+                    info_text += f"\n【チャプター ({len(chapters)}件)】\n"
+                    for number, chapter in enumerate(chapters, 1):
+                        info_text += f"{number:02d}. {format_duration(chapter['start'])} {chapter['title']}\n"
+
             self.info_text.setText(info_text)
 
         except ffmpeg.Error as e:
@@ -158,3 +265,113 @@ class MediaInfoPage(QWizardPage):
             QMessageBox.critical(self, "エラー",
                                f"予期せぬエラーが発生しました:\n{str(e)}")
             self.info_text.clear()
+
+    @profiled()
+    def load_metadata(self, file_path):
+        """MP4ファイルのタグを編集欄に読み込む（対応していないファイルは編集不可）"""
+        self.loaded_tags = {}
+        editable = bool(file_path) and os.path.splitext(file_path)[1].lower() in METADATA_EXTENSIONS
+        if editable:
+            try:
+                self.loaded_tags = read_tags(file_path)
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"メタデータを読み取れません:\n{str(e)}")
+                editable = False
+        for tag, edit in self.metadata_edits.items():
+            value = self.loaded_tags.get(tag)
+            edit.setText(value if isinstance(value, str) else "")
+        self.season_spin.setValue(self.loaded_tags.get('season') or 0)
+        self.episode_spin.setValue(self.loaded_tags.get('episode') or 0)
+        self.artwork_edit.clear()
+        artwork = self.loaded_tags.get('artwork')
+        self.artwork_edit.setPlaceholderText(f"変更しない（{len(artwork)}枚）" if artwork else "変更しない")
+        self.metadata_group.setEnabled(editable)
+
+    def browse_artwork(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "アートワークの選択", "", "画像ファイル (*.jpg *.jpeg *.png)")
+        if file_path:
+            self.artwork_edit.setText(file_path)
+
+    def save_metadata(self):
+        """変更したタグだけをファイルに書き込む"""
+        file_path = self.file_edit.text()
+        tags = {}
+        for tag, edit in self.metadata_edits.items():
+            value = edit.text().strip()
+            if value != (self.loaded_tags.get(tag) or ""):
+                tags[tag] = value
+        for tag, spin in (('season', self.season_spin), ('episode', self.episode_spin)):
+            if spin.value() != (self.loaded_tags.get(tag) or 0):
+                tags[tag] = spin.value() or None
+        if self.artwork_edit.text():
+            tags['artwork'] = self.artwork_edit.text()
+        if not tags:
+            QMessageBox.information(self, "情報", "変更されたメタデータはありません。")
+            return
+
+        padding = self.wizard().config.getint("Settings", "metadata_padding", fallback=DEFAULT_PADDING)
+        try:
+            write_tags(file_path, tags, padding)
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"メタデータの保存に失敗しました:\n{str(e)}")
+            return
+        QMessageBox.information(self, "完了", "メタデータを保存しました。")
+        self.show_media_info(file_path)
+        self.load_metadata(file_path)
+
+    def clear_thumbnails(self):
+        """サムネイルの表示をクリア"""
+        for label in self.thumbnail_labels:
+            self.thumbnail_layout.removeWidget(label)
+            label.deleteLater()
+        self.thumbnail_labels = []
+
+    def show_thumbnails(self, file_path):
+        """サムネイルの枠を先に並べ、バックグラウンドで作成できたものから表示"""
+        self.clear_thumbnails()
+        config = self.wizard().config
+        tools = get_tool_paths(config)
+        if 'ffmpeg' not in tools:
+            return
+        temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+        count = config.getint("Settings", "thumbnail_count", fallback=DEFAULT_THUMBNAIL_COUNT)
+
+        for i in range(count):
+            label = QLabel("読み込み中...")
+            label.setAlignment(Qt.AlignCenter)
+            label.setFixedWidth(THUMBNAIL_DISPLAY_WIDTH)
+            self.thumbnail_layout.addWidget(label, i // DEFAULT_SHEET_COLUMNS, i % DEFAULT_SHEET_COLUMNS)
+            self.thumbnail_labels.append(label)
+
+        thread = ThumbnailThread(tools, file_path, temp_dir, count)
+        thread.thumbnail_ready.connect(self.on_thumbnail_ready)
+        thread.thumbnail_failed.connect(self.on_single_thumbnail_failed)
+        thread.failed.connect(self.on_thumbnail_failed)
+        thread.finished.connect(lambda: self.thumbnail_threads.remove(thread))
+        self.thumbnail_threads.append(thread)
+        thread.start()
+
+    def on_thumbnail_ready(self, file_path, index, seconds, path):
+        """作成されたサムネイルを表示（別のファイルを選択済みなら無視）"""
+        if file_path != self.file_edit.text() or index >= len(self.thumbnail_labels):
+            return
+        label = self.thumbnail_labels[index]
+        label.setPixmap(QPixmap(path).scaledToWidth(THUMBNAIL_DISPLAY_WIDTH, Qt.SmoothTransformation))
+        label.setToolTip(format_duration(seconds))
+
+    def on_single_thumbnail_failed(self, file_path, index, message):
+        """作成できなかったサムネイルの枠にメッセージを表示"""
+        if file_path != self.file_edit.text() or index >= len(self.thumbnail_labels):
+            return
+        self.thumbnail_labels[index].setText("作成できません")
+        self.thumbnail_labels[index].setToolTip(message)
+
+    def on_thumbnail_failed(self, file_path, message):
+        """サムネイルの作成に失敗した場合は枠にメッセージを表示"""
+        if file_path != self.file_edit.text():
+            return
+        for label in self.thumbnail_labels:
+            if label.pixmap() is None or label.pixmap().isNull():
+                label.setText("作成できません")
+                label.setToolTip(message)
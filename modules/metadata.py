@@ -0,0 +1,403 @@
+import os
+import csv
+import json
+import shutil
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from .isobmff import (BoxError, iter_children, find_child, find_path, read_moov, read_top_level,
+                      check_structure)
+from .core import partial_output_path, commit_output, fsync_path
+
+# 編集できるタグ名とilstのアトム名
+TAG_ATOMS = {
+    'title': '©nam',
+    'artist': '©ART',
+    'album_artist': 'aART',
+    'album': '©alb',
+    'genre': '©gen',
+    'date': '©day',
+    'comment': '©cmt',
+    'description': 'desc',
+    'long_description': 'ldes',
+    'copyright': 'cprt',
+    'encoder': '©too',
+    'show': 'tvsh',
+    'network': 'tvnn',
+    'episode_id': 'tven',
+    'season': 'tvsn',
+    'episode': 'tves',
+    'track': 'trkn',
+    'media_type': 'stik',
+    'sort_title': 'sonm',
+    'sort_show': 'sosn',
+    'artwork': 'covr',
+}
+ATOM_TAGS = {atom: tag for tag, atom in TAG_ATOMS.items()}
+# 数値として保存するタグ（値のバイト数）
+INTEGER_TAGS = {'season': 4, 'episode': 4, 'media_type': 1}
+
+# dataアトムの型
+DATA_BINARY = 0
+DATA_UTF8 = 1
+DATA_JPEG = 13
+DATA_PNG = 14
+DATA_INTEGER = 21
+
+# 最初に書き込むときに確保する余白（以降の編集でmdatを動かさずに済むように）
+DEFAULT_PADDING = 64 * 1024
+# 一括適用で同時に処理するファイル数の既定値
+DEFAULT_TAG_WORKERS = 8
+# 全体を書き直すときのコピーのバッファサイズ
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+# その場で書き換えるときに変更を比べる単位（変わっていないブロックは書き込まない）
+PATCH_BLOCK_SIZE = 4096
+
+METADATA_EXTENSIONS = ('.mp4', '.m4v', '.m4a', '.mov')
+FREE_TYPES = ('free', 'skip')
+
+class MetadataError(Exception):
+    """メタデータを書き込めないときの例外"""
+
+def _box(box_type, payload):
+    """ボックスのバイト列を作成"""
+    return struct.pack('>I4s', 8 + len(payload), box_type.encode('latin-1')) + payload
+
+def free_box(size):
+    """指定したサイズ（8バイト以上）のfreeボックスを作成"""
+    return struct.pack('>I4s', size, b'free') + bytes(size - 8)
+
+def _meta_children_start(data, start, end):
+    """metaボックスの子ボックスの開始位置を返す（QuickTime形式はバージョン・フラグがない）"""
+    if end - start >= 8 and data[start + 4:start + 8] == b'hdlr':
+        return start
+    return start + 4
+
+def _moov_content(moov):
+    """moovボックスのヘッダーを除いた内容の開始位置を返す"""
+    return 16 if struct.unpack_from('>I', moov, 0)[0] == 1 else 8
+
+def _find_ilst(moov):
+    """moovからudta/meta/ilstの(内容の開始位置, 終了位置)を探す（なければNone）"""
+    meta = find_path(moov, _moov_content(moov), len(moov), 'udta/meta')
+    if meta is None:
+        return None
+    return find_child(moov, _meta_children_start(moov, *meta), meta[1], 'ilst')
+
+def decode_item(atom, data, start, end):
+    """ilstの項目のdataアトムから値を取得（数値・文字列・画像）"""
+    values = []
+    for box_type, offset, size, header_size in iter_children(data, start, end):
+        if box_type != 'data':
+            continue
+        data_type = struct.unpack_from('>I', data, offset + header_size)[0] & 0xFFFFFF
+        payload = bytes(data[offset + header_size + 8:offset + size])
+        if atom == 'trkn' and len(payload) >= 6:
+            number, total = struct.unpack_from('>HH', payload, 2)
+            values.append(f"{number}/{total}" if total else str(number))
+        elif data_type == DATA_UTF8:
+            values.append(payload.decode('utf-8', errors='replace'))
+        elif data_type == DATA_INTEGER and len(payload) in (1, 2, 4, 8):
+            values.append(int.from_bytes(payload, 'big', signed=True))
+        elif data_type in (DATA_JPEG, DATA_PNG):
+            values.append({'format': 'png' if data_type == DATA_PNG else 'jpeg', 'data': payload})
+        else:
+            values.append(payload)
+    if atom == 'covr':
+        return values
+    return values[0] if values else None
+
+def read_tags(file_path):
+    """ilstのタグを読み取る（既知のタグはタグ名、それ以外はアトム名をキーにする）"""
+    _, moov = read_moov(file_path)
+    ilst = _find_ilst(moov)
+    tags = {}
+    if ilst is None:
+        return tags
+    for atom, offset, size, header_size in iter_children(moov, *ilst):
+        if atom == '----':
+            continue
+        value = decode_item(atom, moov, offset + header_size, offset + size)
+        if value is not None:
+            tags[ATOM_TAGS.get(atom, atom)] = value
+    return tags
+
+def _data_atom(data_type, payload):
+    """ilstの項目の値を表すdataアトムを作成"""
+    return _box('data', struct.pack('>II', data_type, 0) + payload)
+
+def encode_item(tag, value):
+    """タグ名と値からilstの項目を作成（artworkは画像ファイルのパスまたはそのリスト）"""
+    atom = TAG_ATOMS[tag]
+    if tag == 'artwork':
+        atoms = b''
+        for image in (value if isinstance(value, list) else [value]):
+            if isinstance(image, dict):
+                data_type, payload = (DATA_PNG if image['format'] == 'png' else DATA_JPEG), image['data']
+            else:
+                with open(image, 'rb') as f:
+                    payload = f.read()
+                data_type = DATA_PNG if payload.startswith(b'\x89PNG') else DATA_JPEG
+            atoms += _data_atom(data_type, payload)
+        return _box(atom, atoms)
+    if tag == 'track':
+        number, _, total = str(value).partition('/')
+        payload = struct.pack('>HHHH', 0, int(number), int(total or 0), 0)
+        return _box(atom, _data_atom(DATA_BINARY, payload))
+    if tag in INTEGER_TAGS:
+        try:
+            payload = int(value).to_bytes(INTEGER_TAGS[tag], 'big', signed=True)
+        except (ValueError, OverflowError):
+            raise MetadataError(f"{tag} には数値を指定してください: {value}")
+        return _box(atom, _data_atom(DATA_INTEGER, payload))
+    return _box(atom, _data_atom(DATA_UTF8, str(value).encode('utf-8')))
+
+def build_ilst(old_items, tags):
+    """既存のilstの項目にタグの変更を反映したilstの内容を作成
+
+    old_itemsは(アトム名, 項目のバイト列)のリスト。値がNoneまたは空文字のタグは削除する。
+    変更していない項目（未知のアトムを含む）は元のバイト列のまま残す。
+    """
+    for tag in tags:
+        if tag not in TAG_ATOMS:
+            raise MetadataError(f"未対応のタグです: {tag}")
+    changed = {TAG_ATOMS[tag]: value for tag, value in tags.items()}
+    items = []
+    for atom, item in old_items:
+        if atom in changed:
+            value = changed.pop(atom)
+            if value not in (None, ''):
+                items.append(encode_item(ATOM_TAGS[atom], value))
+        else:
+            items.append(item)
+    for atom, value in changed.items():
+        if value not in (None, ''):
+            items.append(encode_item(ATOM_TAGS[atom], value))
+    return b''.join(items)
+
+def _meta_box(ilst_content, padding, old_meta=None):
+    """ilstと余白のfreeボックスを含むmetaボックスを作成（既存のmetaのhdlrなどは残す）"""
+    if old_meta is None:
+        header = struct.pack('>I', 0)
+        hdlr = _box('hdlr', struct.pack('>II4s4sII', 0, 0, b'mdir', b'appl', 0, 0) + b'\0')
+        children = [hdlr]
+    else:
+        data, start, end = old_meta
+        children_start = _meta_children_start(data, start, end)
+        header = bytes(data[start:children_start])
+        children = [bytes(data[offset:offset + size])
+                    for box_type, offset, size, _ in iter_children(data, children_start, end)
+                    if box_type not in ('ilst',) + FREE_TYPES]
+    children.append(_box('ilst', ilst_content))
+    if padding:
+        children.append(free_box(padding))
+    return _box('meta', header + b''.join(children))
+
+def build_moov(moov, tags, padding):
+    """タグを変更したmoovを作成（udta/metaのfreeボックスはpaddingバイトにする）"""
+    content_start = _moov_content(moov)
+    old_items = []
+    ilst = _find_ilst(moov)
+    if ilst is not None:
+        old_items = [(atom, bytes(moov[offset:offset + size]))
+                     for atom, offset, size, _ in iter_children(moov, *ilst)]
+    ilst_content = build_ilst(old_items, tags)
+
+    children = []
+    found_udta = False
+    for box_type, offset, size, header_size in iter_children(moov, content_start, len(moov)):
+        if box_type != 'udta':
+            children.append(bytes(moov[offset:offset + size]))
+            continue
+        found_udta = True
+        udta_children = []
+        found_meta = False
+        for child_type, child_offset, child_size, child_header in iter_children(
+                moov, offset + header_size, offset + size):
+            if child_type == 'meta':
+                found_meta = True
+                old_meta = (moov, child_offset + child_header, child_offset + child_size)
+                udta_children.append(_meta_box(ilst_content, padding, old_meta))
+            else:
+                udta_children.append(bytes(moov[child_offset:child_offset + child_size]))
+        if not found_meta:
+            udta_children.append(_meta_box(ilst_content, padding))
+        children.append(_box('udta', b''.join(udta_children)))
+    if not found_udta:
+        children.append(_box('udta', _meta_box(ilst_content, padding)))
+    return bytearray(_box('moov', b''.join(children)))
+
+def shift_chunk_offsets(moov, threshold, delta):
+    """moov内の全トラックのstco/co64のうち、threshold以降を指すオフセットをdeltaだけずらす"""
+    for box_type, offset, size, header_size in iter_children(moov, _moov_content(moov), len(moov)):
+        if box_type != 'trak':
+            continue
+        stbl = find_path(moov, offset + header_size, offset + size, 'mdia/minf/stbl')
+        if stbl is None:
+            continue
+        for table_type, table_offset, table_size, table_header in iter_children(moov, *stbl):
+            if table_type not in ('stco', 'co64'):
+                continue
+            start = table_offset + table_header + 4
+            count = struct.unpack_from('>I', moov, start)[0]
+            fmt, width = ('>I', 4) if table_type == 'stco' else ('>Q', 8)
+            for i in range(count):
+                position = start + 4 + i * width
+                chunk = struct.unpack_from(fmt, moov, position)[0]
+                if chunk >= threshold:
+                    chunk += delta
+                    if table_type == 'stco' and chunk > 0xFFFFFFFF:
+                        raise MetadataError("チャンクのオフセットが32ビットを超えるため書き込めません")
+                    struct.pack_into(fmt, moov, position, chunk)
+
+def _changed_ranges(old, new, block_size=PATCH_BLOCK_SIZE):
+    """2つのバイト列をブロック単位で比べ、内容が変わる(開始, 終了)の範囲の一覧を返す"""
+    ranges = []
+    for start in range(0, len(new), block_size):
+        end = min(start + block_size, len(new))
+        if old[start:end] == new[start:end]:
+            continue
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+def write_tags(file_path, tags, padding=DEFAULT_PADDING):
+    """ilstのタグを書き換え、書き込み方法（'in_place', 'append', 'rewrite'）を返す
+
+    新しいmoovがmoovと直後のfreeボックスの範囲に収まる場合は、metaのfreeボックスで
+    大きさを合わせてその場で書き換える（mdatは動かない）。書き込むのは内容が変わるブロック
+    （udta/meta/freeとmoovのサイズ）だけで、トラックのサンプルテーブルは書き直さない。moovがファイルの末尾にある場合は
+    新しいmoovを末尾に追記してから古いmoovをfreeボックスに変える（途中で中断しても古いmoovが残る）。
+    どちらもできない場合はpaddingバイトの余白を確保してファイル全体を
+    書き直し、チャンクのオフセットをずらす。
+    """
+    boxes = read_top_level(file_path)
+    index = next((i for i, box in enumerate(boxes) if box[0] == 'moov'), None)
+    if index is None:
+        raise BoxError("moovボックスが見つかりません")
+    _, moov_offset, moov_size, _ = boxes[index]
+    with open(file_path, 'rb') as f:
+        f.seek(moov_offset)
+        moov = f.read(moov_size)
+
+    # moovの直後に続くfreeボックスも書き換えに使える範囲とする
+    # （udtaがmoovの最後にない場合は、大きさが変わると後ろのトラックがずれるためmoovの範囲だけにする）
+    moov_children = [box_type for box_type, _, _, _ in iter_children(moov, _moov_content(moov), len(moov))]
+    span = moov_size
+    following = boxes[index + 1:]
+    if 'udta' not in moov_children or moov_children[-1] == 'udta':
+        for box_type, _, size, _ in following:
+            if box_type not in FREE_TYPES:
+                break
+            span += size
+    at_end = all(box_type in FREE_TYPES for box_type, _, _, _ in following)
+
+    compact_size = len(build_moov(moov, tags, 0))
+    spare = span - compact_size
+    if spare == 0 or spare >= 8:
+        new_moov = build_moov(moov, tags, spare)
+        if len(new_moov) != span:
+            raise MetadataError("moovの大きさを合わせられません")
+        with open(file_path, 'r+b') as f:
+            f.seek(moov_offset)
+            old = f.read(span)
+            # 後ろから書き込み、moovの先頭（サイズ）は最後に書き換える
+            for start, end in reversed(_changed_ranges(old, new_moov)):
+                f.seek(moov_offset + start)
+                f.write(new_moov[start:end])
+        fsync_path(file_path)
+        return 'in_place'
+
+    new_moov = build_moov(moov, tags, padding)
+    if at_end:
+        file_size = os.path.getsize(file_path)
+        try:
+            with open(file_path, 'r+b') as f:
+                f.seek(file_size)
+                f.write(new_moov)
+        except OSError:
+            # 書き込めなかった分を切り詰め、古いmoovのままにする
+            with open(file_path, 'r+b') as f:
+                f.truncate(file_size)
+            raise
+        fsync_path(file_path)
+        # 新しいmoovがディスクに書き込まれてから、古いmoovのタイプだけをfreeに変える
+        with open(file_path, 'r+b') as f:
+            f.seek(moov_offset + 4)
+            f.write(b'free')
+        fsync_path(file_path)
+        return 'append'
+
+    if any(box_type == 'moof' for box_type, _, _, _ in boxes):
+        raise MetadataError("フラグメント化されたMP4は全体を書き直せません")
+    delta = len(new_moov) - span
+    shift_chunk_offsets(new_moov, moov_offset + span, delta)
+    temp_file = partial_output_path(file_path)
+    try:
+        with open(file_path, 'rb') as src, open(temp_file, 'wb') as dst:
+            dst.write(src.read(moov_offset))
+            dst.write(new_moov)
+            src.seek(moov_offset + span)
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        shutil.copystat(file_path, temp_file)
+        commit_output(temp_file, file_path, check=check_structure)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return 'rewrite'
+
+def _manifest_value(value):
+    """マニフェストの値を変換（CSVの空欄は変更しない、JSONのnullは削除）"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value if value else None
+    return value
+
+def load_manifest(manifest_path):
+    """CSV/JSONのマニフェストを読み込み、(ファイル, タグ)のリストを返す
+
+    CSVは'file'列とタグ名の列を持つ表（空欄のセルは変更しない）。JSONは'file'とタグを持つ
+    オブジェクトのリスト（値がnullのタグは削除）。相対パスはマニフェストのディレクトリから解決する。
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    if os.path.splitext(manifest_path)[1].lower() == '.csv':
+        with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                tags = {key: _manifest_value(value) for key, value in row.items() if key and key != 'file'}
+                entries.append((row['file'], {key: value for key, value in tags.items() if value is not None}))
+    else:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('files', [data])
+        for entry in data:
+            entry = dict(entry)
+            entries.append((entry.pop('file'), {key: _manifest_value(value) for key, value in entry.items()}))
+
+    resolved = []
+    for file_path, tags in entries:
+        file_path = os.path.join(base_dir, file_path)
+        if 'artwork' in tags and isinstance(tags['artwork'], str):
+            tags['artwork'] = os.path.join(base_dir, tags['artwork'])
+        resolved.append((file_path, tags))
+    return resolved
+
+def apply_manifest(manifest_path, padding=DEFAULT_PADDING, max_workers=DEFAULT_TAG_WORKERS, log=print):
+    """マニフェストのタグを各ファイルに並列に書き込み、失敗した件数を返す"""
+    entries = load_manifest(manifest_path)
+
+    def apply(entry):
+        file_path, tags = entry
+        return write_tags(file_path, tags, padding)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for (file_path, _), future in zip(entries, [executor.submit(apply, entry) for entry in entries]):
+            try:
+                log(f"{file_path}: {future.result()}")
+            except Exception as e:
+                failed += 1
+                log(f"{file_path}: 失敗しました\n{e}")
+    return failed
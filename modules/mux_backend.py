@@ -0,0 +1,242 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from .core import (ToolError, find_executable, mux_tracks, build_mux_args, stage_subtitles, remove_files,
+                   run_command, check_result, partial_output_path, commit_output)
+from .isobmff import check_structure as check_mp4_structure
+from .ebml import check_structure as check_mkv_structure
+from .webvtt import package_subtitles
+from .verify import mux_checker, count_input_tracks, DEFAULT_SPOT_CHECK_SAMPLES
+
+# mkvmergeで追加できる字幕ファイルの拡張子（.subはVobSubの.idxと一緒に読み込まれる）
+MKVMERGE_SUBTITLE_EXTENSIONS = ['.srt', '.ass', '.ssa', '.vtt', '.sup', '.idx']
+# ベンチマークの繰り返し回数の既定値
+DEFAULT_BENCHMARK_REPEAT = 1
+
+class MuxBackend(ABC):
+    """多重化バックエンドの基底クラス（引数はcore.mux_tracksのトラックの一覧から作る）"""
+    name = None
+    tool_name = None
+    extensions = []  # 出力できる拡張子（先頭が既定）
+
+    @abstractmethod
+    def executable(self, tools):
+        """実行ファイルのパスを取得（設定がなければToolErrorを送出）"""
+
+    @abstractmethod
+    def build_args(self, executable, job, staged_paths):
+        """多重化コマンドを構築（staged_pathsはcore.stage_subtitlesの戻り値）"""
+
+    def check_result(self, returncode, stdout, stderr, output_file=None):
+        """実行結果を確認し、失敗していればToolErrorを送出"""
+        check_result(self.tool_name, returncode, stdout, stderr, output_file)
+
+    @abstractmethod
+    def check_structure(self, file_path):
+        """検証を省略する場合に使う出力ファイルの簡易チェック"""
+
+class Mp4BoxBackend(MuxBackend):
+    """MP4BoxでMP4を出力するバックエンド"""
+    name = 'mp4box'
+    tool_name = 'MP4Box'
+    extensions = ['.mp4', '.m4v']
+
+    def executable(self, tools):
+        if 'mp4box' not in tools:
+            raise ToolError("MP4Boxの設定が見つかりません。")
+        return tools['mp4box']
+
+    def build_args(self, executable, job, staged_paths):
+        return build_mux_args(executable, job, staged_paths)
+
+    def check_structure(self, file_path):
+        check_mp4_structure(file_path)
+
+class MkvmergeBackend(MuxBackend):
+    """mkvmergeでMKVを出力するバックエンド"""
+    name = 'mkvmerge'
+    tool_name = 'mkvmerge'
+    extensions = ['.mkv']
+
+    def executable(self, tools):
+        if 'mkv_dir' not in tools:
+            raise ToolError("MKVToolNixの設定が見つかりません。")
+        mkvmerge_path = find_executable(tools['mkv_dir'], "mkvmerge")
+        if not os.path.exists(mkvmerge_path):
+            raise ToolError(f"MKVToolNixの実行ファイルが見つかりません: {mkvmerge_path}")
+        return mkvmerge_path
+
+    def build_args(self, executable, job, staged_paths):
+        """mkvmergeの多重化コマンドを構築
+
+        mkvmergeのトラックIDは入力ファイルごとに0から始まるため、入力ファイルのトラックID（1から）から1を引く。
+        追加する字幕はそれぞれ別の入力ファイル（トラックID 0）として指定する。
+        """
+        tracks = mux_tracks(job)
+        subtitles = job.get('subtitles', [])
+        args = [executable, '-o', job['output_file']]
+
+        # 入力ファイルのトラックの言語とフラグ（Noneの項目は入力のまま）
+        for track in tracks:
+            if track['input_track_id'] is None:
+                continue
+            track_id = track['input_track_id'] - 1
+            if track['language'] is not None:
+                args.extend(['--language', f"{track_id}:{track['language']}"])
+            if track['default'] is not None:
+                args.extend(['--default-track-flag', f"{track_id}:{int(track['default'])}"])
+            if track['forced'] is not None:
+                args.extend(['--forced-display-flag', f"{track_id}:{int(track['forced'])}"])
+
+        # 除外するトラック（種類が分からないため映像・音声・字幕のすべてで除外する）
+        drop_tracks = sorted(set(job.get('drop_tracks', [])))
+        if drop_tracks:
+            if 'input_track_count' not in job:
+                raise ToolError("入力ファイルのトラック数が分からないため、トラックを除外できません。")
+            if len(drop_tracks) >= job['input_track_count']:
+                raise ToolError("すべてのトラックが除外されています。")
+            excluded = "!" + ",".join(str(track_id - 1) for track_id in drop_tracks)
+            args.extend(['-d', excluded, '-a', excluded, '-s', excluded])
+
+        # 読み込んだチャプターは入力ファイルのチャプターを置き換える
+        if job.get('chapters') and len(staged_paths) > len(subtitles):
+            args.extend(['--no-chapters', job['input_file'], '--chapters', staged_paths[len(subtitles)]])
+        else:
+            args.append(job['input_file'])
+
+        # 字幕の追加（表示タイミングの補正はミリ秒）
+        for track in tracks:
+            index = track['subtitle_index']
+            if index is None or index >= len(staged_paths):
+                continue
+            ext = os.path.splitext(subtitles[index]['file'])[1].lower()
+            if ext not in MKVMERGE_SUBTITLE_EXTENSIONS:
+                raise ToolError(f"mkvmergeで追加できない字幕の形式です: {ext}")
+            args.extend(['--language', f"0:{track['language']}",
+                         '--default-track-flag', f"0:{int(track['default'])}",
+                         '--forced-display-flag', f"0:{int(track['forced'])}"])
+            if track['delay']:
+                args.extend(['--sync', f"0:{int(round(track['delay'] * 1000))}"])
+            args.append(staged_paths[index])
+        return args
+
+    def check_result(self, returncode, stdout, stderr, output_file=None):
+        # mkvmergeの終了コード1は警告のみで、出力は作成されている
+        check_result(self.tool_name, 0 if returncode == 1 else returncode, stdout, stderr, output_file)
+
+    def check_structure(self, file_path):
+        check_mkv_structure(file_path)
+
+MUX_BACKENDS = {backend.name: backend for backend in (Mp4BoxBackend(), MkvmergeBackend())}
+
+def get_mux_backend(job):
+    """ジョブの多重化バックエンドを取得
+
+    job['backend']（'mp4box'または'mkvmerge'）を優先し、省略時は出力ファイルの拡張子で選ぶ。
+    バックエンドが出力できない形式の場合はToolErrorを送出。
+    """
+    ext = os.path.splitext(job['output_file'])[1].lower()
+    name = job.get('backend')
+    if name is None:
+        name = 'mkvmerge' if ext in MkvmergeBackend.extensions else 'mp4box'
+    if name not in MUX_BACKENDS:
+        raise ToolError(f"不明な多重化バックエンドです: {name}")
+    backend = MUX_BACKENDS[name]
+    if ext not in backend.extensions:
+        raise ToolError(f"{backend.tool_name}では{ext or '拡張子なし'}のファイルを出力できません。")
+    return backend
+
+def mux(tools, job, temp_dir, on_output=None, verify=True,
+        spot_check_samples=DEFAULT_SPOT_CHECK_SAMPLES):
+    """字幕とタグを設定してジョブのバックエンドで出力
+
+    出力先と同じディレクトリの一時ファイルに書き込み、構造（verifyがTrueなら
+    トラック数・言語・フラグ・長さ）を確認してから置き換える。
+    """
+    backend = get_mux_backend(job)
+    executable = backend.executable(tools)
+    if 'input_track_count' not in job:
+        input_track_count = count_input_tracks(job['input_file'])
+        if input_track_count is not None:
+            job = dict(job, input_track_count=input_track_count)
+    check = mux_checker(job, spot_check_samples) if verify else backend.check_structure
+    temp_output = partial_output_path(job['output_file'])
+    staged_paths = stage_subtitles(job, temp_dir)
+    try:
+        args = backend.build_args(executable, dict(job, output_file=temp_output), staged_paths)
+        returncode, stdout, stderr = run_command(args, on_output)
+        backend.check_result(returncode, stdout, stderr, temp_output)
+        commit_output(temp_output, job['output_file'], check)
+        if job.get('webvtt') is not None:
+            package_subtitles(job, staged_paths[:len(job.get('subtitles', []))], **job['webvtt'])
+    finally:
+        remove_files(staged_paths + [temp_output])
+
+def benchmark_backends(tools, job, temp_dir, backends=None, repeat=DEFAULT_BENCHMARK_REPEAT, log=print):
+    """同じジョブを各バックエンドで多重化して処理速度を比較
+
+    出力は作業ディレクトリに書き込み、計測後に削除する（出力先は変更しない）。
+    キャッシュの影響をならすため、繰り返しごとにバックエンドを交互に実行する。
+    バックエンドごとに{'backend', 'runs', 'seconds'（最速）, 'mean_seconds', 'mb_per_second',
+    'output_bytes'}を返す（設定がないバックエンドは'error'だけを返す）。
+    """
+    names = backends or list(MUX_BACKENDS)
+    input_bytes = os.path.getsize(job['input_file']) + sum(
+        os.path.getsize(subtitle['file']) for subtitle in job.get('subtitles', []))
+    if 'input_track_count' not in job:
+        input_track_count = count_input_tracks(job['input_file'])
+        if input_track_count is not None:
+            job = dict(job, input_track_count=input_track_count)
+
+    results = {}
+    runnable = []
+    for name in names:
+        if name not in MUX_BACKENDS:
+            raise ToolError(f"不明な多重化バックエンドです: {name}")
+        backend = MUX_BACKENDS[name]
+        try:
+            executable = backend.executable(tools)
+        except ToolError as e:
+            results[name] = {'backend': name, 'error': str(e)}
+            continue
+        results[name] = {'backend': name, 'runs': [], 'output_bytes': None}
+        runnable.append((backend, executable))
+
+    os.makedirs(temp_dir, exist_ok=True)
+    staged_paths = stage_subtitles(job, temp_dir)
+    try:
+        for run in range(repeat):
+            for backend, executable in runnable:
+                output_file = os.path.join(temp_dir, f"benchmark_{backend.name}{backend.extensions[0]}")
+                args = backend.build_args(executable, dict(job, output_file=output_file, backend=backend.name),
+                                          staged_paths)
+                try:
+                    start = time.perf_counter()
+                    returncode, stdout, stderr = run_command(args)
+                    seconds = time.perf_counter() - start
+                    backend.check_result(returncode, stdout, stderr, output_file)
+                    results[backend.name]['runs'].append(seconds)
+                    results[backend.name]['output_bytes'] = os.path.getsize(output_file)
+                    log(f"{backend.tool_name}: {run + 1}回目 {seconds:.2f}秒")
+                finally:
+                    remove_files([output_file])
+    finally:
+        remove_files(staged_paths)
+
+    for result in results.values():
+        if result.get('runs'):
+            result['seconds'] = min(result['runs'])
+            result['mean_seconds'] = sum(result['runs']) / len(result['runs'])
+            result['mb_per_second'] = input_bytes / 1024 / 1024 / max(result['seconds'], 1e-6)
+    return [results[name] for name in names]
+
+def format_benchmark(results):
+    """ベンチマークの結果を表示用の文字列に変換"""
+    lines = ["バックエンド\t最速(秒)\t平均(秒)\tMB/秒\t出力(MB)"]
+    for result in results:
+        if 'error' in result:
+            lines.append(f"{result['backend']}\t{result['error']}")
+            continue
+        lines.append(f"{result['backend']}\t{result['seconds']:.2f}\t{result['mean_seconds']:.2f}\t"
+                     f"{result['mb_per_second']:.1f}\t{result['output_bytes'] / 1024 / 1024:.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+import os
+import struct
+from array import array
+
+# PGS（Blu-rayの字幕、.sup）のセグメントの種類
+PDS = 0x14  # パレット
+ODS = 0x15  # オブジェクト（字幕の画像）
+PCS = 0x16  # 画面構成（表示セットの始まり）
+WDS = 0x17  # ウィンドウ
+END = 0x80  # 表示セットの終わり
+
+SEGMENT_MAGIC = b'PG'
+SEGMENT_HEADER = struct.Struct('>2sIIBH')
+# PTS/DTSのクロック（90kHz）
+PGS_CLOCK = 90000
+# 読み込みのバッファサイズ（セグメントは最大64KBのため、ファイル全体は読み込まない）
+PGS_BUFFER_SIZE = 1024 * 1024
+# 表示時間がこれより短いキューは問題として報告する（秒）
+DEFAULT_MIN_CUE_DURATION = 0.1
+# 種類ごとに表示する問題の件数の上限
+MAX_REPORTED_PROBLEMS = 10
+
+# 画面構成の状態
+COMPOSITION_STATES = {0x00: 'normal', 0x40: 'acquisition_point', 0x80: 'epoch_start'}
+
+class PgsError(Exception):
+    """PGS字幕を読み取れないときの例外"""
+
+class PgsIndex:
+    """表示セットの索引（各項目は型付きの配列に格納し、辞書は必要なときだけ作る）
+
+    pts: 表示開始時刻（90kHz）、offsets: ファイル内の位置、object_counts: 表示するオブジェクト数、
+    object_bytes: ODSのデータ量、states: 画面構成の状態、complete: ENDセグメントで終わっているか。
+    """
+
+    def __init__(self):
+        self.pts = array('Q')
+        self.offsets = array('Q')
+        self.object_counts = array('B')
+        self.object_bytes = array('I')
+        self.states = array('B')
+        self.complete = array('B')
+        self.width = 0
+        self.height = 0
+        self.segment_count = 0
+        self.orphan_segments = 0  # PCSより前にあるセグメント
+
+    def __len__(self):
+        return len(self.pts)
+
+    def end_pts(self, i):
+        """表示セットの表示終了時刻（次の表示セットの時刻、最後の表示セットはNone）"""
+        return self.pts[i + 1] if i + 1 < len(self.pts) else None
+
+    def cue_indexes(self):
+        """字幕を表示する（オブジェクトが1つ以上ある）表示セットの番号"""
+        return [i for i, count in enumerate(self.object_counts) if count]
+
+    def display_set(self, i):
+        """表示セットの情報を辞書で取得（時刻は秒）"""
+        end = self.end_pts(i)
+        return {
+            'start': self.pts[i] / PGS_CLOCK,
+            'end': end / PGS_CLOCK if end is not None else None,
+            'offset': self.offsets[i],
+            'objects': self.object_counts[i],
+            'object_bytes': self.object_bytes[i],
+            'state': COMPOSITION_STATES.get(self.states[i], hex(self.states[i])),
+            'complete': bool(self.complete[i]),
+        }
+
+def index_pgs(file_path):
+    """.supファイルのセグメントを先頭から順にたどり、表示セットの索引を作成
+
+    PCS以外のセグメントの内容は読まずに読み飛ばすため、大きなファイルでもメモリ使用量は一定。
+    """
+    index = PgsIndex()
+    with open(file_path, 'rb', buffering=PGS_BUFFER_SIZE) as f:
+        file_size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while True:
+            header = f.read(SEGMENT_HEADER.size)
+            if not header:
+                break
+            if len(header) < SEGMENT_HEADER.size:
+                raise PgsError(f"セグメントヘッダーが途中で終わっています (位置: {offset})")
+            magic, pts, _, segment_type, size = SEGMENT_HEADER.unpack(header)
+            if magic != SEGMENT_MAGIC:
+                raise PgsError(f"PGSのセグメントではありません (位置: {offset})")
+            index.segment_count += 1
+
+            if segment_type == PCS:
+                payload = f.read(size)
+                if len(payload) < 11:
+                    raise PgsError(f"PCSが途中で終わっています (位置: {offset})")
+                width, height, _, _, state, _, _, object_count = struct.unpack_from('>HHBHBBBB', payload)
+                index.width, index.height = width, height
+                index.pts.append(pts)
+                index.offsets.append(offset)
+                index.object_counts.append(object_count)
+                index.object_bytes.append(0)
+                index.states.append(state)
+                index.complete.append(0)
+            else:
+                if not len(index.pts):
+                    index.orphan_segments += 1
+                elif segment_type == ODS:
+                    index.object_bytes[-1] += size
+                elif segment_type == END:
+                    index.complete[-1] = 1
+                f.seek(size, 1)
+            offset += SEGMENT_HEADER.size + size
+
+        if offset > file_size:
+            raise PgsError(f"最後のセグメントが途中で終わっています (位置: {offset})")
+    return index
+
+def pgs_cues(index):
+    """字幕を表示する表示セットを{'start', 'end', 'text'}のキューに変換（テキストは空）
+
+    最後の表示セットに終了時刻がない場合は開始時刻と同じにする。
+    """
+    cues = []
+    for i in index.cue_indexes():
+        end = index.end_pts(i)
+        start = index.pts[i] / PGS_CLOCK
+        cues.append({'start': start, 'end': end / PGS_CLOCK if end is not None else start, 'text': ''})
+    return cues
+
+def _limited(problems, message, count):
+    """同じ種類の問題が多い場合は件数だけを追加"""
+    if count > MAX_REPORTED_PROBLEMS:
+        problems.append(f"{message}（ほか{count - MAX_REPORTED_PROBLEMS}件）")
+
+def check_pgs(index, min_duration=DEFAULT_MIN_CUE_DURATION):
+    """索引から時刻と構造の問題を調べ、問題の一覧を返す（問題がなければ空のリスト）
+
+    時刻が戻っている表示セット（前の字幕と重なる）、表示時間が短すぎる字幕、
+    ENDで終わっていない表示セット、最初の表示セットがエポックの開始でないことを確認する。
+    """
+    problems = []
+    if index.orphan_segments:
+        problems.append(f"最初のPCSより前に{index.orphan_segments}個のセグメントがあります")
+    if len(index) and index.states[0] != 0x80:
+        problems.append("最初の表示セットがエポックの開始ではありません")
+
+    overlaps = short = incomplete = 0
+    for i in range(len(index)):
+        start = index.pts[i] / PGS_CLOCK
+        if i and index.pts[i] < index.pts[i - 1]:
+            overlaps += 1
+            if overlaps <= MAX_REPORTED_PROBLEMS:
+                problems.append(f"表示セット{i + 1} ({start:.3f}秒): 前の表示セットより時刻が前です（重なり）")
+        end = index.end_pts(i)
+        if index.object_counts[i] and end is not None and end >= index.pts[i] \
+                and (end - index.pts[i]) / PGS_CLOCK < min_duration:
+            short += 1
+            if short <= MAX_REPORTED_PROBLEMS:
+                problems.append(f"表示セット{i + 1} ({start:.3f}秒): 表示時間が"
+                                f"{(end - index.pts[i]) / PGS_CLOCK:.3f}秒しかありません")
+        if not index.complete[i]:
+            incomplete += 1
+            if incomplete <= MAX_REPORTED_PROBLEMS:
+                problems.append(f"表示セット{i + 1} ({start:.3f}秒): ENDセグメントがありません")
+    _limited(problems, "時刻の重なり", overlaps)
+    _limited(problems, "表示時間が短すぎる字幕", short)
+    _limited(problems, "ENDセグメントがない表示セット", incomplete)
+    if len(index) and index.object_counts[-1]:
+        problems.append("最後の字幕を消去する表示セットがありません（終了時刻が不明）")
+    return problems
+
+def summarize_pgs(index):
+    """索引の概要（キュー数・表示セット数・範囲・オブジェクトのデータ量）を取得"""
+    cue_indexes = index.cue_indexes()
+    cue_pts = [index.pts[i] for i in cue_indexes]
+    return {
+        'cues': len(cue_indexes),
+        'display_sets': len(index),
+        'segments': index.segment_count,
+        'width': index.width,
+        'height': index.height,
+        'first': min(cue_pts) / PGS_CLOCK if cue_pts else None,
+        'last': max(cue_pts) / PGS_CLOCK if cue_pts else None,
+        'object_bytes': sum(index.object_bytes),
+        'max_objects': max(index.object_counts, default=0),
+    }
+
+def format_pgs_summary(summary):
+    """概要を1行のテキストに整形"""
+    text = f"PGS {summary['width']}x{summary['height']}: {summary['cues']}件"
+    if summary['first'] is not None:
+        text += f" ({summary['first']:.1f}〜{summary['last']:.1f}秒)"
+    return text + f", 画像 {summary['object_bytes'] / (1024 * 1024):.1f} MB"
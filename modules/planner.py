@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+from .isobmff import parse_movie, BoxError
+from .core import probe, partial_output_path
+from .mux_backend import get_mux_backend
+
+# 実績がない場合に使う処理速度（MB/秒）
+DEFAULT_THROUGHPUT = 100.0
+# 処理速度の実績を更新するときの新しい値の重み
+THROUGHPUT_WEIGHT = 0.3
+# 空き容量に残す余裕（必要なバイト数に対する割合）
+DEFAULT_SPACE_MARGIN = 0.05
+
+# 同じプロセス内で実績ファイルを同時に書き換えないためのロック
+_history_lock = threading.Lock()
+
+def volume_root(path):
+    """パスが属するボリュームのマウントポイントを取得（まだ存在しないパスは親ディレクトリで判定）"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+def available_bytes(path):
+    """ボリュームの空き容量（一般ユーザーが使えるバイト数）を取得"""
+    if hasattr(os, 'statvfs'):
+        stat = os.statvfs(path)
+        return stat.f_bavail * stat.f_frsize
+    return shutil.disk_usage(path).free
+
+class ThroughputHistory:
+    """ツールとボリュームごとの処理速度の実績（temp_dir配下のJSONファイルに保存）"""
+
+    def __init__(self, temp_dir):
+        self.path = os.path.join(temp_dir, 'throughput.json')
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, tool, path, nbytes, seconds):
+        """処理したバイト数と時間から処理速度の実績を更新"""
+        if nbytes <= 0 or seconds <= 0:
+            return
+        rate = nbytes / seconds / (1024 * 1024)
+        key = f"{tool}|{volume_root(path)}"
+        with _history_lock:
+            history = self._load()
+            entry = history.get(key)
+            if entry is None:
+                entry = {'rate': rate, 'count': 0}
+            else:
+                entry['rate'] = entry['rate'] * (1 - THROUGHPUT_WEIGHT) + rate * THROUGHPUT_WEIGHT
+            entry['count'] += 1
+            history[key] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = partial_output_path(self.path)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(history, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+
+    def rate(self, tool, path):
+        """処理速度（MB/秒）と根拠（'volume'・'tool'・'default'）を返す
+
+        同じツールとボリュームの実績がなければ、同じツールの全ボリュームの平均を使う。
+        """
+        history = self._load()
+        entry = history.get(f"{tool}|{volume_root(path)}")
+        if entry is not None:
+            return entry['rate'], 'volume'
+        rates = [entry['rate'] for key, entry in history.items() if key.split('|', 1)[0] == tool]
+        if rates:
+            return sum(rates) / len(rates), 'tool'
+        return DEFAULT_THROUGHPUT, 'default'
+
+@contextmanager
+def measure(history, tool, path, nbytes):
+    """処理にかかった時間を計り、成功した場合だけ処理速度の実績に記録"""
+    start = time.monotonic()
+    yield
+    if history is not None:
+        history.record(tool, path, nbytes, time.monotonic() - start)
+
+def _file_size(path):
+    """ファイルサイズを取得（存在しない場合は0）"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def stream_bytes(tools, input_file, stream_index, probe_data=None):
+    """ストリームのデータ量を推定（MP4はサンプルサイズの合計、それ以外はプローブ情報から）"""
+    if os.path.splitext(input_file)[1].lower() in ('.mp4', '.m4v', '.mov'):
+        try:
+            tracks = parse_movie(input_file, sample_tables=True)['tracks']
+            if stream_index < len(tracks):
+                sizes = tracks[stream_index].get('stsz', 0)
+                if isinstance(sizes, int):
+                    return sizes * tracks[stream_index].get('sample_count', 0)
+                return sum(sizes)
+        except (OSError, BoxError):
+            pass
+    if probe_data is None and tools is not None:
+        probe_data = probe(tools, input_file)
+    if probe_data is not None:
+        stream = next((s for s in probe_data['streams'] if s['index'] == stream_index), {})
+        tags = stream.get('tags', {})
+        for key, value in tags.items():
+            if key.upper().startswith('NUMBER_OF_BYTES'):
+                return int(value)
+        duration = float(stream.get('duration') or probe_data['format'].get('duration') or 0)
+        if stream.get('bit_rate') and duration:
+            return int(int(stream['bit_rate']) * duration / 8)
+    return _file_size(input_file)
+
+def job_tool(kind, payload):
+    """ジョブを実行する外部ツールの名前を取得"""
+    if kind == 'extract' and os.path.splitext(payload['input_file'])[1].lower() == '.mkv':
+        return 'mkvextract'
+    if kind == 'mux':
+        return get_mux_backend(payload).tool_name
+    return 'MP4Box'
+
+def job_work(kind, payload):
+    """ジョブを実行するツール・処理するデータ量（バイト）・入力のボリュームのパスを返す（外部ツールは使わない）"""
+    tool = job_tool(kind, payload)
+    subtitle_bytes = sum(_file_size(subtitle['file']) for subtitle in payload.get('subtitles', []))
+    if kind == 'concat':
+        return tool, sum(_file_size(path) for path in payload['inputs']) + subtitle_bytes, payload['inputs'][0]
+    if kind == 'extract' and tool == 'MP4Box':
+        # MP4Boxは抽出するトラックのサンプルだけを読む
+        return tool, stream_bytes(None, payload['input_file'], payload['stream_index']), payload['input_file']
+    return tool, _file_size(payload['input_file']) + subtitle_bytes, payload['input_file']
+
+def job_requirements(tools, kind, payload, probe_data=None):
+    """ジョブが必要とする容量と処理するデータ量を見積もる
+
+    {'tool', 'work_bytes'（処理速度の計算に使う入力の量）, 'temp_bytes'（作業ディレクトリ）,
+     'output_bytes'（出力先）, 'volume'（処理速度を引くボリュームのパス）}を返す。
+    """
+    tool, work_bytes, volume = job_work(kind, payload)
+    subtitle_bytes = sum(_file_size(subtitle['file']) for subtitle in payload.get('subtitles', []))
+    if kind == 'extract':
+        output_bytes = stream_bytes(tools, payload['input_file'], payload['stream_index'], probe_data)
+    else:
+        # トラックを除外する場合も、上限として入力全体の大きさを見込む
+        output_bytes = work_bytes
+    return {
+        'tool': tool,
+        'work_bytes': work_bytes,
+        'temp_bytes': subtitle_bytes,
+        'output_bytes': output_bytes,
+        'volume': volume,
+    }
+
+def plan_jobs(tools, jobs, temp_dir, history=None, margin=DEFAULT_SPACE_MARGIN, probe_data=None):
+    """ジョブを実行する前に、必要な容量・空き容量・所要時間を見積もる（何も書き込まない）
+
+    jobsは{'kind', 'payload'}のリスト。作業ディレクトリの一時ファイルはジョブごとに削除されるため最大値、
+    出力は合計を各ボリュームで必要とする。
+    """
+    history = history or ThroughputHistory(temp_dir)
+    planned = []
+    volumes = {}
+    for job in jobs:
+        payload = job['payload']
+        requirements = job_requirements(tools, job['kind'], payload, probe_data)
+        rate, basis = history.rate(requirements['tool'], requirements['volume'])
+        requirements.update(kind=job['kind'], output_file=payload['output_file'], rate=rate, basis=basis,
+                            seconds=requirements['work_bytes'] / (1024 * 1024) / rate)
+        planned.append(requirements)
+
+        output_volume = volumes.setdefault(volume_root(payload['output_file']), {'output': 0, 'temp': 0})
+        output_volume['output'] += requirements['output_bytes']
+        temp_volume = volumes.setdefault(volume_root(temp_dir), {'output': 0, 'temp': 0})
+        temp_volume['temp'] = max(temp_volume['temp'], requirements['temp_bytes'])
+
+    checked = []
+    for root, usage in sorted(volumes.items()):
+        required = int((usage['output'] + usage['temp']) * (1 + margin))
+        available = available_bytes(root)
+        checked.append({'volume': root, 'required': required, 'available': available,
+                        'ok': required <= available})
+    return {
+        'jobs': planned,
+        'volumes': checked,
+        'seconds': sum(job['seconds'] for job in planned),
+        'ok': all(volume['ok'] for volume in checked),
+    }
+
+def _megabytes(nbytes):
+    return f"{nbytes / (1024 * 1024):,.1f} MB"
+
+def format_plan(plan):
+    """見積もりを表示用のテキストに整形"""
+    basis_names = {'volume': "実績", 'tool': "他のボリュームの実績", 'default': "既定値"}
+    lines = []
+    for job in plan['jobs']:
+        lines.append(f"{job['kind']}: {job['output_file']}\n"
+                     f"  出力 {_megabytes(job['output_bytes'])}, 一時ファイル {_megabytes(job['temp_bytes'])}, "
+                     f"約{job['seconds']:.0f}秒 ({job['tool']} {job['rate']:.1f} MB/秒, "
+                     f"{basis_names[job['basis']]})")
+    for volume in plan['volumes']:
+        status = "OK" if volume['ok'] else "不足"
+        lines.append(f"{volume['volume']}: 必要 {_megabytes(volume['required'])} / "
+                     f"空き {_megabytes(volume['available'])} [{status}]")
+    lines.append(f"合計の所要時間の見積もり: 約{plan['seconds'] / 60:.1f}分")
+    return "\n".join(lines)
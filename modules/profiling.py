@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# tracemallocで記録するスタックの深さ
+TRACEMALLOC_FRAMES = 16
+# スタックのサンプリング間隔（秒）
+SAMPLE_INTERVAL = 0.005
+# メモリの増加を表示する行数
+TOP_ALLOCATIONS = 10
+
+# メモリの増加の集計から除く計測自体のファイル
+IGNORED_FILES = [tracemalloc.__file__, cProfile.__file__, __file__]
+
+_session = None
+_session_lock = threading.Lock()
+
+class ProfileSession:
+    """プロファイルのセッション（区間ごとのcProfile・tracemalloc・スタックのサンプリング）
+
+    cProfileは同時に1つしか有効にできないため、最も外側の区間だけを計測し、
+    内側の区間と別スレッドで重なった区間は時間とメモリだけを記録する。
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = os.path.join(output_dir, time.strftime("profile_%Y%m%d_%H%M%S") + f"_{os.getpid()}")
+        self.stats = {}  # 区間名 -> pstats.Stats
+        self.sections = {}  # 区間名 -> {'count', 'seconds', 'memory', 'peak'}
+        self.allocations = []  # (区間名, 増加したメモリの上位の行)
+        self.samples = {}  # 折りたたんだスタック -> サンプル数
+        self._profiler_lock = threading.Lock()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        """tracemallocとスタックのサンプリングを開始"""
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def _sample(self):
+        """一定間隔で全スレッドのスタックを取得し、flamegraph.plの折りたたみ形式で数える"""
+        names = {}
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == threading.get_ident():
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                key = ";".join([names.get(thread_id, str(thread_id))] + stack[::-1])
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    @contextmanager
+    def section(self, name):
+        """区間の処理時間とメモリを記録（最も外側でcProfileが空いていればcProfileも使う）"""
+        depth = getattr(self._local, 'depth', 0)
+        profiler = None
+        snapshot = None
+        if depth == 0 and self._profiler_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            snapshot = _snapshot()
+            tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.depth = depth
+            memory_after, peak = tracemalloc.get_traced_memory()
+            with _session_lock:
+                entry = self.sections.setdefault(name, {'count': 0, 'seconds': 0.0, 'memory': 0, 'peak': 0})
+                entry['count'] += 1
+                entry['seconds'] += seconds
+                entry['memory'] += memory_after - memory_before
+                if profiler is not None:
+                    entry['peak'] = max(entry['peak'], peak - memory_before)
+                    if name in self.stats:
+                        self.stats[name].add(profiler)
+                    else:
+                        self.stats[name] = pstats.Stats(profiler)
+                    # セッションの終了後に区間が終わった場合はスナップショットを取れない
+                    if tracemalloc.is_tracing():
+                        differences = _snapshot().compare_to(snapshot, 'lineno')[:TOP_ALLOCATIONS]
+                        self.allocations.append((name, [str(difference) for difference in differences]))
+            if profiler is not None:
+                self._profiler_lock.release()
+
+    def finish(self):
+        """計測を終了し、結果をセッションのディレクトリに書き出して、そのパスを返す
+
+        区間ごとのpstats（snakevizやpstatsで表示）、全区間を合わせたsession.pstats、
+        flamegraph.plやspeedscopeで読める折りたたみ形式のsession.folded、
+        メモリの増加の上位の行（memory.txt）と区間の一覧（summary.txt）を書き出す。
+        """
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        tracemalloc.stop()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        combined = None
+        for name, stats in self.stats.items():
+            path = os.path.join(self.output_dir, f"{_file_name(name)}.pstats")
+            stats.dump_stats(path)
+            if combined is None:
+                combined = pstats.Stats(path)
+            else:
+                combined.add(path)
+        if combined is not None:
+            combined.dump_stats(os.path.join(self.output_dir, "session.pstats"))
+
+        with open(os.path.join(self.output_dir, "session.folded"), 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        with open(os.path.join(self.output_dir, "memory.txt"), 'w', encoding='utf-8') as f:
+            for name, differences in self.allocations:
+                f.write(f"[{name}]\n")
+                f.writelines(f"  {difference}\n" for difference in differences)
+
+        with open(os.path.join(self.output_dir, "summary.txt"), 'w', encoding='utf-8') as f:
+            f.write("区間\t回数\t合計(秒)\tメモリ増加(KB)\tピーク(KB)\n")
+            for name, entry in sorted(self.sections.items(), key=lambda item: -item[1]['seconds']):
+                f.write(f"{name}\t{entry['count']}\t{entry['seconds']:.3f}\t"
+                        f"{entry['memory'] / 1024:.1f}\t{entry['peak'] / 1024:.1f}\n")
+        return self.output_dir
+
+def _snapshot():
+    """計測自体の割り当てを除いたtracemallocのスナップショットを取得"""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, file_name) for file_name in IGNORED_FILES])
+
+def _file_name(name):
+    """区間名をファイル名に使える文字列に変換"""
+    return "".join(char if char.isalnum() or char in '-_.' else '_' for char in name)
+
+def start_session(output_dir):
+    """プロファイルのセッションを開始（以降のprofile_sectionとprofiledの区間を計測）"""
+    global _session
+    _session = ProfileSession(output_dir)
+    _session.start()
+    return _session
+
+def finish_session():
+    """セッションを終了して結果を書き出し、出力先のディレクトリを返す（セッションがなければNone）"""
+    global _session
+    session, _session = _session, None
+    return session.finish() if session is not None else None
+
+def profile_section(name):
+    """区間を計測するコンテキストマネージャー（セッションがなければ何もしない）"""
+    session = _session
+    if session is None:
+        return _noop()
+    return session.section(name)
+
+@contextmanager
+def _noop():
+    yield
+
+def profiled(name=None):
+    """関数の呼び出しを区間として計測するデコレーター（区間名の省略時は関数の修飾名）"""
+    def decorator(func):
+        section_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _session is None:
+                return func(*args, **kwargs)
+            with _session.section(section_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profile_dir(config, temp_dir):
+    """プロファイルの出力先（設定ファイルのprofile_dir、省略時は作業ディレクトリ内）"""
+    return config.get("Settings", "profile_dir", fallback=os.path.join(temp_dir, 'profiles'))
@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import shutil
+import asyncio
+import threading
+import subprocess
+from contextlib import contextmanager, asynccontextmanager
+
+# 外部ツールの実行に使うリソースのプリセット
+#   nice: CPUの優先度（0〜19、大きいほど低い）
+#   ionice_class: I/Oのスケジューリングクラス（1: リアルタイム, 2: ベストエフォート, 3: アイドル、Noneは変更しない）
+#   ionice_level: ベストエフォートの優先度（0〜7）
+#   cpu_max: cgroupのCPU上限（CPUコア数換算、Noneは制限なし）
+#   io_max: cgroupのデバイスごとの読み書きの上限（バイト/秒、Noneは制限なし）
+#   device_limit: 同じデバイスを使う外部ツールの同時実行数（0は制限なし）
+RESOURCE_PRESETS = {
+    'full_speed': {'nice': 0, 'ionice_class': None, 'ionice_level': 4,
+                   'cpu_max': None, 'io_max': None, 'device_limit': 0},
+    'balanced': {'nice': 5, 'ionice_class': 2, 'ionice_level': 6,
+                 'cpu_max': None, 'io_max': None, 'device_limit': 2},
+    'background': {'nice': 19, 'ionice_class': 3, 'ionice_level': 7,
+                   'cpu_max': 1.0, 'io_max': 50 * 1024 * 1024, 'device_limit': 1},
+}
+RESOURCE_PRESET_NAMES = {
+    'full_speed': "最高速度",
+    'balanced': "バランス",
+    'background': "バックグラウンド",
+}
+DEFAULT_RESOURCE_PRESET = 'full_speed'
+
+# cgroup v2のCPU上限の周期（マイクロ秒）
+CGROUP_CPU_PERIOD = 100000
+
+# asyncioでデバイスの枠の空きを確認する間隔（秒）
+ASYNC_SLOT_POLL_INTERVAL = 0.05
+
+# Windowsのプロセス優先度クラス
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+IDLE_PRIORITY_CLASS = 0x00000040
+
+# MP4Boxの入力に付ける「#trackID=1」「:fmt=tx3g」などの指定
+TRACK_OPTION = re.compile(r'#|:(?=\w+=)')
+
+_policy = dict(RESOURCE_PRESETS[DEFAULT_RESOURCE_PRESET], name=DEFAULT_RESOURCE_PRESET, cgroup=None)
+_device_slots = {}
+_device_lock = threading.Lock()
+_cgroup_warnings = set()
+
+def load_policy(config):
+    """設定ファイルからリソースの方針を作成（プリセットの値を個別の設定で上書きできる）"""
+    name = config.get("Settings", "resource_preset", fallback=DEFAULT_RESOURCE_PRESET)
+    policy = dict(RESOURCE_PRESETS.get(name, RESOURCE_PRESETS[DEFAULT_RESOURCE_PRESET]), name=name)
+    for key in ('nice', 'ionice_class', 'ionice_level', 'device_limit'):
+        if config.has_option("Settings", f"resource_{key}"):
+            policy[key] = config.getint("Settings", f"resource_{key}")
+    for key in ('cpu_max', 'io_max'):
+        if config.has_option("Settings", f"resource_{key}"):
+            policy[key] = config.getfloat("Settings", f"resource_{key}")
+    # 外部ツールを入れるcgroup v2の親ディレクトリ（書き込み権限を委譲されたもの）
+    policy['cgroup'] = config.get("Settings", "resource_cgroup", fallback=None) or None
+    return policy
+
+def set_policy(policy):
+    """以降に起動する外部ツールに適用するリソースの方針を設定"""
+    global _policy
+    with _device_lock:
+        _policy = policy
+        _device_slots.clear()
+
+def get_policy():
+    """現在のリソースの方針を取得"""
+    return _policy
+
+def apply_config(config):
+    """設定ファイルのリソースの方針を適用"""
+    set_policy(load_policy(config))
+
+def _command_paths(args):
+    """コマンドの引数からファイルのパスらしいものを取り出す（MP4Boxの#や:の指定は除く）"""
+    for arg in args[1:]:
+        if not isinstance(arg, str) or arg.startswith('-'):
+            continue
+        path = TRACK_OPTION.split(arg)[0]
+        if os.path.exists(path):
+            yield path
+        elif os.path.dirname(path) and os.path.isdir(os.path.dirname(path)):
+            # まだ存在しない出力ファイルは親ディレクトリのデバイスを使う
+            yield os.path.dirname(path)
+
+def command_devices(args):
+    """コマンドが読み書きするファイルのデバイス（st_dev）の一覧を取得"""
+    devices = set()
+    for path in _command_paths(args):
+        try:
+            devices.add(os.stat(path).st_dev)
+        except OSError:
+            continue
+    return sorted(devices)
+
+@contextmanager
+def device_slots(args):
+    """コマンドが使う各デバイスの同時実行数の枠を確保する（デッドロックしないようデバイス順に確保）"""
+    policy = _policy
+    if not policy.get('device_limit'):
+        yield
+        return
+    with _device_lock:
+        semaphores = [_device_slots.setdefault(device, threading.BoundedSemaphore(policy['device_limit']))
+                      for device in command_devices(args)]
+    acquired = []
+    try:
+        for semaphore in semaphores:
+            semaphore.acquire()
+            acquired.append(semaphore)
+        yield
+    finally:
+        for semaphore in reversed(acquired):
+            semaphore.release()
+
+@asynccontextmanager
+async def async_device_slots(args):
+    """device_slotsのasyncio版（枠が空くまでイベントループを止めずに待つ）
+
+    スレッドで実行する外部ツールと同じ枠を共有する。キャンセルされても確保済みの枠は解放する。
+    """
+    policy = _policy
+    if not policy.get('device_limit'):
+        yield
+        return
+    with _device_lock:
+        semaphores = [_device_slots.setdefault(device, threading.BoundedSemaphore(policy['device_limit']))
+                      for device in command_devices(args)]
+    acquired = []
+    try:
+        for semaphore in semaphores:
+            while not semaphore.acquire(blocking=False):
+                await asyncio.sleep(ASYNC_SLOT_POLL_INTERVAL)
+            acquired.append(semaphore)
+        yield
+    finally:
+        for semaphore in reversed(acquired):
+            semaphore.release()
+
+def _wrap_command(args, policy):
+    """POSIXではniceとioniceのコマンドを前に付けて優先度を下げる"""
+    prefix = []
+    if policy.get('nice') and shutil.which('nice'):
+        prefix.extend(['nice', '-n', str(policy['nice'])])
+    if policy.get('ionice_class') and shutil.which('ionice'):
+        prefix.extend(['ionice', '-c', str(policy['ionice_class'])])
+        if policy['ionice_class'] in (1, 2):
+            prefix.extend(['-n', str(policy.get('ionice_level', 4))])
+    return prefix + list(args)
+
+def _block_device(st_dev):
+    """st_devのデバイス（パーティション）が属するディスクの'major:minor'を取得"""
+    device = f"{os.major(st_dev)}:{os.minor(st_dev)}"
+    sys_path = f"/sys/dev/block/{device}"
+    if os.path.exists(os.path.join(sys_path, 'partition')):
+        with open(os.path.join(os.path.dirname(os.path.realpath(sys_path)), 'dev'), 'r') as f:
+            device = f.read().strip()
+    return device
+
+def _write_cgroup(path, name, value):
+    """cgroupの設定ファイルに書き込む（失敗した場合はOSErrorを送出）"""
+    with open(os.path.join(path, name), 'w') as f:
+        f.write(value)
+
+def _report_cgroup(message):
+    """cgroupの上限を適用できないことを通知（同じ内容は1回だけ）"""
+    if message not in _cgroup_warnings:
+        _cgroup_warnings.add(message)
+        print(f"警告: {message}")
+
+def _prepare_cgroup(policy, devices):
+    """プリセットごとのcgroup v2を作成してCPUとI/Oの上限を設定し、そのパスを返す（適用できない場合は通知してNone）"""
+    if not policy.get('cgroup') or (policy.get('cpu_max') is None and policy.get('io_max') is None):
+        return None
+    controllers = [name for name, key in (('cpu', 'cpu_max'), ('io', 'io_max')) if policy.get(key) is not None]
+    path = os.path.join(policy['cgroup'], f"mpeg4toolbox-{policy['name']}")
+    try:
+        # 親のcgroupでコントローラーを有効にしないと、子のcgroupにcpu.maxとio.maxが作られない
+        _write_cgroup(policy['cgroup'], 'cgroup.subtree_control', " ".join(f"+{name}" for name in controllers))
+        os.makedirs(path, exist_ok=True)
+        if policy.get('cpu_max') is not None:
+            quota = int(policy['cpu_max'] * CGROUP_CPU_PERIOD)
+            _write_cgroup(path, 'cpu.max', f"{quota} {CGROUP_CPU_PERIOD}")
+        if policy.get('io_max') is not None:
+            rate = int(policy['io_max'])
+            for st_dev in devices:
+                _write_cgroup(path, 'io.max', f"{_block_device(st_dev)} rbps={rate} wbps={rate}")
+        if not os.access(os.path.join(path, 'cgroup.procs'), os.W_OK):
+            raise PermissionError(f"{os.path.join(path, 'cgroup.procs')}に書き込めません")
+    except OSError as e:
+        _report_cgroup(f"cgroupの上限を適用できません ({path}): {e}")
+        return None
+    return path
+
+def _join_cgroup(path):
+    """子プロセスでexecの前に自身をcgroupに移す（起動直後から上限が適用される）"""
+    try:
+        _write_cgroup(path, 'cgroup.procs', '0')
+    except OSError:
+        # 子プロセスからは通知できないため、書き込めるかどうかは_prepare_cgroupで確認する
+        pass
+
+def _cgroup_flags(policy, args, kwargs):
+    """Linuxではcgroupの上限を設定し、execの前にcgroupへ移すpreexec_fnを指定する"""
+    path = _prepare_cgroup(policy, command_devices(args))
+    if path is not None:
+        kwargs['preexec_fn'] = lambda: _join_cgroup(path)
+    return kwargs
+
+def _priority_flags(policy, kwargs):
+    """Windowsでは優先度をプロセスの作成フラグで指定する"""
+    if policy.get('nice', 0) >= 10 or policy.get('ionice_class') == 3:
+        kwargs['creationflags'] = kwargs.get('creationflags', 0) | IDLE_PRIORITY_CLASS
+    elif policy.get('nice', 0) > 0:
+        kwargs['creationflags'] = kwargs.get('creationflags', 0) | BELOW_NORMAL_PRIORITY_CLASS
+    return kwargs
+
+def popen(args, **kwargs):
+    """現在のリソースの方針を適用して外部ツールを起動"""
+    policy = _policy
+    if sys.platform == 'win32':
+        return subprocess.Popen(args, **_priority_flags(policy, kwargs))
+
+    if sys.platform.startswith('linux'):
+        kwargs = _cgroup_flags(policy, args, kwargs)
+    return subprocess.Popen(_wrap_command(args, policy), **kwargs)
+
+async def create_subprocess(args, **kwargs):
+    """popenのasyncio版（asyncio.create_subprocess_execに同じリソースの方針を適用）"""
+    policy = _policy
+    if sys.platform == 'win32':
+        return await asyncio.create_subprocess_exec(*args, **_priority_flags(policy, kwargs))
+
+    if sys.platform.startswith('linux'):
+        kwargs = _cgroup_flags(policy, args, kwargs)
+    return await asyncio.create_subprocess_exec(*_wrap_command(args, policy), **kwargs)
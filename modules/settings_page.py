@@ -1,7 +1,9 @@
 import os
 from PyQt5.QtWidgets import (QWizardPage, QLabel, QVBoxLayout, QPushButton,
-                            QLineEdit, QFileDialog, QMessageBox, QGroupBox, QHBoxLayout, QWizard)
+                            QLineEdit, QFileDialog, QMessageBox, QGroupBox, QHBoxLayout, QWizard,
+                            QComboBox)
 from .utils import get_default_temp_dir
+from .resources import RESOURCE_PRESET_NAMES, DEFAULT_RESOURCE_PRESET, apply_config
 
 class MediaToolSettingsPage(QWizardPage):
     def __init__(self):
@@ -67,6 +69,19 @@ class MediaToolSettingsPage(QWizardPage):
         temp_group.setLayout(temp_layout)
         layout.addWidget(temp_group)
 
+        # 外部ツールの実行に使うリソース設定
+        resource_group = QGroupBox("リソース")
+        resource_layout = QHBoxLayout()
+        self.resource_combo = QComboBox()
+        for name, label in RESOURCE_PRESET_NAMES.items():
+            self.resource_combo.addItem(label, name)
+        self.resource_combo.setToolTip("バックグラウンドでは優先度を下げ、同じディスクを使う処理を1つずつ実行します")
+        resource_layout.addWidget(QLabel("実行モード:"))
+        resource_layout.addWidget(self.resource_combo)
+        resource_layout.addStretch()
+        resource_group.setLayout(resource_layout)
+        layout.addWidget(resource_group)
+
         self.setLayout(layout)
 
         # 必須フィールドとして設定
@@ -90,6 +105,10 @@ class MediaToolSettingsPage(QWizardPage):
             # デフォルトの一時ディレクトリを設定
             default_temp = get_default_temp_dir()
             self.temp_edit.setText(default_temp)
+        index = self.resource_combo.findData(
+            config.get("Settings", "resource_preset", fallback=DEFAULT_RESOURCE_PRESET))
+        if index >= 0:
+            self.resource_combo.setCurrentIndex(index)
 
         # 完了ボタンのテキストを「完了」に設定
         self.wizard().setButtonText(QWizard.FinishButton, "完了")
@@ -115,7 +134,9 @@ class MediaToolSettingsPage(QWizardPage):
         wizard.config.set("Settings", "ffmpeg_path", ffmpeg_path)
         wizard.config.set("Settings", "mkv_path", mkv_path)
         wizard.config.set("Settings", "temp_dir", temp_dir)
+        wizard.config.set("Settings", "resource_preset", self.resource_combo.currentData())
         wizard.save_config()
+        apply_config(wizard.config)
         return True
 
     def nextId(self):
@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from .job_cache import file_identity
+from .core import partial_output_path
+
+# ネットワーク上のファイルシステムの種類（/proc/mountsの値）
+REMOTE_FILESYSTEMS = ('cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'afs', '9p', 'fuse.sshfs', 'fuse.rclone', 'davfs')
+# Windowsのネットワークドライブの種類（GetDriveTypeWの戻り値）
+DRIVE_REMOTE = 4
+
+# ステージングキャッシュの容量の上限の既定値（GB）
+DEFAULT_STAGING_MAX_GB = 50
+# コピーに使うバッファサイズ（大きな単位で順に読み込む）
+STAGING_BUFFER_SIZE = 16 * 1024 * 1024
+
+_copy_locks = {}
+_copy_locks_guard = threading.Lock()
+
+def _mount_types():
+    """/proc/mountsから(マウントポイント, ファイルシステムの種類)の一覧を取得"""
+    mounts = []
+    try:
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mounts.append((fields[1].replace('\\040', ' '), fields[2]))
+    except OSError:
+        pass
+    return mounts
+
+def is_remote(file_path, extra_prefixes=()):
+    """ファイルがネットワーク共有（SMB/NFSなど）上にあるかを判定
+
+    extra_prefixesに指定したパスで始まるファイルもネットワーク上とみなす。
+    """
+    path = os.path.abspath(file_path)
+    if any(prefix and path.startswith(prefix) for prefix in extra_prefixes):
+        return True
+    if sys.platform == 'win32':
+        if path.startswith('\\\\'):
+            return True
+        import ctypes
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + '\\') == DRIVE_REMOTE
+    # 最も長く一致するマウントポイントのファイルシステムで判定
+    best, fstype = '', None
+    for mount_point, mount_type in _mount_types():
+        prefix = mount_point.rstrip('/') + '/'
+        if (path + '/').startswith(prefix) and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype in REMOTE_FILESYSTEMS
+
+def _copy_lock(key):
+    """同じファイルを同時にコピーしないためのロックを取得"""
+    with _copy_locks_guard:
+        return _copy_locks.setdefault(key, threading.Lock())
+
+class StagingCache:
+    """ネットワーク上の入力ファイルをローカルにコピーして使い回すキャッシュ（LRUで削除）
+
+    probeなどヘッダーだけを読む処理は元のファイルを使い、外部ツールで全体を読む処理だけがコピーを使う。
+    """
+
+    def __init__(self, cache_dir, max_bytes, remote_prefixes=()):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.remote_prefixes = tuple(remote_prefixes)
+
+    def _local_path(self, file_path):
+        """ファイルの同一性からキャッシュのパスを決める（ツールが拡張子で形式を判定するため拡張子は残す）"""
+        identity = json.dumps(dict(file_identity(file_path), path=os.path.abspath(file_path)), sort_keys=True)
+        key = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, key + os.path.splitext(file_path)[1].lower())
+
+    def _entries(self):
+        """キャッシュ内のファイルの(最終使用時刻, サイズ, パス)の一覧を取得"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if '.partial' in name or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, needed, keep):
+        """容量の上限を超えないよう、最後に使われた時刻が古いファイルから削除"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries) + needed
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # 使用中のファイルは削除できない場合がある
+                continue
+
+    def _copy(self, file_path, local_path):
+        """大きな単位で順に読み込んでコピー（一時ファイルに書いてから置き換える）"""
+        temp_path = partial_output_path(local_path)
+        buffer = bytearray(STAGING_BUFFER_SIZE)
+        view = memoryview(buffer)
+        try:
+            with open(file_path, 'rb', buffering=0) as src, open(temp_path, 'wb', buffering=0) as dst:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                while True:
+                    size = src.readinto(buffer)
+                    if not size:
+                        break
+                    dst.write(view[:size])
+            os.replace(temp_path, local_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, file_path):
+        """外部ツールに渡すパスを取得（ネットワーク上のファイルはローカルのコピー）
+
+        ローカルのファイルと上限より大きいファイルは元のパスを返す。
+        """
+        if not is_remote(file_path, self.remote_prefixes):
+            return file_path
+        size = os.path.getsize(file_path)
+        if size > self.max_bytes:
+            return file_path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        local_path = self._local_path(file_path)
+        with _copy_lock(local_path):
+            if not os.path.exists(local_path):
+                self._evict(size, local_path)
+                self._copy(file_path, local_path)
+            # 最後に使われた時刻を更新（LRUの順序に使う）
+            os.utime(local_path)
+        return local_path
+
+def load_staging_cache(config, temp_dir):
+    """設定からステージングキャッシュを作成（無効な場合はNone）"""
+    if not config.getboolean("Settings", "staging_cache", fallback=False):
+        return None
+    cache_dir = config.get("Settings", "staging_cache_dir", fallback=os.path.join(temp_dir, 'staging'))
+    max_gb = config.getfloat("Settings", "staging_cache_max_gb", fallback=DEFAULT_STAGING_MAX_GB)
+    prefixes = [prefix.strip() for prefix in
+                config.get("Settings", "staging_remote_paths", fallback="").split(';') if prefix.strip()]
+    return StagingCache(cache_dir, int(max_gb * 1024 ** 3), prefixes)
+
+def staged_path(staging, file_path):
+    """ステージングキャッシュがあればローカルのコピーのパスを、なければ元のパスを返す"""
+    return staging.get(file_path) if staging is not None else file_path
@@ -0,0 +1,138 @@
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from .isobmff import BoxError, iter_children, find_child, parse_movie, read_top_level
+from .core import fsync_path
+from .metadata import free_box
+
+# トラックの種類とhdlrのハンドラータイプ
+TRACK_KINDS = {
+    'video': ('vide',),
+    'audio': ('soun',),
+    'subtitle': ('text', 'sbtl', 'subt', 'clcp'),
+}
+# 同時に処理するファイル数の既定値
+DEFAULT_STRIP_WORKERS = 8
+
+class StripError(Exception):
+    """トラックを削除できないときの例外"""
+
+def select_tracks(tracks, track_ids=(), kinds=(), languages=(), name=None):
+    """条件のいずれかに一致するトラックのIDの一覧を返す
+
+    kindsは'video'/'audio'/'subtitle'、nameはhdlrのトラック名に含まれる文字列（大文字小文字を区別しない）。
+    """
+    handlers = {handler for kind in kinds for handler in TRACK_KINDS[kind]}
+    selected = []
+    for track in tracks:
+        if (track['track_id'] in track_ids
+                or track.get('handler') in handlers
+                or track.get('language') in languages
+                or (name and name.lower() in track.get('name', '').lower())):
+            selected.append(track['track_id'])
+    return selected
+
+def _box(box_type, payload):
+    """ボックスのバイト列を作成"""
+    return struct.pack('>I4s', 8 + len(payload), box_type.encode('latin-1')) + payload
+
+def _strip_tref(data, start, end, track_ids):
+    """trefから削除するトラックへの参照を取り除く（参照が残らなければNone）"""
+    references = b''
+    for box_type, offset, size, header_size in iter_children(data, start, end):
+        count = (size - header_size) // 4
+        ids = struct.unpack_from(f'>{count}I', data, offset + header_size)
+        kept = [track_id for track_id in ids if track_id not in track_ids]
+        if kept:
+            references += _box(box_type, struct.pack(f'>{len(kept)}I', *kept))
+    return _box('tref', references) if references else None
+
+def build_stripped_moov(moov, track_ids):
+    """指定したトラックのtrakを取り除いたmoovを作成（mdatのサンプルはそのまま残る）"""
+    _, _, moov_size, header_size = next(iter_children(moov, 0, len(moov)))
+    children = []
+    for box_type, offset, size, child_header in iter_children(moov, header_size, moov_size):
+        if box_type != 'trak':
+            children.append(bytes(moov[offset:offset + size]))
+            continue
+        start, end = offset + child_header, offset + size
+        tkhd = find_child(moov, start, end, 'tkhd')
+        if tkhd is None:
+            raise BoxError("trakにtkhdがありません")
+        version = moov[tkhd[0]]
+        track_id = struct.unpack_from('>I', moov, tkhd[0] + (20 if version == 1 else 12))[0]
+        if track_id in track_ids:
+            continue
+        # 残すトラックから削除するトラックへの参照（チャプターなど）を取り除く
+        trak_children = []
+        for trak_type, trak_offset, trak_size, trak_header in iter_children(moov, start, end):
+            if trak_type == 'tref':
+                tref = _strip_tref(moov, trak_offset + trak_header, trak_offset + trak_size, track_ids)
+                if tref is not None:
+                    trak_children.append(tref)
+            else:
+                trak_children.append(bytes(moov[trak_offset:trak_offset + trak_size]))
+        children.append(_box('trak', b''.join(trak_children)))
+    return _box('moov', b''.join(children))
+
+def strip_tracks(file_path, track_ids):
+    """指定したトラックをmoovから取り除き、(削除したトラック数, 参照されなくなったサンプルのバイト数)を返す
+
+    moovだけをその場で書き換え、小さくなった分はfreeボックスで埋めるため、mdatは読み書きしない。
+    削除したトラックのサンプルはmdatに残る（ファイルサイズは変わらない）。
+    """
+    movie = parse_movie(file_path, sample_tables=True)
+    existing = {track['track_id'] for track in movie['tracks']}
+    track_ids = set(track_ids) & existing
+    if not track_ids:
+        return 0, 0
+    if track_ids == existing:
+        raise StripError("すべてのトラックを削除することはできません")
+    if any(box_type == 'moof' for box_type, _, _, _ in read_top_level(file_path)):
+        raise StripError("フラグメント化されたMP4のトラックは削除できません")
+
+    moov = movie['moov']
+    new_moov = build_stripped_moov(moov, track_ids)
+    remaining = len(moov) - len(new_moov)
+    if remaining and remaining < 8:
+        raise StripError("moovの空き領域をfreeボックスで埋められません")
+    with open(file_path, 'r+b') as f:
+        f.seek(movie['moov_offset'])
+        f.write(new_moov + (free_box(remaining) if remaining else b''))
+    fsync_path(file_path)
+
+    unreferenced = 0
+    for track in movie['tracks']:
+        if track['track_id'] in track_ids:
+            sizes = track.get('stsz', 0)
+            unreferenced += sizes * track.get('sample_count', 0) if isinstance(sizes, int) else sum(sizes)
+    return len(track_ids), unreferenced
+
+def strip_files(file_paths, track_ids=(), kinds=(), languages=(), name=None, dry_run=False,
+                max_workers=DEFAULT_STRIP_WORKERS, log=print):
+    """複数のファイルから条件に一致するトラックを並列に削除し、失敗した件数を返す"""
+    def strip(file_path):
+        movie = parse_movie(file_path)
+        selected = select_tracks(movie['tracks'], track_ids, kinds, languages, name)
+        descriptions = [f"#{track['track_id']} {track.get('handler')} {track.get('language')} {track.get('name', '')}"
+                        .rstrip() for track in movie['tracks'] if track['track_id'] in selected]
+        if dry_run or not selected:
+            return descriptions, None
+        return descriptions, strip_tracks(file_path, selected)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(file_path, executor.submit(strip, file_path)) for file_path in file_paths]
+        for file_path, future in futures:
+            try:
+                descriptions, result = future.result()
+            except Exception as e:
+                failed += 1
+                log(f"{file_path}: 失敗しました\n{e}")
+                continue
+            if not descriptions:
+                log(f"{file_path}: 該当するトラックはありません")
+                continue
+            log(f"{file_path}: {', '.join(descriptions)}")
+            if result is not None:
+                log(f"  {result[0]}トラックを削除しました（参照されなくなったデータ: {result[1] / (1024 * 1024):.1f} MB）")
+    return failed
@@ -1,14 +1,123 @@
 import os
-import uuid
 import ffmpeg
-import subprocess
 from PyQt5.QtWidgets import (QWizardPage, QLabel, QVBoxLayout, QHBoxLayout,
                             QLineEdit, QPushButton, QComboBox, QFileDialog,
                             QMessageBox, QGroupBox, QScrollArea, QWidget,
                             QCheckBox, QWizard, QApplication)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, QEventLoop, pyqtSignal
 from .constants import LANGUAGES
-from .utils import get_default_temp_dir
+from .utils import get_default_temp_dir, format_duration
+from .job_cache import JobCache, compute_job_key, file_identity, DEFAULT_MAX_ENTRIES
+from .core import (MEDIA_EXTENSIONS, SUBTITLE_EXTENSIONS, SUBTITLE_EXPORT_EXTENSIONS,
+                   get_tool_paths, stage_subtitles, remove_files, run_command,
+                   partial_output_path, commit_output, extract_subtitle, ToolError)
+from .mux_backend import MUX_BACKENDS, get_mux_backend
+from .interleave import (analyze_interleave, interleave_problems, format_interleave_report,
+                         InterleaveError, DEFAULT_INTERLEAVE_DURATION, DEFAULT_MAX_SKEW)
+from .ebml import probe_matroska, EbmlError
+from .verify import mux_checker, count_input_tracks, DEFAULT_SPOT_CHECK_SAMPLES
+from .loudness import (analyze_tracks, check_compliance, format_result, DEFAULT_TARGET_LOUDNESS,
+                       DEFAULT_LOUDNESS_TOLERANCE, DEFAULT_TRUE_PEAK_LIMIT)
+from .langdetect import detect_files
+from .staging import load_staging_cache
+from .pgs import index_pgs, check_pgs, summarize_pgs, format_pgs_summary
+from .webvtt import package_subtitles, load_package_options, WebVttError
+from .profiling import profiled
+from .chapters import read_chapters, load_chapters, CHAPTER_MEDIA_EXTENSIONS
+from .planner import ThroughputHistory, plan_jobs, format_plan, job_work, measure
+from .sync import (analyze_sync, sync_problems, DEFAULT_OFFSET_TOLERANCE, DEFAULT_DRIFT_TOLERANCE,
+                   DEFAULT_MIN_SCORE)
+
+# 自動判定した言語を選択する信頼度の下限の既定値
+DEFAULT_LANGUAGE_DETECT_CONFIDENCE = 0.5
+
+class LoudnessThread(QThread):
+    """オーディオトラックのラウドネスと無音区間をバックグラウンドで解析するスレッド"""
+    analyzed = pyqtSignal(list)
+
+    def __init__(self, tools, tracks):
+        super().__init__()
+        self.tools = tools
+        self.tracks = tracks
+
+    def run(self):
+        try:
+            results = analyze_tracks(self.tools, self.tracks)
+        except Exception as e:
+            # 解析を開始できない場合も各トラックの失敗として通知する
+            results = [{'error': str(e)} for _ in self.tracks]
+        self.analyzed.emit(results)
+
+class LanguageDetectionThread(QThread):
+    """字幕ファイルの言語をバックグラウンドで判定するスレッド"""
+    detected = pyqtSignal(list)
+
+    def __init__(self, file_paths):
+        super().__init__()
+        self.file_paths = file_paths
+
+    def run(self):
+        self.detected.emit(detect_files(self.file_paths))
+
+class PgsIndexThread(QThread):
+    """PGS字幕（.sup）の索引をバックグラウンドで作成し、キュー数と時刻の問題を通知するスレッド"""
+    indexed = pyqtSignal(str, str, list)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            index = index_pgs(self.file_path)
+            self.indexed.emit(self.file_path, format_pgs_summary(summarize_pgs(index)), check_pgs(index))
+        except Exception as e:
+            self.indexed.emit(self.file_path, "PGS: 読み取れません", [str(e)])
+
+class SyncThread(QThread):
+    """追加する字幕と音声の発話区間のずれをバックグラウンドで推定するスレッド
+
+    files_by_audioはオーディオのインデックスから(字幕の番号, 字幕ファイル)の一覧への対応。
+    字幕の番号と解析結果の組の一覧と、解析できない場合のエラーメッセージを通知する。
+    """
+    analyzed = pyqtSignal(list, str)
+
+    def __init__(self, tools, input_file, files_by_audio):
+        super().__init__()
+        self.tools = tools
+        self.input_file = input_file
+        self.files_by_audio = files_by_audio
+
+    def run(self):
+        try:
+            results = []
+            for audio_index, files in self.files_by_audio.items():
+                indexes = [i for i, _ in files]
+                results.extend(zip(indexes, analyze_sync(self.tools, self.input_file, audio_index,
+                                                         [file_path for _, file_path in files])))
+            self.analyzed.emit(results, "")
+        except Exception as e:
+            self.analyzed.emit([], str(e))
+
+class StagingThread(QThread):
+    """ネットワーク上の入力ファイルをバックグラウンドでローカルにコピーするスレッド
+
+    元のファイルのパス、ローカルのコピーのパス、コピーしたときの元のファイルの同一性情報を通知する。
+    """
+    staged = pyqtSignal(str, str, dict)
+
+    def __init__(self, staging, file_path):
+        super().__init__()
+        self.staging = staging
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            identity = file_identity(self.file_path)
+            self.staged.emit(self.file_path, self.staging.get(self.file_path), identity)
+        except Exception as e:
+            # コピーできない場合は元のファイルをそのまま使う
+            print(f"ステージングに失敗しました: {e}")
 
 class MediaTagManagementPage(QWizardPage):
     def __init__(self):
@@ -16,6 +125,10 @@ class MediaTagManagementPage(QWizardPage):
         self.setTitle("字幕・タグ管理")
         self.setSubTitle("メディアファイルの言語設定とメタデータを管理します")
         self.subtitle_groups = []
+        self.probe_data = None  # 入力ファイルのメディア情報
+        self.detection_threads = []
+        self.staging_threads = []
+        self.staged_files = {}  # ネットワーク上の入力ファイルから(ローカルのコピー, 元のファイルの同一性情報)への対応
 
         # ドラッグ＆ドロップを有効化
         self.setAcceptDrops(True)
@@ -46,6 +159,17 @@ class MediaTagManagementPage(QWizardPage):
         output_layout.addWidget(QLabel("出力ファイル:"))
         output_layout.addWidget(self.output_edit)
         output_layout.addWidget(self.output_browse_button)
+        # 出力形式（多重化バックエンド）
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("MP4 (MP4Box)", 'mp4box')
+        self.backend_combo.addItem("MKV (mkvmerge)", 'mkvmerge')
+        self.backend_combo.currentIndexChanged.connect(self.update_output_extension)
+        output_layout.addWidget(QLabel("出力形式:"))
+        output_layout.addWidget(self.backend_combo)
+        # 多重化と同じ処理でサンプルを並べ直す（MP4のみ）
+        self.interleave_check = QCheckBox("インターリーブを最適化")
+        self.interleave_check.setToolTip("音声・字幕のチャンクを映像と交互に並べ、再生時のシークを減らします")
+        output_layout.addWidget(self.interleave_check)
         main_layout.addLayout(output_layout)
 
         # 映像言語設定
@@ -73,9 +197,35 @@ class MediaTagManagementPage(QWizardPage):
         audio_group = QGroupBox("オーディオ設定")
         audio_layout = QVBoxLayout()
         self.audio_settings = []  # オーディオ設定を保持
+        self.loudness_button = QPushButton("ラウドネス・無音を解析")
+        self.loudness_button.clicked.connect(self.analyze_loudness)
+        self.loudness_thread = None
+        audio_layout.addWidget(self.loudness_button)
         audio_group.setLayout(audio_layout)
         main_layout.addWidget(audio_group)
 
+        # チャプター設定（字幕と同じMP4Boxの1回の処理で追加する）
+        chapter_group = QGroupBox("チャプター")
+        chapter_layout = QVBoxLayout()
+        self.chapter_info_label = QLabel("")
+        self.chapter_info_label.setStyleSheet("QLabel { color: gray; }")
+        chapter_layout.addWidget(self.chapter_info_label)
+        chapter_file_layout = QHBoxLayout()
+        self.chapter_edit = QLineEdit()
+        self.chapter_edit.setReadOnly(True)
+        self.chapter_edit.setPlaceholderText("入力ファイルのチャプターをそのまま使う")
+        chapter_browse_button = QPushButton("読み込み...")
+        chapter_browse_button.clicked.connect(self.browse_chapters)
+        chapter_clear_button = QPushButton("クリア")
+        chapter_clear_button.clicked.connect(lambda: self.set_chapter_file(""))
+        chapter_file_layout.addWidget(QLabel("チャプターファイル:"))
+        chapter_file_layout.addWidget(self.chapter_edit)
+        chapter_file_layout.addWidget(chapter_browse_button)
+        chapter_file_layout.addWidget(chapter_clear_button)
+        chapter_layout.addLayout(chapter_file_layout)
+        chapter_group.setLayout(chapter_layout)
+        main_layout.addWidget(chapter_group)
+
         # 字幕追加ボタン
         add_button = QPushButton("字幕を追加")
         add_button.clicked.connect(self.add_subtitle_group)
@@ -109,7 +259,7 @@ class MediaTagManagementPage(QWizardPage):
                 file_path = urls[0].toLocalFile()
                 ext = os.path.splitext(file_path)[1].lower()
                 # メディアファイルまたは字幕ファイルの場合のみ受け入れる
-                if ext in ['.mp4', '.m4v', '.mkv'] or ext in ['.srt', '.ass', '.ssa', '.txt', '.vtt', '.smi', '.sup', '.dvb', '.ttx', '.tx3g']:
+                if ext in MEDIA_EXTENSIONS or ext in SUBTITLE_EXTENSIONS:
                     event.acceptProposedAction()
 
     def page_dropEvent(self, event):
@@ -120,18 +270,18 @@ class MediaTagManagementPage(QWizardPage):
             ext = os.path.splitext(file_path)[1].lower()
 
             # メディアファイルの場合
-            if ext in ['.mp4', '.m4v', '.mkv']:
+            if ext in MEDIA_EXTENSIONS:
                 self.file_edit.setText(file_path)
                 # 出力ファイル名を自動設定
                 dir_name = os.path.dirname(file_path)
                 base_name = os.path.splitext(os.path.basename(file_path))[0]
-                self.output_edit.setText(os.path.join(dir_name, f"{base_name}_output.mp4"))
+                self.output_edit.setText(os.path.join(dir_name, f"{base_name}_output{self.output_extension()}"))
 
                 # ファイル情報を更新
                 self.update_file_info(file_path)
-            # 字幕ファイルの場合
-            elif ext in ['.srt', '.ass', '.ssa', '.txt', '.vtt', '.smi', '.sup', '.dvb', '.ttx', '.tx3g']:
-                self.add_subtitle_with_file(file_path)
+            # 字幕ファイルの場合（複数の字幕をまとめて追加）
+            elif ext in SUBTITLE_EXTENSIONS:
+                self.add_subtitle_files([url.toLocalFile() for url in urls])
             else:
                 QMessageBox.warning(self, "警告", "サポートされていないファイル形式です。")
 
@@ -143,7 +293,7 @@ class MediaTagManagementPage(QWizardPage):
                 file_path = urls[0].toLocalFile()
                 ext = os.path.splitext(file_path)[1].lower()
                 # 字幕ファイルの場合のみ受け入れる
-                if ext in ['.srt', '.ass', '.ssa', '.txt', '.vtt', '.smi', '.sup', '.dvb', '.ttx', '.tx3g']:
+                if ext in SUBTITLE_EXTENSIONS:
                     event.acceptProposedAction()
 
     def subtitle_dropEvent(self, event):
@@ -152,11 +302,17 @@ class MediaTagManagementPage(QWizardPage):
         if urls:
             file_path = urls[0].toLocalFile()
             ext = os.path.splitext(file_path)[1].lower()
-            if ext in ['.srt', '.ass', '.ssa', '.txt', '.vtt', '.smi', '.sup', '.dvb', '.ttx', '.tx3g']:
-                self.add_subtitle_with_file(file_path)
+            if ext in SUBTITLE_EXTENSIONS:
+                self.add_subtitle_files([url.toLocalFile() for url in urls])
             else:
                 QMessageBox.warning(self, "警告", "サポートされていない字幕ファイル形式です。")
 
+    def add_subtitle_files(self, file_paths):
+        """複数の字幕ファイルを追加し、言語をまとめて自動判定"""
+        groups = [self.add_subtitle_with_file(file_path) for file_path in file_paths
+                  if os.path.splitext(file_path)[1].lower() in SUBTITLE_EXTENSIONS]
+        self.detect_subtitle_languages(groups)
+
     def add_subtitle_with_file(self, file_path):
         """字幕ファイルを追加"""
         group = QGroupBox(f"字幕 #{len(self.subtitle_groups) + 1}")
@@ -181,6 +337,9 @@ class MediaTagManagementPage(QWizardPage):
         for code, name in LANGUAGES:
             lang_combo.addItem(f"{name} ({code})", code)
         lang_layout.addWidget(lang_combo)
+        detect_label = QLabel("")  # 自動判定の結果を表示するラベル
+        detect_label.setStyleSheet("QLabel { color: gray; }")
+        lang_layout.addWidget(detect_label)
         layout.addLayout(lang_layout)
 
         # 関連付けるオーディオ選択
@@ -214,6 +373,7 @@ class MediaTagManagementPage(QWizardPage):
             'group': group,
             'file': file_edit,
             'language': lang_combo,
+            'detected': detect_label,
             'audio': audio_combo,
             'default': default_check,
             'forced': forced_check,
@@ -223,7 +383,19 @@ class MediaTagManagementPage(QWizardPage):
         # オーディオストリーム情報を更新
         if self.file_edit.text():
             self.update_audio_streams(self.file_edit.text())
-
+        return self.subtitle_groups[-1]
+
+    @profiled()
+    def probe_media(self, file_path):
+        """メディア情報を取得（MKVはヘッダーを直接読み取り、mkvextractと同じトラックIDを使う）"""
+        if os.path.splitext(file_path)[1].lower() == '.mkv':
+            try:
+                return probe_matroska(file_path)
+            except (OSError, EbmlError) as e:
+                print(f"\nMKVヘッダーの読み取りに失敗したためffprobeを使用します: {e}")
+        return ffmpeg.probe(file_path)
+
+    @profiled()
     def update_file_info(self, file_path):
         """ファイル情報を更新"""
         try:
@@ -234,7 +406,8 @@ class MediaTagManagementPage(QWizardPage):
                 os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ["PATH"]
 
             # メディア情報を取得
-            probe = ffmpeg.probe(file_path)
+            probe = self.probe_media(file_path)
+            self.probe_data = probe
 
             # 映像言語を設定
             detected_video_lang = "未設定"
@@ -304,6 +477,12 @@ class MediaTagManagementPage(QWizardPage):
             # オーディオストリーム情報を更新
             self.update_audio_streams(file_path)
 
+            # 入力ファイルのチャプターを表示
+            self.show_input_chapters(file_path)
+
+            # ネットワーク上のファイルは先にローカルへコピーしておく
+            self.start_staging(file_path)
+
         except ffmpeg.Error as e:
             QMessageBox.warning(self, "警告",
                               f"メディア情報の取得に失敗しました:\n{str(e)}")
@@ -311,11 +490,89 @@ class MediaTagManagementPage(QWizardPage):
             QMessageBox.warning(self, "警告",
                               f"予期せぬエラーが発生しました:\n{str(e)}")
 
+    def show_input_chapters(self, file_path):
+        """入力ファイルのチャプター数を表示（読み取れない場合は表示しない）"""
+        text = ""
+        if os.path.splitext(file_path)[1].lower() in CHAPTER_MEDIA_EXTENSIONS:
+            try:
+                chapters = read_chapters(file_path)
+                text = f"入力ファイルのチャプター: {len(chapters)}件" if chapters else "入力ファイルにチャプターはありません"
+            except Exception as e:
+                print(f"\nチャプターを読み取れません: {e}")
+        self.chapter_info_label.setText(text)
+
+    def browse_chapters(self):
+        """追加するチャプターファイルを選択"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "チャプターファイルの選択", "",
+            "チャプターファイル (*.txt *.ogm *.xml *.csv);;メディアファイル (*.mp4 *.m4v *.mkv);;すべてのファイル (*.*)")
+        if file_path:
+            self.set_chapter_file(file_path)
+
+    def set_chapter_file(self, file_path):
+        """チャプターファイルを設定し、読み込めるか確認して件数を表示"""
+        if file_path:
+            try:
+                chapters = load_chapters(file_path)
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"チャプターファイルを読み込めません:\n{str(e)}")
+                return
+            if not chapters:
+                QMessageBox.warning(self, "警告", "チャプターファイルにチャプターがありません。")
+                return
+            self.chapter_edit.setToolTip("\n".join(
+                f"{format_duration(chapter['start'])} {chapter['title']}" for chapter in chapters))
+        else:
+            self.chapter_edit.setToolTip("")
+        self.chapter_edit.setText(file_path)
+
+    def start_staging(self, file_path):
+        """ステージングキャッシュが有効なら入力ファイルのコピーをバックグラウンドで開始"""
+        config = self.wizard().config
+        temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+        staging = load_staging_cache(config, temp_dir)
+        if staging is None or self.local_input(file_path) != file_path:
+            return
+        thread = StagingThread(staging, file_path)
+        thread.staged.connect(self.on_staged)
+        thread.finished.connect(lambda: self.staging_threads.remove(thread))
+        self.staging_threads.append(thread)
+        thread.start()
+
+    def on_staged(self, file_path, local_path, identity):
+        """コピーが完了したら以降の外部ツールはローカルのコピーを読む"""
+        self.staged_files[file_path] = (local_path, identity)
+
+    def local_input(self, file_path):
+        """外部ツールに渡す入力ファイルのパス（コピーが完了していなければ元のパス）
+
+        コピーがキャッシュから削除された場合や元のファイルが変更された場合は、対応を破棄して元のパスを返す。
+        """
+        if file_path not in self.staged_files:
+            return file_path
+        local_path, identity = self.staged_files[file_path]
+        try:
+            valid = os.path.exists(local_path) and file_identity(file_path) == identity
+        except OSError:
+            valid = False
+        if not valid:
+            del self.staged_files[file_path]
+            return file_path
+        return local_path
+
     def initializePage(self):
         """ページの初期化"""
         # ファイル選択をクリア
         self.file_edit.clear()
         self.output_edit.clear()
+        index = self.backend_combo.findData(
+            self.wizard().config.get("Settings", "mux_backend", fallback='mp4box'))
+        self.backend_combo.setCurrentIndex(max(index, 0))
+        self.interleave_check.setChecked(
+            self.wizard().config.getboolean("Settings", "interleave_optimize", fallback=False))
+        self.probe_data = None
+        self.chapter_info_label.setText("")
+        self.set_chapter_file("")
 
         # 映像言語をデフォルトに設定
         self.video_lang_combo.setCurrentIndex(0)
@@ -341,6 +598,7 @@ class MediaTagManagementPage(QWizardPage):
         # 完了ボタンのテキストを「出力」に変更
         self.wizard().setButtonText(QWizard.FinishButton, "出力")
 
+    @profiled()
     def update_audio_settings(self, probe_data):
         """オーディオ設定を更新"""
         # 既存の設定をクリア
@@ -402,11 +660,21 @@ class MediaTagManagementPage(QWizardPage):
                 lang_layout.addStretch()
                 layout.addLayout(lang_layout)
 
-                # デフォルトフラグ
+                # 出力対象とデフォルトフラグ
+                flags_layout = QHBoxLayout()
+                output_check = QCheckBox("出力")
+                output_check.setChecked(True)  # デフォルトで出力対象
                 default_check = QCheckBox("デフォルトオーディオ")
                 if 'disposition' in stream and stream['disposition'].get('default', 0) == 1:
                     default_check.setChecked(True)
-                layout.addWidget(default_check)
+                flags_layout.addWidget(output_check)
+                flags_layout.addWidget(default_check)
+                flags_layout.addStretch()
+                layout.addLayout(flags_layout)
+
+                # ラウドネスの解析結果
+                loudness_label = QLabel("")
+                layout.addWidget(loudness_label)
 
                 group.setLayout(layout)
                 self.audio_layout.addWidget(group)
@@ -414,11 +682,61 @@ class MediaTagManagementPage(QWizardPage):
                     'group': group,
                     'language': lang_combo,
                     'default': default_check,
+                    'output': output_check,
+                    'loudness': loudness_label,
                     'stream_index': i,
-                    'audio_index': audio_index
+                    'track_id': i + 1,  # MP4Boxのトラック番号（1から）
+                    'audio_index': audio_index,
+                    'channels': int(stream.get('channels', 2))
                 })
                 audio_index += 1
 
+    def analyze_loudness(self):
+        """全オーディオトラックのラウドネス・トゥルーピーク・無音区間を並列に解析"""
+        tools = get_tool_paths(self.wizard().config)
+        if 'ffmpeg' not in tools:
+            QMessageBox.critical(self, "エラー", "FFmpegの設定が見つかりません。")
+            return
+        if not self.audio_settings or self.loudness_thread is not None:
+            return
+
+        input_file = self.file_edit.text()
+        tracks = [{'file': self.local_input(input_file), 'audio_index': setting['audio_index'], 'channels': setting['channels']}
+                  for setting in self.audio_settings]
+        for setting in self.audio_settings:
+            setting['loudness'].setText("解析中...")
+        self.loudness_button.setEnabled(False)
+        self.loudness_thread = LoudnessThread(tools, tracks)
+        self.loudness_thread.analyzed.connect(
+            lambda results: self.show_loudness(input_file, results))
+        # スレッドの参照はrunが終了してから解放する
+        self.loudness_thread.finished.connect(self.loudness_finished)
+        self.loudness_thread.start()
+
+    def loudness_finished(self):
+        """ラウドネスの解析スレッドの終了後に参照を解放し、再び解析できるようにする"""
+        self.loudness_thread = None
+        self.loudness_button.setEnabled(True)
+
+    def show_loudness(self, input_file, results):
+        """ラウドネスの解析結果と準拠の確認結果を各オーディオ設定に表示"""
+        if input_file != self.file_edit.text():
+            return
+        config = self.wizard().config
+        target = config.getfloat("Settings", "loudness_target", fallback=DEFAULT_TARGET_LOUDNESS)
+        tolerance = config.getfloat("Settings", "loudness_tolerance", fallback=DEFAULT_LOUDNESS_TOLERANCE)
+        true_peak_limit = config.getfloat("Settings", "true_peak_limit", fallback=DEFAULT_TRUE_PEAK_LIMIT)
+        for setting, result in zip(self.audio_settings, results):
+            problems = check_compliance(result, target, tolerance, true_peak_limit)
+            text = format_result(result)
+            if problems:
+                text += "\n" + "\n".join(f"警告: {problem}" for problem in problems)
+                setting['loudness'].setStyleSheet("QLabel { color: red; }")
+            else:
+                setting['loudness'].setStyleSheet("")
+            setting['loudness'].setText(text)
+
+    @profiled()
     def update_existing_subtitles(self, probe_data):
         """既存の字幕ストリームを字幕グループとして追加"""
         subtitle_index = 0
@@ -522,6 +840,7 @@ class MediaTagManagementPage(QWizardPage):
                     'forced': forced_check,
                     'output': output_check,  # 出力対象フラグを追加
                     'stream_index': i,  # 元のストリームのインデックスを保持
+                    'track_id': i + 1,  # MP4Boxのトラック番号（1から）
                     'subtitle_index': subtitle_index,  # 字幕のインデックスを保持
                     'is_existing': True  # 既存の字幕であることを示すフラグ
                 })
@@ -550,6 +869,9 @@ class MediaTagManagementPage(QWizardPage):
         for code, name in LANGUAGES:
             lang_combo.addItem(f"{name} ({code})", code)
         lang_layout.addWidget(lang_combo)
+        detect_label = QLabel("")  # 自動判定の結果を表示するラベル
+        detect_label.setStyleSheet("QLabel { color: gray; }")
+        lang_layout.addWidget(detect_label)
         layout.addLayout(lang_layout)
 
         # 関連付けるオーディオ選択
@@ -583,6 +905,7 @@ class MediaTagManagementPage(QWizardPage):
             'group': group,
             'file': file_edit,
             'language': lang_combo,
+            'detected': detect_label,
             'audio': audio_combo,
             'default': default_check,
             'forced': forced_check,
@@ -614,19 +937,37 @@ class MediaTagManagementPage(QWizardPage):
             # 出力ファイル名を自動設定
             dir_name = os.path.dirname(file_path)
             base_name = os.path.splitext(os.path.basename(file_path))[0]
-            self.output_edit.setText(os.path.join(dir_name, f"{base_name}_output.mp4"))
+            self.output_edit.setText(os.path.join(dir_name, f"{base_name}_output{self.output_extension()}"))
 
             # ファイル情報を更新
             self.update_file_info(file_path)
 
     def browse_output(self):
         """出力ファイルを選択"""
+        if self.backend_combo.currentData() == 'mkvmerge':
+            file_filter = "MKVファイル (*.mkv);;すべてのファイル (*.*)"
+        else:
+            file_filter = "MP4ファイル (*.mp4);;すべてのファイル (*.*)"
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "出力ファイルの選択", self.output_edit.text(),
-            "MP4ファイル (*.mp4);;すべてのファイル (*.*)")
+            self, "出力ファイルの選択", self.output_edit.text(), file_filter)
         if file_path:
             self.output_edit.setText(file_path)
 
+    def output_extension(self):
+        """選択した出力形式の既定の拡張子"""
+        return MUX_BACKENDS[self.backend_combo.currentData()].extensions[0]
+
+    def update_output_extension(self):
+        """出力形式に合わせて出力ファイルの拡張子を変更"""
+        # MKVはクラスター単位で交互に並ぶため、インターリーブの設定はMP4のみ
+        self.interleave_check.setEnabled(self.backend_combo.currentData() == 'mp4box')
+        output_file = self.output_edit.text()
+        if not output_file:
+            return
+        base_name, ext = os.path.splitext(output_file)
+        if ext.lower() not in MUX_BACKENDS[self.backend_combo.currentData()].extensions:
+            self.output_edit.setText(base_name + self.output_extension())
+
     def browse_subtitle(self, edit):
         """字幕ファイルを選択"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -634,6 +975,65 @@ class MediaTagManagementPage(QWizardPage):
             "字幕ファイル (*.srt *.ass *.ssa *.txt *.vtt *.smi *.sup *.dvb *.ttx *.tx3g);;すべてのファイル (*.*)")
         if file_path:
             edit.setText(file_path)
+            self.detect_subtitle_languages([group for group in self.subtitle_groups if group['file'] is edit])
+
+    def detect_subtitle_languages(self, groups):
+        """字幕ファイルの言語をバックグラウンドで判定し、言語の選択に反映"""
+        groups = [group for group in groups if 'detected' in group and group['file'].text()]
+        # PGSの画像字幕は言語を判定できないため、キュー数と時刻の問題を表示する
+        for group in [group for group in groups if group['file'].text().lower().endswith('.sup')]:
+            groups.remove(group)
+            self.index_pgs_subtitle(group)
+        if not groups:
+            return
+        for group in groups:
+            group['detected'].setText("言語を判定中...")
+        thread = LanguageDetectionThread([group['file'].text() for group in groups])
+        thread.detected.connect(lambda results: self.apply_detected_languages(groups, results))
+        thread.finished.connect(lambda: self.detection_threads.remove(thread))
+        self.detection_threads.append(thread)
+        thread.start()
+
+    def index_pgs_subtitle(self, group):
+        """PGS字幕の索引をバックグラウンドで作成"""
+        group['detected'].setText("PGSを解析中...")
+        thread = PgsIndexThread(group['file'].text())
+        thread.indexed.connect(lambda file_path, summary, problems:
+                               self.show_pgs_summary(group, file_path, summary, problems))
+        thread.finished.connect(lambda: self.detection_threads.remove(thread))
+        self.detection_threads.append(thread)
+        thread.start()
+
+    def show_pgs_summary(self, group, file_path, summary, problems):
+        """PGS字幕のキュー数を表示し、時刻の問題はツールチップに表示"""
+        # 解析中に削除された字幕や、別のファイルに変更された字幕は無視
+        if group not in self.subtitle_groups or group['file'].text() != file_path:
+            return
+        if problems:
+            summary += f" / 問題 {len(problems)}件"
+        group['detected'].setText(summary)
+        group['detected'].setToolTip("\n".join(problems))
+
+    def apply_detected_languages(self, groups, results):
+        """判定した言語を表示し、信頼度が十分で未設定（und）の字幕は言語を選択"""
+        min_confidence = self.wizard().config.getfloat(
+            "Settings", "language_detect_confidence", fallback=DEFAULT_LANGUAGE_DETECT_CONFIDENCE)
+        names = dict(LANGUAGES)
+        for group, result in zip(groups, results):
+            # 判定中に削除された字幕や、別のファイルに変更された字幕は無視
+            if group not in self.subtitle_groups or group['file'].text() != result['file']:
+                continue
+            if 'error' in result or result['language'] == 'und':
+                group['detected'].setText("自動判定: 不明")
+                group['detected'].setToolTip(result.get('error', ""))
+                continue
+            language, confidence = result['language'], result['confidence']
+            group['detected'].setText(f"自動判定: {names.get(language, language)} ({confidence:.0%})")
+            combo = group['language']
+            if confidence >= min_confidence and combo.currentData() == 'und':
+                index = combo.findData(language)
+                if index >= 0:
+                    combo.setCurrentIndex(index)
 
     def update_audio_streams(self, file_path):
         """オーディオストリーム情報を更新"""
@@ -645,7 +1045,7 @@ class MediaTagManagementPage(QWizardPage):
                 os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ["PATH"]
 
             # メディア情報を取得
-            probe = ffmpeg.probe(file_path)
+            probe = self.probe_media(file_path)
             audio_streams = []
             for i, stream in enumerate(probe['streams']):
                 if stream['codec_type'] == 'audio':
@@ -703,6 +1103,147 @@ class MediaTagManagementPage(QWizardPage):
         # 字幕の処理を実行
         return self.process_subtitles()
 
+    def build_mux_job(self):
+        """画面の設定から多重化ジョブを作成（形式はcore.build_mux_argsを参照）"""
+        job = {
+            'input_file': self.file_edit.text(),
+            'output_file': self.output_edit.text(),
+            'backend': self.backend_combo.currentData(),
+            'video_language': self.video_lang_combo.currentData(),
+            'audio': [],
+            'subtitles': []
+        }
+
+        # オーディオ言語とデフォルト設定
+        for audio_setting in self.audio_settings:
+            job['audio'].append({
+                'language': audio_setting['language'].currentData(),
+                'default': audio_setting['default'].isChecked()
+            })
+
+        # 出力対象外にした既存のオーディオと字幕のトラックは除外する
+        drop_tracks = [setting['track_id'] for setting in self.audio_settings if not setting['output'].isChecked()]
+        drop_tracks.extend(group['track_id'] for group in self.subtitle_groups
+                           if group.get('is_existing', False) and not group['output'].isChecked())
+        if drop_tracks:
+            job['drop_tracks'] = drop_tracks
+
+        # 追加する字幕（出力対象外と既存の字幕は除く）
+        for group in self.subtitle_groups:
+            if not group['output'].isChecked():
+                continue
+            if group.get('is_existing', False) or not group['file'].text():
+                continue
+            job['subtitles'].append({
+                'file': group['file'].text(),
+                'language': group['language'].currentData(),
+                'default': group['default'].isChecked(),
+                'forced': group['forced'].isChecked()
+            })
+
+        # 読み込んだチャプター（入力ファイルのチャプターを置き換える）
+        if self.chapter_edit.text():
+            job['chapters'] = self.chapter_edit.text()
+
+        # サンプルを並べ直すチャンクの長さ（ミリ秒）
+        if self.interleave_check.isEnabled() and self.interleave_check.isChecked():
+            job['interleave'] = self.wizard().config.getint(
+                "Settings", "interleave_duration", fallback=DEFAULT_INTERLEAVE_DURATION)
+
+        # 字幕をWebVTTのセグメントとしても出力する設定
+        webvtt = load_package_options(self.wizard().config)
+        if webvtt is not None and job['subtitles']:
+            job['webvtt'] = webvtt
+
+        # 出力の検証に使う入力ファイルの情報
+        input_track_count = count_input_tracks(job['input_file'])
+        if input_track_count is None and self.probe_data is not None:
+            input_track_count = len([stream for stream in self.probe_data['streams']
+                                     if stream['codec_type'] in ('video', 'audio', 'subtitle')])
+        if input_track_count is not None:
+            job['input_track_count'] = input_track_count
+        if self.probe_data is not None and 'duration' in self.probe_data['format']:
+            job['input_duration'] = float(self.probe_data['format']['duration'])
+
+        return job
+
+    def check_subtitle_sync(self, job):
+        """追加する字幕と音声の発話区間のずれを推定し、ずれがあれば補正を提案
+
+        補正する場合は字幕にdelayを設定したジョブ、中止する場合はNoneを返す。
+        """
+        config = self.wizard().config
+        tools = get_tool_paths(config)
+        if 'ffmpeg' not in tools or not self.audio_settings or not job['subtitles']:
+            return job
+
+        # 字幕ごとに関連付けたオーディオ（なければ最初のオーディオ）と比較する
+        audio_indexes = {setting['stream_index']: setting['audio_index'] for setting in self.audio_settings}
+        files_by_audio = {}
+        for i, subtitle in enumerate(job['subtitles']):
+            group = next((group for group in self.subtitle_groups
+                          if not group.get('is_existing', False) and group['file'].text() == subtitle['file']), None)
+            stream_index = group['audio'].currentData() if group is not None else None
+            audio_index = audio_indexes.get(stream_index, 0)
+            files_by_audio.setdefault(audio_index, []).append((i, subtitle['file']))
+
+        # 音声のデコードはGUIスレッドを止めないようにスレッドで実行し、終わるまでイベントを処理しながら待つ
+        analyzed = {}
+        thread = SyncThread(tools, self.local_input(job['input_file']), files_by_audio)
+        thread.analyzed.connect(lambda results, error: analyzed.update(results=results, error=error))
+        progress_dialog = QMessageBox(self)
+        progress_dialog.setWindowTitle("処理中")
+        progress_dialog.setText("字幕のタイミングを確認中...")
+        progress_dialog.setStandardButtons(QMessageBox.NoButton)
+        progress_dialog.show()
+        loop = QEventLoop()
+        thread.finished.connect(loop.quit)
+        thread.start()
+        loop.exec_()
+        thread.wait()
+        QApplication.processEvents()  # キューに残っている解析結果の通知を受け取る
+        progress_dialog.close()
+
+        if analyzed.get('error') or 'results' not in analyzed:
+            # 解析できない場合は確認せずに出力する
+            print(f"\n字幕のタイミングを確認できませんでした: {analyzed.get('error', '')}")
+            return job
+        suggestions = []
+        for i, result in analyzed['results']:
+            problems = sync_problems(
+                result,
+                config.getfloat("Settings", "sync_offset_tolerance", fallback=DEFAULT_OFFSET_TOLERANCE),
+                config.getfloat("Settings", "sync_drift_tolerance", fallback=DEFAULT_DRIFT_TOLERANCE),
+                config.getfloat("Settings", "sync_min_score", fallback=DEFAULT_MIN_SCORE))
+            if problems:
+                suggestions.append((i, result, problems))
+
+        if not suggestions:
+            return job
+
+        message = "字幕のタイミングが音声とずれている可能性があります。\n"
+        for i, result, problems in suggestions:
+            message += f"\n{os.path.basename(job['subtitles'][i]['file'])} (相関: {result['score']:.2f})\n"
+            message += "".join(f"  {problem}\n" for problem in problems)
+        dialog = QMessageBox(self)
+        dialog.setWindowTitle("字幕のタイミング")
+        dialog.setIcon(QMessageBox.Warning)
+        dialog.setText(message)
+        fix_button = dialog.addButton("ずれを補正して出力", QMessageBox.AcceptRole)
+        keep_button = dialog.addButton("そのまま出力", QMessageBox.DestructiveRole)
+        dialog.addButton("キャンセル", QMessageBox.RejectRole)
+        dialog.exec_()
+
+        if dialog.clickedButton() == keep_button:
+            return job
+        if dialog.clickedButton() != fix_button:
+            return None
+        subtitles = list(job['subtitles'])
+        for i, result, _ in suggestions:
+            subtitles[i] = dict(subtitles[i], delay=result['offset'])
+        return dict(job, subtitles=subtitles)
+
+    @profiled()
     def process_subtitles(self):
         """字幕の処理を実行"""
         input_file = self.file_edit.text()
@@ -712,113 +1253,103 @@ class MediaTagManagementPage(QWizardPage):
         progress_dialog = None
 
         try:
-            # MP4Boxのパスを設定
-            if not config.has_option("Settings", "mp4box_path"):
-                QMessageBox.critical(self, "エラー", "MP4Boxの設定が見つかりません。")
+            # 多重化バックエンド（MP4Boxまたはmkvmerge）のパスを設定
+            job = self.build_mux_job()
+            backend = get_mux_backend(job)
+            try:
+                executable = backend.executable(get_tool_paths(config))
+            except ToolError as e:
+                QMessageBox.critical(self, "エラー", str(e))
                 return False
-
-            mp4box_path = config.get("Settings", "mp4box_path")
-            mp4box_dir = os.path.dirname(mp4box_path)
-            os.environ["PATH"] = mp4box_dir + os.pathsep + os.environ["PATH"]
+            os.environ["PATH"] = os.path.dirname(executable) + os.pathsep + os.environ["PATH"]
 
             # 一時ディレクトリの設定
             temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
             os.makedirs(temp_dir, exist_ok=True)
 
-            # MP4Boxコマンドの構築
-            args = [mp4box_path]
-
-            # 新しいMP4ファイルを作成
-            args.extend(['-add', input_file])
-
-            # 映像言語の設定
-            video_lang = self.video_lang_combo.currentData()
-            args.extend(['-lang', '1=' + video_lang])
-
-            # オーディオ言語とデフォルト設定
-            for i, audio_setting in enumerate(self.audio_settings):
-                lang_code = audio_setting['language'].currentData()
-                args.extend(['-lang', f'{i+2}={lang_code}'])
-                if audio_setting['default'].isChecked():
-                    args.extend(['-def', str(i+2)])
-
-            # 字幕の処理
-            subtitle_index = len(self.audio_settings) + 2  # ビデオ(1) + オーディオ数 + 1
-            for group in self.subtitle_groups:
-                # 出力対象外の字幕はスキップ
-                if not group['output'].isChecked():
-                    continue
-
-                if not group.get('is_existing', False):
-                    if group['file'].text():
-                        subtitle_file = group['file'].text()
-                        # 字幕ファイルを一時ディレクトリにコピー
-                        temp_subtitle = os.path.join(
-                            temp_dir,
-                            f"sub_{uuid.uuid4().hex[:16]}{os.path.splitext(subtitle_file)[1]}"
-                        )
-                        with open(subtitle_file, 'rb') as src, open(temp_subtitle, 'wb') as dst:
-                            dst.write(src.read())
-                        temp_files.append(temp_subtitle)
-
-                        # 字幕の追加（字幕ファイルの種類に応じて適切なオプションを追加）
-                        ext = os.path.splitext(subtitle_file)[1].lower()
-                        if ext == '.srt':
-                            args.extend(['-add', f'{temp_subtitle}:fmt=tx3g'])
-                        else:
-                            args.extend(['-add', temp_subtitle])
-
-                        # 言語設定
-                        args.extend(['-lang', f'{subtitle_index}={group["language"].currentData()}'])
-
-                        # デフォルトと強制フラグの設定
-                        if group['default'].isChecked():
-                            args.extend(['-def', str(subtitle_index)])
-                        if group['forced'].isChecked():
-                            args.extend(['-force', str(subtitle_index)])
-
-                        subtitle_index += 1
-
-            # 出力ファイルを指定
-            args.extend(['-new', '-out', output_file])
+            # 字幕ファイルを一時ディレクトリにコピーして多重化コマンドを構築
+            # （途中で中断されても出力先が壊れないよう、同じディレクトリの一時ファイルに書き込む）
+            if config.getboolean("Settings", "sync_check", fallback=True):
+                job = self.check_subtitle_sync(job)
+                if job is None:
+                    return False
+            # 書き込む前に空き容量と所要時間を見積もる
+            history = ThroughputHistory(temp_dir)
+            estimate = ""
+            if config.getboolean("Settings", "preflight_check", fallback=True):
+                plan = plan_jobs(get_tool_paths(config), [{'kind': 'mux', 'payload': job}], temp_dir, history,
+                                 probe_data=self.probe_data)
+                print("\n見積もり:")
+                print(format_plan(plan))
+                if not plan['ok']:
+                    QMessageBox.critical(self, "エラー", f"空き容量が不足しています:\n{format_plan(plan)}")
+                    return False
+                estimate = f"（見積もり: 約{plan['seconds']:.0f}秒）"
+            temp_output = partial_output_path(output_file)
+            temp_files = stage_subtitles(job, temp_dir)
+            args = backend.build_args(executable, dict(job, output_file=temp_output), temp_files)
+            temp_files.append(temp_output)
+            # ネットワーク上の入力ファイルはコピーが完了していればローカルから読み込む
+            # （GUIスレッドでコピーを待たない。キャッシュのキーは元のパスで計算）
+            run_input = self.local_input(input_file)
+            run_args = backend.build_args(executable, dict(job, input_file=run_input, output_file=temp_output),
+                                          temp_files[:-1])
 
             # コマンドを表示
-            print("\nMP4Boxコマンド:")
+            print(f"\n{backend.tool_name}コマンド:")
             print(" ".join(args))
 
+            # 同じ入力と設定で処理済みの場合はキャッシュを再利用
+            job_cache = None
+            job_key = None
+            if config.getboolean("Settings", "job_cache", fallback=True):
+                job_cache = JobCache(temp_dir, config.getint(
+                    "Settings", "job_cache_max_entries", fallback=DEFAULT_MAX_ENTRIES))
+                staged_files = {temp: subtitle['file'] for temp, subtitle in zip(temp_files, job['subtitles'])}
+                if job.get('chapters'):
+                    # 変換したチャプターファイルは内容で比較する
+                    chapter_file = temp_files[len(job['subtitles'])]
+                    staged_files[chapter_file] = chapter_file
+                job_key = compute_job_key(input_file, args, temp_output, staged_files)
+                if job_cache.reuse(job_key, output_file):
+                    print("\nジョブキャッシュを再利用しました")
+                    self.package_webvtt(job, temp_files)
+                    QMessageBox.information(self, "成功", "同じ設定で処理済みのため、既存の出力を再利用しました。")
+                    return True
+
             # 進捗表示用のダイアログを作成
             progress_dialog = QMessageBox(self)
             progress_dialog.setWindowTitle("処理中")
-            progress_dialog.setText("MP4Boxでファイルを処理中...")
+            progress_dialog.setText(f"{backend.tool_name}でファイルを処理中...{estimate}")
             progress_dialog.setStandardButtons(QMessageBox.NoButton)
             progress_dialog.show()
             QApplication.processEvents()
 
-            # MP4Boxコマンドを実行
-            process = subprocess.Popen(
-                args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='replace',
-                bufsize=1
-            )
+            # 多重化コマンドを実行し、進捗情報を表示
+            def show_progress(line):
+                progress_dialog.setText(f"{backend.tool_name}でファイルを処理中...{estimate}\n\n{line}")
+                QApplication.processEvents()
 
-            # 進捗情報を表示
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    progress_dialog.setText(f"MP4Boxでファイルを処理中...\n\n{output.strip()}")
-                    QApplication.processEvents()
+            tool, work_bytes, volume = job_work('mux', job)
+            with measure(history, tool, volume, work_bytes):
+                returncode, stdout, stderr = run_command(run_args, show_progress)
+            backend.check_result(returncode, stdout, stderr, temp_output)
+
+            # 構造（設定に応じてトラック・言語・フラグ・長さ）を確認してから出力先に置き換える
+            if config.getboolean("Settings", "verify_output", fallback=True):
+                check = mux_checker(job, config.getint(
+                    "Settings", "verify_spot_check_samples", fallback=DEFAULT_SPOT_CHECK_SAMPLES))
+            else:
+                check = backend.check_structure
+            commit_output(temp_output, output_file, check)
 
-            # エラー出力を確認
-            stderr_output = process.stderr.read()
-            if process.returncode != 0:
-                error_message = stderr_output if stderr_output else "不明なエラー"
-                raise Exception(error_message)
+            # ジョブキャッシュに記録（WebVTTの出力に失敗しても多重化の結果は再利用できる）
+            if job_cache is not None:
+                job_cache.store(job_key, output_file)
+
+            self.package_webvtt(job, temp_files)
+            if job.get('interleave'):
+                self.report_interleave(output_file)
 
             QMessageBox.information(self, "成功", "メディアファイルの処理が完了しました。")
             return True
@@ -829,18 +1360,42 @@ class MediaTagManagementPage(QWizardPage):
             return False
         finally:
             # 一時ファイルの削除
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except Exception as e:
-                    pass
+            remove_files(temp_files)
 
             # プログレスダイアログを閉じる
             if progress_dialog:
                 progress_dialog.close()
                 progress_dialog = None
 
+    def report_interleave(self, output_file):
+        """出力ファイルのインターリーブを解析して表示（ずれが大きい場合は警告）"""
+        try:
+            report = analyze_interleave(output_file)
+        except InterleaveError as e:
+            print(f"\nインターリーブを解析できません: {e}")
+            return
+        print("\nインターリーブ:")
+        print(format_interleave_report(report))
+        problems = interleave_problems(report, self.wizard().config.getfloat(
+            "Settings", "interleave_max_skew", fallback=DEFAULT_MAX_SKEW))
+        if problems:
+            QMessageBox.warning(self, "警告", "インターリーブの問題があります:\n" + "\n".join(problems))
+
+    def package_webvtt(self, job, staged_paths):
+        """設定に応じて、一時ディレクトリにコピーした字幕をWebVTTのセグメントとプレイリストとして出力
+
+        多重化の出力は完了しているため、失敗した場合は警告として表示する。
+        """
+        if job.get('webvtt') is None:
+            return
+        try:
+            playlist = package_subtitles(job, staged_paths[:len(job['subtitles'])], **job['webvtt'])
+        except (WebVttError, OSError) as e:
+            QMessageBox.warning(self, "警告", f"WebVTTのセグメントを出力できませんでした:\n{e}")
+            return
+        if playlist is not None:
+            print(f"\nWebVTTのセグメントを出力しました: {playlist}")
+
     def export_subtitle(self, stream):
         """字幕ストリームをエクスポート"""
         try:
@@ -851,20 +1406,7 @@ class MediaTagManagementPage(QWizardPage):
             codec_name = stream.get('codec_name', 'sub')
 
             # コーデックに応じたデフォルトの拡張子を設定
-            default_ext = {
-                'subrip': 'srt',
-                'ass': 'ass',
-                'ssa': 'ssa',
-                'mov_text': 'txt',
-                'text': 'txt',
-                'dvd_subtitle': 'sub',  # DVD字幕の拡張子を.subに変更
-                'hdmv_pgs_subtitle': 'sup',
-                'dvb_subtitle': 'dvb',
-                'dvb_teletext': 'ttx',
-                'webvtt': 'vtt',
-                'sami': 'smi',
-                'tx3g': 'tx3g'
-            }.get(codec_name, 'sub')
+            default_ext = SUBTITLE_EXPORT_EXTENSIONS.get(codec_name, 'sub')
 
             # 出力ファイルの選択
             file_path, _ = QFileDialog.getSaveFileName(
@@ -874,15 +1416,26 @@ class MediaTagManagementPage(QWizardPage):
             )
 
             if file_path:
-                # ファイル形式に応じて適切なツールを選択
-                file_ext = os.path.splitext(input_file)[1].lower()
+                config = self.wizard().config
+                tools = get_tool_paths(config)
+                temp_dir = config.get("Settings", "temp_dir", fallback=get_default_temp_dir())
+                payload = {'input_file': input_file, 'stream_index': stream_index, 'output_file': file_path}
+
+                # 書き込む前に出力先の空き容量を確認
+                history = ThroughputHistory(temp_dir)
+                if config.getboolean("Settings", "preflight_check", fallback=True):
+                    plan = plan_jobs(tools, [{'kind': 'extract', 'payload': payload}], temp_dir, history,
+                                     probe_data=self.probe_data)
+                    if not plan['ok']:
+                        QMessageBox.critical(self, "エラー", f"空き容量が不足しています:\n{format_plan(plan)}")
+                        return
 
-                if file_ext == '.mkv':
-                    # MKVファイルの場合はMKVToolNixを使用
-                    self._export_subtitle_mkv(input_file, stream_index, file_path)
-                else:
-                    # その他のファイル（MP4など）の場合はMP4Boxを使用
-                    self._export_subtitle_mp4box(input_file, stream_index, file_path)
+                # ファイル形式に応じて適切なツールを選択
+                # （MKVファイルはMKVToolNix、その他のファイルはMP4Boxを使用）
+                tool, work_bytes, volume = job_work('extract', payload)
+                run_input = self.local_input(input_file)
+                with measure(history, tool, volume, work_bytes):
+                    extract_subtitle(tools, run_input, stream_index, file_path)
 
                 QMessageBox.information(self, "成功", "字幕のエクスポートが完了しました。")
 
@@ -890,112 +1443,6 @@ class MediaTagManagementPage(QWizardPage):
             QMessageBox.critical(self, "エラー",
                                f"字幕のエクスポートに失敗しました:\n{str(e)}")
 
-    def _export_subtitle_mkv(self, input_file, stream_index, output_file):
-        """MKVToolNixを使用して字幕をエクスポート"""
-        config = self.wizard().config
-        if not config.has_option("Settings", "mkv_path"):
-            raise Exception("MKVToolNixの設定が見つかりません。")
-
-        mkv_dir = config.get("Settings", "mkv_path")
-        # MKVToolNixの実行ファイル名を付与
-        mkv_path = os.path.join(mkv_dir, "mkvextract.exe")
-
-        # 実行ファイルが存在するか確認
-        if not os.path.exists(mkv_path):
-            raise Exception(f"MKVToolNixの実行ファイルが見つかりません: {mkv_path}")
-
-        os.environ["PATH"] = mkv_dir + os.pathsep + os.environ["PATH"]
-
-        # MKVToolNixコマンドを構築
-        # MKVToolNixでは字幕ストリームのインデックスは0から始まる
-        # 正しい形式: mkvextract 入力ファイル トラックID:出力ファイル
-        args = [
-            mkv_path,
-            "tracks",  # トラック抽出モードを指定
-            input_file,
-            f"{stream_index}:{output_file}"
-        ]
-
-        # コマンドを表示
-        print("\nMKVToolNixコマンド:")
-        print(" ".join(args))
-
-        # MKVToolNixコマンドを実行
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-
-        # プロセスの終了を待つ
-        stdout, stderr = process.communicate()
-
-        # 出力を表示
-        print("\nMKVToolNix標準出力:")
-        print(stdout)
-        print("\nMKVToolNixエラー出力:")
-        print(stderr)
-
-        if process.returncode != 0:
-            raise Exception(f"MKVToolNixエラー: {stderr}")
-
-        # 出力ファイルの存在確認
-        if not os.path.exists(output_file):
-            raise Exception(f"出力ファイルが作成されませんでした。\n終了コード: {process.returncode}\n標準出力:\n{stdout}\nエラー出力:\n{stderr}")
-
-    def _export_subtitle_mp4box(self, input_file, stream_index, output_file):
-        """MP4Boxを使用して字幕をエクスポート"""
-        config = self.wizard().config
-        if not config.has_option("Settings", "mp4box_path"):
-            raise Exception("MP4Boxの設定が見つかりません。")
-
-        mp4box_path = config.get("Settings", "mp4box_path")
-        mp4box_dir = os.path.dirname(mp4box_path)
-        os.environ["PATH"] = mp4box_dir + os.pathsep + os.environ["PATH"]
-
-        # MP4Boxコマンドを構築
-        # MP4Boxでは字幕ストリームのインデックスは1から始まる
-        subtitle_index = stream_index + 1
-        args = [
-            mp4box_path,
-            '-raw', str(subtitle_index),
-            input_file,
-            '-out', output_file
-        ]
-
-        # コマンドを表示
-        print("\nMP4Boxコマンド:")
-        print(" ".join(args))
-
-        # MP4Boxコマンドを実行
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-
-        # プロセスの終了を待つ
-        stdout, stderr = process.communicate()
-
-        # 出力を表示
-        print("\nMP4Box標準出力:")
-        print(stdout)
-        print("\nMP4Boxエラー出力:")
-        print(stderr)
-
-        if process.returncode != 0:
-            raise Exception(f"MP4Boxエラー: {stderr}")
-
-        # 出力ファイルの存在確認
-        if not os.path.exists(output_file):
-            raise Exception(f"出力ファイルが作成されませんでした。\n終了コード: {process.returncode}\n標準出力:\n{stdout}\nエラー出力:\n{stderr}")
-
     def nextId(self):
         """次のページのIDを返す"""
         return -1  # 最後のページなので-1を返す
@@ -0,0 +1,126 @@
+import os
+import re
+import codecs
+from .pgs import index_pgs, pgs_cues, PgsError
+
+# BOMがない場合に試す文字コード（先に成功したものを使う）
+FALLBACK_ENCODINGS = ['utf-8', 'cp932', 'euc-kr', 'gb18030', 'cp1251', 'cp1252']
+
+TIMESTAMP = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})')
+CUE_TIMING = re.compile(TIMESTAMP.pattern + r'\s*-->\s*' + TIMESTAMP.pattern)
+HTML_TAG = re.compile(r'<[^>]*>')
+ASS_OVERRIDE = re.compile(r'\{[^}]*\}')
+SAMI_SYNC = re.compile(r'<sync\s+start\s*=\s*"?(\d+)"?[^>]*>', re.IGNORECASE)
+
+class SubtitleParseError(Exception):
+    """字幕ファイルを読み取れないときの例外"""
+
+def decode_subtitle(data):
+    """字幕ファイルのバイト列を文字列に変換（BOM・UTF-8・各国の従来の文字コードの順に試す）"""
+    for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'),
+                          (codecs.BOM_UTF16_BE, 'utf-16')):
+        if data.startswith(bom):
+            return data.decode(encoding)
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('latin-1')
+
+def _seconds(groups):
+    """タイムスタンプの正規表現のグループを秒数に変換"""
+    hours, minutes, seconds, fraction = groups
+    return (int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+            + int(fraction.ljust(3, '0')) / 1000)
+
+def _ass_seconds(text):
+    """ASS形式の時刻（H:MM:SS.cc）を秒数に変換"""
+    hours, minutes, seconds = text.strip().split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def clean_text(text):
+    """タグや書式指定を取り除いた表示テキストを取得"""
+    text = ASS_OVERRIDE.sub('', text)
+    text = text.replace('\\N', '\n').replace('\\n', '\n').replace('\\h', ' ')
+    text = HTML_TAG.sub('', text).replace('&nbsp;', ' ')
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip())
+
+def parse_timed_text(text):
+    """SRT/WebVTT形式のキューを取得"""
+    cues = []
+    for block in re.split(r'\r?\n\s*\r?\n', text):
+        lines = block.strip().splitlines()
+        for i, line in enumerate(lines):
+            match = CUE_TIMING.search(line)
+            if match:
+                cues.append({
+                    'start': _seconds(match.groups()[:4]),
+                    'end': _seconds(match.groups()[4:]),
+                    'text': clean_text('\n'.join(lines[i + 1:]))
+                })
+                break
+    return cues
+
+def parse_ass(text):
+    """ASS/SSA形式のDialogue行からキューを取得"""
+    cues = []
+    fields = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.lower().startswith('format:') and fields is None:
+            fields = [field.strip().lower() for field in line[7:].split(',')]
+        elif line.lower().startswith('dialogue:'):
+            columns = fields or ['layer', 'start', 'end', 'style', 'name',
+                                 'marginl', 'marginr', 'marginv', 'effect', 'text']
+            values = line[9:].split(',', len(columns) - 1)
+            if len(values) < len(columns):
+                continue
+            cue = dict(zip(columns, values))
+            try:
+                cues.append({'start': _ass_seconds(cue['start']), 'end': _ass_seconds(cue['end']),
+                             'text': clean_text(cue['text'])})
+            except (KeyError, ValueError):
+                continue
+    return cues
+
+def parse_sami(text):
+    """SAMI形式のSYNCタグからキューを取得（終了時刻は次のSYNCの開始時刻）"""
+    cues = []
+    matches = list(SAMI_SYNC.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = re.sub(r'<br\s*/?>', '\n', text[match.end():end], flags=re.IGNORECASE)
+        cue_text = clean_text(body)
+        if cue_text:
+            next_start = int(matches[i + 1].group(1)) / 1000 if i + 1 < len(matches) else None
+            start = int(match.group(1)) / 1000
+            cues.append({'start': start, 'end': next_start if next_start is not None else start, 'text': cue_text})
+    return cues
+
+def parse_cues(text, ext):
+    """拡張子に応じて字幕のキュー（start, end, text）の一覧を取得"""
+    ext = ext.lower()
+    if ext in ('.ass', '.ssa'):
+        return parse_ass(text)
+    if ext == '.smi':
+        return parse_sami(text)
+    cues = parse_timed_text(text)
+    if not cues and ext == '.txt':
+        # タイミングのないテキストは1行を1キューとして扱う
+        cues = [{'start': None, 'end': None, 'text': line.strip()} for line in text.splitlines() if line.strip()]
+    return cues
+
+def read_cues(file_path):
+    """字幕ファイルを読み込み、キューの一覧を取得（PGSは時刻のみ、その他の画像字幕など読み取れない形式はSubtitleParseError）"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.sup':
+        # PGSの画像字幕は表示時刻だけを取得（テキストは空）
+        try:
+            return pgs_cues(index_pgs(file_path))
+        except PgsError as e:
+            raise SubtitleParseError(str(e))
+    if ext in ('.dvb', '.ttx', '.tx3g', '.sub'):
+        raise SubtitleParseError(f"テキスト字幕ではありません: {file_path}")
+    with open(file_path, 'rb') as f:
+        return parse_cues(decode_subtitle(f.read()), ext)
@@ -0,0 +1,152 @@
+import numpy as np
+from .core import ToolError, stream_output
+from .subtitle_parser import read_cues, SubtitleParseError
+
+# 音声の包絡線を求めるサンプリングレートと10ms単位のサンプル数
+ENVELOPE_RATE = 8000
+FRAMES_PER_SECOND = 100
+FRAME_SAMPLES = ENVELOPE_RATE // FRAMES_PER_SECOND
+# 1回に読み込むバッファの長さ（秒）
+BUFFER_SECONDS = 60
+
+# 発話判定: 背景雑音（エネルギーの下位パーセンタイル）からの差と、発話とみなす最小レベル
+NOISE_PERCENTILE = 20
+SPEECH_MARGIN = 8.0
+SPEECH_FLOOR = -55.0
+# 発話とみなして埋める切れ目の長さ（10ms単位、奇数）
+SPEECH_GAP = 21
+
+# ずれを探す範囲（秒）と、ドリフトを求めるための区間の長さ（秒）
+DEFAULT_MAX_OFFSET = 30.0
+DEFAULT_WINDOW = 600.0
+# 区間ごとのずれの推定に必要な字幕の数と相関の下限
+MIN_WINDOW_CUES = 10
+MIN_WINDOW_SCORE = 0.1
+
+# 補正を提案するずれ（秒）・ドリフト（1時間あたりの秒数）・相関の下限の既定値
+DEFAULT_OFFSET_TOLERANCE = 0.2
+DEFAULT_DRIFT_TOLERANCE = 0.5
+DEFAULT_MIN_SCORE = 0.15
+
+def build_envelope_args(ffmpeg_path, input_file, audio_index):
+    """オーディオストリームを音声帯域のモノラル・低サンプリングレートで出力するffmpegのコマンドを構築"""
+    return [
+        ffmpeg_path, '-v', 'error', '-nostdin', '-i', input_file,
+        '-map', f"0:a:{audio_index}", '-ac', '1', '-ar', str(ENVELOPE_RATE),
+        '-af', 'highpass=f=200,lowpass=f=3400',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-'
+    ]
+
+def read_energy(tools, input_file, audio_index):
+    """オーディオストリームを1回デコードし、10msごとのエネルギー（dB）を取得"""
+    if 'ffmpeg' not in tools:
+        raise ToolError("FFmpegの設定が見つかりません。")
+    buffer = np.empty(ENVELOPE_RATE * BUFFER_SECONDS, dtype=np.float32)
+    view = memoryview(buffer).cast('B')
+    chunks = []
+    args = build_envelope_args(tools['ffmpeg'], input_file, audio_index)
+    for size in stream_output("FFmpeg", args, view):
+        frames = size // buffer.itemsize // FRAME_SAMPLES
+        if frames:
+            chunks.append(np.square(buffer[:frames * FRAME_SAMPLES]).reshape(frames, FRAME_SAMPLES).mean(axis=1))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    with np.errstate(divide='ignore'):
+        return (10 * np.log10(np.concatenate(chunks) + 1e-12)).astype(np.float32)
+
+def voice_activity(energy):
+    """エネルギーのしきい値で10msごとの発話の有無を判定"""
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    threshold = max(np.percentile(energy, NOISE_PERCENTILE) + SPEECH_MARGIN, SPEECH_FLOOR)
+    active = energy > threshold
+    # 単語の間などの短い切れ目を埋める（膨張と収縮で、発話区間の端の位置は変えない）
+    kernel = np.ones(SPEECH_GAP)
+    dilated = np.convolve(active, kernel, mode='same') > 0
+    return np.convolve(dilated, kernel, mode='same') >= SPEECH_GAP
+
+def cue_activity(cues, length):
+    """字幕の表示区間を10msごとの有無の配列に変換"""
+    timed = [cue for cue in cues if cue['start'] is not None and cue['end'] is not None]
+    delta = np.zeros(length + 1, dtype=np.int32)
+    if timed:
+        starts = np.clip((np.array([cue['start'] for cue in timed]) * FRAMES_PER_SECOND).astype(int), 0, length)
+        ends = np.clip((np.array([cue['end'] for cue in timed]) * FRAMES_PER_SECOND).astype(int), 0, length)
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, ends, -1)
+    return np.cumsum(delta[:length]) > 0
+
+def best_offset(speech, subtitles, max_lag):
+    """発話と字幕の相互相関（FFT）が最大になるずれを求め、(ずれのフレーム数, 正規化した相関)を返す
+
+    ずれが正の場合、字幕を遅らせると発話に合う。
+    """
+    a = speech.astype(np.float32) - speech.mean()
+    b = subtitles.astype(np.float32) - subtitles.mean()
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    if norm == 0:
+        return 0, 0.0
+    n = 1 << int(len(a) + len(b) - 1).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(a, n) * np.conj(np.fft.rfft(b, n)), n)
+    max_lag = min(max_lag, len(a) - 1)
+    candidates = np.concatenate([correlation[n - max_lag:], correlation[:max_lag + 1]])
+    index = int(np.argmax(candidates))
+    return index - max_lag, float(candidates[index]) / norm
+
+def estimate_sync(speech, cues, max_offset=DEFAULT_MAX_OFFSET, window=DEFAULT_WINDOW):
+    """発話の有無と字幕の表示区間から、全体のずれと時間とともに変化するずれ（ドリフト）を推定"""
+    length = len(speech)
+    subtitles = cue_activity(cues, length)
+    max_lag = int(max_offset * FRAMES_PER_SECOND)
+    lag, score = best_offset(speech, subtitles, max_lag)
+    result = {'offset': lag / FRAMES_PER_SECOND, 'score': score, 'drift': None, 'windows': []}
+
+    # 区間ごとのずれを求め、直線で近似してドリフトを推定
+    window_frames = int(window * FRAMES_PER_SECOND)
+    starts = np.array([cue['start'] for cue in cues if cue['start'] is not None])
+    for begin in range(0, length, window_frames):
+        end = min(length, begin + window_frames)
+        count = np.count_nonzero((starts * FRAMES_PER_SECOND >= begin) & (starts * FRAMES_PER_SECOND < end))
+        if count < MIN_WINDOW_CUES:
+            continue
+        lag, score = best_offset(speech[begin:end], subtitles[begin:end], max_lag)
+        if score >= MIN_WINDOW_SCORE:
+            result['windows'].append(((begin + end) / 2 / FRAMES_PER_SECOND, lag / FRAMES_PER_SECOND, score))
+    if len(result['windows']) >= 2:
+        times, offsets, _ = zip(*result['windows'])
+        slope, _ = np.polyfit(times, offsets, 1)
+        result['drift'] = float(slope * 3600)
+    return result
+
+def analyze_sync(tools, input_file, audio_index, subtitle_files, max_offset=DEFAULT_MAX_OFFSET,
+                 window=DEFAULT_WINDOW):
+    """オーディオストリームを1回だけデコードし、各字幕ファイルのずれとドリフトを推定
+
+    subtitle_filesと同じ順序で結果（読み取れない字幕は{'error': メッセージ}）のリストを返す。
+    """
+    speech = voice_activity(read_energy(tools, input_file, audio_index))
+    results = []
+    for subtitle_file in subtitle_files:
+        try:
+            cues = read_cues(subtitle_file)
+        except (OSError, SubtitleParseError) as e:
+            results.append({'file': subtitle_file, 'error': str(e)})
+            continue
+        result = estimate_sync(speech, cues, max_offset, window)
+        result['file'] = subtitle_file
+        results.append(result)
+    return results
+
+def sync_problems(result, offset_tolerance=DEFAULT_OFFSET_TOLERANCE, drift_tolerance=DEFAULT_DRIFT_TOLERANCE,
+                  min_score=DEFAULT_MIN_SCORE):
+    """推定結果から補正を提案すべきずれの一覧を返す（相関が低く信頼できない場合は空）"""
+    if 'error' in result or result['score'] < min_score:
+        return []
+    problems = []
+    if abs(result['offset']) >= offset_tolerance:
+        direction = "遅らせる" if result['offset'] > 0 else "早める"
+        problems.append(f"字幕を{abs(result['offset']):.2f}秒{direction}と音声に合います")
+    if result['drift'] is not None and abs(result['drift']) >= drift_tolerance:
+        problems.append(f"ずれが1時間あたり{result['drift']:+.2f}秒変化しています"
+                        "（フレームレートの違いの可能性があります）")
+    return problems
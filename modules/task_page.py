@@ -14,6 +14,7 @@ class TaskSelectionPage(QWizardPage):
         self.tasks = [
             ("info", "詳細情報表示"),
             ("subtitle", "字幕・タグ管理"),
+            ("catalog", "ライブラリ一覧"),
             ("settings", "メディアツール設定")
         ]
 
@@ -93,6 +94,8 @@ class TaskSelectionPage(QWizardPage):
                    wizard.config.has_option("Settings", "ffmpeg_path")):
                 return wizard.media_tool_settings_page_id
             return wizard.subtitle_management_page_id
+        elif current_task == "catalog":
+            return wizard.catalog_page_id
         elif current_task == "settings":
             return wizard.media_tool_settings_page_id
 
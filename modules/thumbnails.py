@@ -0,0 +1,198 @@
+import os
+import json
+import math
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from .job_cache import file_identity
+from .isobmff import parse_movie, BoxError
+from .ebml import read_matroska, EbmlError
+from .core import ToolError, run_command, check_result, probe
+from .trim import KeyframeIndexCache
+
+# サムネイルの枚数・幅・コンタクトシートの列数の既定値
+DEFAULT_THUMBNAIL_COUNT = 12
+DEFAULT_THUMBNAIL_WIDTH = 320
+DEFAULT_SHEET_COLUMNS = 4
+# 同時に実行するffmpegの数の既定値
+DEFAULT_THUMBNAIL_WORKERS = min(8, os.cpu_count() or 1)
+
+def media_duration(tools, file_path):
+    """メディアファイルの長さ（秒）を取得（MP4/MKVはヘッダーのみ読み取る）"""
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext in ('.mp4', '.m4v', '.mov'):
+            movie = parse_movie(file_path)
+            if movie['timescale']:
+                return movie['duration'] / movie['timescale']
+        elif ext == '.mkv':
+            duration = read_matroska(file_path)['duration']
+            if duration:
+                return duration
+    except (BoxError, EbmlError):
+        pass
+    return float(probe(tools, file_path)['format']['duration'])
+
+def last_keyframe(temp_dir, file_path):
+    """MP4の最後のキーフレームの時刻（秒）を取得（MP4以外や読めない場合はNone）"""
+    if os.path.splitext(file_path)[1].lower() not in ('.mp4', '.m4v', '.mov'):
+        return None
+    try:
+        keyframes = KeyframeIndexCache(temp_dir).get(file_path)['keyframes']
+    except (OSError, BoxError):
+        return None
+    return keyframes[-1] if keyframes else None
+
+def thumbnail_times(duration, count, last_keyframe=None):
+    """長さ全体から等間隔にサムネイルの時刻を決める（各区間の中央）
+
+    最後のキーフレームより後ろではキーフレームだけのデコードで画像が出力されないため、
+    last_keyframeを指定した場合はその時刻までに収める。
+    """
+    times = [duration * (i + 0.5) / count for i in range(count)]
+    if last_keyframe is not None:
+        times = [min(seconds, last_keyframe) for seconds in times]
+    return times
+
+def build_thumbnail_args(ffmpeg_path, input_file, seconds, output_file, width=DEFAULT_THUMBNAIL_WIDTH,
+                         keyframes_only=True):
+    """指定時刻の直前のキーフレームを1枚だけデコードして画像にするffmpegのコマンドを構築
+
+    keyframes_onlyがFalseの場合はキーフレームから指定時刻までデコードする（遅いが必ず画像になる）。
+    """
+    args = [ffmpeg_path, '-v', 'error', '-y']
+    if keyframes_only:
+        # キーフレーム以外をデコードせず、入力側でシークする
+        args.extend(['-skip_frame', 'nokey', '-noaccurate_seek'])
+    return args + [
+        '-ss', f"{seconds:.3f}", '-i', input_file,
+        '-map', '0:v:0', '-frames:v', '1', '-vf', f"scale={width}:-2",
+        output_file
+    ]
+
+def build_contact_sheet_args(ffmpeg_path, list_file, count, output_file, columns=DEFAULT_SHEET_COLUMNS):
+    """サムネイル画像の一覧（concat形式）をタイル状に並べたコンタクトシートを作成するffmpegのコマンドを構築"""
+    rows = math.ceil(count / columns)
+    return [
+        ffmpeg_path, '-v', 'error', '-y',
+        '-f', 'concat', '-safe', '0', '-i', list_file,
+        '-vf', f"tile={columns}x{rows}:padding=4:margin=4",
+        '-frames:v', '1', output_file
+    ]
+
+def _render(build_args, output_file):
+    """一時ファイルに画像を出力するffmpegを実行し、成功したら出力ファイルに置き換える"""
+    temp_output = f"{os.path.splitext(output_file)[0]}.{uuid.uuid4().hex[:8]}.partial.jpg"
+    try:
+        returncode, stdout, stderr = run_command(build_args(temp_output))
+        check_result("FFmpeg", returncode, stdout, stderr, temp_output)
+        os.replace(temp_output, output_file)
+    finally:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
+
+class ThumbnailCache:
+    """ファイルごとのサムネイルとコンタクトシートのキャッシュ（temp_dir配下に保存）"""
+
+    def __init__(self, temp_dir):
+        self.cache_dir = os.path.join(temp_dir, 'thumbnails')
+
+    def directory(self, file_path, count, width):
+        """ファイルの同一性と枚数・幅からキャッシュのディレクトリを決める"""
+        identity = json.dumps(file_identity(file_path), sort_keys=True)
+        key = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]
+        directory = os.path.join(self.cache_dir, key, f"{count}x{width}")
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+def generate_thumbnails(tools, input_file, temp_dir, count=DEFAULT_THUMBNAIL_COUNT,
+                        width=DEFAULT_THUMBNAIL_WIDTH, max_workers=DEFAULT_THUMBNAIL_WORKERS,
+                        on_thumbnail=None, on_error=None):
+    """等間隔のキーフレームからサムネイルを並列に作成し、画像パスの一覧を返す
+
+    on_thumbnail(番号, 時刻, パス)は各サムネイルができた（またはキャッシュにあった）時点で呼ばれる。
+    作成できなかったサムネイルはパスをNoneにしてon_error(番号, 時刻, メッセージ)を呼び、
+    すべて失敗した場合だけToolErrorを送出する。
+    """
+    if 'ffmpeg' not in tools:
+        raise ToolError("FFmpegの設定が見つかりません。")
+    directory = ThumbnailCache(temp_dir).directory(input_file, count, width)
+    times = thumbnail_times(media_duration(tools, input_file), count, last_keyframe(temp_dir, input_file))
+    paths = [os.path.join(directory, f"thumb_{i:02d}.jpg") for i in range(count)]
+    errors = []
+
+    def extract(i):
+        if not os.path.exists(paths[i]):
+            try:
+                try:
+                    _render(lambda output: build_thumbnail_args(
+                        tools['ffmpeg'], input_file, times[i], output, width), paths[i])
+                except ToolError:
+                    # キーフレームが見つからない場合は指定時刻までデコードし直す
+                    _render(lambda output: build_thumbnail_args(
+                        tools['ffmpeg'], input_file, times[i], output, width, keyframes_only=False), paths[i])
+            except Exception as e:
+                errors.append(str(e))
+                if on_error:
+                    on_error(i, times[i], str(e))
+                return None
+        if on_thumbnail:
+            on_thumbnail(i, times[i], paths[i])
+        return paths[i]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(extract, range(count)))
+    if len(errors) == count:
+        raise ToolError(f"サムネイルを作成できませんでした:\n{errors[0]}")
+    return results
+
+def generate_contact_sheet(tools, input_file, temp_dir, count=DEFAULT_THUMBNAIL_COUNT,
+                           width=DEFAULT_THUMBNAIL_WIDTH, columns=DEFAULT_SHEET_COLUMNS,
+                           max_workers=DEFAULT_THUMBNAIL_WORKERS, on_thumbnail=None):
+    """サムネイルを作成してコンタクトシートにまとめ、シートのパスを返す"""
+    paths = generate_thumbnails(tools, input_file, temp_dir, count, width, max_workers, on_thumbnail)
+    # 作成できなかったサムネイルは詰めて並べる
+    paths = [path for path in paths if path is not None]
+    directory = os.path.dirname(paths[0])
+    sheet = os.path.join(directory, f"sheet_{columns}.jpg")
+    if not os.path.exists(sheet):
+        list_file = os.path.join(directory, f"sheet_{uuid.uuid4().hex[:8]}.txt")
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for path in paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        try:
+            _render(lambda output: build_contact_sheet_args(tools['ffmpeg'], list_file, count, output, columns),
+                    sheet)
+        finally:
+            os.remove(list_file)
+    return sheet
+
+def generate_library_sheets(tools, input_files, temp_dir, output_dir=None, count=DEFAULT_THUMBNAIL_COUNT,
+                            width=DEFAULT_THUMBNAIL_WIDTH, columns=DEFAULT_SHEET_COLUMNS,
+                            max_workers=DEFAULT_THUMBNAIL_WORKERS, log=print):
+    """複数のファイルのコンタクトシートを並列に作成
+
+    ファイル単位で並列化し、各ファイルのサムネイルは順に作成する。
+    output_dirを指定した場合は「ファイル名.jpg」としてコピーする。失敗した件数を返す。
+    """
+    def make(input_file):
+        sheet = generate_contact_sheet(tools, input_file, temp_dir, count, width, columns, max_workers=1)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            destination = os.path.join(output_dir, os.path.splitext(os.path.basename(input_file))[0] + ".jpg")
+            with open(sheet, 'rb') as src, open(destination, 'wb') as dst:
+                dst.write(src.read())
+            sheet = destination
+        return sheet
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(input_file, executor.submit(make, input_file)) for input_file in input_files]
+        for input_file, future in futures:
+            try:
+                log(f"{input_file}: {future.result()}")
+            except Exception as e:
+                failed += 1
+                log(f"{input_file}: 失敗しました\n{e}")
+    return failed
@@ -0,0 +1,345 @@
+import os
+import csv
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from .isobmff import (BoxError, parse_movie, find_child, encode_language, check_structure)
+from .ebml import read_matroska, EbmlError
+from .core import (ToolError, find_executable, run_command, check_result, partial_output_path,
+                   commit_output, remove_files, fsync_path)
+from .catalog import HANDLER_KINDS
+from .verify import normalize_language
+
+# マニフェストの列（file以外はトラックごとの値。kindとcodecは確認用で、適用時には使わない）
+MANIFEST_FIELDS = ['file', 'track', 'kind', 'codec', 'language', 'default', 'forced', 'title']
+# 適用する列
+EDITABLE_FIELDS = ('language', 'default', 'forced', 'title')
+# 同時に処理するファイル数の既定値
+DEFAULT_MANIFEST_WORKERS = 8
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'on', 'はい')
+FALSE_VALUES = ('0', 'false', 'no', 'n', 'off', 'いいえ')
+# tx3gの強制表示フラグ（表示フラグの上位2ビット）
+TX3G_FORCED_FLAGS = 0xC0000000
+
+class TrackManifestError(Exception):
+    """トラックのマニフェストを読み込めない・適用できないときの例外"""
+
+def _tx3g_flags(data, track):
+    """tx3gの表示フラグの位置と値を取得（tx3gでなければNone）"""
+    for entry_type, start, _ in track['sample_entries']:
+        if entry_type == 'tx3g':
+            return start + 8, struct.unpack_from('>I', data, start + 8)[0]
+    return None
+
+def _mp4_state(file_path):
+    """MP4ファイルの各トラックの状態を取得（デフォルトはtkhdの有効フラグ、強制はtx3gの表示フラグ）"""
+    movie = parse_movie(file_path)
+    tracks = []
+    for track in movie['tracks']:
+        flags = _tx3g_flags(movie['moov'], track)
+        tracks.append({
+            'track': track['track_id'],
+            'kind': HANDLER_KINDS.get(track.get('handler'), track.get('handler')),
+            'codec': track['codec'],
+            'language': track.get('extended_language') or track.get('language', 'und'),
+            'default': track['enabled'],
+            'forced': bool(flags[1] & TX3G_FORCED_FLAGS) if flags else False,
+            'title': track.get('name', ''),
+        })
+    return tracks
+
+def _mkv_state(file_path):
+    """MKVファイルの各トラックの状態を取得（トラックIDはmkvextractと同じ）"""
+    tracks = []
+    for track in read_matroska(file_path)['tracks']:
+        tracks.append({
+            'track': track['id'],
+            'kind': track['type'],
+            'codec': track['codec_id'],
+            'language': track['language_ietf'] or track['language'],
+            'default': track['default'],
+            'forced': track['forced'],
+            'title': track['name'] or '',
+        })
+    return tracks
+
+def read_track_state(file_path):
+    """ファイルの各トラックの言語・デフォルト・強制・タイトルをヘッダーだけから取得"""
+    try:
+        if os.path.splitext(file_path)[1].lower() == '.mkv':
+            return _mkv_state(file_path)
+        return _mp4_state(file_path)
+    except (BoxError, EbmlError, struct.error) as e:
+        raise TrackManifestError(f"トラックの情報を読み取れません: {e}")
+
+def export_track_manifest(files, manifest_path, max_workers=DEFAULT_MANIFEST_WORKERS, log=print):
+    """複数のファイルのトラックの状態を1つのマニフェスト（CSV/JSON）に書き出し、失敗した件数を返す
+
+    CSVは1行1トラック、JSONは{'files': [{'file', 'tracks': [...]}]}の形式。
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_track_state, file_path) for file_path in files]
+    entries = []
+    failed = 0
+    for file_path, future in zip(files, futures):
+        try:
+            entries.append((os.path.abspath(file_path), future.result()))
+        except Exception as e:
+            failed += 1
+            log(f"{file_path}: 失敗しました\n{e}")
+
+    if os.path.splitext(manifest_path)[1].lower() == '.csv':
+        with open(manifest_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+            writer.writeheader()
+            for file_path, tracks in entries:
+                for track in tracks:
+                    writer.writerow(dict(track, file=file_path, default=int(track['default']),
+                                         forced=int(track['forced'])))
+    else:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': [{'file': file_path, 'tracks': tracks} for file_path, tracks in entries]},
+                      f, ensure_ascii=False, indent=1)
+    log(f"{len(entries)}件のファイルを書き出しました: {manifest_path}")
+    return failed
+
+def _parse_flag(value):
+    """マニフェストのフラグの値を変換（CSVの空欄は変更しない）"""
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise TrackManifestError(f"フラグには1または0を指定してください: {value}")
+
+def _desired(row):
+    """マニフェストの1トラック分の値から、変更する項目だけの辞書を作成"""
+    desired = {}
+    for field in EDITABLE_FIELDS:
+        value = row.get(field)
+        if field in ('default', 'forced'):
+            value = _parse_flag(value)
+        elif isinstance(value, str) and field == 'language':
+            value = value.strip() or None
+        if value is not None:
+            desired[field] = value
+    return desired
+
+def load_track_manifest(manifest_path):
+    """CSV/JSONのマニフェストを読み込み、{ファイル: {トラックID: 変更する項目}}を返す
+
+    CSVの空欄のセルとJSONにない項目は変更しない。相対パスはマニフェストのディレクトリから解決する。
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    rows = []
+    if os.path.splitext(manifest_path)[1].lower() == '.csv':
+        with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('title') == '':
+                    # CSVでは空欄と空のタイトルを区別できないため、空欄は変更しない
+                    del row['title']
+                rows.append(row)
+    else:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('files', [data])
+        for entry in data:
+            rows.extend(dict(track, file=entry['file']) for track in entry.get('tracks', []))
+
+    manifest = {}
+    for row in rows:
+        if not row.get('file') or str(row.get('track', '')).strip() == '':
+            raise TrackManifestError(f"fileとtrackの値がない行があります: {row}")
+        try:
+            track_id = int(row['track'])
+        except ValueError:
+            raise TrackManifestError(f"trackには数値を指定してください: {row['track']}")
+        file_path = os.path.join(base_dir, row['file'])
+        manifest.setdefault(file_path, {})[track_id] = _desired(row)
+    return manifest
+
+def diff_track_state(current, desired):
+    """現在の状態とマニフェストを比べ、{トラックID: {項目: 新しい値}}の差分を返す（言語は表記の違いを無視）"""
+    tracks = {track['track']: track for track in current}
+    changes = {}
+    for track_id, fields in desired.items():
+        track = tracks.get(track_id)
+        if track is None:
+            raise TrackManifestError(f"トラック{track_id}が見つかりません")
+        changed = {}
+        for field, value in fields.items():
+            if field == 'language':
+                if normalize_language(value) != normalize_language(track['language']) \
+                        and value.lower() != track['language'].lower():
+                    changed[field] = value
+            elif value != track[field]:
+                changed[field] = value
+        if changed:
+            changes[track_id] = changed
+    return changes
+
+def plan_mp4_changes(file_path, changes):
+    """MP4ファイルの変更を、その場で書き換える(ファイル内の位置, バイト列)と、MP4Boxに渡す引数に分ける
+
+    言語（3文字のコード）・デフォルト（tkhdの有効フラグ）・強制（tx3gの表示フラグ）と、
+    元の領域に収まるタイトル（hdlrの名前）は大きさが変わらないためその場で書き換える。
+    拡張言語（elng）が必要な言語や長いタイトルはMP4Boxでmoovを書き直す。
+    (書き換え, MP4Boxの引数, その場で書き換える差分{トラックID: {項目: 値}})を返す。
+    """
+    movie = parse_movie(file_path)
+    data = movie['moov']
+    base = movie['moov_offset']
+    tracks = {track['track_id']: track for track in movie['tracks']}
+    patches = []
+    remux_args = []
+    patched = {}
+    for track_id, changed in sorted(changes.items()):
+        track = tracks[track_id]
+        in_place = patched.setdefault(track_id, {})
+        start, end = track['box']
+        mdia = find_child(data, start, end, 'mdia')
+        if 'language' in changed:
+            language = changed['language']
+            elng = find_child(data, mdia[0], mdia[1], 'elng')
+            if len(language) == 3 and language.isascii() and language.isalpha() and elng is None:
+                mdhd = find_child(data, mdia[0], mdia[1], 'mdhd')
+                position = mdhd[0] + (32 if data[mdhd[0]] == 1 else 20)
+                patches.append((base + position, struct.pack('>H', encode_language(language.lower()))))
+                in_place['language'] = language
+            else:
+                remux_args.extend(['-lang', f"{track_id}={language}"])
+        if 'default' in changed:
+            tkhd = find_child(data, start, end, 'tkhd')
+            flags = int.from_bytes(data[tkhd[0] + 1:tkhd[0] + 4], 'big')
+            flags = flags | 0x1 if changed['default'] else flags & ~0x1
+            patches.append((base + tkhd[0] + 1, flags.to_bytes(3, 'big')))
+            in_place['default'] = changed['default']
+        if 'forced' in changed:
+            tx3g = _tx3g_flags(data, track)
+            if tx3g is None:
+                raise TrackManifestError(f"トラック{track_id}: tx3g以外の字幕には強制フラグを設定できません")
+            position, flags = tx3g
+            flags = flags | TX3G_FORCED_FLAGS if changed['forced'] else flags & ~TX3G_FORCED_FLAGS
+            patches.append((base + position, struct.pack('>I', flags)))
+            in_place['forced'] = changed['forced']
+        if 'title' in changed:
+            hdlr = find_child(data, mdia[0], mdia[1], 'hdlr')
+            name = changed['title'].encode('utf-8')
+            space = hdlr[1] - (hdlr[0] + 24)
+            if len(name) < space:
+                # 名前の後ろは0で埋める（NUL終端の後の値は読まれない）
+                patches.append((base + hdlr[0] + 24, name + bytes(space - len(name))))
+                in_place['title'] = changed['title']
+            else:
+                remux_args.extend(['-name', f"{track_id}={changed['title']}"])
+    return patches, remux_args, {track_id: fields for track_id, fields in patched.items() if fields}
+
+def patch_file(file_path, patches):
+    """ファイルの指定した位置をその場で書き換えてディスクに同期"""
+    with open(file_path, 'r+b') as f:
+        for position, value in patches:
+            f.seek(position)
+            f.write(value)
+    fsync_path(file_path)
+
+def remux_mp4_headers(tools, file_path, remux_args, patched=None):
+    """MP4Boxでトラックの設定を変更したファイルを一時ファイルに書き出してから置き換える
+
+    patchedにはその場で書き換える差分を指定でき、置き換える前に一時ファイルに書き込む。
+    """
+    if 'mp4box' not in tools:
+        raise ToolError("MP4Boxの設定が見つかりません。")
+    temp_output = partial_output_path(file_path)
+    try:
+        args = [tools['mp4box']] + remux_args + [file_path, '-out', temp_output]
+        returncode, stdout, stderr = run_command(args)
+        check_result("MP4Box", returncode, stdout, stderr, temp_output)
+        if patched:
+            # 書き直した後のファイルの位置で計画し直す
+            patches, extra_args, _ = plan_mp4_changes(temp_output, patched)
+            if extra_args:
+                raise TrackManifestError("MP4Boxで書き直した後のファイルに変更を書き込めません")
+            patch_file(temp_output, patches)
+        commit_output(temp_output, file_path, check_structure)
+    finally:
+        remove_files([temp_output])
+
+def build_propedit_args(mkvpropedit_path, file_path, tracks, changes):
+    """MKVのトラックの設定を変更するmkvpropeditのコマンドを構築（ヘッダーだけを書き換える）"""
+    tracks = {track['id']: track for track in tracks}
+    args = [mkvpropedit_path, file_path]
+    for track_id, changed in sorted(changes.items()):
+        track = tracks[track_id]
+        selector = f"track:={track['uid']}" if track['uid'] is not None else f"track:{track_id + 1}"
+        args.extend(['--edit', selector])
+        if 'language' in changed:
+            args.extend(['--set', f"language={changed['language']}"])
+        if 'default' in changed:
+            args.extend(['--set', f"flag-default={int(changed['default'])}"])
+        if 'forced' in changed:
+            args.extend(['--set', f"flag-forced={int(changed['forced'])}"])
+        if 'title' in changed:
+            if changed['title']:
+                args.extend(['--set', f"name={changed['title']}"])
+            else:
+                args.extend(['--delete', 'name'])
+    return args
+
+def apply_track_changes(tools, file_path, changes):
+    """差分をファイルに適用し、書き込み方法（'in_place', 'remux', 'mkvpropedit'）を返す"""
+    if os.path.splitext(file_path)[1].lower() == '.mkv':
+        if 'mkv_dir' not in tools:
+            raise ToolError("MKVToolNixの設定が見つかりません。")
+        mkvpropedit_path = find_executable(tools['mkv_dir'], "mkvpropedit")
+        args = build_propedit_args(mkvpropedit_path, file_path, read_matroska(file_path)['tracks'], changes)
+        returncode, stdout, stderr = run_command(args)
+        check_result("mkvpropedit", returncode, stdout, stderr)
+        return 'mkvpropedit'
+
+    patches, remux_args, patched = plan_mp4_changes(file_path, changes)
+    if not remux_args:
+        if patches:
+            patch_file(file_path, patches)
+        return 'in_place'
+
+    # MP4Boxが失敗しても途中まで書き換えた状態にならないよう、すべての変更を一時ファイルに書き込んでから置き換える
+    remux_mp4_headers(tools, file_path, remux_args, patched)
+    return 'remux'
+
+def format_changes(changes):
+    """差分を1行のテキストに整形"""
+    return "; ".join(f"トラック{track_id}: " + ", ".join(f"{field}={value}" for field, value in changed.items())
+                     for track_id, changed in sorted(changes.items()))
+
+def apply_track_manifest(tools, manifest_path, dry_run=False, max_workers=DEFAULT_MANIFEST_WORKERS, log=print):
+    """マニフェストを各ファイルに並列に適用し、失敗した件数を返す
+
+    各ファイルのヘッダーを読んで現在の状態と比べ、差分のあるファイルだけを書き換える。
+    dry_runがTrueなら差分を表示するだけで書き込まない。
+    """
+    manifest = load_track_manifest(manifest_path)
+
+    def apply(file_path):
+        changes = diff_track_state(read_track_state(file_path), manifest[file_path])
+        if not changes:
+            return "変更なし"
+        if dry_run:
+            return format_changes(changes)
+        return f"{apply_track_changes(tools, file_path, changes)} ({format_changes(changes)})"
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(apply, file_path) for file_path in manifest]
+        for file_path, future in zip(manifest, futures):
+            try:
+                log(f"{file_path}: {future.result()}")
+            except Exception as e:
+                failed += 1
+                log(f"{file_path}: 失敗しました\n{e}")
+    return failed
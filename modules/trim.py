@@ -0,0 +1,117 @@
+import os
+import json
+import uuid
+import bisect
+import hashlib
+from .job_cache import file_identity
+from .isobmff import parse_movie, check_structure, BoxError
+from .core import (ToolError, run_command, check_result, partial_output_path,
+                   commit_output, remove_files)
+
+def sync_sample_times(track):
+    """映像トラックのキーフレーム（同期サンプル）の時刻（秒）一覧を取得"""
+    timescale = track['timescale']
+    stts = track.get('stts')
+    if not stts or not timescale:
+        return []
+    stss = track.get('stss')
+    sync_samples = iter(stss) if stss is not None else None
+
+    times = []
+    sample = 1
+    decode_time = 0
+    target = next(sync_samples, None) if sync_samples is not None else 1
+    # sttsの区間ごとに、区間内にある同期サンプルの時刻を計算
+    for i in range(0, len(stts), 2):
+        count, delta = stts[i], stts[i + 1]
+        while target is not None and target < sample + count:
+            times.append((decode_time + (target - sample) * delta) / timescale)
+            if sync_samples is None:
+                target += 1
+            else:
+                target = next(sync_samples, None)
+        sample += count
+        decode_time += count * delta
+    return times
+
+def build_keyframe_index(file_path):
+    """stss/sttsからキーフレームのインデックスを作成"""
+    movie = parse_movie(file_path, sample_tables=True)
+    video = next((track for track in movie['tracks'] if track.get('handler') == 'vide'), None)
+    if video is None:
+        raise BoxError("映像トラックが見つかりません")
+    return {
+        'duration': movie['duration'] / movie['timescale'] if movie['timescale'] else 0,
+        'keyframes': sync_sample_times(video)
+    }
+
+class KeyframeIndexCache:
+    """ファイルごとのキーフレームインデックスのキャッシュ（temp_dir配下に保存）"""
+
+    def __init__(self, temp_dir):
+        self.cache_dir = os.path.join(temp_dir, 'keyframes')
+
+    def _cache_path(self, identity):
+        key = hashlib.sha256(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, file_path):
+        """キーフレームインデックスを取得（キャッシュがなければ作成して保存）"""
+        cache_path = self._cache_path(file_identity(file_path))
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        index = build_keyframe_index(file_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, cache_path)
+        return index
+
+def snap_clip(index, start, end):
+    """開始点を直前のキーフレームに、終了点を直後のキーフレームに合わせる"""
+    keyframes = index['keyframes']
+    duration = index['duration']
+    if not keyframes:
+        return start, min(end, duration)
+    i = bisect.bisect_right(keyframes, start) - 1
+    snapped_start = keyframes[max(i, 0)]
+    j = bisect.bisect_left(keyframes, end)
+    snapped_end = keyframes[j] if j < len(keyframes) else duration
+    if snapped_end <= snapped_start:
+        snapped_end = duration
+    return snapped_start, snapped_end
+
+def build_trim_args(mp4box_path, input_file, start, end, output_file):
+    """MP4Boxの切り出しコマンドを構築（字幕を含む全トラックを切り出し、時刻を0からに振り直す）"""
+    return [mp4box_path, '-splitx', f"{start:.3f}:{end:.3f}", input_file, '-out', output_file]
+
+def trim_clips(tools, input_file, clips, temp_dir, log=print):
+    """1つの入力から複数のクリップを再エンコードせずに切り出す
+
+    clipsは[{'start': 秒, 'end': 秒, 'output_file': パス}, ...]。
+    キーフレームインデックスは1回だけ読み込み、全クリップで共有する。
+    実際に切り出した(開始, 終了)の一覧を返す。
+    """
+    if 'mp4box' not in tools:
+        raise ToolError("MP4Boxの設定が見つかりません。")
+    index = KeyframeIndexCache(temp_dir).get(input_file)
+
+    results = []
+    for clip in clips:
+        start, end = snap_clip(index, clip['start'], clip['end'])
+        temp_output = partial_output_path(clip['output_file'])
+        try:
+            args = build_trim_args(tools['mp4box'], input_file, start, end, temp_output)
+            returncode, stdout, stderr = run_command(args)
+            check_result("MP4Box", returncode, stdout, stderr, temp_output)
+            commit_output(temp_output, clip['output_file'], check_structure)
+        finally:
+            remove_files([temp_output])
+        log(f"{clip['output_file']}: {start:.3f}〜{end:.3f}秒")
+        results.append((start, end))
+    return results
@@ -24,3 +24,10 @@ def format_bitrate(bitrate):
         return f"{bitrate/1000000:.2f} Mbps"
     else:
         return f"{bitrate/1000:.1f} kbps"
+
+def parse_duration(text):
+    """H:M:S形式（または秒数）の文字列を秒数に変換"""
+    seconds = 0.0
+    for part in str(text).strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
@@ -0,0 +1,237 @@
+import os
+import random
+import struct
+from .constants import LANGUAGES
+from .isobmff import parse_movie, read_top_level, sample_location, iter_children, BoxError
+from .ebml import read_matroska, EbmlError
+
+# 1トラックあたりに読み取って確認するサンプル数の既定値
+DEFAULT_SPOT_CHECK_SAMPLES = 3
+
+# ISO 639-2の書誌用コード（B）から用語用コード（T）への対応
+LANGUAGE_ALIASES = {'chi': 'zho', 'fre': 'fra', 'ger': 'deu', 'may': 'msa'}
+
+# NALユニットの長さが前置されている映像コーデックと、その設定ボックス
+NAL_CODECS = {'avc1': 'avcC', 'avc3': 'avcC', 'hvc1': 'hvcC', 'hev1': 'hvcC'}
+
+class VerificationError(Exception):
+    """出力ファイルの検証に失敗したときの例外"""
+
+def normalize_language(code):
+    """言語コードをISO 639-2/Tの3文字コードにそろえる"""
+    code = (code or 'und').lower()
+    if len(code) == 2:
+        # LANGUAGESで同じ言語名を持つ3文字コードを探す
+        names = dict(LANGUAGES)
+        for other, name in LANGUAGES:
+            if len(other) == 3 and name == names.get(code):
+                return other
+    return LANGUAGE_ALIASES.get(code, code)
+
+def first_added_track_id(job):
+    """追加する字幕の最初のトラックIDを取得（入力ファイルの残すトラックの最大のIDの次）"""
+    input_track_count = job.get('input_track_count', len(job.get('audio', [])) + 1)
+    drop_tracks = set(job.get('drop_tracks', []))
+    kept = [track_id for track_id in range(1, input_track_count + 1) if track_id not in drop_tracks]
+    return max(kept, default=0) + 1
+
+def expected_tracks(job):
+    """多重化ジョブから、出力の各トラックIDに期待する設定を作成（core.build_mux_argsと同じ番号、言語の指定がなければNone）"""
+    expected = {1: {'language': job.get('video_language'), 'default': False, 'forced': False}}
+    for i, audio in enumerate(job.get('audio', [])):
+        expected[i + 2] = {'language': audio['language'], 'default': audio.get('default', False), 'forced': False}
+    for track_id in job.get('drop_tracks', []):
+        expected.pop(track_id, None)
+    subtitle_index = first_added_track_id(job)
+    for subtitle in job.get('subtitles', []):
+        expected[subtitle_index] = {
+            'language': subtitle['language'],
+            'default': subtitle.get('default', False),
+            'forced': subtitle.get('forced', False)
+        }
+        subtitle_index += 1
+    return expected
+
+def count_input_tracks(input_file):
+    """入力ファイルのトラック数を取得（対応していない形式や読めない場合はNone）"""
+    ext = os.path.splitext(input_file)[1].lower()
+    try:
+        if ext in ('.mp4', '.m4v', '.mov'):
+            return len(parse_movie(input_file)['tracks'])
+        if ext == '.mkv':
+            return len(read_matroska(input_file)['tracks'])
+    except (OSError, BoxError, EbmlError):
+        pass
+    return None
+
+def _is_forced(data, track):
+    """tx3g字幕の強制表示フラグを取得（判定できない形式はNone）"""
+    for entry_type, start, _ in track['sample_entries']:
+        if entry_type == 'tx3g':
+            display_flags = struct.unpack_from('>I', data, start + 8)[0]
+            return bool(display_flags & 0xC0000000)
+    return None
+
+def _nal_length_size(data, track):
+    """映像サンプルのNALユニット長のバイト数を取得（NAL形式でなければNone）"""
+    for entry_type, start, end in track['sample_entries']:
+        config_type = NAL_CODECS.get(entry_type)
+        if config_type is None:
+            continue
+        # VisualSampleEntryの固定部分（78バイト）の後に設定ボックスが続く
+        for child_type, offset, _, header_size in iter_children(data, start + 78, end):
+            if child_type == config_type:
+                pos = offset + header_size + (4 if config_type == 'avcC' else 21)
+                return (data[pos] & 0x3) + 1
+    return None
+
+def _spot_check(f, mdat_ranges, track, nal_length_size, count, rng):
+    """ランダムに選んだサンプルを読み取り、位置と内容の整合性を確認"""
+    problems = []
+    sample_count = track.get('sample_count', 0)
+    if sample_count == 0:
+        return problems
+    for sample_number in rng.sample(range(1, sample_count + 1), min(count, sample_count)):
+        offset, size = sample_location(track, sample_number)
+        if not any(start <= offset and offset + size <= end for start, end in mdat_ranges):
+            problems.append(f"トラック{track['track_id']}: サンプル{sample_number}がmdatの範囲外です")
+            continue
+        f.seek(offset)
+        sample = f.read(size)
+        if len(sample) != size:
+            problems.append(f"トラック{track['track_id']}: サンプル{sample_number}を読み取れません")
+            continue
+        if nal_length_size:
+            # NALユニットの長さを順にたどり、サンプルの終わりとちょうど一致するか確認
+            pos = 0
+            while pos + nal_length_size <= size:
+                pos += nal_length_size + int.from_bytes(sample[pos:pos + nal_length_size], 'big')
+            if pos != size:
+                problems.append(f"トラック{track['track_id']}: サンプル{sample_number}のNALユニット長が不正です")
+    return problems
+
+def verify_mux(job, output_file, spot_check_samples=DEFAULT_SPOT_CHECK_SAMPLES):
+    """多重化の出力をmoovだけで検証し、問題の一覧を返す（問題がなければ空のリスト）
+
+    トラック数・言語・デフォルト/強制フラグ・長さを確認し、
+    spot_check_samplesが1以上なら各トラックのサンプルをランダムに読み取って確認する。
+    """
+    try:
+        movie = parse_movie(output_file, sample_tables=spot_check_samples > 0)
+    except BoxError as e:
+        return [f"moovを読み取れません: {e}"]
+    data = movie['moov']
+    tracks = {track['track_id']: track for track in movie['tracks']}
+    problems = []
+
+    # トラック数
+    input_track_count = job.get('input_track_count')
+    if input_track_count is not None:
+        expected_count = input_track_count - len(set(job.get('drop_tracks', []))) + len(job.get('subtitles', []))
+        if len(tracks) != expected_count:
+            problems.append(f"トラック数が一致しません (期待: {expected_count}, 実際: {len(tracks)})")
+
+    # 言語とフラグ
+    for track_id, expected in expected_tracks(job).items():
+        track = tracks.get(track_id)
+        if track is None:
+            problems.append(f"トラック{track_id}が見つかりません")
+            continue
+        language = normalize_language(expected['language'])
+        actual = normalize_language(track.get('language'))
+        extended = track.get('extended_language', '').lower()
+        if expected['language'] is not None and language != actual and expected['language'].lower() != extended:
+            problems.append(f"トラック{track_id}の言語が一致しません (期待: {language}, 実際: {actual})")
+        if expected['default'] and not track['enabled']:
+            problems.append(f"トラック{track_id}がデフォルト（有効）になっていません")
+        if expected['forced'] and _is_forced(data, track) is False:
+            problems.append(f"トラック{track_id}が強制表示になっていません")
+
+    # 長さ
+    if movie['timescale'] == 0 or movie['duration'] == 0:
+        problems.append("ムービーの長さが0です")
+    for track in movie['tracks']:
+        if track.get('handler') in ('vide', 'soun') and not track.get('duration'):
+            problems.append(f"トラック{track['track_id']}の長さが0です")
+    # ムービーの長さは字幕を含むすべてのトラックにわたるため、最も長い映像・音声のトラックと比べる
+    input_duration = job.get('input_duration')
+    media_durations = [track['duration'] / track['timescale'] for track in movie['tracks']
+                       if track.get('handler') in ('vide', 'soun') and track.get('timescale')]
+    if input_duration and (media_durations or movie['timescale']):
+        duration = max(media_durations) if media_durations else movie['duration'] / movie['timescale']
+        if abs(duration - input_duration) > max(0.5, input_duration * 0.01):
+            problems.append(f"長さが入力と一致しません (入力: {input_duration:.3f}秒, 出力: {duration:.3f}秒)")
+
+    # サンプルの抜き取り確認
+    if spot_check_samples > 0:
+        mdat_ranges = [(offset + header_size, offset + size)
+                       for box_type, offset, size, header_size in read_top_level(output_file)
+                       if box_type == 'mdat']
+        rng = random.Random()
+        with open(output_file, 'rb') as f:
+            for track in movie['tracks']:
+                problems.extend(_spot_check(f, mdat_ranges, track, _nal_length_size(data, track),
+                                            spot_check_samples, rng))
+
+    return problems
+
+def verify_matroska_mux(job, output_file):
+    """mkvmergeで多重化したMKVの出力をヘッダーだけで検証し、問題の一覧を返す
+
+    MKVのトラックはMP4Boxの出力のトラックIDの順に並ぶため、トラックIDの順位で対応させて言語とフラグを確認する。
+    """
+    try:
+        info = read_matroska(output_file)
+    except EbmlError as e:
+        return [f"MKVのヘッダーを読み取れません: {e}"]
+    tracks = info['tracks']
+    expected = expected_tracks(job)
+    problems = []
+
+    # トラック数（入力のトラック数が分からない場合は期待する設定のトラックだけが並ぶとみなす）
+    input_track_count = job.get('input_track_count')
+    if input_track_count is not None:
+        drop_tracks = set(job.get('drop_tracks', []))
+        first_added = first_added_track_id(job)
+        output_ids = [track_id for track_id in range(1, input_track_count + 1) if track_id not in drop_tracks]
+        output_ids.extend(range(first_added, first_added + len(job.get('subtitles', []))))
+        if len(tracks) != len(output_ids):
+            problems.append(f"トラック数が一致しません (期待: {len(output_ids)}, 実際: {len(tracks)})")
+    else:
+        output_ids = sorted(expected)
+    positions = {track_id: position for position, track_id in enumerate(output_ids)}
+
+    # 言語とフラグ
+    for track_id, settings in expected.items():
+        position = positions.get(track_id)
+        if position is None or position >= len(tracks):
+            problems.append(f"トラック{track_id}が見つかりません")
+            continue
+        track = tracks[position]
+        language = normalize_language(settings['language'])
+        actual = normalize_language(track['language'])
+        if settings['language'] is not None and language != actual \
+                and settings['language'].lower() != (track['language_ietf'] or '').lower():
+            problems.append(f"トラック{track_id}の言語が一致しません (期待: {language}, 実際: {actual})")
+        if settings['default'] and not track['default']:
+            problems.append(f"トラック{track_id}がデフォルトになっていません")
+        if settings['forced'] and not track['forced']:
+            problems.append(f"トラック{track_id}が強制表示になっていません")
+
+    # 長さ（セグメントの長さは字幕を含むすべてのトラックにわたるため、入力より短い場合だけを問題とする）
+    input_duration = job.get('input_duration')
+    if input_duration and info['duration'] is not None:
+        if input_duration - info['duration'] > max(0.5, input_duration * 0.01):
+            problems.append(f"長さが入力と一致しません (入力: {input_duration:.3f}秒, 出力: {info['duration']:.3f}秒)")
+    return problems
+
+def mux_checker(job, spot_check_samples=DEFAULT_SPOT_CHECK_SAMPLES):
+    """core.commit_outputに渡す検証関数を作成（問題があればVerificationErrorを送出、MKVはヘッダーだけを確認）"""
+    def check(output_file):
+        if os.path.splitext(output_file)[1].lower() == '.mkv':
+            problems = verify_matroska_mux(job, output_file)
+        else:
+            problems = verify_mux(job, output_file, spot_check_samples)
+        if problems:
+            raise VerificationError("出力ファイルの検証に失敗しました:\n" + "\n".join(problems))
+    return check
@@ -0,0 +1,168 @@
+import os
+import math
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from .constants import LANGUAGES
+from .subtitle_parser import read_cues, SubtitleParseError
+from .verify import normalize_language
+
+# セグメントの長さの既定値（秒）
+DEFAULT_SEGMENT_DURATION = 6.0
+# X-TIMESTAMP-MAPのMPEGTSの既定値（90kHz。fMP4の映像がタイムライン0から始まる場合は0）
+DEFAULT_MPEGTS_OFFSET = 0
+# 同時に処理する字幕の数の既定値
+DEFAULT_PACKAGE_WORKERS = 4
+# 字幕のマスタープレイリストの断片のファイル名とグループID
+SUBTITLE_PLAYLIST_NAME = 'subtitles.m3u8'
+SUBTITLE_GROUP_ID = 'subs'
+# WebVTTに変換できない画像字幕の拡張子（PGS・VobSub・DVB）
+BITMAP_SUBTITLE_EXTENSIONS = ('.sup', '.idx', '.sub', '.dvb')
+
+class WebVttError(Exception):
+    """WebVTTに変換できないときの例外"""
+
+def format_timestamp(seconds):
+    """秒数をWebVTTの時刻形式（HH:MM:SS.mmm）に変換"""
+    milliseconds = int(round(max(seconds, 0) * 1000))
+    return (f"{milliseconds // 3600000:02d}:{milliseconds // 60000 % 60:02d}:"
+            f"{milliseconds // 1000 % 60:02d}.{milliseconds % 1000:03d}")
+
+def escape_text(text):
+    """キューのテキストをWebVTTの文字参照にエスケープ"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def bcp47_language(code):
+    """ISO 639-2の言語コードをHLSのLANGUAGE属性（BCP 47、2文字のコードがあれば2文字）に変換"""
+    code = normalize_language(code)
+    names = dict(LANGUAGES)
+    for other, name in LANGUAGES:
+        if len(other) == 2 and name == names.get(code):
+            return other
+    return code
+
+def load_cues(file_path, delay=0.0):
+    """字幕ファイルのキューを開始時刻の順に取得（delayは秒、時刻のないキューとテキストのないキューは除く）"""
+    try:
+        cues = read_cues(file_path)
+    except SubtitleParseError as e:
+        raise WebVttError(str(e))
+    cues = [dict(cue, start=cue['start'] + delay, end=cue['end'] + delay) for cue in cues
+            if cue['start'] is not None and cue['end'] is not None and cue['text']]
+    return sorted((cue for cue in cues if cue['end'] > 0 and cue['end'] > cue['start']),
+                  key=lambda cue: cue['start'])
+
+def _write_file(path, text):
+    """ファイルを一時ファイルに書き込んでから置き換える"""
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def segment_cues(cues, output_dir, segment_duration=DEFAULT_SEGMENT_DURATION, total_duration=None,
+                 mpegts_offset=DEFAULT_MPEGTS_OFFSET):
+    """キューを一定の長さのWebVTTセグメントに分けて書き出し、メディアプレイリストを作成
+
+    キューは開始時刻の順に1回だけたどり、セグメントの境界をまたぐキューは重なるすべてのセグメントに
+    元の時刻のまま含める（HLSのWebVTTの規定）。キューのないセグメントもヘッダーだけで書き出す。
+    (セグメント数, プレイリストのパス)を返す。
+    """
+    if segment_duration <= 0:
+        raise WebVttError("セグメントの長さは0より大きくしてください")
+    end_time = max([cue['end'] for cue in cues] + [total_duration or 0])
+    segment_count = max(1, math.ceil(end_time / segment_duration))
+    os.makedirs(output_dir, exist_ok=True)
+    header = f"WEBVTT\nX-TIMESTAMP-MAP=MPEGTS:{mpegts_offset},LOCAL:00:00:00.000\n"
+
+    durations = []
+    active = []  # 前のセグメントから続いているキュー
+    position = 0
+    for number in range(segment_count):
+        segment_start = number * segment_duration
+        segment_end = segment_start + segment_duration
+        if number == segment_count - 1 and end_time > segment_start:
+            # 最後のセグメントは終わりまでの長さ
+            segment_end = end_time
+        # このセグメントで始まるキューを追加し、終わったキューを取り除く
+        while position < len(cues) and cues[position]['start'] < segment_end:
+            active.append(cues[position])
+            position += 1
+        active = [cue for cue in active if cue['end'] > segment_start]
+
+        blocks = [header]
+        for cue in active:
+            blocks.append(f"{format_timestamp(cue['start'])} --> {format_timestamp(cue['end'])}\n"
+                          f"{escape_text(cue['text'])}\n")
+        _write_file(os.path.join(output_dir, f"segment_{number:05d}.vtt"), "\n".join(blocks))
+        durations.append(segment_end - segment_start)
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3",
+             f"#EXT-X-TARGETDURATION:{math.ceil(max(durations))}",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+    for number, duration in enumerate(durations):
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(f"segment_{number:05d}.vtt")
+    lines.append("#EXT-X-ENDLIST")
+    playlist = os.path.join(output_dir, 'index.m3u8')
+    # プレイリストはすべてのセグメントを書き出してから作成する
+    _write_file(playlist, "\n".join(lines) + "\n")
+    return segment_count, playlist
+
+def package_dir(output_file):
+    """出力ファイルに対応する字幕セグメントの出力先ディレクトリ"""
+    return os.path.splitext(output_file)[0] + '_subtitles'
+
+def package_subtitles(job, subtitle_files=None, output_dir=None, segment_duration=DEFAULT_SEGMENT_DURATION,
+                      mpegts_offset=DEFAULT_MPEGTS_OFFSET, max_workers=DEFAULT_PACKAGE_WORKERS, log=print):
+    """多重化ジョブの追加する字幕をWebVTTのセグメントとHLSのプレイリストとして出力
+
+    subtitle_filesには一時ディレクトリにコピーした字幕のパス（job['subtitles']と同じ順序）を指定できる。
+    言語ごとに並列に処理し、最後に各字幕のプレイリストをまとめたEXT-X-MEDIAの一覧を書き出す。
+    画像字幕はテキストがないため出力せずに通知する。
+    作成したファイル（subtitles.m3u8）のパスを返す（出力する字幕がなければNone）。
+    """
+    subtitles = job.get('subtitles', [])
+    subtitle_files = subtitle_files or [subtitle['file'] for subtitle in subtitles]
+    indexes = []
+    for i, subtitle in enumerate(subtitles):
+        if os.path.splitext(subtitle['file'])[1].lower() in BITMAP_SUBTITLE_EXTENSIONS:
+            log(f"{subtitle['file']}: 画像字幕のためWebVTTに変換しません")
+        else:
+            indexes.append(i)
+    if not indexes:
+        return None
+    output_dir = output_dir or package_dir(job['output_file'])
+    total_duration = job.get('input_duration')
+
+    def package(i):
+        subtitle = subtitles[i]
+        name = f"{i + 1:02d}_{subtitle['language']}"
+        cues = load_cues(subtitle_files[i], subtitle.get('delay', 0.0))
+        segment_cues(cues, os.path.join(output_dir, name), segment_duration, total_duration, mpegts_offset)
+        return name
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        names = list(executor.map(package, indexes))
+
+    lines = ["#EXTM3U"]
+    for name, subtitle in zip(names, (subtitles[i] for i in indexes)):
+        language = bcp47_language(subtitle['language'])
+        attributes = ['TYPE=SUBTITLES', f'GROUP-ID="{SUBTITLE_GROUP_ID}"',
+                      f'NAME="{name}"', f'LANGUAGE="{language}"',
+                      f'DEFAULT={"YES" if subtitle.get("default") else "NO"}',
+                      f'AUTOSELECT={"YES" if subtitle.get("default") or not subtitle.get("forced") else "NO"}',
+                      f'FORCED={"YES" if subtitle.get("forced") else "NO"}',
+                      f'URI="{name}/index.m3u8"']
+        lines.append("#EXT-X-MEDIA:" + ",".join(attributes))
+    playlist = os.path.join(output_dir, SUBTITLE_PLAYLIST_NAME)
+    _write_file(playlist, "\n".join(lines) + "\n")
+    return playlist
+
+def load_package_options(config):
+    """設定ファイルからWebVTTセグメントの出力設定を取得（無効な場合はNone）"""
+    if not config.getboolean("Settings", "webvtt_segments", fallback=False):
+        return None
+    return {
+        'segment_duration': config.getfloat("Settings", "webvtt_segment_duration",
+                                            fallback=DEFAULT_SEGMENT_DURATION),
+        'mpegts_offset': config.getint("Settings", "webvtt_mpegts_offset", fallback=DEFAULT_MPEGTS_OFFSET),
+    }
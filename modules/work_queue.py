@@ -0,0 +1,218 @@
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+
+# ジョブの状態
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+class WorkQueue(ABC):
+    """ワーカーがジョブを取得するキューのインターフェース
+
+    ジョブは{'id', 'kind', 'payload', 'attempts'}の辞書で表す。
+    kindは'mux'または'extract'、payloadはcoreの各関数に渡す引数。
+    別のブローカーを使う場合はこのクラスを継承して各メソッドを実装する。
+    """
+
+    @abstractmethod
+    def enqueue(self, kind, payload, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """ジョブを追加してIDを返す"""
+
+    @abstractmethod
+    def acquire(self, worker_id, lease_seconds):
+        """実行可能なジョブを1件取得してリースする（なければNone）"""
+
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """リースを延長する（リースを失っていればFalse）"""
+
+    @abstractmethod
+    def complete(self, job_id, worker_id):
+        """ジョブを完了にする"""
+
+    @abstractmethod
+    def fail(self, job_id, worker_id, error):
+        """ジョブを失敗にする（試行回数が残っていれば再実行待ちに戻す）"""
+
+    @abstractmethod
+    def counts(self):
+        """状態ごとのジョブ数を返す"""
+
+class MemoryWorkQueue(WorkQueue):
+    """プロセス内で完結するキュー（単一ノードでの実行やテスト用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = []
+
+    def enqueue(self, kind, payload, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        with self._lock:
+            job_id = len(self._jobs) + 1
+            self._jobs.append({
+                'id': job_id, 'kind': kind, 'payload': payload,
+                'status': STATUS_PENDING, 'attempts': 0, 'max_attempts': max_attempts,
+                'lease_owner': None, 'lease_expires': 0, 'error': None
+            })
+            return job_id
+
+    def acquire(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._lock:
+            for job in self._jobs:
+                expired = job['status'] == STATUS_RUNNING and job['lease_expires'] < now
+                if job['status'] != STATUS_PENDING and not expired:
+                    continue
+                if job['attempts'] >= job['max_attempts']:
+                    job['status'] = STATUS_FAILED
+                    continue
+                job.update(status=STATUS_RUNNING, lease_owner=worker_id,
+                           lease_expires=now + lease_seconds, attempts=job['attempts'] + 1)
+                return {'id': job['id'], 'kind': job['kind'],
+                        'payload': job['payload'], 'attempts': job['attempts']}
+        return None
+
+    def _owned(self, job_id, worker_id):
+        if not 1 <= job_id <= len(self._jobs):
+            return None
+        job = self._jobs[job_id - 1]
+        if job['status'] == STATUS_RUNNING and job['lease_owner'] == worker_id:
+            return job
+        return None
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is None:
+                return False
+            job['lease_expires'] = time.time() + lease_seconds
+            return True
+
+    def complete(self, job_id, worker_id):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is not None:
+                job.update(status=STATUS_DONE, lease_owner=None, error=None)
+
+    def fail(self, job_id, worker_id, error):
+        with self._lock:
+            job = self._owned(job_id, worker_id)
+            if job is not None:
+                retry = job['attempts'] < job['max_attempts']
+                job.update(status=STATUS_PENDING if retry else STATUS_FAILED,
+                           lease_owner=None, error=error)
+
+    def counts(self):
+        with self._lock:
+            result = {}
+            for job in self._jobs:
+                result[job['status']] = result.get(job['status'], 0) + 1
+            return result
+
+class SQLiteWorkQueue(WorkQueue):
+    """共有ストレージ上のSQLiteファイルを使うキュー
+
+    NFSではWALモードが使えないため、通常のロールバックジャーナルのまま
+    BEGIN IMMEDIATEで書き込みロックを取ってからジョブを取得する。
+    """
+
+    def __init__(self, db_path, timeout=30):
+        self.db_path = db_path
+        self.timeout = timeout
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self, conn, func):
+        """書き込みロックを取得してから処理を実行"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, kind, payload, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, status, max_attempts, updated) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), STATUS_PENDING, max_attempts, time.time()))
+            return cursor.lastrowid
+
+    def acquire(self, worker_id, lease_seconds):
+        def take(conn):
+            now = time.time()
+            # リースが切れたまま試行回数を使い切ったジョブは失敗にする
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, updated = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (STATUS_FAILED, now, STATUS_RUNNING, now))
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs "
+                "WHERE (status = ? OR (status = ? AND lease_expires < ?)) AND attempts < max_attempts "
+                "ORDER BY id LIMIT 1",
+                (STATUS_PENDING, STATUS_RUNNING, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (STATUS_RUNNING, worker_id, now + lease_seconds, now, row['id']))
+            return {'id': row['id'], 'kind': row['kind'],
+                    'payload': json.loads(row['payload']), 'attempts': row['attempts'] + 1}
+
+        with closing(self._connect()) as conn:
+            return self._transaction(conn, take)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        with closing(self._connect()) as conn:
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + lease_seconds, now, job_id, STATUS_RUNNING, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, error = NULL, updated = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (STATUS_DONE, time.time(), job_id, worker_id))
+
+    def fail(self, job_id, worker_id, error):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+                "lease_owner = NULL, error = ?, updated = ? WHERE id = ? AND lease_owner = ?",
+                (STATUS_PENDING, STATUS_FAILED, error, time.time(), job_id, worker_id))
+
+    def counts(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            return {row[0]: row[1] for row in rows}
@@ -0,0 +1,113 @@
+import os
+import time
+import socket
+import threading
+from .core import extract_subtitle
+from .mux_backend import mux
+from .concat import concat
+from .planner import ThroughputHistory, job_work, measure
+from .staging import staged_path
+from .profiling import profile_section
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_POLL_INTERVAL = 5
+# リースの延長に失敗したときに再試行する間隔（秒）
+HEARTBEAT_RETRY_INTERVAL = 5
+
+def run_job(tools, job, temp_dir, staging=None):
+    """キューから取得したジョブを実行（出力は一時ファイルに書いてから置き換える）
+
+    stagingを指定した場合、ネットワーク上の入力ファイルはローカルのコピーから読み込む。
+    """
+    payload = job['payload']
+    if job['kind'] not in ('mux', 'concat', 'extract'):
+        raise ValueError(f"不明なジョブの種類です: {job['kind']}")
+    # 処理速度の実績を記録し、見積もり（planner.plan_jobs）に使う
+    tool, work_bytes, volume = job_work(job['kind'], payload)
+    if job['kind'] == 'concat':
+        payload = dict(payload, inputs=[staged_path(staging, path) for path in payload['inputs']])
+    else:
+        payload = dict(payload, input_file=staged_path(staging, payload['input_file']))
+    with profile_section(f"job:{job['kind']}"), measure(ThroughputHistory(temp_dir), tool, volume, work_bytes):
+        if job['kind'] == 'mux':
+            mux(tools, payload, temp_dir)
+        elif job['kind'] == 'concat':
+            concat(tools, payload, temp_dir)
+        else:
+            extract_subtitle(tools, payload['input_file'], payload['stream_index'], payload['output_file'])
+
+class Heartbeat(threading.Thread):
+    """ジョブの実行中に定期的にリースを延長するスレッド"""
+
+    def __init__(self, queue, job_id, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # リース期間の1/3ごとに延長する
+        deadline = time.time() + self.lease_seconds
+        interval = self.lease_seconds / 3
+        while not self._stop_event.wait(interval):
+            try:
+                extended = self.queue.heartbeat(self.job_id, self.worker_id, self.lease_seconds)
+            except Exception:
+                # データベースのロックなど一時的な失敗はリースの期限が切れるまで再試行する
+                interval = min(HEARTBEAT_RETRY_INTERVAL, self.lease_seconds / 3)
+                if time.time() + interval >= deadline:
+                    self.lost = True
+                    break
+                continue
+            if not extended:
+                self.lost = True
+                break
+            deadline = time.time() + self.lease_seconds
+            interval = self.lease_seconds / 3
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def default_worker_id():
+    """ホスト名とプロセスIDからワーカーIDを作成"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def run_worker(queue, tools, temp_dir, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               poll_interval=DEFAULT_POLL_INTERVAL, exit_when_empty=False, log=print, staging=None):
+    """キューからジョブを取得して実行し続ける
+
+    exit_when_emptyがTrueの場合、実行可能なジョブがなくなった時点で終了する。
+    処理したジョブ数を返す。
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while True:
+        job = queue.acquire(worker_id, lease_seconds)
+        if job is None:
+            if exit_when_empty:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        log(f"[{worker_id}] ジョブ #{job['id']} ({job['kind']}) を開始 (試行{job['attempts']}回目)")
+        heartbeat = Heartbeat(queue, job['id'], worker_id, lease_seconds)
+        heartbeat.start()
+        try:
+            run_job(tools, job, temp_dir, staging)
+        except Exception as e:
+            heartbeat.stop()
+            log(f"[{worker_id}] ジョブ #{job['id']} が失敗しました: {e}")
+            queue.fail(job['id'], worker_id, str(e))
+        else:
+            heartbeat.stop()
+            if heartbeat.lost:
+                # リースを失った場合は他のワーカーが再実行するため完了にしない
+                log(f"[{worker_id}] ジョブ #{job['id']} のリースを失いました")
+            else:
+                queue.complete(job['id'], worker_id)
+                log(f"[{worker_id}] ジョブ #{job['id']} が完了しました")
+        processed += 1